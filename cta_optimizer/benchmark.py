@@ -0,0 +1,321 @@
+"""
+benchmark.py
+
+Times the hot paths of the optimizer against the bundled CTA line files and
+writes the results as JSON, so that two runs can be compared and a slowdown
+caught before it ships:
+
+    python -m cta_optimizer.benchmark --output results.json
+    python -m cta_optimizer.benchmark --output new.json --compare results.json
+
+Every benchmark is run several times and reports the time of one operation:
+loading the line files, building the graph the way main does, one
+get_shortest_path over a fixed set of origin and destination pairs, one
+Location.distance_to and one Logger.info. --synthetic runs them against a
+generated network instead, see network_generator.
+"""
+
+import argparse
+import glob
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Tuple
+
+PACKAGE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_LINE_FILES = sorted(
+    glob.glob(os.path.join(PACKAGE_ROOT, "data", "trains", "cta", "*_line.json"))
+)
+
+# Runs of every benchmark; the median is compared between runs
+DEFAULT_REPEAT = 5
+
+# Origin and destination pairs get_shortest_path is timed over, drawn with a
+# fixed seed so that every run routes the same pairs
+DEFAULT_OD_PAIR_COUNT = 100
+OD_SEED = 2024
+
+# Logger.info calls per run
+LOG_MESSAGE_COUNT = 2000
+
+# A benchmark is a regression when its median is this much slower than the baseline
+DEFAULT_REGRESSION_TOLERANCE = 0.2
+
+RESULTS_VERSION = 1
+
+
+def time_runs(function: Callable[[], object], repeat: int, operations: int) -> dict:
+    """
+    Time a function several times
+
+    :param function: The function to time, running every operation once per call
+    :param repeat: The number of times to call it
+    :param operations: The number of operations one call runs
+    :return: The seconds of every run and the min, median and mean seconds of
+        one operation
+    """
+    if not isinstance(repeat, int) or repeat < 1:
+        raise ValueError("Repeat must be a positive integer")
+
+    runs = []
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        runs.append(time.perf_counter() - start)
+
+    per_operation = [run / max(operations, 1) for run in runs]
+
+    return {
+        "operations": operations,
+        "runs": runs,
+        "min": min(per_operation),
+        "median": statistics.median(per_operation),
+        "mean": statistics.fmean(per_operation),
+    }
+
+
+def get_od_pairs(station_ids: List[str], count: int = DEFAULT_OD_PAIR_COUNT):
+    """
+    Draw origin and destination pairs of distinct stations, the same for the same
+    stations on every run
+
+    :param station_ids: The ids to draw from
+    :param count: The number of pairs
+    :return: (origin id, destination id) pairs
+    """
+    if len(station_ids) < 2:
+        return []
+
+    generator = random.Random(OD_SEED)
+    ordered = sorted(station_ids)
+
+    return [tuple(generator.sample(ordered, 2)) for _ in range(count)]
+
+
+def run_benchmarks(
+    files: List[str] = None,
+    repeat: int = DEFAULT_REPEAT,
+    od_pair_count: int = DEFAULT_OD_PAIR_COUNT,
+) -> dict:
+    """
+    Run every benchmark
+
+    :param files: The line files to load, the bundled CTA files by default
+    :param repeat: The number of runs of every benchmark
+    :param od_pair_count: The number of pairs get_shortest_path is timed over
+    :return: The results, ready to be written as JSON
+    """
+    from networkx import NetworkXNoPath
+
+    from cta_optimizer.lib.logger import Logger
+    from cta_optimizer.main import create_stations_graph
+    from cta_optimizer.station_data_loader import StationDataLoader
+    from cta_optimizer.stations_graph_service import RoutingAlgorithm
+
+    files = DEFAULT_LINE_FILES if files is None else files
+
+    if len(files) == 0:
+        raise ValueError("Files cannot be empty")
+
+    benchmarks: Dict[str, dict] = {}
+
+    benchmarks["load_stations"] = time_runs(
+        lambda: StationDataLoader(files, strict=True), repeat, 1
+    )
+
+    station_loader = StationDataLoader(files, strict=True)
+    stations = station_loader.get_all_stations()
+
+    benchmarks["build_graph"] = time_runs(
+        lambda: create_stations_graph(stations), repeat, 1
+    )
+
+    # without the path cache every run searches again
+    station_graph = create_stations_graph(stations, path_cache_size=0)
+    pairs = [
+        (
+            station_loader.get_station_by_id(origin),
+            station_loader.get_station_by_id(end),
+        )
+        for origin, end in get_od_pairs(
+            [station.get_id() for station in stations], od_pair_count
+        )
+    ]
+
+    for algorithm in (RoutingAlgorithm.DIJKSTRA, RoutingAlgorithm.ASTAR):
+        found = []
+
+        def route_pairs():
+            found.clear()
+
+            for origin, end in pairs:
+                try:
+                    station_graph.get_shortest_path(origin, end, algorithm)
+                    found.append(True)
+                except NetworkXNoPath:
+                    found.append(False)
+
+        result = time_runs(route_pairs, repeat, len(pairs))
+        # pairs without a path cost less, so the share of found paths matters
+        result["paths_found"] = sum(found)
+        benchmarks[f"shortest_path_{algorithm}"] = result
+
+    locations = [station.get_location() for station in stations]
+    location_pairs = list(zip(locations, locations[1:] + locations[:1]))
+
+    def measure_distances():
+        for location, other_location in location_pairs:
+            location.distance_to(other_location)
+
+    benchmarks["distance_to"] = time_runs(
+        measure_distances, repeat, len(location_pairs)
+    )
+
+    with tempfile.TemporaryDirectory() as directory:
+        for buffered in (False, True):
+            logger = Logger(
+                os.path.join(directory, f"benchmark_{buffered}.log"),
+                print_to_console=False,
+                buffered=buffered,
+            )
+
+            def log_messages():
+                for index in range(LOG_MESSAGE_COUNT):
+                    logger.info(f"Benchmark message {index}")
+
+                logger.flush()
+
+            result = time_runs(log_messages, repeat, LOG_MESSAGE_COUNT)
+            result["messages_per_second"] = 1 / result["median"]
+            name = "logger_info_buffered" if buffered else "logger_info"
+            benchmarks[name] = result
+            logger.close()
+
+    return {
+        "version": RESULTS_VERSION,
+        "created": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "files": [os.path.basename(file) for file in files],
+        "stations": len(stations),
+        "repeat": repeat,
+        "benchmarks": benchmarks,
+    }
+
+
+def write_results(results: dict, file: str):
+    """
+    Write benchmark results as JSON
+
+    :param results: The results of run_benchmarks
+    :param file: The file to write
+    """
+    directory = os.path.dirname(os.path.abspath(file))
+    os.makedirs(directory, exist_ok=True)
+
+    with open(file, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+        f.write("\n")
+
+
+def read_results(file: str) -> dict:
+    with open(file, "r", encoding="utf-8") as f:
+        results = json.load(f)
+
+    if results.get("version") != RESULTS_VERSION:
+        raise ValueError(f"Unsupported benchmark results version in {file}")
+
+    return results
+
+
+def compare_results(
+    baseline: dict,
+    current: dict,
+    tolerance: float = DEFAULT_REGRESSION_TOLERANCE,
+) -> List[Tuple[str, float, float]]:
+    """
+    Find the benchmarks that got slower than a baseline run allows
+
+    :param baseline: The results to compare against
+    :param current: The new results
+    :param tolerance: How much slower the median may get, 0.2 for 20%
+    :return: (name, baseline median, current median) of every regression.
+        Benchmarks only one of the runs has are skipped.
+    """
+    if tolerance < 0:
+        raise ValueError("Tolerance cannot be negative")
+
+    regressions = []
+
+    for name, result in current["benchmarks"].items():
+        baseline_result = baseline["benchmarks"].get(name)
+
+        if baseline_result is None:
+            continue
+
+        if result["median"] > baseline_result["median"] * (1 + tolerance):
+            regressions.append((name, baseline_result["median"], result["median"]))
+
+    return regressions
+
+
+def main(arguments: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Time the optimizer hot paths and write the results as JSON"
+    )
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--files", nargs="+", default=None)
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--od-pairs", type=int, default=DEFAULT_OD_PAIR_COUNT)
+    parser.add_argument("--compare", help="Baseline results to check against")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_REGRESSION_TOLERANCE)
+    parser.add_argument(
+        "--synthetic",
+        type=int,
+        metavar="STOPS",
+        help="Run against a generated network of about this many stops instead",
+    )
+    options = parser.parse_args(arguments)
+
+    if options.synthetic is None:
+        results = run_benchmarks(options.files, options.repeat, options.od_pairs)
+    else:
+        from cta_optimizer.network_generator import NetworkGenerator
+
+        with tempfile.TemporaryDirectory() as directory:
+            files = NetworkGenerator.for_stop_count(
+                options.synthetic, seed=OD_SEED
+            ).write_line_files(directory)
+            results = run_benchmarks(files, options.repeat, options.od_pairs)
+
+    write_results(results, options.output)
+
+    for name, result in results["benchmarks"].items():
+        print(f"{name}: {result['median'] * 1e6:.2f} us per operation")
+
+    if options.compare is None:
+        return 0
+
+    regressions = compare_results(
+        read_results(options.compare), results, options.tolerance
+    )
+
+    for name, baseline_median, median in regressions:
+        print(
+            f"Regression in {name}: {baseline_median * 1e6:.2f} us -> "
+            f"{median * 1e6:.2f} us per operation"
+        )
+
+    return 1 if len(regressions) > 0 else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,584 @@
+"""
+contraction_hierarchy.py
+
+The ContractionHierarchy class answers shortest path queries on large station
+graphs with two small searches instead of one search over the whole graph.
+
+Preprocessing contracts stations one at a time, least important first. When a
+station is contracted, a shortcut edge replaces every shortest path that ran
+through it between two of its remaining neighbours, unless a witness path of
+at most the same length avoids it. Every station gets a rank, its position in
+the contraction order, and every edge, original or shortcut, goes either up or
+down the order.
+
+A query runs Dijkstra upward from the start and upward on reversed edges from
+the end. The shortest path always has a highest station, where the two
+searches meet, and both searches only settle stations ranked higher than where
+they started, so they stay small. Shortcuts on the path are unpacked through
+the station they bypass.
+"""
+
+import heapq
+import json
+import os
+import shutil
+import tempfile
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+NO_PREDECESSOR = -1
+# Middle station of an edge of the original graph
+NO_MIDDLE = -1
+
+# Stations a witness search may settle before giving up and adding the shortcut.
+# Extra shortcuts never make queries wrong, only the hierarchy larger.
+WITNESS_SEARCH_LIMIT = 50
+
+ARRAYS_FILE = "hierarchy.npz"
+STATIONS_FILE = "stations.json"
+
+# (target, weight, middle) of the edges of one station during contraction
+EdgeMap = Dict[int, Tuple[float, int]]
+
+
+class ContractionHierarchy:
+    def __init__(
+        self,
+        station_ids: List[str],
+        ranks: np.ndarray,
+        up_offsets: np.ndarray,
+        up_targets: np.ndarray,
+        up_weights: np.ndarray,
+        up_middles: np.ndarray,
+        down_offsets: np.ndarray,
+        down_sources: np.ndarray,
+        down_weights: np.ndarray,
+        down_middles: np.ndarray,
+    ):
+        """
+        Edges are kept in two compressed sparse row graphs. The up graph holds,
+        at each station, the edges to higher ranked stations. The down graph
+        holds, at each station, the edges coming in from higher ranked stations,
+        which the backward search follows in reverse.
+
+        :param station_ids: The station ids, in index order
+        :param ranks: The position of every station in the contraction order
+        :param up_offsets: Where the up edges of every station start
+        :param up_targets: The target of every up edge
+        :param up_weights: The weight of every up edge
+        :param up_middles: The station an up shortcut bypasses, -1 for edges
+        :param down_offsets: Where the down edges of every station start
+        :param down_sources: The source of every down edge
+        :param down_weights: The weight of every down edge
+        :param down_middles: The station a down shortcut bypasses, -1 for edges
+        """
+        size = len(station_ids)
+
+        if len(ranks) != size:
+            raise ValueError("Ranks do not match the station list")
+
+        if len(up_offsets) != size + 1 or len(down_offsets) != size + 1:
+            raise ValueError("Offsets do not match the station list")
+
+        if not len(up_targets) == len(up_weights) == len(up_middles):
+            raise ValueError("Up edge arrays must have the same length")
+
+        if not len(down_sources) == len(down_weights) == len(down_middles):
+            raise ValueError("Down edge arrays must have the same length")
+
+        self.station_ids = station_ids
+        self.ranks = ranks
+        self.up_offsets = up_offsets
+        self.up_targets = up_targets
+        self.up_weights = up_weights
+        self.up_middles = up_middles
+        self.down_offsets = down_offsets
+        self.down_sources = down_sources
+        self.down_weights = down_weights
+        self.down_middles = down_middles
+
+        # memoryviews give plain Python numbers without copying the arrays
+        self.__up = (
+            memoryview(up_offsets),
+            memoryview(up_targets),
+            memoryview(up_weights),
+            memoryview(up_middles),
+        )
+        self.__down = (
+            memoryview(down_offsets),
+            memoryview(down_sources),
+            memoryview(down_weights),
+            memoryview(down_middles),
+        )
+
+    @staticmethod
+    def build(
+        station_ids: List[str], adjacency: List[List[Tuple[int, float]]]
+    ) -> "ContractionHierarchy":
+        """
+        Contract every station of a graph. Stations are ordered by how many
+        edges contracting them adds, lazily updated, so that chains of stations
+        along a line contract first and busy transfer stations last.
+
+        :param station_ids: The station ids, in index order
+        :param adjacency: For every station index, a list of (target index, weight) pairs
+        :return: The hierarchy
+        """
+        if len(adjacency) != len(station_ids):
+            raise ValueError("Adjacency does not match the station list")
+
+        size = len(station_ids)
+        out_edges: List[EdgeMap] = [{} for _ in range(size)]
+        in_edges: List[EdgeMap] = [{} for _ in range(size)]
+
+        for source, edges in enumerate(adjacency):
+            for target, weight in edges:
+                if weight < 0:
+                    raise ValueError("Edge weights cannot be negative")
+
+                if source != target:
+                    _add_edge(out_edges, in_edges, source, target, weight, NO_MIDDLE)
+
+        # stations next to each station that were contracted already
+        contracted_neighbors = [0] * size
+        # one more than the highest level among the contracted neighbours, so
+        # that the hierarchy stays shallow
+        levels = [0] * size
+        ranks = [size] * size
+        up_edges: List[Tuple[int, int, float, int]] = []
+        down_edges: List[Tuple[int, int, float, int]] = []
+
+        def evaluate(station: int) -> Tuple[int, List[Tuple[int, int, float]]]:
+            # (priority, shortcuts): twice the edges contracting the station adds
+            # less the edges it removes, plus its contracted neighbours and its
+            # level, which spread contraction evenly over the graph
+            shortcuts = _find_shortcuts(station, out_edges, in_edges)
+            degree = len(out_edges[station]) + len(in_edges[station])
+            priority = (
+                2 * (len(shortcuts) - degree)
+                + contracted_neighbors[station]
+                + levels[station]
+            )
+            return priority, shortcuts
+
+        heap = [(evaluate(station)[0], station) for station in range(size)]
+        heapq.heapify(heap)
+        rank = 0
+
+        while heap:
+            _, station = heapq.heappop(heap)
+
+            # priorities go stale as neighbours are contracted
+            priority, shortcuts = evaluate(station)
+
+            if heap and priority > heap[0][0]:
+                heapq.heappush(heap, (priority, station))
+                continue
+
+            ranks[station] = rank
+            rank += 1
+            level = levels[station] + 1
+
+            for target, (weight, middle) in out_edges[station].items():
+                up_edges.append((station, target, weight, middle))
+                del in_edges[target][station]
+                contracted_neighbors[target] += 1
+                levels[target] = max(levels[target], level)
+
+            for source, (weight, middle) in in_edges[station].items():
+                down_edges.append((source, station, weight, middle))
+                del out_edges[source][station]
+                contracted_neighbors[source] += 1
+                levels[source] = max(levels[source], level)
+
+            out_edges[station] = {}
+            in_edges[station] = {}
+
+            for source, target, weight in shortcuts:
+                _add_edge(out_edges, in_edges, source, target, weight, station)
+
+        up_offsets, (up_targets, up_weights, up_middles) = _to_csr(size, up_edges)
+        # the down graph is indexed by the lower ranked end of the edge
+        down_offsets, (down_sources, down_weights, down_middles) = _to_csr(
+            size,
+            [
+                (target, source, weight, middle)
+                for source, target, weight, middle in down_edges
+            ],
+        )
+
+        return ContractionHierarchy(
+            station_ids,
+            np.array(ranks, dtype=np.int32),
+            up_offsets,
+            up_targets,
+            up_weights,
+            up_middles,
+            down_offsets,
+            down_sources,
+            down_weights,
+            down_middles,
+        )
+
+    def save(self, directory: str):
+        """
+        Write the hierarchy to a directory, replacing it in one step so that
+        concurrent readers never see a half written hierarchy
+
+        :param directory: The directory to write to
+        """
+        parent = os.path.dirname(os.path.abspath(directory))
+        os.makedirs(parent, exist_ok=True)
+        temporary_directory = tempfile.mkdtemp(dir=parent)
+
+        try:
+            np.savez(
+                os.path.join(temporary_directory, ARRAYS_FILE),
+                ranks=self.ranks,
+                up_offsets=self.up_offsets,
+                up_targets=self.up_targets,
+                up_weights=self.up_weights,
+                up_middles=self.up_middles,
+                down_offsets=self.down_offsets,
+                down_sources=self.down_sources,
+                down_weights=self.down_weights,
+                down_middles=self.down_middles,
+            )
+
+            with open(
+                os.path.join(temporary_directory, STATIONS_FILE), "w", encoding="utf-8"
+            ) as f:
+                json.dump(self.station_ids, f)
+
+            try:
+                os.rename(temporary_directory, directory)
+            except OSError:
+                # Another process finished the same hierarchy first
+                shutil.rmtree(temporary_directory, ignore_errors=True)
+
+        except BaseException:
+            shutil.rmtree(temporary_directory, ignore_errors=True)
+            raise
+
+    @staticmethod
+    def load(directory: str) -> "ContractionHierarchy":
+        """
+        Open a hierarchy previously written by save
+
+        :param directory: The directory the hierarchy was written to
+        :return: The hierarchy
+        """
+        with open(os.path.join(directory, STATIONS_FILE), "r", encoding="utf-8") as f:
+            station_ids = json.load(f)
+
+        with np.load(os.path.join(directory, ARRAYS_FILE)) as arrays:
+            return ContractionHierarchy(
+                station_ids,
+                arrays["ranks"],
+                arrays["up_offsets"],
+                arrays["up_targets"],
+                arrays["up_weights"],
+                arrays["up_middles"],
+                arrays["down_offsets"],
+                arrays["down_sources"],
+                arrays["down_weights"],
+                arrays["down_middles"],
+            )
+
+    @staticmethod
+    def exists(directory: str) -> bool:
+        return all(
+            os.path.exists(os.path.join(directory, file))
+            for file in (ARRAYS_FILE, STATIONS_FILE)
+        )
+
+    def get_shortcut_count(self) -> int:
+        return int(np.count_nonzero(self.up_middles != NO_MIDDLE)) + int(
+            np.count_nonzero(self.down_middles != NO_MIDDLE)
+        )
+
+    def get_distance(self, start: int, end: int) -> float:
+        return self.__search(start, end)[0]
+
+    def get_path(self, start: int, end: int) -> List[int]:
+        """
+        Find the shortest path between two station indices, with every shortcut
+        on it unpacked into the stations of the original graph
+
+        :param start: The index of the start station
+        :param end: The index of the end station
+        :return: The station indices on the path, or an empty list if there is no path
+        """
+        distance, meeting, forward, backward = self.__search(start, end)
+
+        if distance == float("inf"):
+            return []
+
+        # (source, target, middle) of the edges on the path, start to end
+        edges = []
+        station = meeting
+
+        while station != start:
+            parent, middle = forward[station]
+            edges.append((parent, station, middle))
+            station = parent
+
+        edges.reverse()
+        station = meeting
+
+        while station != end:
+            child, middle = backward[station]
+            edges.append((station, child, middle))
+            station = child
+
+        path = [start]
+
+        for edge in edges:
+            path.extend(self.__unpack(*edge))
+
+        return path
+
+    def __search(
+        self, start: int, end: int
+    ) -> Tuple[float, int, Dict[int, Tuple[int, int]], Dict[int, Tuple[int, int]]]:
+        # Bidirectional upward Dijkstra. Returns the distance, the station the
+        # searches met at, and the (station, middle) each search reached every
+        # settled station from.
+        size = len(self.station_ids)
+
+        if not 0 <= start < size or not 0 <= end < size:
+            raise ValueError("Invalid station index")
+
+        infinity = float("inf")
+        forward_distances = {start: 0.0}
+        backward_distances = {end: 0.0}
+        forward_parents = {start: (NO_PREDECESSOR, NO_MIDDLE)}
+        backward_parents = {end: (NO_PREDECESSOR, NO_MIDDLE)}
+        forward_heap = [(0.0, start)]
+        backward_heap = [(0.0, end)]
+        # (heap, distances, parents, other distances, edges to relax, edges to
+        # stall on) of each search. A search stalls on the edges into a station
+        # from higher ranked stations.
+        forward = (
+            forward_heap,
+            forward_distances,
+            forward_parents,
+            backward_distances,
+            self.__up,
+            self.__down,
+        )
+        backward = (
+            backward_heap,
+            backward_distances,
+            backward_parents,
+            forward_distances,
+            self.__down,
+            self.__up,
+        )
+        heappush, heappop = heapq.heappush, heapq.heappop
+        best = infinity
+        meeting = NO_PREDECESSOR
+
+        while True:
+            forward_top = forward_heap[0][0] if forward_heap else infinity
+            backward_top = backward_heap[0][0] if backward_heap else infinity
+
+            # the search with the closer station goes next, until neither can
+            # lead to a shorter path
+            if forward_top <= backward_top:
+                if forward_top >= best:
+                    break
+
+                search = forward
+            else:
+                if backward_top >= best:
+                    break
+
+                search = backward
+
+            heap, distances, parents, other_distances, edges, stall_edges = search
+            distance, station = heappop(heap)
+
+            if distance > distances[station]:
+                continue
+
+            other_distance = other_distances.get(station)
+
+            if other_distance is not None and distance + other_distance < best:
+                best = distance + other_distance
+                meeting = station
+
+            # stall on demand: a higher ranked station this search reached has a
+            # shorter way down to this one, so no shortest path goes up from here
+            offsets, neighbors, weights, _ = stall_edges
+            stalled = False
+
+            for edge in range(offsets[station], offsets[station + 1]):
+                if distances.get(neighbors[edge], infinity) + weights[edge] < distance:
+                    stalled = True
+                    break
+
+            if stalled:
+                continue
+
+            offsets, neighbors, weights, middles = edges
+
+            for edge in range(offsets[station], offsets[station + 1]):
+                neighbor = neighbors[edge]
+                candidate = distance + weights[edge]
+
+                if candidate < distances.get(neighbor, infinity):
+                    distances[neighbor] = candidate
+                    parents[neighbor] = (station, middles[edge])
+                    heappush(heap, (candidate, neighbor))
+
+        return best, meeting, forward_parents, backward_parents
+
+    def __unpack(self, source: int, target: int, middle: int) -> List[int]:
+        # The stations after source on the edge from source to target. The
+        # station a shortcut bypasses is ranked below both ends, so the first
+        # half is a down edge into it and the second half an up edge out of it.
+        path = []
+        stack = [(source, target, middle)]
+
+        while stack:
+            source, target, middle = stack.pop()
+
+            if middle == NO_MIDDLE:
+                path.append(target)
+                continue
+
+            stack.append(
+                (middle, target, self.__find_middle(self.__up, middle, target))
+            )
+            stack.append(
+                (source, middle, self.__find_middle(self.__down, middle, source))
+            )
+
+        return path
+
+    @staticmethod
+    def __find_middle(
+        graph: Tuple[memoryview, memoryview, memoryview, memoryview],
+        station: int,
+        neighbor: int,
+    ) -> int:
+        offsets, neighbors, _, middles = graph
+
+        for edge in range(offsets[station], offsets[station + 1]):
+            if neighbors[edge] == neighbor:
+                return middles[edge]
+
+        raise ValueError("Hierarchy is missing an edge of a shortcut")
+
+
+def _add_edge(
+    out_edges: List[EdgeMap],
+    in_edges: List[EdgeMap],
+    source: int,
+    target: int,
+    weight: float,
+    middle: int,
+):
+    # Keep only the shortest edge between two stations
+    existing = out_edges[source].get(target)
+
+    if existing is not None and existing[0] <= weight:
+        return
+
+    out_edges[source][target] = (weight, middle)
+    in_edges[target][source] = (weight, middle)
+
+
+def _find_shortcuts(
+    station: int, out_edges: List[EdgeMap], in_edges: List[EdgeMap]
+) -> List[Tuple[int, int, float]]:
+    # The (source, target, weight) shortcuts contracting a station needs: one for
+    # every pair of neighbours whose shortest path runs through the station
+    shortcuts = []
+    outgoing = out_edges[station]
+
+    for source, (in_weight, _) in in_edges[station].items():
+        required = {
+            target: in_weight + out_weight
+            for target, (out_weight, _) in outgoing.items()
+            if target != source
+        }
+
+        if len(required) == 0:
+            continue
+
+        witnesses = _witness_search(
+            source, station, max(required.values()), required, out_edges
+        )
+
+        for target, weight in required.items():
+            if witnesses.get(target, float("inf")) > weight:
+                shortcuts.append((source, target, weight))
+
+    return shortcuts
+
+
+def _witness_search(
+    source: int,
+    excluded: int,
+    limit: float,
+    targets: Dict[int, float],
+    out_edges: List[EdgeMap],
+) -> Dict[int, float]:
+    # Dijkstra from source that never enters the excluded station and stops at
+    # limit, once every target is settled, or after WITNESS_SEARCH_LIMIT stations
+    distances = {source: 0.0}
+    heap = [(0.0, source)]
+    remaining = len(targets)
+    settled = 0
+
+    while heap and settled < WITNESS_SEARCH_LIMIT:
+        distance, station = heapq.heappop(heap)
+
+        if distance > distances[station]:
+            continue
+
+        if distance > limit:
+            break
+
+        settled += 1
+
+        if station in targets:
+            remaining -= 1
+
+            if remaining == 0:
+                break
+
+        for neighbor, (weight, _) in out_edges[station].items():
+            if neighbor == excluded:
+                continue
+
+            candidate = distance + weight
+
+            if candidate < distances.get(neighbor, float("inf")):
+                distances[neighbor] = candidate
+                heapq.heappush(heap, (candidate, neighbor))
+
+    return distances
+
+
+def _to_csr(
+    size: int, edges: List[Tuple[int, int, float, int]]
+) -> Tuple[np.ndarray, Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    # (offsets, (neighbors, weights, middles)) of edges grouped by their first station
+    edges.sort(key=lambda edge: (edge[0], edge[1]))
+    offsets = np.zeros(size + 1, dtype=np.int64)
+    np.cumsum(
+        np.bincount(
+            np.array([edge[0] for edge in edges], dtype=np.int64), minlength=size
+        ),
+        out=offsets[1:],
+    )
+
+    return offsets, (
+        np.array([edge[1] for edge in edges], dtype=np.int32),
+        np.array([edge[2] for edge in edges], dtype=np.float64),
+        np.array([edge[3] for edge in edges], dtype=np.int32),
+    )
@@ -0,0 +1,512 @@
+"""
+csr_graph.py
+
+The CSRGraph class is a compact directed graph backend for StationsGraphService.
+Every station gets a dense integer index and edges are frozen into compressed
+sparse row arrays: the targets of station i are targets[offsets[i]:offsets[i + 1]]
+with matching weights. The same edges are also kept in reverse, grouped by
+target, for backward searches. Extra per-edge attributes, such as a fare, are
+kept in edge_data arrays aligned with targets. Edges can still be added at any
+time; they are staged and merged into the arrays on the next query.
+"""
+
+import heapq
+from typing import Callable, Dict, Generic, Iterable, List, Tuple, TypeVar
+
+import numpy as np
+
+S = TypeVar("S")
+
+NO_PREDECESSOR = -1
+
+# Returned by get_edge for a pair of stations without an edge
+NO_EDGE = -1
+
+
+class CSRGraph(Generic[S]):
+    def __init__(self):
+        self.stations: List[S] = []
+        self.index: Dict[S, int] = {}
+
+        self.offsets = np.zeros(1, dtype=np.int64)
+        self.targets = np.zeros(0, dtype=np.int32)
+        self.weights = np.zeros(0, dtype=np.float64)
+
+        self.reverse_offsets = np.zeros(1, dtype=np.int64)
+        self.reverse_sources = np.zeros(0, dtype=np.int32)
+        self.reverse_weights = np.zeros(0, dtype=np.float64)
+
+        # attribute name -> value of every edge, in the same order as targets.
+        # Edges added without an attribute get 0.
+        self.edge_data: Dict[str, np.ndarray] = {}
+
+        # (source index, target index) -> weight, merged into the arrays by freeze
+        self.__pending_edges: Dict[Tuple[int, int], float] = {}
+        # (sources, targets, weights, attributes) batches from add_edge_arrays, in
+        # insertion order
+        self.__pending_arrays: List[
+            Tuple[np.ndarray, np.ndarray, np.ndarray, Dict[str, np.ndarray]]
+        ] = []
+        self.__frozen_size = 0
+
+    def add_node(self, station: S):
+        if station in self.index:
+            return
+
+        self.index[station] = len(self.stations)
+        self.stations.append(station)
+
+    def nodes(self):
+        """
+        The stations in index order. Supports constant time membership checks.
+        """
+        return self.index.keys()
+
+    def add_weighted_edges_from(
+        self,
+        edges: Iterable[Tuple[S, S, float]],
+        weight: str = "distance",
+        **attributes: float,
+    ):
+        """
+        Add or replace weighted edges, mirroring networkx.DiGraph.add_weighted_edges_from
+
+        :param edges: (source station, target station, weight) triples
+        :param weight: Kept for compatibility with networkx, CSRGraph stores one weight per edge
+        :param attributes: Numeric attributes given to every edge, such as fare=2.5
+        """
+        if len(attributes) == 0:
+            for source, target, edge_weight in edges:
+                self.__pending_edges[(self.index[source], self.index[target])] = float(
+                    edge_weight
+                )
+
+            return
+
+        edges = list(edges)
+        self.add_edge_arrays(
+            np.array([self.index[edge[0]] for edge in edges], dtype=np.int64),
+            np.array([self.index[edge[1]] for edge in edges], dtype=np.int64),
+            np.array([edge[2] for edge in edges], dtype=np.float64),
+            **attributes,
+        )
+
+    def add_edge_arrays(
+        self,
+        sources: np.ndarray,
+        targets: np.ndarray,
+        weights: np.ndarray,
+        **attributes: "np.ndarray | float",
+    ):
+        """
+        Add or replace many edges given as station index arrays, without creating a
+        Python object per edge
+
+        :param sources: The source station index of every edge
+        :param targets: The target station index of every edge
+        :param weights: The weight of every edge
+        :param attributes: Numeric attributes of every edge, as arrays or one value for all
+        """
+        sources = np.asarray(sources, dtype=np.int64)
+        targets = np.asarray(targets, dtype=np.int64)
+        weights = np.asarray(weights, dtype=np.float64)
+
+        if not (sources.shape == targets.shape == weights.shape) or sources.ndim != 1:
+            raise ValueError("Edge arrays must be one dimensional and the same length")
+
+        try:
+            attributes = {
+                name: np.broadcast_to(
+                    np.asarray(values, dtype=np.float64), sources.shape
+                )
+                for name, values in attributes.items()
+            }
+        except ValueError:
+            raise ValueError("Edge attributes must match the edge arrays")
+
+        size = len(self.stations)
+
+        if len(sources) > 0 and (
+            min(sources.min(), targets.min()) < 0
+            or max(sources.max(), targets.max()) >= size
+        ):
+            raise ValueError("Invalid station index")
+
+        # keep insertion order between single edges and batches
+        self.__flush_pending_edges()
+        self.__pending_arrays.append((sources, targets, weights, attributes))
+
+    def __flush_pending_edges(self):
+        if len(self.__pending_edges) == 0:
+            return
+
+        pending = np.array(list(self.__pending_edges.keys()), dtype=np.int64)
+        self.__pending_arrays.append(
+            (
+                pending[:, 0],
+                pending[:, 1],
+                np.fromiter(self.__pending_edges.values(), dtype=np.float64),
+                {},
+            )
+        )
+        self.__pending_edges = {}
+
+    def is_frozen(self) -> bool:
+        return (
+            len(self.__pending_edges) == 0
+            and len(self.__pending_arrays) == 0
+            and self.__frozen_size == len(self.stations)
+        )
+
+    def freeze(self):
+        """
+        Merge staged edges and nodes into the compressed sparse row arrays
+        """
+        if self.is_frozen():
+            return
+
+        size = len(self.stations)
+        sources = np.repeat(
+            np.arange(self.__frozen_size, dtype=np.int64), np.diff(self.offsets)
+        )
+        targets = self.targets.astype(np.int64)
+        weights = self.weights
+        edge_data = self.edge_data
+
+        self.__flush_pending_edges()
+
+        if len(self.__pending_arrays) > 0:
+            sources = np.concatenate(
+                [sources, *(batch[0] for batch in self.__pending_arrays)]
+            )
+            targets = np.concatenate(
+                [targets, *(batch[1] for batch in self.__pending_arrays)]
+            )
+            weights = np.concatenate(
+                [weights, *(batch[2] for batch in self.__pending_arrays)]
+            )
+
+            names = set(edge_data).union(*(batch[3] for batch in self.__pending_arrays))
+            edge_data = {
+                name: np.concatenate(
+                    [
+                        edge_data.get(name, np.zeros(len(self.targets))),
+                        *(
+                            batch[3].get(name, np.zeros(len(batch[0])))
+                            for batch in self.__pending_arrays
+                        ),
+                    ]
+                )
+                for name in sorted(names)
+            }
+
+            # later edges replace earlier edges between the same stations
+            keys = sources * size + targets
+            _, last_reversed = np.unique(keys[::-1], return_index=True)
+            keep = np.sort(len(keys) - 1 - last_reversed)
+
+            sources, targets, weights = sources[keep], targets[keep], weights[keep]
+            edge_data = {name: values[keep] for name, values in edge_data.items()}
+
+        order = np.argsort(sources, kind="stable")
+
+        self.offsets = np.zeros(size + 1, dtype=np.int64)
+        np.cumsum(np.bincount(sources, minlength=size), out=self.offsets[1:])
+        self.targets = targets[order].astype(np.int32)
+        self.weights = weights[order]
+        self.edge_data = {name: values[order] for name, values in edge_data.items()}
+
+        reverse_order = np.argsort(targets, kind="stable")
+
+        self.reverse_offsets = np.zeros(size + 1, dtype=np.int64)
+        np.cumsum(np.bincount(targets, minlength=size), out=self.reverse_offsets[1:])
+        self.reverse_sources = sources[reverse_order].astype(np.int32)
+        self.reverse_weights = weights[reverse_order]
+
+        self.__pending_arrays = []
+        self.__frozen_size = size
+
+    @property
+    def adj(self) -> "CSRAdjacencyView[S]":
+        """
+        Read only adjacency in the same shape as networkx.DiGraph.adj:
+        graph.adj[station] maps each neighbour to {"distance": weight}
+        """
+        self.freeze()
+        return CSRAdjacencyView(self)
+
+    def get_neighbors(self, index: int) -> Tuple[np.ndarray, np.ndarray]:
+        self.freeze()
+        start, end = self.offsets[index], self.offsets[index + 1]
+        return self.targets[start:end], self.weights[start:end]
+
+    def get_edge(self, source: int, target: int) -> int:
+        """
+        Find the position of an edge in targets, weights and edge_data
+
+        :param source: The index of the source station
+        :param target: The index of the target station
+        :return: The edge position, or NO_EDGE if there is no such edge
+        """
+        self.freeze()
+
+        for edge in range(self.offsets[source], self.offsets[source + 1]):
+            if self.targets[edge] == target:
+                return int(edge)
+
+        return NO_EDGE
+
+    def set_weight(self, source: int, target: int, weight: float):
+        """
+        Change the weight of an existing edge in place, in both the forward and the
+        reverse arrays. An infinite weight masks the edge: no search relaxes it,
+        and the adjacency view leaves it out.
+
+        :param source: The index of the source station
+        :param target: The index of the target station
+        :param weight: The new weight
+        """
+        edge = self.get_edge(source, target)
+
+        if edge == NO_EDGE:
+            raise ValueError("Invalid edge")
+
+        self.weights[edge] = weight
+
+        for reverse_edge in range(
+            self.reverse_offsets[target], self.reverse_offsets[target + 1]
+        ):
+            if self.reverse_sources[reverse_edge] == source:
+                self.reverse_weights[reverse_edge] = weight
+                break
+
+    def search(
+        self,
+        source: int,
+        target: int = NO_PREDECESSOR,
+        heuristic: Callable[[int], float] = None,
+        targets: Iterable[int] = None,
+        reverse: bool = False,
+    ) -> Tuple[List[float], List[int]]:
+        """
+        Dijkstra, or A* when a heuristic is given, over the frozen arrays
+
+        :param source: The index of the station to start from
+        :param target: The index of the station to stop at, or -1 to settle every reachable station
+        :param heuristic: A consistent lower bound on the distance from an index to the target
+        :param targets: Indices of stations to stop after, once all of them are settled
+        :param reverse: Follow edges backward, giving the distance from every station
+            to source and the next station on the way there instead
+        :return: The distance and predecessor of every station index
+        """
+        self.freeze()
+
+        # memoryviews give plain Python numbers without copying the arrays
+        if reverse:
+            offsets = memoryview(self.reverse_offsets)
+            neighbors = memoryview(self.reverse_sources)
+            weights = memoryview(self.reverse_weights)
+        else:
+            offsets = memoryview(self.offsets)
+            neighbors = memoryview(self.targets)
+            weights = memoryview(self.weights)
+
+        size = len(self.stations)
+        distances = [float("inf")] * size
+        predecessors = [NO_PREDECESSOR] * size
+        settled = [False] * size
+
+        distances[source] = 0.0
+        heap = [(heuristic(source) if heuristic else 0.0, source)]
+
+        # stations in targets that are not settled yet
+        remaining = None if targets is None else set(targets)
+
+        while heap:
+            _, node = heapq.heappop(heap)
+
+            if settled[node]:
+                continue
+
+            settled[node] = True
+
+            if node == target:
+                break
+
+            if remaining is not None:
+                remaining.discard(node)
+
+                if len(remaining) == 0:
+                    break
+
+            distance = distances[node]
+
+            for edge in range(offsets[node], offsets[node + 1]):
+                neighbor = neighbors[edge]
+                candidate = distance + weights[edge]
+
+                if candidate < distances[neighbor]:
+                    distances[neighbor] = candidate
+                    predecessors[neighbor] = node
+                    heapq.heappush(
+                        heap,
+                        (
+                            candidate + heuristic(neighbor) if heuristic else candidate,
+                            neighbor,
+                        ),
+                    )
+
+        return distances, predecessors
+
+    def shortest_path(
+        self, start: S, end: S, heuristic: Callable[[int], float] = None
+    ) -> List[S]:
+        """
+        Get the shortest path between two stations
+
+        :param start: The station to start from
+        :param end: The station to end at
+        :param heuristic: Optional A* heuristic over station indices
+        :return: The stations on the path, or an empty list if end is unreachable
+        """
+        source, target = self.index[start], self.index[end]
+
+        if heuristic is None:
+            path = self.bidirectional_search(source, target)
+        else:
+            distances, predecessors = self.search(source, target, heuristic)
+            path = (
+                []
+                if distances[target] == float("inf")
+                else build_path(predecessors, source, target)
+            )
+
+        return [self.stations[index] for index in path]
+
+    def bidirectional_search(self, source: int, target: int) -> List[int]:
+        """
+        Dijkstra from both ends at once, forward over the edges and backward over
+        the reverse edges, until the two searches can no longer improve on the best
+        meeting point
+
+        :param source: The index of the station to start from
+        :param target: The index of the station to end at
+        :return: The indices on the shortest path, or an empty list if target is unreachable
+        """
+        self.freeze()
+
+        if source == target:
+            return [source]
+
+        size = len(self.stations)
+        infinity = float("inf")
+
+        directions = (
+            (
+                memoryview(self.offsets),
+                memoryview(self.targets),
+                memoryview(self.weights),
+            ),
+            (
+                memoryview(self.reverse_offsets),
+                memoryview(self.reverse_sources),
+                memoryview(self.reverse_weights),
+            ),
+        )
+        distances = ([infinity] * size, [infinity] * size)
+        predecessors = ([NO_PREDECESSOR] * size, [NO_PREDECESSOR] * size)
+        settled = ([False] * size, [False] * size)
+        heaps = ([(0.0, source)], [(0.0, target)])
+
+        distances[0][source] = 0.0
+        distances[1][target] = 0.0
+
+        best_distance = infinity
+        meeting_node = NO_PREDECESSOR
+
+        while heaps[0] and heaps[1]:
+            if heaps[0][0][0] + heaps[1][0][0] >= best_distance:
+                break
+
+            # expand the direction with the smaller frontier
+            direction = 0 if len(heaps[0]) <= len(heaps[1]) else 1
+            other = 1 - direction
+
+            distance, node = heapq.heappop(heaps[direction])
+
+            if settled[direction][node]:
+                continue
+
+            settled[direction][node] = True
+            offsets, neighbors, weights = directions[direction]
+            direction_distances = distances[direction]
+            other_distances = distances[other]
+
+            for edge in range(offsets[node], offsets[node + 1]):
+                neighbor = neighbors[edge]
+                candidate = distance + weights[edge]
+
+                if candidate < direction_distances[neighbor]:
+                    direction_distances[neighbor] = candidate
+                    predecessors[direction][neighbor] = node
+                    heapq.heappush(heaps[direction], (candidate, neighbor))
+
+                if candidate + other_distances[neighbor] < best_distance:
+                    best_distance = candidate + other_distances[neighbor]
+                    meeting_node = neighbor
+
+        if meeting_node == NO_PREDECESSOR:
+            return []
+
+        path = build_path(predecessors[0], source, meeting_node)
+        node = meeting_node
+
+        while node != target:
+            node = predecessors[1][node]
+            path.append(node)
+
+        return path
+
+
+class CSRAdjacencyView(Generic[S]):
+    def __init__(self, graph: CSRGraph[S]):
+        self.graph = graph
+
+    def __getitem__(self, station: S) -> Dict[S, Dict[str, float]]:
+        index = self.graph.index[station]
+        targets, weights = self.graph.get_neighbors(index)
+        start, end = self.graph.offsets[index], self.graph.offsets[index + 1]
+        edge_data = {
+            name: values[start:end].tolist()
+            for name, values in self.graph.edge_data.items()
+        }
+
+        return {
+            self.graph.stations[target]: {
+                "distance": weight,
+                **{name: values[position] for name, values in edge_data.items()},
+            }
+            for position, (target, weight) in enumerate(
+                zip(targets.tolist(), weights.tolist())
+            )
+            # masked edges, see CSRGraph.set_weight
+            if weight != float("inf")
+        }
+
+    def __contains__(self, station: S) -> bool:
+        return station in self.graph.index
+
+
+def build_path(predecessors: List[int], source: int, target: int) -> List[int]:
+    """
+    Walk a predecessor list back from target to source
+
+    :return: The indices on the path from source to target
+    """
+    path = [target]
+
+    while path[-1] != source:
+        path.append(predecessors[path[-1]])
+
+    path.reverse()
+    return path
@@ -6,8 +6,14 @@ from cta_optimizer.cta.train_station import CTATrainLine
 
 
 class CTAStationDataLoader(StationDataLoader):
-    def __init__(self, files: List[str] = None):
-        super().__init__(files)
+    def __init__(
+        self,
+        files: List[str] = None,
+        max_workers: int = None,
+        use_processes: bool = False,
+        strict: bool = False,
+    ):
+        super().__init__(files, max_workers, use_processes, strict)
 
     def get_stations_by_route(self, line: CTATrainLine) -> List[Station]:
         """
@@ -16,6 +22,4 @@ class CTAStationDataLoader(StationDataLoader):
         :param line: The train line to get stations for
         :return: A list of Station objects
         """
-        return [
-            station for station in self.stations if station.route == line.value.lower()
-        ]
+        return super().get_stations_by_route(line.value.lower())
@@ -19,15 +19,14 @@ class CTATrainLine(Enum):
 
 
 class CTATrainStation(Station):
-    def __init__(self, name: str, location: Location, route: CTATrainLine):
-        super().__init__(name, location)
-        self.route = route
+    __slots__ = ("line",)
 
-    def get_id(self):
-        return f"{self.route}:{self.name}"
+    def __init__(self, name: str, location: Location, route: CTATrainLine):
+        super().__init__(name, location, str(route))
+        self.line = route
 
     def get_line(self):
-        return self.route
+        return self.line
 
     def __str__(self):
         return f"CTA Train Station: {self.name} ({self.location})"
@@ -42,5 +41,4 @@ class CTATrainStation(Station):
             and self.route == other.route
         )
 
-    def __hash__(self):
-        return hash((self.name, self.location, self.route))
+    __hash__ = Station.__hash__
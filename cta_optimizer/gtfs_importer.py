@@ -0,0 +1,424 @@
+"""
+gtfs_importer.py
+
+The GTFSImporter class turns a GTFS feed into line files in the StationData
+schema read by StationDataLoader, one file per route.
+
+CSV files are streamed straight out of the zip, one row at a time, and only the
+columns in use are kept. stop_times.txt, by far the largest file, is never held
+in memory: its rows are grouped by trip, and only the stops of the trip being
+read are buffered. Every trip adds its hops to the adjacency of its route and
+its running time to the route's average speed. Memory therefore grows with the
+number of stops, routes and trips, not with the number of stop times.
+
+Platforms are merged into their parent station. A station served by several
+routes gets a free transfer between its routes, and transfers.txt adds
+transfers between neighbouring stations.
+
+Usage: python -m cta_optimizer.gtfs_importer <feed.zip> <output dir> [route type...]
+"""
+
+import csv
+import io
+import json
+import os
+import sys
+import tempfile
+import zipfile
+from operator import itemgetter
+from typing import Dict, Iterable, Iterator, List, Set, Tuple, TYPE_CHECKING
+
+from cta_optimizer.models.journey import parse_time
+from cta_optimizer.models.location import Location
+
+if TYPE_CHECKING:
+    from cta_optimizer.station_schema import StationData
+
+# Speed in kilometers per hour given to routes without timed stop times
+DEFAULT_SPEED = 30.0
+
+# transfers.txt transfer_type of stops a rider cannot transfer between
+TRANSFER_NOT_POSSIBLE = "3"
+
+# stops.txt location_type of a station, as opposed to a platform
+LOCATION_TYPE_STATION = "1"
+
+
+class GTFSImportError(Exception):
+    """
+    Raised when a GTFS feed is missing a file or column, or is not laid out the
+    way the importer streams it
+    """
+
+
+class GTFSImporter:
+    def __init__(
+        self,
+        path: str,
+        route_types: Iterable[int] = None,
+        route_names: Dict[str, str] = None,
+    ):
+        """
+        :param path: The GTFS zip file
+        :param route_types: Only import routes of these GTFS route types, such as 1
+            for subway. Defaults to every route.
+        :param route_names: Route name by GTFS route id, such as {"Brn": "brown"}.
+            Defaults to the route id.
+        """
+        if path is None or not os.path.isfile(path):
+            raise ValueError(f"GTFS feed not found: {path}")
+
+        self.path = path
+        self.route_types = (
+            None
+            if route_types is None
+            else {str(route_type) for route_type in route_types}
+        )
+        self.route_names = route_names or {}
+
+        # route id -> route name, of the imported routes
+        self.routes: Dict[str, str] = {}
+        # station id -> (name, latitude, longitude)
+        self.stations: Dict[str, Tuple[str, float, float]] = {}
+        # stop id -> id of the station it belongs to
+        self.stop_stations: Dict[str, str] = {}
+        # route name -> station ids in the order trips first reach them
+        self.route_stations: Dict[str, Dict[str, None]] = {}
+        # route name -> (station id, station id) hop run by any trip -> kilometers
+        self.route_hops: Dict[str, Dict[Tuple[str, str], float]] = {}
+        # route name -> [kilometers, seconds] of the timed hops
+        self.route_running: Dict[str, List[float]] = {}
+        # (station id, station id) from transfers.txt
+        self.transfers: Set[Tuple[str, str]] = set()
+
+    def load(self) -> List["StationData"]:
+        """
+        Read the feed
+
+        :return: One StationData per imported route that runs at least one trip
+        """
+        with zipfile.ZipFile(self.path) as feed:
+            trip_routes = self.__read_routes_and_trips(feed)
+            self.__read_stops(feed)
+            self.__read_stop_times(feed, trip_routes)
+            self.__read_transfers(feed)
+
+        return self.__create_station_data()
+
+    def write_line_files(self, directory: str) -> List[str]:
+        """
+        Read the feed and write one line file per route
+
+        :param directory: The directory to write <route>_line.json files to
+        :return: The paths of the written files
+        """
+        os.makedirs(directory, exist_ok=True)
+        files = []
+
+        for station_data in self.load():
+            path = os.path.join(directory, f"{station_data.route_name}_line.json")
+            _write_json(path, station_data.model_dump())
+            files.append(path)
+
+        return files
+
+    def __read_routes_and_trips(self, feed: zipfile.ZipFile) -> Dict[str, str]:
+        for route_id, route_type in _read_columns(
+            feed, "routes.txt", ["route_id", "route_type"]
+        ):
+            if self.route_types is not None and route_type not in self.route_types:
+                continue
+
+            self.routes[route_id] = self.route_names.get(route_id, route_id)
+
+        trip_routes = {}
+
+        for trip_id, route_id in _read_columns(
+            feed, "trips.txt", ["trip_id", "route_id"]
+        ):
+            route = self.routes.get(route_id)
+
+            if route is not None:
+                trip_routes[trip_id] = route
+
+        return trip_routes
+
+    def __read_stops(self, feed: zipfile.ZipFile):
+        parents = {}
+
+        for stop_id, name, latitude, longitude, location_type, parent in _read_columns(
+            feed,
+            "stops.txt",
+            [
+                "stop_id",
+                "stop_name",
+                "stop_lat",
+                "stop_lon",
+                "location_type",
+                "parent_station",
+            ],
+        ):
+            if parent != "" and location_type != LOCATION_TYPE_STATION:
+                parents[stop_id] = parent
+
+            if latitude == "" or longitude == "":
+                continue
+
+            self.stations[stop_id] = (name, float(latitude), float(longitude))
+
+        for stop_id in self.stations:
+            parent = parents.get(stop_id)
+            self.stop_stations[stop_id] = parent if parent in self.stations else stop_id
+
+    def __read_stop_times(self, feed: zipfile.ZipFile, trip_routes: Dict[str, str]):
+        read_trips = set()
+        trip_id = None
+        stops = []
+        # parsed times, cached since a day has far fewer distinct times than stop
+        # times. Stops between timepoints may leave their times empty.
+        times: Dict[str, int | None] = {"": None}
+
+        for row_trip_id, arrival, departure, stop_id, sequence in _read_columns(
+            feed,
+            "stop_times.txt",
+            ["trip_id", "arrival_time", "departure_time", "stop_id", "stop_sequence"],
+        ):
+            if row_trip_id != trip_id:
+                if trip_id is not None:
+                    self.__add_trip(trip_routes[trip_id], stops)
+                    read_trips.add(trip_id)
+
+                if row_trip_id not in trip_routes:
+                    trip_id = None
+                    continue
+
+                if row_trip_id in read_trips:
+                    raise GTFSImportError(
+                        f"stop_times.txt must list the stops of a trip together: {row_trip_id}"
+                    )
+
+                trip_id = row_trip_id
+                stops = []
+
+            station = self.stop_stations.get(stop_id)
+
+            if station is None:
+                raise GTFSImportError(f"Unknown stop in stop_times.txt: {stop_id}")
+
+            arrival_seconds = times.get(arrival, -1)
+
+            if arrival_seconds == -1:
+                arrival_seconds = times[arrival] = parse_time(arrival)
+
+            departure_seconds = times.get(departure, -1)
+
+            if departure_seconds == -1:
+                departure_seconds = times[departure] = parse_time(departure)
+
+            stops.append((int(sequence), station, arrival_seconds, departure_seconds))
+
+        if trip_id is not None:
+            self.__add_trip(trip_routes[trip_id], stops)
+
+    def __add_trip(self, route: str, stops: List[Tuple[int, str, int, int]]):
+        stops.sort()
+        route_stations = self.route_stations.setdefault(route, {})
+        hops = self.route_hops.setdefault(route, {})
+        running = self.route_running.setdefault(route, [0.0, 0.0])
+
+        for _, station, _, _ in stops:
+            route_stations.setdefault(station, None)
+
+        for (_, station1, _, departure), (_, station2, arrival, _) in zip(
+            stops, stops[1:]
+        ):
+            if station1 == station2:
+                continue
+
+            hop = (station1, station2)
+            distance = hops.get(hop)
+
+            if distance is None:
+                distance = hops[hop] = self.__get_distance(station1, station2)
+
+            if departure is not None and arrival is not None and arrival > departure:
+                running[0] += distance
+                running[1] += arrival - departure
+
+    def __read_transfers(self, feed: zipfile.ZipFile):
+        if "transfers.txt" not in feed.namelist():
+            return
+
+        for from_stop, to_stop, transfer_type in _read_columns(
+            feed, "transfers.txt", ["from_stop_id", "to_stop_id", "transfer_type"]
+        ):
+            if transfer_type == TRANSFER_NOT_POSSIBLE:
+                continue
+
+            station1 = self.stop_stations.get(from_stop)
+            station2 = self.stop_stations.get(to_stop)
+
+            if station1 is not None and station2 is not None and station1 != station2:
+                self.transfers.add((station1, station2))
+
+    def __create_station_data(self) -> List["StationData"]:
+        from cta_optimizer.station_schema import StationData
+
+        # station id -> routes serving it, and its unique name on every route
+        station_routes: Dict[str, List[str]] = {}
+        names: Dict[Tuple[str, str], str] = {}
+
+        for route, stations in self.route_stations.items():
+            counts: Dict[str, int] = {}
+
+            for station in stations:
+                station_routes.setdefault(station, []).append(route)
+                name = self.stations[station][0]
+                counts[name] = counts.get(name, 0) + 1
+
+            for station in stations:
+                name = self.stations[station][0]
+                # two stations with the same name on one route, such as the two
+                # Western stops of the Blue Line, are told apart by stop id
+                names[(route, station)] = (
+                    name if counts[name] == 1 else f"{name} ({station})"
+                )
+
+        def get_id(route: str, station: str) -> str:
+            return f"{route}:{names[(route, station)]}"
+
+        transfers_from: Dict[str, List[str]] = {}
+
+        for station1, station2 in self.transfers:
+            transfers_from.setdefault(station1, []).append(station2)
+
+        station_data = []
+
+        for route, stations in self.route_stations.items():
+            adjacent: Dict[str, List[str]] = {station: [] for station in stations}
+
+            for station1, station2 in sorted(self.route_hops[route]):
+                adjacent[station1].append(get_id(route, station2))
+
+            kilometers, seconds = self.route_running[route]
+            speed = kilometers / seconds * 3600 if seconds > 0 else DEFAULT_SPEED
+
+            station_stops = []
+
+            for station in stations:
+                name, latitude, longitude = self.stations[station]
+                transfer_stations = {}
+
+                for other_route in station_routes[station]:
+                    if other_route != route:
+                        transfer_stations[get_id(other_route, station)] = {
+                            "free_transfer": True
+                        }
+
+                for other_station in transfers_from.get(station, []):
+                    for other_route in station_routes.get(other_station, []):
+                        transfer_stations.setdefault(
+                            get_id(other_route, other_station), {"free_transfer": None}
+                        )
+
+                station_stops.append(
+                    {
+                        "name": names[(route, station)],
+                        "route": route,
+                        "position": {"lat": latitude, "lng": longitude},
+                        "adjacent_stations": adjacent[station],
+                        "transfer_stations": transfer_stations,
+                    }
+                )
+
+            station_data.append(
+                StationData(
+                    route_name=route, speed=round(speed, 1), stations=station_stops
+                )
+            )
+
+        return station_data
+
+    def __get_distance(self, station1: str, station2: str) -> float:
+        _, latitude1, longitude1 = self.stations[station1]
+        _, latitude2, longitude2 = self.stations[station2]
+
+        return (
+            Location(latitude1, longitude1)
+            .distance_to(Location(latitude2, longitude2))
+            .value
+        )
+
+
+def _read_columns(
+    feed: zipfile.ZipFile, name: str, columns: List[str]
+) -> Iterator[Tuple[str, ...]]:
+    """
+    Stream the rows of one CSV file of a feed
+
+    :param feed: The open feed
+    :param name: The file to read, such as "stops.txt"
+    :param columns: The columns to read. The first one is required, the others
+        read as "" when the file does not have them.
+    :return: The requested columns of every row
+    """
+    try:
+        raw = feed.open(name)
+    except KeyError:
+        raise GTFSImportError(f"GTFS feed has no {name}")
+
+    # utf-8-sig drops the byte order mark some agencies write
+    with io.TextIOWrapper(raw, encoding="utf-8-sig", newline="") as f:
+        reader = csv.reader(f)
+        header = [column.strip() for column in next(reader, [])]
+
+        if columns[0] not in header:
+            raise GTFSImportError(f"{name} has no {columns[0]} column")
+
+        # a missing column reads the "" appended to every row
+        get_columns = itemgetter(
+            *(header.index(column) if column in header else -1 for column in columns)
+        )
+
+        for row in reader:
+            if len(row) == 0:
+                continue
+
+            if len(row) < len(header):
+                row.extend([""] * (len(header) - len(row)))
+
+            row.append("")
+
+            yield get_columns(row) if len(columns) > 1 else (get_columns(row),)
+
+
+def _write_json(path: str, data: dict):
+    directory = os.path.dirname(os.path.abspath(path))
+    file_descriptor, temporary_path = tempfile.mkstemp(dir=directory)
+
+    try:
+        with os.fdopen(file_descriptor, "w") as f:
+            json.dump(data, f, indent=4)
+
+        os.replace(temporary_path, path)
+    except BaseException:
+        os.remove(temporary_path)
+        raise
+
+
+def main(arguments: List[str]):
+    if len(arguments) < 2:
+        print(__doc__)
+        return 1
+
+    route_types = [int(route_type) for route_type in arguments[2:]] or None
+    files = GTFSImporter(arguments[0], route_types).write_line_files(arguments[1])
+
+    for file in files:
+        print(f"Wrote {file}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
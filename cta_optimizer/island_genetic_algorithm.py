@@ -0,0 +1,308 @@
+"""
+island_genetic_algorithm.py
+
+The IslandGeneticAlgorithm class runs several RouteGeneticAlgorithm
+populations, called islands, in a process pool. Islands evolve independently
+and every migration_interval generations the best route sets of each island
+replace the worst route sets of the next island in a ring.
+
+The shortest path and demand matrices, and the fitness arrays derived from
+them, are computed once and copied once into shared memory. Worker processes
+map them instead of receiving a pickled graph service or deriving their own
+copies, so memory per worker does not grow with the network, and only
+populations, their fitness and random generator states travel between
+processes.
+"""
+
+import os
+from multiprocessing import Pool
+from multiprocessing.shared_memory import SharedMemory
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from cta_optimizer.route_genetic_algorithm import (
+    DEFAULT_POPULATION_SIZE,
+    FITNESS_ARRAYS,
+    RouteGeneticAlgorithm,
+)
+from cta_optimizer.stations_graph_service import StationsGraphService
+
+DEFAULT_MIGRATION_INTERVAL = 20
+DEFAULT_MIGRATION_SIZE = 2
+
+# name -> (shared memory block name, shape, dtype), enough to map an array
+SharedArrayLayout = Dict[str, Tuple[str, Tuple[int, ...], str]]
+
+
+class IslandGeneticAlgorithm:
+    def __init__(
+        self,
+        graph_service: StationsGraphService,
+        route_count: int,
+        island_count: int = None,
+        island_size: int = DEFAULT_POPULATION_SIZE,
+        migration_interval: int = DEFAULT_MIGRATION_INTERVAL,
+        migration_size: int = DEFAULT_MIGRATION_SIZE,
+        processes: int = None,
+        demand: np.ndarray = None,
+        seed: int = None,
+        **options,
+    ):
+        """
+        :param graph_service: The graph the routes run on
+        :param route_count: The number of routes in every candidate route set
+        :param island_count: The number of islands, defaults to the number of CPUs
+        :param island_size: The number of route sets on every island
+        :param migration_interval: The number of generations between migrations
+        :param migration_size: The number of route sets every island sends to the next
+        :param processes: The number of worker processes, defaults to one per island.
+            With 1, islands run one after another in this process.
+        :param demand: The demand matrix, see RouteGeneticAlgorithm
+        :param seed: Seed for the random number generators of every island
+        :param options: Any other RouteGeneticAlgorithm option, such as mutation_rate
+        """
+        if island_count is None:
+            island_count = os.cpu_count() or 1
+
+        if not isinstance(island_count, int) or island_count < 1:
+            raise ValueError("Island count must be a positive integer")
+
+        if not isinstance(migration_interval, int) or migration_interval < 1:
+            raise ValueError("Migration interval must be a positive integer")
+
+        if not isinstance(migration_size, int) or not 0 <= migration_size < island_size:
+            raise ValueError("Migration size must be between 0 and the island size")
+
+        if processes is None:
+            processes = island_count
+
+        if not isinstance(processes, int) or processes < 1:
+            raise ValueError("Processes must be a positive integer")
+
+        self.route_count = route_count
+        self.island_size = island_size
+        self.migration_interval = migration_interval
+        self.migration_size = migration_size
+        self.processes = min(processes, island_count)
+        self.options = options
+        self.generation = 0
+
+        distances, predecessors = graph_service.get_all_pairs_shortest_paths()
+
+        # every island draws from its own independent stream
+        generators = [
+            np.random.default_rng(sequence)
+            for sequence in np.random.SeedSequence(seed).spawn(island_count)
+        ]
+
+        # the first island validates the matrices, the others share its arrays
+        first = RouteGeneticAlgorithm(
+            graph_service,
+            route_count,
+            demand=demand,
+            population_size=island_size,
+            seed=generators[0],
+            shortest_paths=(distances, predecessors),
+            **options,
+        )
+        self.islands: List[RouteGeneticAlgorithm] = [
+            first,
+            *(
+                RouteGeneticAlgorithm(
+                    graph_service,
+                    route_count,
+                    demand=first.demand,
+                    population_size=island_size,
+                    seed=generator,
+                    shortest_paths=(first.distances, first.predecessors),
+                    fitness_arrays=first.fitness_arrays,
+                    **options,
+                )
+                for generator in generators[1:]
+            ),
+        ]
+
+        self.__shared_arrays = {
+            "distances": first.distances,
+            "predecessors": first.predecessors,
+            "demand": first.demand,
+            **first.fitness_arrays,
+        }
+        self.__shared_memory: List[SharedMemory] = []
+        self.__pool = None
+
+    def run(self, generations: int) -> np.ndarray:
+        """
+        Advance every island several generations, migrating between islands every
+        migration_interval generations
+
+        :param generations: The number of generations to run
+        :return: The best route set found on any island
+        """
+        if not isinstance(generations, int) or generations < 0:
+            raise ValueError("Generations must be a non-negative integer")
+
+        remaining = generations
+
+        while remaining > 0:
+            epoch = min(self.migration_interval, remaining)
+            self.__evolve(epoch)
+            remaining -= epoch
+
+            if epoch == self.migration_interval:
+                self.__migrate()
+
+        return self.get_best()
+
+    def get_best(self) -> np.ndarray:
+        return self.__get_best_island().get_best()
+
+    def get_best_fitness(self) -> float:
+        return self.__get_best_island().get_best_fitness()
+
+    def get_history(self) -> List[float]:
+        """
+        :return: The best fitness on any island after every generation
+        """
+        return np.min([island.history for island in self.islands], axis=0).tolist()
+
+    def get_routes(self, route_set: np.ndarray):
+        return self.islands[0].get_routes(route_set)
+
+    def close(self):
+        """
+        Stop the worker processes and free the shared memory
+        """
+        if self.__pool is not None:
+            self.__pool.close()
+            self.__pool.join()
+            self.__pool = None
+
+        for block in self.__shared_memory:
+            block.close()
+            block.unlink()
+
+        self.__shared_memory = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __del__(self):
+        # __init__ may have failed before every attribute was set
+        if hasattr(self, "_IslandGeneticAlgorithm__pool"):
+            self.close()
+
+    def __evolve(self, generations: int):
+        tasks = [
+            (
+                self.route_count,
+                self.island_size,
+                self.options,
+                island.population,
+                island.fitness,
+                island.random,
+                generations,
+            )
+            for island in self.islands
+        ]
+
+        if self.processes == 1:
+            results = [_evolve_island(task, self.__shared_arrays) for task in tasks]
+        else:
+            results = self.__get_pool().map(_evolve_island, tasks)
+
+        for island, (population, fitness, history, random) in zip(
+            self.islands, results
+        ):
+            island.population = population
+            island.fitness = fitness
+            island.history.extend(history)
+            island.random = random
+            island.generation += generations
+
+        self.generation += generations
+
+    def __migrate(self):
+        if self.migration_size == 0 or len(self.islands) == 1:
+            return
+
+        # pick every emigrant before any island changes
+        emigrants = []
+
+        for island in self.islands:
+            best = np.argsort(island.fitness, kind="stable")[: self.migration_size]
+            emigrants.append((island.population[best], island.fitness[best]))
+
+        for index, (population, fitness) in enumerate(emigrants):
+            island = self.islands[(index + 1) % len(self.islands)]
+            worst = np.argsort(island.fitness, kind="stable")[-self.migration_size :]
+
+            island.population = island.population.copy()
+            island.fitness = island.fitness.copy()
+            island.population[worst] = population
+            island.fitness[worst] = fitness
+
+    def __get_pool(self):
+        if self.__pool is None:
+            layout: SharedArrayLayout = {}
+
+            for name, array in self.__shared_arrays.items():
+                block = SharedMemory(create=True, size=max(array.nbytes, 1))
+                np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[:] = array
+
+                self.__shared_memory.append(block)
+                layout[name] = (block.name, array.shape, array.dtype.str)
+
+            self.__pool = Pool(
+                self.processes, initializer=_attach_shared_arrays, initargs=(layout,)
+            )
+
+        return self.__pool
+
+    def __get_best_island(self) -> RouteGeneticAlgorithm:
+        return min(self.islands, key=lambda island: island.get_best_fitness())
+
+
+# Arrays mapped from shared memory by _attach_shared_arrays, one copy per worker
+_shared_arrays: Dict[str, np.ndarray] = {}
+_shared_blocks: List[SharedMemory] = []
+
+
+def _attach_shared_arrays(layout: SharedArrayLayout):
+    for name, (block_name, shape, dtype) in layout.items():
+        block = SharedMemory(name=block_name)
+        array = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+        array.flags.writeable = False
+
+        # the block must stay open for as long as the array is used
+        _shared_blocks.append(block)
+        _shared_arrays[name] = array
+
+
+def _evolve_island(task: tuple, shared_arrays: Dict[str, np.ndarray] = None):
+    route_count, island_size, options, population, fitness, random, generations = task
+
+    if shared_arrays is None:
+        shared_arrays = _shared_arrays
+
+    # nothing is validated, derived or evaluated again: the arrays were checked
+    # when the islands were created, and the fitness comes with the population
+    island = RouteGeneticAlgorithm(
+        None,
+        route_count,
+        demand=shared_arrays["demand"],
+        population_size=island_size,
+        seed=random,
+        shortest_paths=(shared_arrays["distances"], shared_arrays["predecessors"]),
+        population=population,
+        fitness=fitness,
+        fitness_arrays={name: shared_arrays[name] for name in FITNESS_ARRAYS},
+        **options,
+    )
+    island.run(generations)
+
+    return island.population, island.fitness, island.history[1:], island.random
@@ -0,0 +1,267 @@
+"""
+k_shortest_paths.py
+
+Yen's algorithm for the k shortest loopless paths between two stations of a
+CSRGraph. Every path after the first leaves an earlier path at a spur station:
+it follows the earlier path up to the spur (the root), then takes the shortest
+way to the target that avoids the root and every edge already used by a found
+path with the same root.
+
+Most of the work of the plain algorithm is repeated spur searches, which are
+cut down here:
+- One backward search from the target gives the exact distance from every
+  station to the target, and the next station on that shortest way. Spur
+  searches use the distances as an A* heuristic. Removing stations and edges
+  only makes distances longer, so the heuristic stays consistent.
+- A spur search stops at the first station whose cached shortest way to the
+  target is not blocked. That way is optimal, so most spur searches settle a
+  handful of stations, and many none at all.
+- A path only spurs from where it left its parent path onwards (Lawler's
+  refinement). Spurs from earlier stations were already tried by the parent.
+- A spur is skipped when it cannot beat the candidates already found: the
+  root distance plus the cheapest way to leave the spur and reach the target is
+  longer than enough candidates to fill every path still missing.
+"""
+
+import heapq
+from typing import Dict, List, Set, Tuple
+
+from cta_optimizer.csr_graph import NO_PREDECESSOR, CSRGraph
+
+# (distance, station indices)
+WeightedPath = Tuple[float, List[int]]
+
+
+def k_shortest_paths(
+    graph: CSRGraph, source: int, target: int, k: int
+) -> List[WeightedPath]:
+    """
+    Find the k shortest loopless paths between two stations, shortest first.
+    Candidates of equal length are taken in order of their station indices.
+    When more paths tie for the last places than fit in k, which of them are
+    found before the cutoff still depends on the order of the spur searches.
+
+    :param graph: The graph to search
+    :param source: The index of the station to start from
+    :param target: The index of the station to end at
+    :param k: The number of paths to find
+    :return: Up to k paths, fewer if there are not that many
+    """
+    graph.freeze()
+
+    to_target, next_stations = graph.search(target, reverse=True)
+
+    if to_target[source] == float("inf"):
+        return []
+
+    offsets = memoryview(graph.offsets)
+    targets = memoryview(graph.targets)
+    weights = memoryview(graph.weights)
+
+    first = _follow_tree(source, target, next_stations)
+    paths: List[WeightedPath] = [(to_target[source], first)]
+    # index of the station every found path left its parent path at
+    deviations = [0]
+
+    # (distance, path, deviation index), ordered by distance then path
+    candidates: List[Tuple[float, Tuple[int, ...], int]] = []
+    seen: Set[Tuple[int, ...]] = {tuple(first)}
+
+    while len(paths) < k:
+        _, last = paths[-1]
+        cumulative = _get_cumulative_distances(last, offsets, targets, weights)
+        missing = k - len(paths)
+        # a spur longer than this can never be one of the k paths
+        threshold = _get_threshold(candidates, missing)
+
+        # found paths that share the root so far, narrowed one station at a time
+        sharing = [path for _, path in paths]
+
+        for spur_index in range(len(last) - 1):
+            spur = last[spur_index]
+            sharing = [
+                path
+                for path in sharing
+                if len(path) > spur_index and path[spur_index] == spur
+            ]
+
+            if spur_index < deviations[-1]:
+                continue
+
+            blocked_next = {
+                path[spur_index + 1] for path in sharing if len(path) > spur_index + 1
+            }
+            blocked_stations = set(last[:spur_index])
+
+            # lower bound of any spur path: one unblocked edge, then the shortest
+            # way from there ignoring every other block
+            bound = min(
+                (
+                    weights[edge] + to_target[targets[edge]]
+                    for edge in range(offsets[spur], offsets[spur + 1])
+                    if targets[edge] not in blocked_next
+                    and targets[edge] not in blocked_stations
+                ),
+                default=float("inf"),
+            )
+
+            if cumulative[spur_index] + bound > threshold:
+                continue
+
+            spur_path = _spur_search(
+                spur,
+                target,
+                blocked_stations,
+                blocked_next,
+                to_target,
+                next_stations,
+                offsets,
+                targets,
+                weights,
+            )
+
+            if spur_path is None:
+                continue
+
+            spur_distance, spur_stations = spur_path
+            path = tuple(last[:spur_index]) + tuple(spur_stations)
+
+            if path in seen:
+                continue
+
+            seen.add(path)
+            heapq.heappush(
+                candidates, (cumulative[spur_index] + spur_distance, path, spur_index)
+            )
+            threshold = _get_threshold(candidates, missing)
+
+        if len(candidates) == 0:
+            break
+
+        distance, path, deviation = heapq.heappop(candidates)
+        paths.append((distance, list(path)))
+        deviations.append(deviation)
+
+    return paths
+
+
+def _spur_search(
+    spur: int,
+    target: int,
+    blocked_stations: Set[int],
+    blocked_next: Set[int],
+    to_target: List[float],
+    next_stations: List[int],
+    offsets: memoryview,
+    targets: memoryview,
+    weights: memoryview,
+) -> WeightedPath | None:
+    # A* from the spur that never enters a blocked station, never returns to the
+    # spur and never leaves the spur towards a station in blocked_next
+    infinity = float("inf")
+    # station -> whether its cached way to the target avoids blocked stations
+    free: Dict[int, bool] = {target: True}
+
+    def is_free(station: int) -> bool:
+        walked = []
+
+        while station not in free:
+            if station in blocked_stations or station == spur:
+                free[station] = False
+                break
+
+            walked.append(station)
+            station = next_stations[station]
+
+        result = free[station]
+
+        for walked_station in walked:
+            free[walked_station] = result
+
+        return result
+
+    next_station = next_stations[spur]
+
+    if (
+        spur != target
+        and next_station != NO_PREDECESSOR
+        and next_station not in blocked_next
+        and is_free(next_station)
+    ):
+        return to_target[spur], _follow_tree(spur, target, next_stations)
+
+    distances = {spur: 0.0}
+    predecessors = {spur: NO_PREDECESSOR}
+    settled = set()
+    heap = [(to_target[spur], spur)]
+
+    while heap:
+        _, station = heapq.heappop(heap)
+
+        if station in settled:
+            continue
+
+        settled.add(station)
+        distance = distances[station]
+
+        if station != spur and is_free(station):
+            path = [station]
+
+            while predecessors[path[-1]] != NO_PREDECESSOR:
+                path.append(predecessors[path[-1]])
+
+            path.reverse()
+            path.extend(_follow_tree(station, target, next_stations)[1:])
+            return distance + to_target[station], path
+
+        for edge in range(offsets[station], offsets[station + 1]):
+            neighbor = targets[edge]
+
+            if (
+                neighbor == spur
+                or neighbor in blocked_stations
+                or (station == spur and neighbor in blocked_next)
+                or to_target[neighbor] == infinity
+            ):
+                continue
+
+            candidate = distance + weights[edge]
+
+            if candidate < distances.get(neighbor, infinity):
+                distances[neighbor] = candidate
+                predecessors[neighbor] = station
+                heapq.heappush(heap, (candidate + to_target[neighbor], neighbor))
+
+    return None
+
+
+def _get_threshold(
+    candidates: List[Tuple[float, Tuple[int, ...], int]], missing: int
+) -> float:
+    if len(candidates) < missing:
+        return float("inf")
+
+    return heapq.nsmallest(missing, candidates)[-1][0]
+
+
+def _follow_tree(station: int, target: int, next_stations: List[int]) -> List[int]:
+    path = [station]
+
+    while path[-1] != target:
+        path.append(next_stations[path[-1]])
+
+    return path
+
+
+def _get_cumulative_distances(
+    path: List[int], offsets: memoryview, targets: memoryview, weights: memoryview
+) -> List[float]:
+    cumulative = [0.0]
+
+    for station1, station2 in zip(path, path[1:]):
+        for edge in range(offsets[station1], offsets[station1 + 1]):
+            if targets[edge] == station2:
+                cumulative.append(cumulative[-1] + weights[edge])
+                break
+
+    return cumulative
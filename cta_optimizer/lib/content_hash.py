@@ -0,0 +1,55 @@
+"""
+content_hash.py
+--------------
+Helpers for keying derived artifacts (precomputed tables, snapshots) on the
+content of the files they were built from.
+"""
+
+import hashlib
+from typing import Iterable, List
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def hash_files(files: List[str]) -> str:
+    """
+    Hash the content of a list of files, in order
+
+    :param files: The paths of the files to hash
+    :return: A hex sha256 digest that changes whenever any file content or the file order changes
+    """
+    if files is None:
+        raise ValueError("Files cannot be None")
+
+    digest = hashlib.sha256()
+
+    for file in files:
+        file_digest = hashlib.sha256()
+
+        with open(file, "rb") as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                file_digest.update(chunk)
+
+        digest.update(file_digest.digest())
+
+    return digest.hexdigest()
+
+
+def hash_values(values: Iterable[str]) -> str:
+    """
+    Hash a sequence of strings, in order
+
+    :param values: The strings to hash
+    :return: A hex sha256 digest that is stable across processes, unlike the built-in hash
+    """
+    if values is None:
+        raise ValueError("Values cannot be None")
+
+    digest = hashlib.sha256()
+
+    for value in values:
+        encoded = value.encode("utf-8")
+        digest.update(len(encoded).to_bytes(8, "little"))
+        digest.update(encoded)
+
+    return digest.hexdigest()
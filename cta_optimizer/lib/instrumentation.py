@@ -0,0 +1,408 @@
+"""
+instrumentation.py
+--------------
+The Instrumentation class records per-stage numbers of a run: named timers,
+counters and peak memory samples. It is off unless switched on, and while off
+every call returns at once without recording anything, so the loader, the
+graph service and the routing calls stay instrumented in production.
+
+Switch it on with the CTA_OPTIMIZER_INSTRUMENTATION environment variable set
+to the file to write when the process exits, or with enable(). The file is a
+JSON report by default, or a Chrome trace, which chrome://tracing and Perfetto
+open, with CTA_OPTIMIZER_INSTRUMENTATION_FORMAT=chrome.
+"""
+
+import atexit
+import functools
+import json
+import os
+import sys
+import threading
+import time
+import warnings
+from enum import StrEnum
+from typing import Callable, Dict, List, Tuple, TypeVar
+
+INSTRUMENTATION_ENVIRONMENT_VARIABLE = "CTA_OPTIMIZER_INSTRUMENTATION"
+INSTRUMENTATION_FORMAT_ENVIRONMENT_VARIABLE = "CTA_OPTIMIZER_INSTRUMENTATION_FORMAT"
+
+# Timer events kept for the Chrome trace. Timers are still summed past this.
+DEFAULT_MAX_EVENTS = 100_000
+
+F = TypeVar("F", bound=Callable)
+
+
+class OutputFormat(StrEnum):
+    """
+    Enum class for the files Instrumentation writes
+    """
+
+    JSON = "json"
+    CHROME = "chrome"
+
+
+class _NoOpTimer:
+    # Returned by timer while instrumentation is off
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+_NO_OP_TIMER = _NoOpTimer()
+
+
+class _Timer:
+    __slots__ = ("instrumentation", "name", "start")
+
+    def __init__(self, instrumentation: "Instrumentation", name: str):
+        self.instrumentation = instrumentation
+        self.name = name
+        self.start = 0
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.instrumentation.record_duration(
+            self.name, self.start, time.perf_counter_ns() - self.start
+        )
+        return False
+
+
+class Instrumentation:
+    def __init__(
+        self,
+        enabled: bool = False,
+        output: str = None,
+        output_format: OutputFormat | str = OutputFormat.JSON,
+        max_events: int = DEFAULT_MAX_EVENTS,
+    ):
+        """
+        :param enabled: Whether to record anything
+        :param output: The file to write when the process exits, or None to only
+            write on request
+        :param output_format: "json" for a summary report, "chrome" for a trace
+        :param max_events: The number of timer events to keep for the trace
+        """
+        if not isinstance(max_events, int) or max_events < 0:
+            raise ValueError("Max events must be a non-negative integer")
+
+        self.enabled = enabled
+        self.output = output
+        self.output_format = OutputFormat(output_format)
+        self.max_events = max_events
+
+        self.__lock = threading.Lock()
+        self.__origin = time.perf_counter_ns()
+        # name -> [count, total, min, max] nanoseconds
+        self.__timers: Dict[str, List[int]] = {}
+        self.__counters: Dict[str, int | float] = {}
+        # (name, nanoseconds since the origin, peak rss bytes, peak traced bytes)
+        self.__memory_samples: List[Tuple[str, int, int | None, int | None]] = []
+        # (name, start, duration, thread id), start in nanoseconds since the origin
+        self.__events: List[Tuple[str, int, int, int]] = []
+        self.__dropped_events = 0
+
+    def enable(self, output: str = None, output_format: OutputFormat | str = None):
+        """
+        Start recording
+
+        :param output: The file to write when the process exits, if not None
+        :param output_format: "json" or "chrome", if not None
+        """
+        if output is not None:
+            self.output = output
+
+        if output_format is not None:
+            self.output_format = OutputFormat(output_format)
+
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def is_enabled(self) -> bool:
+        return self.enabled
+
+    def reset(self):
+        """
+        Drop everything recorded so far
+        """
+        with self.__lock:
+            self.__origin = time.perf_counter_ns()
+            self.__timers = {}
+            self.__counters = {}
+            self.__memory_samples = []
+            self.__events = []
+            self.__dropped_events = 0
+
+    def timer(self, name: str):
+        """
+        Time a block:
+
+            with instrumentation.timer("stations_graph_service.add_edges"):
+                ...
+
+        :param name: The name to sum the time under
+        :return: A context manager
+        """
+        if not self.enabled:
+            return _NO_OP_TIMER
+
+        return _Timer(self, name)
+
+    def timed(self, name: str) -> Callable[[F], F]:
+        """
+        Time every call of a function, like timer
+
+        :param name: The name to sum the time under
+        :return: The decorator
+        """
+
+        def decorator(function: F) -> F:
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return function(*args, **kwargs)
+
+                with _Timer(self, name):
+                    return function(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    def count(self, name: str, amount: int | float = 1):
+        """
+        Add to a counter
+
+        :param name: The counter
+        :param amount: The amount to add
+        """
+        if not self.enabled:
+            return
+
+        with self.__lock:
+            self.__counters[name] = self.__counters.get(name, 0) + amount
+
+    def sample_memory(self, name: str):
+        """
+        Record the peak memory of the process so far: the peak resident set size,
+        and the peak memory allocated by Python when tracemalloc is tracing
+
+        :param name: The name of the point of the run the sample is taken at
+        """
+        if not self.enabled:
+            return
+
+        sample = (
+            name,
+            time.perf_counter_ns() - self.__origin,
+            _get_peak_rss(),
+            _get_traced_peak(),
+        )
+
+        with self.__lock:
+            self.__memory_samples.append(sample)
+
+    def record_duration(self, name: str, start: int, duration: int):
+        """
+        Add a measured duration to a timer
+
+        :param name: The timer
+        :param start: When it started, from time.perf_counter_ns
+        :param duration: How long it took, in nanoseconds
+        """
+        if not self.enabled:
+            return
+
+        with self.__lock:
+            timer = self.__timers.get(name)
+
+            if timer is None:
+                self.__timers[name] = [1, duration, duration, duration]
+            else:
+                timer[0] += 1
+                timer[1] += duration
+                timer[2] = min(timer[2], duration)
+                timer[3] = max(timer[3], duration)
+
+            if len(self.__events) < self.max_events:
+                self.__events.append(
+                    (name, start - self.__origin, duration, threading.get_ident())
+                )
+            else:
+                self.__dropped_events += 1
+
+    def get_report(self) -> dict:
+        """
+        Summarize everything recorded so far
+
+        :return: The timers, counters and memory samples, in seconds and bytes
+        """
+        with self.__lock:
+            return {
+                "timers": {
+                    name: {
+                        "count": count,
+                        "total_seconds": total / 1e9,
+                        "mean_seconds": total / count / 1e9,
+                        "min_seconds": minimum / 1e9,
+                        "max_seconds": maximum / 1e9,
+                    }
+                    for name, (count, total, minimum, maximum) in self.__timers.items()
+                },
+                "counters": dict(self.__counters),
+                "memory": [
+                    {
+                        "name": name,
+                        "time_seconds": timestamp / 1e9,
+                        "peak_rss_bytes": peak_rss,
+                        "traced_peak_bytes": traced_peak,
+                    }
+                    for name, timestamp, peak_rss, traced_peak in self.__memory_samples
+                ],
+                "dropped_events": self.__dropped_events,
+            }
+
+    def get_chrome_trace(self) -> dict:
+        """
+        Get everything recorded so far in the Chrome trace event format: a complete
+        event per timed block, and counter events for counters and memory samples
+
+        :return: The trace, ready to be written as JSON
+        """
+        process_id = os.getpid()
+
+        with self.__lock:
+            events = [
+                {
+                    "name": name,
+                    "ph": "X",
+                    "ts": start / 1e3,
+                    "dur": duration / 1e3,
+                    "pid": process_id,
+                    "tid": thread_id,
+                }
+                for name, start, duration, thread_id in self.__events
+            ]
+
+            for name, timestamp, peak_rss, traced_peak in self.__memory_samples:
+                arguments = {"peak_rss_bytes": peak_rss}
+
+                if traced_peak is not None:
+                    arguments["traced_peak_bytes"] = traced_peak
+
+                events.append(
+                    {
+                        "name": f"memory: {name}",
+                        "ph": "C",
+                        "ts": timestamp / 1e3,
+                        "pid": process_id,
+                        "args": arguments,
+                    }
+                )
+
+            end = (time.perf_counter_ns() - self.__origin) / 1e3
+
+            # counters are totals, so they are shown once, at the end of the trace
+            for name, value in self.__counters.items():
+                events.append(
+                    {
+                        "name": name,
+                        "ph": "C",
+                        "ts": end,
+                        "pid": process_id,
+                        "args": {"value": value},
+                    }
+                )
+
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def write(self, file: str = None, output_format: OutputFormat | str = None):
+        """
+        Write everything recorded so far
+
+        :param file: The file to write, the configured output by default
+        :param output_format: "json" or "chrome", the configured format by default
+        """
+        file = self.output if file is None else file
+        output_format = (
+            self.output_format if output_format is None else OutputFormat(output_format)
+        )
+
+        if file is None:
+            raise ValueError("File cannot be None")
+
+        data = (
+            self.get_chrome_trace()
+            if output_format == OutputFormat.CHROME
+            else self.get_report()
+        )
+
+        directory = os.path.dirname(os.path.abspath(file))
+        os.makedirs(directory, exist_ok=True)
+
+        with open(file, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+            f.write("\n")
+
+
+def _get_peak_rss() -> int | None:
+    try:
+        import resource
+    except ImportError:
+        # not available on Windows
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # kilobytes everywhere but macOS, where it is bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _get_traced_peak() -> int | None:
+    # only imported once something may be tracing
+    tracemalloc = sys.modules.get("tracemalloc")
+
+    if tracemalloc is None or not tracemalloc.is_tracing():
+        return None
+
+    return tracemalloc.get_traced_memory()[1]
+
+
+def _create_from_environment() -> Instrumentation:
+    # runs on import of every instrumented module, so a bad setting only warns
+    output = os.environ.get(INSTRUMENTATION_ENVIRONMENT_VARIABLE, "")
+    output_format = os.environ.get(INSTRUMENTATION_FORMAT_ENVIRONMENT_VARIABLE, "")
+    output_format = output_format.strip().lower() or OutputFormat.JSON
+
+    if output_format not in tuple(OutputFormat):
+        warnings.warn(
+            f"Invalid {INSTRUMENTATION_FORMAT_ENVIRONMENT_VARIABLE} "
+            f"{output_format!r}, writing {OutputFormat.JSON} instead",
+            RuntimeWarning,
+        )
+        output_format = OutputFormat.JSON
+
+    if output in ("", "0"):
+        return Instrumentation(output_format=output_format)
+
+    return Instrumentation(enabled=True, output=output, output_format=output_format)
+
+
+# Shared by the whole package, configured from the environment on import
+instrumentation = _create_from_environment()
+
+
+@atexit.register
+def _write_on_exit():
+    if instrumentation.is_enabled() and instrumentation.output is not None:
+        try:
+            instrumentation.write()
+        except OSError:
+            pass
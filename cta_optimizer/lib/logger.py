@@ -4,9 +4,13 @@ logger.py
 The Logger class is responsible for logging messages to a file and optionally to the console.
 """
 
+import atexit
 import os
+import threading
+import weakref
 from datetime import datetime
 from enum import StrEnum
+from typing import List, TextIO
 
 
 class LogLevel(StrEnum):
@@ -19,6 +23,17 @@ class LogLevel(StrEnum):
     WARNING = "WARNING"
 
 
+# Messages below a logger's minimum level are dropped
+LOG_LEVEL_SEVERITY = {
+    LogLevel.INFO: 0,
+    LogLevel.WARNING: 1,
+    LogLevel.ERROR: 2,
+}
+
+DEFAULT_FLUSH_INTERVAL_SECONDS = 1.0
+DEFAULT_BACKUP_COUNT = 3
+
+
 def format_log_message(message: str, level: LogLevel = LogLevel.INFO) -> str:
     """
     Format the log message with the current timestamp and log level
@@ -64,17 +79,58 @@ class Logger:
         print_to_console: bool = True,
         create_new_file: bool = False,
         delete_file_on_exit: bool = False,
+        min_level: LogLevel = LogLevel.INFO,
+        buffered: bool = False,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL_SECONDS,
+        max_bytes: int = 0,
+        backup_count: int = DEFAULT_BACKUP_COUNT,
     ):
+        """
+        :param file_path: The file to append messages to
+        :param print_to_console: Whether to also print messages
+        :param create_new_file: Whether to create the file and its directory if it cannot be opened
+        :param delete_file_on_exit: Whether to delete the file when the logger is closed
+        :param min_level: Messages below this level are dropped before they are formatted
+        :param buffered: Whether to queue file writes and let a background thread write them in batches
+        :param flush_interval: How often, in seconds, the background thread writes queued messages
+        :param max_bytes: Rotate the file when it would grow past this size, 0 to never rotate
+        :param backup_count: How many rotated files to keep, as file_path.1 to file_path.N
+        """
         if file_path is None:
             raise ValueError("File path cannot be None")
 
         if not isinstance(file_path, str):
             raise ValueError("File path must be a valid string")
+
+        if min_level not in LOG_LEVEL_SEVERITY:
+            raise ValueError("Invalid log level")
+
+        if not isinstance(flush_interval, (int, float)) or flush_interval <= 0:
+            raise ValueError("Flush interval must be a positive number")
+
+        if not isinstance(max_bytes, int) or max_bytes < 0:
+            raise ValueError("Max bytes must be a non-negative integer")
+
+        if not isinstance(backup_count, int) or backup_count < 0:
+            raise ValueError("Backup count must be a non-negative integer")
         # Initialize the logger with a file path
 
         self.print_to_console = print_to_console
         self.failed_to_open_file = False
         self.delete_file_on_exit = delete_file_on_exit
+        self.min_severity = LOG_LEVEL_SEVERITY[LogLevel(min_level)]
+        self.buffered = buffered
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.closed = False
+
+        # The file is opened once, on the first write, and kept open until close
+        self.__file: TextIO | None = None
+        self.__lock = threading.Lock()
+        self.__pending_lines: List[str] = []
+        self.__flush_thread: threading.Thread | None = None
+        self.__stop_event = threading.Event()
 
         if file_path:
             self.file_path = file_path
@@ -107,23 +163,93 @@ class Logger:
 
                 # Default to printing to console if the file cannot be opened
 
+        if self.buffered and not self.failed_to_open_file:
+            # The thread only holds a weak reference, so an unused logger can
+            # still be garbage collected and closed by __del__
+            self.__flush_thread = threading.Thread(
+                target=_flush_periodically,
+                args=(weakref.ref(self), self.__stop_event, self.flush_interval),
+                name=f"Logger flush ({self.file_path})",
+                daemon=True,
+            )
+            self.__flush_thread.start()
+
+        _OPEN_LOGGERS.add(self)
+
+    def is_enabled_for(self, level: LogLevel) -> bool:
+        """
+        Check whether a message at a level would be logged, to skip building
+        expensive messages
+
+        :param level: The log level
+        :return: True if the level is at or above the minimum level
+        """
+        return LOG_LEVEL_SEVERITY.get(level, -1) >= self.min_severity
+
     def info(self, message: str):
         self.__message(message, LogLevel.INFO)
 
+    def warning(self, message: str):
+        self.__message(message, LogLevel.WARNING)
+
     def error(self, message: str):
         self.__message(message, LogLevel.ERROR)
 
     def __message(self, message: str, level: LogLevel):
+        if LOG_LEVEL_SEVERITY[level] < self.min_severity:
+            return
+
         validate_message(message)
 
+        line = format_log_message(message, level)
+
         if self.print_to_console:
-            print(format_log_message(message, level))
+            print(line)
+
+        if self.failed_to_open_file is False and not self.closed:
+            with self.__lock:
+                self.__pending_lines.append(line + "\n")
+
+                if not self.buffered:
+                    self.__write_pending_lines()
+
+    def flush(self):
+        """
+        Write every queued message to the log file
+        """
+        with self.__lock:
+            self.__write_pending_lines()
+
+    def close(self):
+        """
+        Write every queued message, stop the background thread and close the log
+        file. Called automatically when the logger is deleted or the interpreter
+        exits. Messages logged after close only go to the console.
+        """
+        if self.closed:
+            return
 
-        if self.failed_to_open_file is False:
-            with open(self.file_path, "a", encoding="utf-8") as f:
-                f.write(format_log_message(message, level) + "\n")
+        self.closed = True
+        self.__stop_event.set()
+
+        if (
+            self.__flush_thread is not None
+            and self.__flush_thread is not threading.current_thread()
+        ):
+            self.__flush_thread.join()
+
+        with self.__lock:
+            try:
+                self.__write_pending_lines()
+            except OSError:
+                self.__pending_lines = []
+
+            if self.__file is not None:
+                self.__file.close()
+                self.__file = None
+
+        _OPEN_LOGGERS.discard(self)
 
-    def __del__(self):
         if self.failed_to_open_file:
             return
 
@@ -133,7 +259,91 @@ class Logger:
             except OSError:
                 pass
 
+    def __write_pending_lines(self):
+        # Callers hold the lock
+        if len(self.__pending_lines) == 0 or self.failed_to_open_file:
+            return
+
+        batch = "".join(self.__pending_lines)
+        self.__pending_lines = []
+
+        if self.__file is None:
+            self.__file = open(self.file_path, "a", encoding="utf-8")
+
+        if self.max_bytes > 0 and self.__file.tell() > 0:
+            if self.__file.tell() + len(batch.encode("utf-8")) > self.max_bytes:
+                self.__rotate()
+
+        self.__file.write(batch)
+        self.__file.flush()
+
+    def __rotate(self):
+        self.__file.close()
+        self.__file = None
+
+        if self.backup_count == 0:
+            # Nothing to keep, start the file over
+            self.__file = open(self.file_path, "w", encoding="utf-8")
+            return
+
+        for index in range(self.backup_count - 1, 0, -1):
+            source = f"{self.file_path}.{index}"
+
+            if os.path.exists(source):
+                os.replace(source, f"{self.file_path}.{index + 1}")
+
+        os.replace(self.file_path, f"{self.file_path}.1")
+        self.__file = open(self.file_path, "a", encoding="utf-8")
+
+    def __del__(self):
+        # __init__ may have failed before every attribute was set
+        if hasattr(self, "closed"):
+            self.close()
+
+
+# Loggers that have not been closed, closed by an exit hook so buffered
+# messages are not lost
+_OPEN_LOGGERS: "weakref.WeakSet[Logger]" = weakref.WeakSet()
+
+
+def _flush_periodically(
+    logger_reference: "weakref.ref[Logger]",
+    stop_event: threading.Event,
+    flush_interval: float,
+):
+    while not stop_event.wait(flush_interval):
+        logger = logger_reference()
+
+        if logger is None:
+            return
+
+        try:
+            logger.flush()
+        except OSError:
+            pass
+
+        # Drop the reference before waiting again
+        del logger
+
+
+@atexit.register
+def _close_open_loggers():
+    for logger in list(_OPEN_LOGGERS):
+        logger.close()
+
+
+# Pre-configured instances of the Logger class, created on first access so that
+# importing this module does not touch the file system
+
+_PRECONFIGURED_LOGGERS = {
+    "default_logger": lambda: Logger(create_new_file=True),
+}
+
 
-# Create pre-configured instances of the Logger class
+def __getattr__(name: str):
+    if name in _PRECONFIGURED_LOGGERS:
+        logger = _PRECONFIGURED_LOGGERS[name]()
+        globals()[name] = logger
+        return logger
 
-default_logger = Logger(create_new_file=True)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,19 +1,53 @@
-from cta_optimizer.station_data_loader import (
-    StationDataLoader,
-    TransferData,
-    AdjacentData,
-)
+import argparse
+import sys
+from typing import List, TYPE_CHECKING
 
-from cta_optimizer.models.kilometer import Kilometer
+from cta_optimizer.station_data_loader import StationDataLoader
 
-from cta_optimizer.stations_graph_service import StationsGraphService
+from cta_optimizer.stations_graph_service import (
+    DEFAULT_PATH_CACHE_SIZE,
+    StationsGraphService,
+)
+from cta_optimizer.lib.instrumentation import OutputFormat, instrumentation
 from cta_optimizer.lib.logger import Logger
-from cta_optimizer.models.station import Station
 
-from memory_profiler import profile
+if TYPE_CHECKING:
+    from cta_optimizer.models.station import Station
+    from cta_optimizer.station_schema import TransferData, AdjacentData
+
+
+def create_stations_graph(
+    stations: List["Station[AdjacentData, TransferData]"],
+    path_cache_size: int = DEFAULT_PATH_CACHE_SIZE,
+) -> "StationsGraphService[AdjacentData, TransferData]":
+    """
+    Build the graph main routes on: every station, with edges to its adjacent
+    stations and its transfer stations
+
+    :param stations: The loaded stations
+    :param path_cache_size: The number of paths the graph keeps, see StationsGraphService
+    :return: The graph
+    """
+    station_graph: StationsGraphService[AdjacentData, TransferData] = (
+        StationsGraphService(path_cache_size=path_cache_size)
+    )
+
+    for station in stations:
+        station_graph.add_station(station)
+
+    # add edges between adjacent stations and transfer stations
+    station_graph.add_edges(
+        (station, other_station)
+        for station in stations
+        for other_station in (
+            *station.get_adjacent_stations().keys(),
+            *station.transfer_stations.keys(),
+        )
+    )
+
+    return station_graph
 
 
-@profile
 def main():
 
     logger = Logger(
@@ -30,51 +64,22 @@ def main():
             ]
         )
 
-        stations = station_loader.get_all_stations()
-
-        station_graph: StationsGraphService[AdjacentData, TransferData] = StationsGraphService()
-
-        for station in stations:
-            station_graph.add_station(station)
+        with instrumentation.timer("main.build_graph"):
+            station_graph = create_stations_graph(station_loader.get_all_stations())
 
-        # add edges between adjacent stations
-        for station in stations:
-            for adjacent_station, _ in station.get_adjacent_stations().items():
-                station_graph.add_edge(station, adjacent_station)
-
-            # add transfer stations
-            for transfer_station, _ in station.get_transfer_stations().items():
-                station_graph.add_edge(station, transfer_station)
+        instrumentation.sample_memory("main.build_graph")
 
         granville_red_line = station_loader.get_station_by_id("yellow:Dempster-Skokie")
         dan_ryan_red_line = station_loader.get_station_by_id("orange:Midway")
 
-        shortest_path = station_graph.get_shortest_path(
-            dan_ryan_red_line, granville_red_line
-        )
-
-        total_cost = 0
-        total_distance = Kilometer(0)
+        with instrumentation.timer("main.route"):
+            trip = station_graph.get_trip(dan_ryan_red_line, granville_red_line)
 
-        last_station = None
-
-        for station in shortest_path:
+        for station in trip.get_stations():
             print(station.get_id())
 
-            if last_station is not None:
-                distance = last_station.get_location().distance_to(station.get_location())
-                total_distance += distance
-
-                is_transfer = last_station.get_transfer_data(station)
-
-                if is_transfer:
-                    if not is_transfer.free_transfer:
-                        total_cost += 2.50
-
-            last_station = station
-
-        print(f"Total cost of this trip: {total_cost}")
-        print(f"Total distance of this trip: {total_distance}")
+        print(f"Total cost of this trip: {trip.get_fare()}")
+        print(f"Total distance of this trip: {trip.get_distance()}")
 
         logger.info("Stations loaded and graph created")
 
@@ -82,5 +87,29 @@ def main():
         logger.error(f"An error occurred: {e}")
 
 
+def parse_arguments(arguments: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Find a trip on the CTA network")
+    parser.add_argument(
+        "--instrument",
+        metavar="FILE",
+        help="Record per-stage timers, counters and peak memory and write them to "
+        "FILE on exit. Also switched on by the CTA_OPTIMIZER_INSTRUMENTATION "
+        "environment variable.",
+    )
+    parser.add_argument(
+        "--instrument-format",
+        choices=[output_format.value for output_format in OutputFormat],
+        default=None,
+        help="Write a JSON report or a Chrome trace, a JSON report by default",
+    )
+
+    return parser.parse_args(arguments)
+
+
 if __name__ == "__main__":
+    options = parse_arguments(sys.argv[1:])
+
+    if options.instrument is not None:
+        instrumentation.enable(options.instrument, options.instrument_format)
+
     main()
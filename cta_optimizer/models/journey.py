@@ -0,0 +1,116 @@
+from typing import Generic, List, TypeVar
+
+from cta_optimizer.models.station import Station
+
+S = TypeVar("S", bound=Station)
+
+
+class Journey(Generic[S]):
+    def __init__(self, stations: List[S], times: List[int], trip_ids: List[str]):
+        """
+        :param stations: The stations on the journey, in order
+        :param times: The time at every station, in seconds after midnight. The
+            first time is the departure, every other one an arrival.
+        :param trip_ids: The trip ridden to every station, None for the first
+            station and for walking transfers
+        """
+        if stations is None or len(stations) == 0:
+            raise ValueError("Stations cannot be empty")
+
+        if times is None or len(times) != len(stations):
+            raise ValueError("There must be one time per station")
+
+        if trip_ids is None or len(trip_ids) != len(stations):
+            raise ValueError("There must be one trip id per station")
+
+        if any(later < earlier for earlier, later in zip(times, times[1:])):
+            raise ValueError("Times must not decrease")
+
+        self.stations = stations
+        self.times = times
+        self.trip_ids = trip_ids
+
+    def get_stations(self) -> List[S]:
+        return self.stations
+
+    def get_start(self) -> S:
+        return self.stations[0]
+
+    def get_end(self) -> S:
+        return self.stations[-1]
+
+    def get_times(self) -> List[int]:
+        return self.times
+
+    def get_trip_ids(self) -> List[str]:
+        return self.trip_ids
+
+    def get_departure_time(self) -> int:
+        return self.times[0]
+
+    def get_arrival_time(self) -> int:
+        return self.times[-1]
+
+    def get_duration(self) -> int:
+        return self.times[-1] - self.times[0]
+
+    def get_rides(self) -> List[str]:
+        """
+        :return: The id of every trip ridden, in order
+        """
+        rides = []
+
+        for trip_id in self.trip_ids:
+            if trip_id is not None and (len(rides) == 0 or rides[-1] != trip_id):
+                rides.append(trip_id)
+
+        return rides
+
+    def get_transfer_count(self) -> int:
+        return max(len(self.get_rides()) - 1, 0)
+
+    def __len__(self):
+        return len(self.stations)
+
+    def __str__(self):
+        return (
+            f"Journey: {self.get_start().get_name()} at "
+            f"{format_time(self.get_departure_time())} to "
+            f"{self.get_end().get_name()} at {format_time(self.get_arrival_time())}"
+        )
+
+
+def format_time(seconds: int) -> str:
+    """
+    :param seconds: Seconds after midnight, may run past 24 hours
+    :return: The time as HH:MM:SS
+    """
+    return f"{seconds // 3600:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+
+
+def parse_time(time: "str | int") -> int:
+    """
+    :param time: HH:MM:SS, as in GTFS stop times, or seconds after midnight
+    :return: Seconds after midnight
+    """
+    if isinstance(time, int) and not isinstance(time, bool):
+        seconds = time
+    elif isinstance(time, str):
+        parts = time.strip().split(":")
+
+        if len(parts) != 3 or not all(part.isdigit() for part in parts):
+            raise ValueError(f"Invalid time: {time}")
+
+        hours, minutes, seconds = (int(part) for part in parts)
+
+        if minutes >= 60 or seconds >= 60:
+            raise ValueError(f"Invalid time: {time}")
+
+        seconds = hours * 3600 + minutes * 60 + seconds
+    else:
+        raise ValueError("Time must be a HH:MM:SS string or a number of seconds")
+
+    if seconds < 0:
+        raise ValueError("Time cannot be negative")
+
+    return seconds
@@ -1,4 +1,6 @@
 class Kilometer:
+    __slots__ = ("value",)
+
     def __init__(self, value: float):
         if value is None:
             raise ValueError("Distance cannot be None")
@@ -9,7 +11,7 @@ class Kilometer:
         if value < 0:
             raise ValueError("Distance cannot be negative")
 
-        self.value = value
+        object.__setattr__(self, "value", value)
 
     def to_miles(self):
         from cta_optimizer.models.mile import Mile
@@ -33,3 +35,9 @@ class Kilometer:
 
     def __str__(self):
         return f"{self.value} km"
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Kilometer is immutable")
+
+    def __reduce__(self):
+        return Kilometer, (self.value,)
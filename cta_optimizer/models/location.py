@@ -1,14 +1,51 @@
 from math import radians, sin, cos, sqrt, asin
+from typing import List, Tuple, TYPE_CHECKING
+from weakref import WeakValueDictionary
+
 from cta_optimizer.models.kilometer import Kilometer
 
+# Radius of earth in kilometers. Use 3956 for miles. Determines return value units.
+EARTH_RADIUS_KILOMETERS = 6371
+
+if TYPE_CHECKING:
+    import numpy as np
+
 
 class Location:
+    """
+    An immutable pair of coordinates. The hash is computed once, as locations are
+    hashed on every lookup of the stations that hold them.
+    """
+
+    __slots__ = ("latitude", "longitude", "_hash", "__weakref__")
+
     def __init__(self, latitude: float, longitude: float):
         self.__validate_latitude(latitude)
         self.__validate_longitude(longitude)
 
-        self.latitude = latitude
-        self.longitude = longitude
+        object.__setattr__(self, "latitude", latitude)
+        object.__setattr__(self, "longitude", longitude)
+        object.__setattr__(self, "_hash", hash((latitude, longitude)))
+
+    @staticmethod
+    def intern(latitude: float, longitude: float) -> "Location":
+        """
+        Get the Location for a pair of coordinates, shared with every other caller
+        that interns the same coordinates while it is alive. Stations at the same
+        place, like the platforms of one station, then hold a single Location.
+
+        :param latitude: The latitude
+        :param longitude: The longitude
+        :return: The shared Location
+        """
+        key = (latitude, longitude)
+        location = _interned_locations.get(key)
+
+        if location is None:
+            location = Location(latitude, longitude)
+            _interned_locations[key] = location
+
+        return location
 
     @staticmethod
     def __validate_latitude(latitude: float):
@@ -62,17 +99,124 @@ class Location:
         dlat = lat2 - lat1
         a = sin(dlat / 2) ** 2 + cos(lat1) * cos(lat2) * sin(dlon / 2) ** 2
         c = 2 * asin(sqrt(a))
-        r = 6371  # Radius of earth in kilometers. Use 3956 for miles. Determines return value units.
-        return Kilometer(c * r)
+        return Kilometer(c * EARTH_RADIUS_KILOMETERS)
+
+    def distances_to(self, others: List["Location"]) -> "np.ndarray":
+        """
+        Calculate the distance between this location and every location in a list
+
+        :param others: The other locations
+        :return: A float64 array of distances in kilometers, in the order of the list
+        """
+        latitudes, longitudes = Location.__to_radians(others)
+
+        return haversine_distances(
+            radians(self.latitude), radians(self.longitude), latitudes, longitudes
+        )
+
+    @staticmethod
+    def distance_matrix(locations: List["Location"]) -> "np.ndarray":
+        """
+        Calculate the distance between every pair of locations
+
+        :param locations: The locations
+        :return: A float64 array of shape (n, n) where entry [i, j] is the
+            distance in kilometers from locations[i] to locations[j]
+        """
+        import numpy as np
+
+        latitudes, longitudes = Location.__to_radians(locations)
+
+        return haversine_distances(
+            latitudes[:, np.newaxis],
+            longitudes[:, np.newaxis],
+            latitudes[np.newaxis, :],
+            longitudes[np.newaxis, :],
+        )
+
+    @staticmethod
+    def pairwise_distances(
+        origins: List["Location"], destinations: List["Location"]
+    ) -> "np.ndarray":
+        """
+        Calculate the distance between each origin and the destination at the same position
+
+        :param origins: The origin locations
+        :param destinations: The destination locations, same length as origins
+        :return: A float64 array of distances in kilometers
+        """
+        if len(origins) != len(destinations):
+            raise ValueError("Origins and destinations must have the same length")
+
+        origin_latitudes, origin_longitudes = Location.__to_radians(origins)
+        destination_latitudes, destination_longitudes = Location.__to_radians(
+            destinations
+        )
+
+        return haversine_distances(
+            origin_latitudes,
+            origin_longitudes,
+            destination_latitudes,
+            destination_longitudes,
+        )
+
+    @staticmethod
+    def __to_radians(locations: List["Location"]):
+        import numpy as np
+
+        if locations is None:
+            raise ValueError("Locations cannot be None")
+
+        for location in locations:
+            if not isinstance(location, Location):
+                raise ValueError("Invalid location")
+
+        coordinates = np.array(
+            [(location.latitude, location.longitude) for location in locations],
+            dtype=np.float64,
+        ).reshape(-1, 2)
+
+        radians_coordinates = np.radians(coordinates)
+        return radians_coordinates[:, 0], radians_coordinates[:, 1]
 
     def __str__(self):
         return f"Location: {self.latitude}, {self.longitude}"
 
     def __eq__(self, other):
+        if self is other:
+            return True
+
         if not isinstance(other, Location):
             return False
 
         return self.latitude == other.latitude and self.longitude == other.longitude
 
     def __hash__(self):
-        return hash((self.latitude, self.longitude))
+        return self._hash
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Location is immutable")
+
+    def __reduce__(self):
+        # rebuilt through the constructor, as __setattr__ refuses to set slots
+        return Location, (self.latitude, self.longitude)
+
+
+# (latitude, longitude) -> Location, see Location.intern
+_interned_locations: "WeakValueDictionary[Tuple[float, float], Location]" = (
+    WeakValueDictionary()
+)
+
+
+def haversine_distances(lat1, lon1, lat2, lon2) -> "np.ndarray":
+    """
+    Vectorized Haversine formula over radian coordinates. Inputs broadcast
+    against each other the same way NumPy arithmetic does.
+    """
+    import numpy as np
+
+    dlon = lon2 - lon1
+    dlat = lat2 - lat1
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2) ** 2
+    c = 2 * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+    return c * EARTH_RADIUS_KILOMETERS
@@ -2,6 +2,8 @@ MILE_TO_KILOMETER = 0.621371
 
 
 class Mile:
+    __slots__ = ("value",)
+
     def __init__(self, value: float):
         if value is None:
             raise ValueError("Distance cannot be None")
@@ -11,7 +13,8 @@ class Mile:
 
         if value < 0:
             raise ValueError("Distance cannot be negative")
-        self.value = value
+
+        object.__setattr__(self, "value", value)
 
     def to_kilometers(self):
         from cta_optimizer.models.kilometer import Kilometer
@@ -35,3 +38,9 @@ class Mile:
 
     def __str__(self):
         return f"{self.value} miles"
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Mile is immutable")
+
+    def __reduce__(self):
+        return Mile, (self.value,)
@@ -1,32 +1,62 @@
-from typing import Generic, TypeVar, Dict
+from types import MappingProxyType
+from typing import Generic, TypeVar, Dict, Mapping
 
 from cta_optimizer.models.location import Location
 
 AdjacentData = TypeVar("AdjacentData")
 TransferData = TypeVar("TransferData")
 
+# Attributes that make up the identity of a station, set once by the constructor
+IDENTITY_ATTRIBUTES = frozenset(("name", "location", "route", "_id", "_hash"))
+
+# Shared by every station without transfers, until its first transfer is added.
+# Read only, so it never leaves the class: get_transfer_stations returns a dict.
+_NO_TRANSFER_STATIONS: Mapping = MappingProxyType({})
+
 
 class Station(Generic[AdjacentData, TransferData]):
+    """
+    A station is identified by its name, location and route, which cannot change
+    after construction. Its id and hash are computed once, as stations are hashed
+    on every graph and dict lookup. Whether it is closed and its adjacent and
+    transfer stations can change.
+    """
+
+    __slots__ = (
+        "name",
+        "location",
+        "route",
+        "_id",
+        "_hash",
+        "closed",
+        "transfer_stations",
+        "adjacent_stations",
+    )
+
     def __init__(self, name: str, location: Location, route: str = None):
         self.__validate_name(name)
         self.__validate_location(location)
         self.__validate_route(route)
 
-        self.name = name
-        self.location = location
-        self.route = route
+        self.__set_identity(name, location, route)
 
         self.closed = False
 
-        self.transfer_stations: Dict["Station", TransferData] = dict[
-            Station, TransferData
-        ]()
+        # most stations have no transfers, so they share one empty mapping
+        self.transfer_stations: Mapping["Station", TransferData] = _NO_TRANSFER_STATIONS
         self.adjacent_stations: Dict["Station", AdjacentData] = dict[
             Station, AdjacentData
         ]()
 
+    def __set_identity(self, name: str, location: Location, route: str):
+        object.__setattr__(self, "name", name)
+        object.__setattr__(self, "location", location)
+        object.__setattr__(self, "route", route)
+        object.__setattr__(self, "_id", f"{route}:{name}")
+        object.__setattr__(self, "_hash", hash((name, route, location)))
+
     def get_id(self):
-        return f"{self.route}:{self.name}"
+        return self._id
 
     def set_closed(self, closed: bool):
         if closed is None:
@@ -42,13 +72,26 @@ class Station(Generic[AdjacentData, TransferData]):
 
     def add_transfer_station(self, station: "Station", data: TransferData = None):
         self.__validate_station(station)
+
+        if self.transfer_stations is _NO_TRANSFER_STATIONS:
+            self.transfer_stations = dict[Station, TransferData]()
+
         self.transfer_stations[station] = data
 
     def remove_transfer_station(self, station: "Station"):
         self.__validate_station(station)
-        self.transfer_stations.pop(station, None)
 
-    def get_transfer_stations(self):
+        if station in self.transfer_stations:
+            del self.transfer_stations[station]
+
+    def get_transfer_stations(self) -> Dict["Station", TransferData]:
+        """
+        :return: The transfer stations and their data. Changes to the dict change
+            the station.
+        """
+        if self.transfer_stations is _NO_TRANSFER_STATIONS:
+            self.transfer_stations = dict[Station, TransferData]()
+
         return self.transfer_stations
 
     def get_transfer_data(self, station: "Station") -> TransferData:
@@ -80,17 +123,90 @@ class Station(Generic[AdjacentData, TransferData]):
         return f"Station: {self.name} ({self.location})"
 
     def __eq__(self, other):
+        if self is other:
+            return True
+
         if not isinstance(other, Station):
             return False
 
         return (
-            self.name == other.name
-            and self.location == other.location
+            self._hash == other._hash
+            and self.name == other.name
             and self.route == other.route
+            and self.location == other.location
         )
 
     def __hash__(self):
-        return hash((self.name, self.location))
+        return self._hash
+
+    def __setattr__(self, name, value):
+        if name in IDENTITY_ATTRIBUTES:
+            raise AttributeError(f"Station {name} cannot change")
+
+        object.__setattr__(self, name, value)
+
+    def __getstate__(self):
+        return (
+            self.name,
+            self.location,
+            self.route,
+            self.closed,
+            # the shared empty mapping cannot be pickled
+            (
+                self.transfer_stations
+                if self.transfer_stations is not _NO_TRANSFER_STATIONS
+                else None
+            ),
+            self.adjacent_stations,
+            self.__get_subclass_state(),
+        )
+
+    def __setstate__(self, state):
+        # string hashes differ between processes, so the hash is computed again
+        (
+            name,
+            location,
+            route,
+            closed,
+            transfer_stations,
+            adjacent_stations,
+            subclass_state,
+        ) = state
+        self.__set_identity(name, location, route)
+
+        for attribute, value in subclass_state.items():
+            object.__setattr__(self, attribute, value)
+
+        self.closed = closed
+        self.transfer_stations = (
+            transfer_stations
+            if transfer_stations is not None
+            else _NO_TRANSFER_STATIONS
+        )
+        self.adjacent_stations = adjacent_stations
+
+    def __get_subclass_state(self) -> Dict[str, object]:
+        # Attributes subclasses add, in their own __slots__ or in a __dict__
+        state = dict(getattr(self, "__dict__", {}))
+
+        for cls in type(self).__mro__:
+            if cls is Station:
+                break
+
+            slots = cls.__dict__.get("__slots__", ())
+
+            for attribute in (slots,) if isinstance(slots, str) else slots:
+                if attribute in ("__dict__", "__weakref__"):
+                    continue
+
+                # private slots are stored under their mangled name
+                if attribute.startswith("__") and not attribute.endswith("__"):
+                    attribute = f"_{cls.__name__.lstrip('_')}{attribute}"
+
+                if hasattr(self, attribute):
+                    state[attribute] = getattr(self, attribute)
+
+        return state
 
     @staticmethod
     def __validate_name(name: str):
@@ -0,0 +1,69 @@
+from typing import Generic, List, TypeVar
+
+from cta_optimizer.models.kilometer import Kilometer
+from cta_optimizer.models.station import Station
+
+S = TypeVar("S", bound=Station)
+
+
+class Trip(Generic[S]):
+    def __init__(
+        self,
+        stations: List[S],
+        cumulative_distances: List[float],
+        transfers: int = 0,
+        fare: float = 0.0,
+    ):
+        """
+        :param stations: The stations on the trip, in order
+        :param cumulative_distances: The distance in kilometers from the first station
+            to every station
+        :param transfers: The number of transfers between routes
+        :param fare: The fare paid for transfers
+        """
+        if stations is None or len(stations) == 0:
+            raise ValueError("Stations cannot be empty")
+
+        if cumulative_distances is None or len(cumulative_distances) != len(stations):
+            raise ValueError("There must be one cumulative distance per station")
+
+        if transfers is None or not isinstance(transfers, int) or transfers < 0:
+            raise ValueError("Transfers must be a non-negative integer")
+
+        if fare is None or not isinstance(fare, (int, float)) or fare < 0:
+            raise ValueError("Fare must be a non-negative number")
+
+        self.stations = stations
+        self.cumulative_distances = cumulative_distances
+        self.transfers = transfers
+        self.fare = fare
+
+    def get_stations(self) -> List[S]:
+        return self.stations
+
+    def get_start(self) -> S:
+        return self.stations[0]
+
+    def get_end(self) -> S:
+        return self.stations[-1]
+
+    def get_cumulative_distances(self) -> List[float]:
+        return self.cumulative_distances
+
+    def get_distance(self) -> Kilometer:
+        return Kilometer(self.cumulative_distances[-1])
+
+    def get_transfer_count(self) -> int:
+        return self.transfers
+
+    def get_fare(self) -> float:
+        return self.fare
+
+    def __len__(self):
+        return len(self.stations)
+
+    def __str__(self):
+        return (
+            f"Trip: {self.get_start().get_name()} to {self.get_end().get_name()} "
+            f"({self.get_distance()}, {self.transfers} transfers, ${self.fare:.2f})"
+        )
@@ -0,0 +1,353 @@
+"""
+network_generator.py
+
+The NetworkGenerator class writes synthetic transit networks as line files in
+the StationData schema read by StationDataLoader, from a thousand to a million
+stops, to test how the loader, the graph and the optimizers scale.
+
+Every line is a straight run across a circular service area, between two
+points on its edge, with stops evenly spaced along it and jittered a little.
+A line is fully described by its two end points, so the generator only keeps
+those in memory. Where two lines cross, the stops closest to the crossing on
+each line transfer to each other, for the share of crossings given by the
+transfer density. Stops are written to disk one at a time, a line at a time,
+so memory grows with the number of lines and not with the number of stops.
+
+The same seed and settings always produce the same files.
+
+Usage: python -m cta_optimizer.network_generator <output dir> <stops> [--seed N]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+from math import ceil, cos, pi, radians, sin, sqrt
+from typing import Dict, Iterator, List, Tuple
+
+from cta_optimizer.models.location import EARTH_RADIUS_KILOMETERS
+
+# Chicago, the center of the service area by default
+DEFAULT_CENTER = (41.8781, -87.6298)
+DEFAULT_SPREAD_KILOMETERS = 40.0
+DEFAULT_TRANSFER_DENSITY = 0.5
+DEFAULT_SPEED = 30.0
+
+# How far a stop may be moved off its line, as a share of the stop spacing
+STOP_JITTER = 0.2
+
+# How far from straight across the service area a line may run, in radians
+MAX_LINE_TURN = pi / 3
+
+KILOMETERS_PER_DEGREE = 2 * pi * EARTH_RADIUS_KILOMETERS / 360
+
+# (x, y) kilometers east and north of the center, of the two ends of a line
+LineEnds = Tuple[float, float, float, float]
+
+
+class NetworkGenerator:
+    def __init__(
+        self,
+        line_count: int,
+        stops_per_line: int,
+        transfer_density: float = DEFAULT_TRANSFER_DENSITY,
+        spread_kilometers: float = DEFAULT_SPREAD_KILOMETERS,
+        center: Tuple[float, float] = DEFAULT_CENTER,
+        speed: float = DEFAULT_SPEED,
+        seed: int = 0,
+    ):
+        """
+        :param line_count: The number of lines
+        :param stops_per_line: The number of stops on every line
+        :param transfer_density: The share of line crossings with a transfer, from
+            0 for no transfers to 1 for a transfer at every crossing
+        :param spread_kilometers: The diameter of the service area
+        :param center: The (latitude, longitude) of the center of the service area
+        :param speed: The speed written to every line file, in kilometers per hour
+        :param seed: The seed every random choice is derived from
+        """
+        if not isinstance(line_count, int) or line_count < 1:
+            raise ValueError("Line count must be a positive integer")
+
+        if not isinstance(stops_per_line, int) or stops_per_line < 2:
+            raise ValueError("Stops per line must be an integer of at least 2")
+
+        if not 0 <= transfer_density <= 1:
+            raise ValueError("Transfer density must be between 0 and 1")
+
+        if spread_kilometers <= 0:
+            raise ValueError("Spread must be positive")
+
+        if speed <= 0:
+            raise ValueError("Speed must be positive")
+
+        if not isinstance(seed, int):
+            raise ValueError("Seed must be an integer")
+
+        self.line_count = line_count
+        self.stops_per_line = stops_per_line
+        self.transfer_density = transfer_density
+        self.spread_kilometers = spread_kilometers
+        self.center = center
+        self.speed = speed
+        self.seed = seed
+
+        # zero padded, so that line files sort in line order
+        self.__route_width = len(str(line_count - 1))
+        self.__line_ends: List[LineEnds] = [
+            self.__create_line_ends(line) for line in range(line_count)
+        ]
+
+    @staticmethod
+    def for_stop_count(stop_count: int, **options) -> "NetworkGenerator":
+        """
+        Create a generator for about a number of stops, with about as many lines
+        as stops per line, the shape of a large city network
+
+        :param stop_count: The number of stops wanted, at least 4
+        :param options: Any other NetworkGenerator argument
+        :return: The generator, for at least stop_count stops
+        """
+        if not isinstance(stop_count, int) or stop_count < 4:
+            raise ValueError("Stop count must be an integer of at least 4")
+
+        line_count = max(int(sqrt(stop_count)), 2)
+        stops_per_line = ceil(stop_count / line_count)
+
+        return NetworkGenerator(line_count, stops_per_line, **options)
+
+    def get_stop_count(self) -> int:
+        return self.line_count * self.stops_per_line
+
+    def get_route_name(self, line: int) -> str:
+        return f"line_{line:0{self.__route_width}d}"
+
+    def iter_stations(self, line: int) -> Iterator[dict]:
+        """
+        Generate the stops of one line, in order along the line
+
+        :param line: The index of the line
+        :return: The stops, as StationStop dicts
+        """
+        if not 0 <= line < self.line_count:
+            raise ValueError("Invalid line")
+
+        route = self.get_route_name(line)
+        x1, y1, x2, y2 = self.__line_ends[line]
+        last = self.stops_per_line - 1
+        spacing = sqrt((x2 - x1) ** 2 + (y2 - y1) ** 2) / last
+        transfers = self.__find_transfers(line)
+        generator = random.Random(f"{self.seed}:stops:{line}")
+
+        for stop in range(self.stops_per_line):
+            share = stop / last
+            x = x1 + (x2 - x1) * share
+            y = y1 + (y2 - y1) * share
+
+            # the ends stay on the edge of the service area
+            if 0 < stop < last:
+                x += generator.uniform(-STOP_JITTER, STOP_JITTER) * spacing
+                y += generator.uniform(-STOP_JITTER, STOP_JITTER) * spacing
+
+            latitude, longitude = self.__to_coordinates(x, y)
+            adjacent_stations = [
+                f"{route}:{_get_stop_name(other_stop)}"
+                for other_stop in (stop - 1, stop + 1)
+                if 0 <= other_stop <= last
+            ]
+
+            yield {
+                "name": _get_stop_name(stop),
+                "route": route,
+                "position": {"lat": latitude, "lng": longitude},
+                "adjacent_stations": adjacent_stations,
+                "transfer_stations": {
+                    station_id: {"free_transfer": True}
+                    for station_id in transfers.get(stop, [])
+                },
+            }
+
+    def write_line_files(self, directory: str) -> List[str]:
+        """
+        Write one line file per line
+
+        :param directory: The directory to write <route>_line.json files to
+        :return: The paths of the written files
+        """
+        os.makedirs(directory, exist_ok=True)
+        files = []
+
+        for line in range(self.line_count):
+            route = self.get_route_name(line)
+            path = os.path.join(directory, f"{route}_line.json")
+            _write_line_file(path, route, self.speed, self.iter_stations(line))
+            files.append(path)
+
+        return files
+
+    def __create_line_ends(self, line: int) -> LineEnds:
+        # a line starts anywhere on the edge of the service area and ends on the
+        # far side, turned at most MAX_LINE_TURN away from straight across
+        generator = random.Random(f"{self.seed}:line:{line}")
+        radius = self.spread_kilometers / 2
+        start_angle = generator.uniform(0, 2 * pi)
+        end_angle = start_angle + pi + generator.uniform(-MAX_LINE_TURN, MAX_LINE_TURN)
+
+        return (
+            radius * cos(start_angle),
+            radius * sin(start_angle),
+            radius * cos(end_angle),
+            radius * sin(end_angle),
+        )
+
+    def __find_transfers(self, line: int) -> Dict[int, List[str]]:
+        # stop index -> ids of the stops on other lines it transfers to. Both lines
+        # of a crossing find it, so transfers always go both ways.
+        transfers: Dict[int, List[str]] = {}
+        ends = self.__line_ends[line]
+        last = self.stops_per_line - 1
+
+        for other_line, other_ends in enumerate(self.__line_ends):
+            if other_line == line:
+                continue
+
+            crossing = _find_crossing(ends, other_ends)
+
+            if crossing is None:
+                continue
+
+            first, second = min(line, other_line), max(line, other_line)
+
+            if _pair_share(self.seed, first, second) >= self.transfer_density:
+                continue
+
+            share, other_share = crossing
+            other_stop = round(other_share * last)
+            transfers.setdefault(round(share * last), []).append(
+                f"{self.get_route_name(other_line)}:{_get_stop_name(other_stop)}"
+            )
+
+        return transfers
+
+    def __to_coordinates(self, x: float, y: float) -> Tuple[float, float]:
+        latitude, longitude = self.center
+        latitude += y / KILOMETERS_PER_DEGREE
+        longitude += x / (KILOMETERS_PER_DEGREE * cos(radians(self.center[0])))
+
+        return round(latitude, 6), round(longitude, 6)
+
+
+def _get_stop_name(stop: int) -> str:
+    return f"Stop {stop}"
+
+
+def _find_crossing(ends: LineEnds, other_ends: LineEnds) -> Tuple[float, float] | None:
+    """
+    Find where two lines cross
+
+    :return: How far along each line they cross, from 0 at its start to 1 at its
+        end, or None if they do not cross
+    """
+    x1, y1, x2, y2 = ends
+    x3, y3, x4, y4 = other_ends
+    dx, dy = x2 - x1, y2 - y1
+    other_dx, other_dy = x4 - x3, y4 - y3
+    denominator = dx * other_dy - dy * other_dx
+
+    # parallel lines do not cross
+    if denominator == 0:
+        return None
+
+    share = ((x3 - x1) * other_dy - (y3 - y1) * other_dx) / denominator
+    other_share = ((x3 - x1) * dy - (y3 - y1) * dx) / denominator
+
+    if 0 <= share <= 1 and 0 <= other_share <= 1:
+        return share, other_share
+
+    return None
+
+
+def _pair_share(seed: int, first: int, second: int) -> float:
+    # A number in [0, 1) fixed for a seed and a pair of lines, from the splitmix64
+    # finalizer. Cheaper than seeding a Random for each of the many pairs.
+    mask = (1 << 64) - 1
+    value = (seed * 0x9E3779B97F4A7C15 + first * 0xBF58476D1CE4E5B9 + second) & mask
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & mask
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & mask
+    value ^= value >> 31
+
+    return value / (1 << 64)
+
+
+def _write_line_file(path: str, route: str, speed: float, stations: Iterator[dict]):
+    """
+    Write a line file one stop at a time, replacing the file in one step
+
+    :param path: The file to write
+    :param route: The route name of the line
+    :param speed: The speed of the line
+    :param stations: The stops of the line, as StationStop dicts
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    file_descriptor, temporary_path = tempfile.mkstemp(dir=directory)
+
+    try:
+        with os.fdopen(file_descriptor, "w") as f:
+            f.write(f'{{"route_name": {json.dumps(route)}, "speed": {speed!r}, ')
+            f.write('"stations": [')
+
+            for index, station in enumerate(stations):
+                if index > 0:
+                    f.write(",")
+
+                f.write("\n")
+                f.write(json.dumps(station))
+
+            f.write("\n]}\n")
+
+        os.replace(temporary_path, path)
+    except BaseException:
+        os.remove(temporary_path)
+        raise
+
+
+def main(arguments: List[str]) -> int:
+    parser = argparse.ArgumentParser(
+        description="Write a synthetic transit network as line files"
+    )
+    parser.add_argument("directory")
+    parser.add_argument("stops", type=int)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--transfer-density", type=float, default=DEFAULT_TRANSFER_DENSITY
+    )
+    parser.add_argument("--spread", type=float, default=DEFAULT_SPREAD_KILOMETERS)
+    parser.add_argument("--lines", type=int, help="Override the number of lines")
+    options = parser.parse_args(arguments)
+
+    settings = {
+        "transfer_density": options.transfer_density,
+        "spread_kilometers": options.spread,
+        "seed": options.seed,
+    }
+
+    if options.lines is not None:
+        generator = NetworkGenerator(
+            options.lines, max(ceil(options.stops / options.lines), 2), **settings
+        )
+    else:
+        generator = NetworkGenerator.for_stop_count(options.stops, **settings)
+
+    files = generator.write_line_files(options.directory)
+    print(
+        f"Wrote {generator.get_stop_count()} stops on {len(files)} lines "
+        f"to {options.directory}"
+    )
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,221 @@
+"""
+network_inference.py
+
+Infers the edges of a network from station locations alone, for feeds that
+only list the stations of every route.
+
+Adjacent stations are the edges of a minimum spanning tree over the stations
+of each route: the shortest set of hops that links every station of the
+route. A straight line becomes a chain, and a route that splits becomes a
+tree with its branches. Candidate hops only run from every station to its
+nearest neighbours, found with a StationSpatialIndex, so building the tree
+costs O(n log n) rather than measuring every pair of stations.
+
+Where the shortest hops do not follow the track, the real hops can be pinned.
+Pinned hops are always kept and the tree is built around them, so they can
+attach a branch at its real junction, or close a loop a tree cannot hold.
+
+Transfer stations are the stations of other routes within walking distance,
+found with one radius query per station.
+"""
+
+from typing import Dict, Iterable, List, Tuple
+
+from cta_optimizer.models.kilometer import Kilometer
+from cta_optimizer.models.station import Station
+from cta_optimizer.station_spatial_index import StationSpatialIndex
+
+# Nearest stations every station may be linked to. Doubled for a route whose
+# stations do not all link up within this many neighbours.
+DEFAULT_NEIGHBOR_COUNT = 4
+
+# How far a rider is expected to walk between two routes
+DEFAULT_WALKING_RADIUS_KILOMETERS = 0.2
+
+
+def infer_adjacent_stations(
+    stations: Iterable[Station],
+    neighbor_count: int = DEFAULT_NEIGHBOR_COUNT,
+    pinned_edges: Iterable[Tuple[Station, Station]] = (),
+) -> Dict[Station, List[Station]]:
+    """
+    Infer the order of the stations along every route
+
+    :param stations: The stations, of any number of routes
+    :param neighbor_count: The number of nearest stations of the same route
+        considered as a station's neighbours
+    :param pinned_edges: (station, station) hops known to be on the track, each
+        between two stations of the same route
+    :return: The adjacent stations of every station, on its own route, in both
+        directions
+    """
+    if not isinstance(neighbor_count, int) or neighbor_count < 1:
+        raise ValueError("Neighbor count must be a positive integer")
+
+    stations_by_route: Dict[str, List[Station]] = {}
+
+    for station in stations:
+        stations_by_route.setdefault(station.route, []).append(station)
+
+    pinned_by_route: Dict[str, List[Tuple[Station, Station]]] = {}
+
+    for station1, station2 in pinned_edges:
+        route_stations = stations_by_route.get(station1.route, [])
+
+        if (
+            station1 == station2
+            or station1.route != station2.route
+            or station1 not in route_stations
+            or station2 not in route_stations
+        ):
+            raise ValueError("Pinned edges must link two stations of the same route")
+
+        pinned_by_route.setdefault(station1.route, []).append((station1, station2))
+
+    adjacent_stations: Dict[Station, List[Station]] = {
+        station: []
+        for route_stations in stations_by_route.values()
+        for station in route_stations
+    }
+
+    for route, route_stations in stations_by_route.items():
+        for station1, station2 in _minimum_spanning_tree(
+            route_stations, neighbor_count, pinned_by_route.get(route, [])
+        ):
+            adjacent_stations[station1].append(station2)
+            adjacent_stations[station2].append(station1)
+
+    return adjacent_stations
+
+
+def infer_transfer_stations(
+    stations: Iterable[Station],
+    radius: float = DEFAULT_WALKING_RADIUS_KILOMETERS,
+) -> Dict[Station, List[Tuple[Station, Kilometer]]]:
+    """
+    Infer transfers between stations of different routes within walking distance
+    of each other. Stations are not chained: two stations further apart than the
+    radius never transfer, even when a third station is close to both.
+
+    :param stations: The stations, of any number of routes
+    :param radius: The walking distance in kilometers
+    :return: The (station, distance) pairs of the other routes every station
+        transfers to, nearest first. Transfers go both ways.
+    """
+    if radius is None or not isinstance(radius, (int, float)) or radius < 0:
+        raise ValueError("Radius must be a non-negative number")
+
+    stations = list(stations)
+
+    # a cell the size of the radius keeps every query to a few cells
+    index = StationSpatialIndex(stations, cell_size=max(radius, 0.01))
+
+    return {
+        station: [
+            (other_station, distance)
+            for other_station, distance in index.get_stations_within(
+                station.get_location(), radius, include_closed=True
+            )
+            if other_station.route != station.route
+        ]
+        for station in stations
+    }
+
+
+def _minimum_spanning_tree(
+    stations: List[Station],
+    neighbor_count: int,
+    pinned_edges: List[Tuple[Station, Station]],
+) -> List[Tuple[Station, Station]]:
+    """
+    Kruskal's algorithm over the hops from every station to its nearest
+    neighbours. When those hops leave the stations in several pieces, the search
+    is repeated with twice as many neighbours, up to every station.
+
+    :param stations: The stations of one route
+    :param neighbor_count: The number of nearest neighbours to start with
+    :param pinned_edges: Hops kept before any other, even when they close a cycle
+    :return: The pinned hops, then the hops of the tree, in the order they were
+        added
+    """
+    if len(stations) < 2:
+        return []
+
+    index = StationSpatialIndex(stations)
+    positions = {station: position for position, station in enumerate(stations)}
+    pinned = [
+        (
+            min(positions[station1], positions[station2]),
+            max(positions[station1], positions[station2]),
+        )
+        for station1, station2 in pinned_edges
+    ]
+
+    while True:
+        neighbor_count = min(neighbor_count, len(stations) - 1)
+        hops = set()
+
+        for station in stations:
+            position = positions[station]
+
+            # one more, as the nearest station is usually the station itself
+            for other_station, distance in index.get_nearest_stations(
+                station.get_location(), neighbor_count + 1, include_closed=True
+            ):
+                other_position = positions[other_station]
+
+                if other_position != position:
+                    hops.add(
+                        (
+                            distance.value,
+                            min(position, other_position),
+                            max(position, other_position),
+                        )
+                    )
+
+        tree, connected = _kruskal(len(stations), pinned, sorted(hops))
+
+        if connected or neighbor_count == len(stations) - 1:
+            return [(stations[first], stations[second]) for first, second in tree]
+
+        neighbor_count *= 2
+
+
+def _kruskal(
+    size: int, pinned: List[Tuple[int, int]], hops: List[Tuple[float, int, int]]
+) -> Tuple[List[Tuple[int, int]], bool]:
+    # union-find with path halving
+    parents = list(range(size))
+
+    def find(position: int) -> int:
+        while parents[position] != position:
+            parents[position] = parents[parents[position]]
+            position = parents[position]
+
+        return position
+
+    # pinned hops are kept whether or not they link two pieces
+    tree = list(dict.fromkeys(pinned))
+    pieces = size
+
+    for first, second in tree:
+        first_root, second_root = find(first), find(second)
+
+        if first_root != second_root:
+            parents[first_root] = second_root
+            pieces -= 1
+
+    for _, first, second in hops:
+        if pieces == 1:
+            break
+
+        first_root, second_root = find(first), find(second)
+
+        if first_root == second_root:
+            continue
+
+        parents[first_root] = second_root
+        pieces -= 1
+        tree.append((first, second))
+
+    return tree, pieces == 1
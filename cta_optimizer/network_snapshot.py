@@ -0,0 +1,406 @@
+"""
+network_snapshot.py
+
+The NetworkSnapshot class compiles line files into one binary file and turns
+that file back into stations and a ready-to-query StationsGraphService without
+reading JSON, running validation or recomputing distances.
+
+File layout: an 8 byte magic, an 8 byte little endian header length, a JSON
+header, then fixed-width arrays, each aligned to 64 bytes. The header records
+the content hash of the source files plus the dtype, shape and offset of every
+array, so the arrays can be memory-mapped straight from the file.
+
+Usage: python -m cta_optimizer.network_snapshot <output file> <line file>...
+"""
+
+import json
+import os
+import sys
+import tempfile
+from typing import Dict, List
+
+import numpy as np
+
+from cta_optimizer.lib.content_hash import hash_files
+from cta_optimizer.models.location import Location, haversine_distances
+from cta_optimizer.models.station import Station
+from cta_optimizer.station_data_loader import StationDataLoader, TransferData
+from cta_optimizer.stations_graph_service import (
+    TRANSFER_FARE,
+    GraphBackend,
+    StationsGraphService,
+)
+
+MAGIC = b"CTASNAP1"
+VERSION = 1
+ALIGNMENT = 64
+
+LINK_ADJACENT = 0
+LINK_TRANSFER = 1
+
+# free_transfer values, TransferData.free_transfer is an Optional[bool]
+FREE_TRANSFER_UNKNOWN = -1
+NO_TRANSFER_DATA = -2
+
+
+class SnapshotError(Exception):
+    """
+    Raised when a snapshot file cannot be read
+    """
+
+
+class NetworkSnapshot:
+    def __init__(self, path: str, header: dict, arrays: Dict[str, np.ndarray]):
+        self.path = path
+        self.header = header
+        self.arrays = arrays
+
+    @staticmethod
+    def compile(files: List[str], path: str) -> "NetworkSnapshot":
+        """
+        Load line files and write them to a snapshot
+
+        :param files: The line files to compile
+        :param path: The path of the snapshot file to write
+        :return: The written snapshot
+        """
+        loader = StationDataLoader(files, strict=True)
+        stations = loader.get_all_stations()
+        index = {station: position for position, station in enumerate(stations)}
+
+        routes = sorted({station.route or "" for station in stations})
+        route_index = {route: position for position, route in enumerate(routes)}
+
+        encoded_names = [station.get_name().encode("utf-8") for station in stations]
+        name_offsets = np.zeros(len(stations) + 1, dtype=np.int64)
+        np.cumsum([len(name) for name in encoded_names], out=name_offsets[1:])
+
+        link_sources, link_targets, link_kinds, free_transfers = [], [], [], []
+
+        for station in stations:
+            for adjacent_station in station.get_adjacent_stations().keys():
+                link_sources.append(index[station])
+                link_targets.append(index[adjacent_station])
+                link_kinds.append(LINK_ADJACENT)
+                free_transfers.append(NO_TRANSFER_DATA)
+
+            for transfer_station, data in station.transfer_stations.items():
+                link_sources.append(index[station])
+                link_targets.append(index[transfer_station])
+                link_kinds.append(LINK_TRANSFER)
+                free_transfers.append(
+                    NO_TRANSFER_DATA
+                    if data is None
+                    else (
+                        FREE_TRANSFER_UNKNOWN
+                        if data.free_transfer is None
+                        else int(data.free_transfer)
+                    )
+                )
+
+        latitudes = np.array(
+            [station.get_location().get_latitude() for station in stations],
+            dtype=np.float64,
+        )
+        longitudes = np.array(
+            [station.get_location().get_longitude() for station in stations],
+            dtype=np.float64,
+        )
+        link_sources = np.array(link_sources, dtype=np.int32)
+        link_targets = np.array(link_targets, dtype=np.int32)
+
+        arrays = {
+            "names": np.frombuffer(b"".join(encoded_names), dtype=np.uint8),
+            "name_offsets": name_offsets,
+            "routes": np.array(
+                [route_index[station.route or ""] for station in stations],
+                dtype=np.int32,
+            ),
+            "route_is_none": np.array(
+                [station.route is None for station in stations], dtype=np.uint8
+            ),
+            "latitudes": latitudes,
+            "longitudes": longitudes,
+            "closed": np.array(
+                [station.is_closed() for station in stations], dtype=np.uint8
+            ),
+            "link_sources": link_sources,
+            "link_targets": link_targets,
+            "link_kinds": np.array(link_kinds, dtype=np.uint8),
+            "free_transfers": np.array(free_transfers, dtype=np.int8),
+            "link_weights": _haversine_by_index(
+                latitudes, longitudes, link_sources, link_targets
+            ),
+        }
+
+        header = {
+            "version": VERSION,
+            "source_hash": hash_files(files),
+            "files": files,
+            "route_names": routes,
+        }
+
+        _write_snapshot(path, header, arrays)
+        return NetworkSnapshot.load(path)
+
+    @staticmethod
+    def load(path: str) -> "NetworkSnapshot":
+        """
+        Open a snapshot. Arrays are memory-mapped, not read.
+
+        :param path: The path of the snapshot file
+        :return: The snapshot
+        """
+        with open(path, "rb") as f:
+            magic = f.read(len(MAGIC))
+
+            if magic != MAGIC:
+                raise SnapshotError(f"Not a network snapshot: {path}")
+
+            header_length = int.from_bytes(f.read(8), "little")
+            header = json.loads(f.read(header_length).decode("utf-8"))
+
+        if header.get("version") != VERSION:
+            raise SnapshotError(
+                f"Unsupported snapshot version: {header.get('version')}"
+            )
+
+        arrays = {}
+
+        for name, layout in header["arrays"].items():
+            shape = tuple(layout["shape"])
+
+            if 0 in shape:
+                arrays[name] = np.zeros(shape, dtype=layout["dtype"])
+                continue
+
+            arrays[name] = np.memmap(
+                path,
+                dtype=layout["dtype"],
+                mode="r",
+                offset=layout["offset"],
+                shape=shape,
+            )
+
+        return NetworkSnapshot(path, header, arrays)
+
+    @staticmethod
+    def load_or_compile(files: List[str], path: str) -> "NetworkSnapshot":
+        """
+        Open a snapshot if it was compiled from the current content of the files,
+        otherwise compile it again
+
+        :param files: The line files the snapshot is built from
+        :param path: The path of the snapshot file
+        :return: An up to date snapshot
+        """
+        if os.path.exists(path):
+            try:
+                snapshot = NetworkSnapshot.load(path)
+
+                if snapshot.is_current(files):
+                    return snapshot
+            except (SnapshotError, ValueError, KeyError):
+                pass
+
+        return NetworkSnapshot.compile(files, path)
+
+    def is_current(self, files: List[str]) -> bool:
+        """
+        Check whether the snapshot was compiled from the current content of the files
+
+        :param files: The line files to check against
+        :return: True if the content hashes match
+        """
+        return self.header["source_hash"] == hash_files(files)
+
+    def create_stations(self) -> List[Station]:
+        """
+        Create the stations in the snapshot, with their adjacent and transfer stations
+
+        :return: A list of Station objects in the order they were compiled
+        """
+        names = bytes(self.arrays["names"])
+        name_offsets = self.arrays["name_offsets"].tolist()
+        route_names = self.header["route_names"]
+
+        stations = []
+
+        for position, (route, route_is_none, latitude, longitude, closed) in enumerate(
+            zip(
+                self.arrays["routes"].tolist(),
+                self.arrays["route_is_none"].tolist(),
+                self.arrays["latitudes"].tolist(),
+                self.arrays["longitudes"].tolist(),
+                self.arrays["closed"].tolist(),
+            )
+        ):
+            station = Station(
+                names[name_offsets[position] : name_offsets[position + 1]].decode(
+                    "utf-8"
+                ),
+                Location.intern(latitude, longitude),
+                None if route_is_none else route_names[route],
+            )
+            station.set_closed(bool(closed))
+            stations.append(station)
+
+        transfer_data = {
+            FREE_TRANSFER_UNKNOWN: TransferData(free_transfer=None),
+            0: TransferData(free_transfer=False),
+            1: TransferData(free_transfer=True),
+        }
+
+        for source, target, kind, free_transfer in zip(
+            self.arrays["link_sources"].tolist(),
+            self.arrays["link_targets"].tolist(),
+            self.arrays["link_kinds"].tolist(),
+            self.arrays["free_transfers"].tolist(),
+        ):
+            if kind == LINK_ADJACENT:
+                stations[source].add_adjacent_station(stations[target])
+            else:
+                stations[source].add_transfer_station(
+                    stations[target], transfer_data.get(free_transfer)
+                )
+
+        return stations
+
+    def create_graph_service(
+        self,
+        stations: List[Station] = None,
+        backend: GraphBackend | str = GraphBackend.CSR,
+    ) -> StationsGraphService:
+        """
+        Create a graph service with every station and an edge for every adjacent or
+        transfer link between open stations, the same graph main.py builds from the
+        line files
+
+        :param stations: Stations from create_stations, created if not given
+        :param backend: The graph backend to use
+        :return: The graph service
+        """
+        if stations is None:
+            stations = self.create_stations()
+
+        service = StationsGraphService(backend)
+
+        for station in stations:
+            service.add_station(station)
+
+        sources = self.arrays["link_sources"]
+        targets = self.arrays["link_targets"]
+        closed = self.arrays["closed"].astype(bool)
+
+        # add_edge skips edges to or from closed stations and loops
+        valid = ~closed[sources] & ~closed[targets] & (sources != targets)
+
+        # the fare rule of StationsGraphService.add_edge: transfers are paid unless
+        # they are known to be free or have no transfer data
+        transfers = self.arrays["link_kinds"][valid] == LINK_TRANSFER
+        free_transfers = self.arrays["free_transfers"][valid]
+        fares = np.where(
+            transfers & (free_transfers != 1) & (free_transfers != NO_TRANSFER_DATA),
+            TRANSFER_FARE,
+            0.0,
+        )
+
+        service.add_weighted_edge_arrays(
+            sources[valid],
+            targets[valid],
+            self.arrays["link_weights"][valid],
+            fares=fares,
+            transfers=transfers.astype(np.float64),
+        )
+
+        return service
+
+
+def _haversine_by_index(
+    latitudes: np.ndarray,
+    longitudes: np.ndarray,
+    sources: np.ndarray,
+    targets: np.ndarray,
+) -> np.ndarray:
+    latitudes, longitudes = np.radians(latitudes), np.radians(longitudes)
+
+    return haversine_distances(
+        latitudes[sources], longitudes[sources], latitudes[targets], longitudes[targets]
+    )
+
+
+def _write_snapshot(path: str, header: dict, arrays: Dict[str, np.ndarray]):
+    layouts = {}
+    offset = 0
+
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        arrays[name] = array
+        layouts[name] = {
+            "dtype": array.dtype.str,
+            "shape": list(array.shape),
+            "offset": offset,
+        }
+        offset += _align(array.nbytes)
+
+    relative_offsets = {name: layout["offset"] for name, layout in layouts.items()}
+    header = {**header, "arrays": layouts}
+    data_start = 0
+
+    # the header holds the absolute offsets, which depend on the header length
+    while True:
+        for name, layout in layouts.items():
+            layout["offset"] = data_start + relative_offsets[name]
+
+        encoded_header = json.dumps(header).encode("utf-8")
+        required_start = _align(len(MAGIC) + 8 + len(encoded_header))
+
+        if required_start <= data_start:
+            break
+
+        data_start = required_start
+
+    encoded_header += b" " * (data_start - len(MAGIC) - 8 - len(encoded_header))
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    file_descriptor, temporary_path = tempfile.mkstemp(dir=directory)
+
+    try:
+        with os.fdopen(file_descriptor, "wb") as f:
+            f.write(MAGIC)
+            f.write(len(encoded_header).to_bytes(8, "little"))
+            f.write(encoded_header)
+
+            for name, array in arrays.items():
+                f.seek(layouts[name]["offset"])
+                f.write(array.tobytes())
+
+            f.truncate(data_start + offset)
+
+        # readers never see a half written snapshot
+        os.replace(temporary_path, path)
+    except BaseException:
+        os.remove(temporary_path)
+        raise
+
+
+def _align(size: int) -> int:
+    return (size + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def main(arguments: List[str]):
+    if len(arguments) < 2:
+        print(__doc__)
+        return 1
+
+    snapshot = NetworkSnapshot.compile(arguments[1:], arguments[0])
+    print(
+        f"Compiled {len(snapshot.arrays['routes'])} stations and "
+        f"{len(snapshot.arrays['link_sources'])} links into {snapshot.path}"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,200 @@
+"""
+pareto_search.py
+
+Multi-criteria label-setting search over a CSRGraph. Instead of one distance
+per station it keeps a bag of labels per station, each label holding a
+(distance, fare, transfers) cost and a pointer to the label it was extended
+from. A label is dropped as soon as another label at the same station, or a
+label that already reached the target, is at least as good in all three
+criteria. The labels left at the target are the Pareto front: no other path is
+shorter, cheaper and has fewer transfers at once.
+
+Labels live in flat parallel lists indexed by label id, so a search allocates
+a handful of lists instead of one object per label.
+"""
+
+import heapq
+from typing import Callable, List, Tuple
+
+from cta_optimizer.csr_graph import NO_PREDECESSOR, CSRGraph
+
+# (distance, fare, transfers, station indices, cumulative distances)
+ParetoPath = Tuple[float, float, int, List[int], List[float]]
+
+
+def pareto_search(
+    graph: CSRGraph,
+    source: int,
+    target: int,
+    max_transfers: int = None,
+    heuristic: Callable[[int], float] = None,
+) -> List[ParetoPath]:
+    """
+    Find every Pareto optimal path between two stations over distance, the "fare"
+    edge attribute and the "transfer" edge attribute
+
+    :param graph: The graph to search
+    :param source: The index of the station to start from
+    :param target: The index of the station to end at
+    :param max_transfers: Drop paths with more transfers than this
+    :param heuristic: A consistent lower bound on the distance from an index to
+        the target, used to discard labels that cannot reach the target in time
+    :return: The Pareto optimal paths, shortest first
+    """
+    graph.freeze()
+
+    offsets = memoryview(graph.offsets)
+    targets = memoryview(graph.targets)
+    weights = memoryview(graph.weights)
+    edge_fares = graph.edge_data.get("fare")
+    edge_transfers = graph.edge_data.get("transfer")
+    fares = memoryview(edge_fares) if edge_fares is not None else None
+    transfer_edges = memoryview(edge_transfers) if edge_transfers is not None else None
+
+    infinity = float("inf")
+
+    if max_transfers is None:
+        max_transfers = infinity
+
+    # label id -> cost, station and parent label
+    label_distances: List[float] = [0.0]
+    label_fares: List[float] = [0.0]
+    label_transfers: List[int] = [0]
+    label_nodes: List[int] = [source]
+    label_parents: List[int] = [NO_PREDECESSOR]
+    label_removed: List[bool] = [False]
+
+    # station index -> ids of the labels at that station that are not dominated
+    bags: dict[int, List[int]] = {source: [0]}
+    # (distance, fare, transfers) of the labels that reached the target
+    front: List[Tuple[float, float, int]] = []
+    results: List[int] = []
+
+    heap = [(heuristic(source) if heuristic else 0.0, 0.0, 0, 0)]
+
+    while heap:
+        _, fare, transfers, label = heapq.heappop(heap)
+
+        if label_removed[label]:
+            continue
+
+        node = label_nodes[label]
+        distance = label_distances[label]
+        bound = distance + heuristic(node) if heuristic else distance
+
+        if _is_dominated(front, bound, fare, transfers):
+            continue
+
+        if node == target:
+            front.append((distance, fare, transfers))
+            results.append(label)
+            continue
+
+        for edge in range(offsets[node], offsets[node + 1]):
+            neighbor = targets[edge]
+            next_distance = distance + weights[edge]
+            next_fare = fare + fares[edge] if fares is not None else fare
+            next_transfers = (
+                transfers + int(transfer_edges[edge])
+                if transfer_edges is not None
+                else transfers
+            )
+
+            # an infinite weight is a masked edge, see CSRGraph.set_weight
+            if next_transfers > max_transfers or next_distance == infinity:
+                continue
+
+            next_bound = (
+                next_distance + heuristic(neighbor) if heuristic else next_distance
+            )
+
+            if _is_dominated(front, next_bound, next_fare, next_transfers):
+                continue
+
+            bag = bags.get(neighbor)
+
+            if bag is None:
+                bag = bags[neighbor] = []
+            else:
+                dominated = False
+                kept = []
+
+                for other in bag:
+                    other_distance = label_distances[other]
+                    other_fare = label_fares[other]
+                    other_transfers = label_transfers[other]
+
+                    if (
+                        other_distance <= next_distance
+                        and other_fare <= next_fare
+                        and other_transfers <= next_transfers
+                    ):
+                        dominated = True
+                        break
+
+                    if (
+                        next_distance <= other_distance
+                        and next_fare <= other_fare
+                        and next_transfers <= other_transfers
+                    ):
+                        label_removed[other] = True
+                    else:
+                        kept.append(other)
+
+                if dominated:
+                    continue
+
+                bag[:] = kept
+
+            next_label = len(label_nodes)
+            label_distances.append(next_distance)
+            label_fares.append(next_fare)
+            label_transfers.append(next_transfers)
+            label_nodes.append(neighbor)
+            label_parents.append(label)
+            label_removed.append(False)
+            bag.append(next_label)
+
+            heapq.heappush(heap, (next_bound, next_fare, next_transfers, next_label))
+
+    paths = []
+
+    for label in results:
+        nodes, distances = [], []
+        current = label
+
+        while current != NO_PREDECESSOR:
+            nodes.append(label_nodes[current])
+            distances.append(label_distances[current])
+            current = label_parents[current]
+
+        nodes.reverse()
+        distances.reverse()
+        paths.append(
+            (
+                label_distances[label],
+                label_fares[label],
+                label_transfers[label],
+                nodes,
+                distances,
+            )
+        )
+
+    return paths
+
+
+def _is_dominated(
+    front: List[Tuple[float, float, int]],
+    distance: float,
+    fare: float,
+    transfers: int,
+) -> bool:
+    for front_distance, front_fare, front_transfers in front:
+        if (
+            front_distance <= distance
+            and front_fare <= fare
+            and front_transfers <= transfers
+        ):
+            return True
+
+    return False
@@ -0,0 +1,429 @@
+"""
+route_genetic_algorithm.py
+
+The RouteGeneticAlgorithm class searches for a set of routes that serves a
+demand matrix well. A route is the shortest path between two terminal
+stations, so a candidate route set is stored as an integer array of terminal
+pairs and a whole population is a (population size, route count, 2) array.
+
+Fitness is evaluated for the whole population at once from precomputed
+all-pairs shortest paths. Every part of a shortest path is itself a shortest
+path, so riding a route between two of its stations costs exactly their graph
+distance. A trip is taken directly when one route serves both stations,
+otherwise with one transfer at the station that minimizes the total distance,
+otherwise it is unserved. Lower fitness is better.
+
+Trips are assumed to be reversible: the network links stations both ways with
+the same distance, as the line files do.
+"""
+
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from cta_optimizer.models.station import Station
+from cta_optimizer.stations_graph_service import StationsGraphService
+
+DEFAULT_POPULATION_SIZE = 100
+DEFAULT_ELITE_COUNT = 2
+DEFAULT_TOURNAMENT_SIZE = 3
+DEFAULT_CROSSOVER_RATE = 0.9
+DEFAULT_MUTATION_RATE = 0.05
+
+# Penalties are in kilometers of travel, so they add to trip distances
+DEFAULT_TRANSFER_PENALTY_KILOMETERS = 2.0
+DEFAULT_UNSERVED_PENALTY_KILOMETERS = 100.0
+
+# Arrays fitness is evaluated from, derived once from the distances and demand
+FITNESS_ARRAYS = (
+    "demand_stations",
+    "trip_demand",
+    "trip_distances",
+    "trip_distances_float32",
+    "hub_distances",
+)
+
+
+def get_fitness_arrays(
+    distances: np.ndarray, demand: np.ndarray
+) -> Dict[str, np.ndarray]:
+    """
+    Derive the arrays fitness is evaluated from. They only depend on the distances
+    and the demand, so algorithms over the same matrices can share them.
+
+    :param distances: The all-pairs shortest path distances
+    :param demand: The demand matrix
+    :return: The arrays, by FITNESS_ARRAYS name
+    """
+    # Only stations that appear in some trip are worth evaluating
+    demand_stations = np.flatnonzero((demand.sum(axis=0) + demand.sum(axis=1)) > 0)
+    trip_distances = distances[np.ix_(demand_stations, demand_stations)]
+
+    return {
+        "demand_stations": demand_stations,
+        "trip_demand": demand[np.ix_(demand_stations, demand_stations)],
+        "trip_distances": trip_distances,
+        "trip_distances_float32": trip_distances.astype(np.float32),
+        # hub_distances[t, o] is the distance from hub t to the station of trip o
+        "hub_distances": distances[:, demand_stations].astype(np.float32),
+    }
+
+
+class RouteGeneticAlgorithm:
+    def __init__(
+        self,
+        graph_service: StationsGraphService,
+        route_count: int,
+        demand: np.ndarray = None,
+        population_size: int = DEFAULT_POPULATION_SIZE,
+        elite_count: int = DEFAULT_ELITE_COUNT,
+        tournament_size: int = DEFAULT_TOURNAMENT_SIZE,
+        crossover_rate: float = DEFAULT_CROSSOVER_RATE,
+        mutation_rate: float = DEFAULT_MUTATION_RATE,
+        transfer_penalty: float = DEFAULT_TRANSFER_PENALTY_KILOMETERS,
+        unserved_penalty: float = DEFAULT_UNSERVED_PENALTY_KILOMETERS,
+        seed: int | np.random.Generator = None,
+        shortest_paths: Tuple[np.ndarray, np.ndarray] = None,
+        population: np.ndarray = None,
+        fitness: np.ndarray = None,
+        fitness_arrays: Dict[str, np.ndarray] = None,
+    ):
+        """
+        :param graph_service: The graph the routes run on, linking stations both ways.
+            May be None when shortest_paths is given, get_routes then cannot be used.
+        :param route_count: The number of routes in every candidate route set
+        :param demand: A matrix where [i, j] is the number of trips from station i to
+            station j, in get_all_stations() order. Defaults to one trip between
+            every pair of stations.
+        :param population_size: The number of route sets per generation
+        :param elite_count: The number of best route sets copied unchanged into the next generation
+        :param tournament_size: The number of route sets compared to pick each parent
+        :param crossover_rate: The chance that a child mixes the routes of two parents
+        :param mutation_rate: The chance that each terminal is replaced by a random station
+        :param transfer_penalty: The cost of one transfer, in kilometers
+        :param unserved_penalty: The cost of a trip that needs more than one transfer, in kilometers
+        :param seed: Seed for the random number generator, or the generator itself
+        :param shortest_paths: A precomputed graph_service.get_all_pairs_shortest_paths()
+        :param population: The route sets to start from instead of random ones
+        :param fitness: The fitness of population, to not evaluate it again
+        :param fitness_arrays: Precomputed get_fitness_arrays(distances, demand) for
+            these shortest paths and demand, which are then trusted as they are
+        """
+        if graph_service is None and shortest_paths is None:
+            raise ValueError("Graph service cannot be None")
+
+        if not isinstance(route_count, int) or route_count < 1:
+            raise ValueError("Route count must be a positive integer")
+
+        if not isinstance(population_size, int) or population_size < 2:
+            raise ValueError("Population size must be an integer of at least 2")
+
+        if not isinstance(elite_count, int) or not 0 <= elite_count < population_size:
+            raise ValueError("Elite count must be between 0 and the population size")
+
+        if not isinstance(tournament_size, int) or tournament_size < 1:
+            raise ValueError("Tournament size must be a positive integer")
+
+        if not 0 <= crossover_rate <= 1 or not 0 <= mutation_rate <= 1:
+            raise ValueError("Crossover and mutation rates must be between 0 and 1")
+
+        self.graph_service = graph_service
+        self.stations: List[Station] = (
+            [] if graph_service is None else list(graph_service.get_all_stations())
+        )
+
+        if shortest_paths is None:
+            shortest_paths = graph_service.get_all_pairs_shortest_paths()
+
+        distances, predecessors = shortest_paths
+        distances = np.asarray(distances, dtype=np.float64)
+        predecessors = np.asarray(predecessors)
+        size = len(distances)
+
+        if size < 2:
+            raise ValueError("The graph must have at least two stations")
+
+        if (
+            distances.shape != (size, size)
+            or predecessors.shape != (size, size)
+            or predecessors.dtype.kind != "i"
+            or (graph_service is not None and len(self.stations) != size)
+        ):
+            raise ValueError("Shortest paths do not match the graph")
+
+        if demand is None:
+            if fitness_arrays is not None:
+                raise ValueError("Demand must be given with the fitness arrays")
+
+            demand = np.ones((size, size)) - np.eye(size)
+
+        demand = np.asarray(demand, dtype=np.float64)
+
+        if demand.shape != (size, size):
+            raise ValueError("Demand matrix does not match the graph")
+
+        if fitness_arrays is None:
+            if np.any(demand < 0):
+                raise ValueError("Demand cannot be negative")
+
+            fitness_arrays = get_fitness_arrays(distances, demand)
+
+        self.distances = distances
+        self.predecessors = predecessors
+        self.demand = demand
+        self.route_count = route_count
+        self.population_size = population_size
+        self.elite_count = elite_count
+        self.tournament_size = tournament_size
+        self.crossover_rate = crossover_rate
+        self.mutation_rate = mutation_rate
+        self.transfer_penalty = transfer_penalty
+        self.unserved_penalty = unserved_penalty
+        self.random = np.random.default_rng(seed)
+
+        self.fitness_arrays = fitness_arrays
+        self.__demand_stations = fitness_arrays["demand_stations"]
+        self.__trip_demand = fitness_arrays["trip_demand"]
+        self.__trip_distances = fitness_arrays["trip_distances"]
+        self.__trip_distances_float32 = fitness_arrays["trip_distances_float32"]
+        self.__hub_distances = fitness_arrays["hub_distances"]
+
+        if population is None:
+            population = self.create_population()
+
+        population = np.asarray(population, dtype=np.int64)
+
+        if population.shape != (population_size, route_count, 2):
+            raise ValueError("Population does not match the population size")
+
+        if population.min() < 0 or population.max() >= size:
+            raise ValueError("Invalid station index")
+
+        if fitness is None:
+            fitness = self.evaluate(population)
+        elif np.shape(fitness) != (population_size,):
+            raise ValueError("Fitness does not match the population size")
+
+        self.population = population
+        self.fitness = np.asarray(fitness, dtype=np.float64)
+        self.generation = 0
+        self.history: List[float] = [float(self.fitness.min())]
+
+    def create_population(self) -> np.ndarray:
+        """
+        Create random route sets whose terminals are connected
+
+        :return: A (population size, route count, 2) array of terminal station indices
+        """
+        reachable = np.argwhere(
+            np.isfinite(self.distances) & ~np.eye(len(self.distances), dtype=bool)
+        )
+
+        if len(reachable) == 0:
+            raise ValueError("The graph has no connected pair of stations")
+
+        picks = self.random.integers(
+            len(reachable), size=(self.population_size, self.route_count)
+        )
+        return reachable[picks].astype(np.int64)
+
+    def evaluate(self, population: np.ndarray) -> np.ndarray:
+        """
+        Score every route set in a population
+
+        :param population: A (population size, route count, 2) array of terminals
+        :return: The demand weighted cost of every route set, lower is better
+        """
+        is_direct, costs = self.__evaluate_transfers(population)
+
+        # turn the transfer matrix into the cost of every trip in place, the
+        # matrices are the largest arrays of a generation
+        costs += np.float32(self.transfer_penalty)
+        np.copyto(costs, np.float32(self.unserved_penalty), where=np.isinf(costs))
+        np.copyto(costs, self.__trip_distances_float32, where=is_direct)
+
+        return costs.reshape(len(costs), -1) @ self.__trip_demand.ravel()
+
+    def evaluate_trips(
+        self, population: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Score every trip between stations with demand, for every route set
+
+        :param population: A (population size, route count, 2) array of terminals
+        :return: (costs, transfers, served): the penalized cost, the number of
+            transfers and whether the trip is served, each of shape (population size,
+            stations, stations) over the stations that have demand
+        """
+        is_direct, transfer = self.__evaluate_transfers(population)
+
+        served = is_direct | np.isfinite(transfer)
+        transfers = (served & ~is_direct).astype(np.int64)
+        costs = np.where(
+            is_direct,
+            self.__trip_distances,
+            np.where(served, transfer + self.transfer_penalty, self.unserved_penalty),
+        )
+
+        return costs, transfers, served
+
+    def __evaluate_transfers(
+        self, population: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        # is_direct[p, o, d] is whether one route of route set p serves trip o, d and
+        # transfer[p, o, d] the shortest distance of the trip with one transfer
+        population = np.asarray(population, dtype=np.int64)
+
+        on_route = self.__get_stations_on_routes(population[..., 0], population[..., 1])
+        trip_on_route = on_route[..., self.__demand_stations].astype(np.float32)
+
+        # two stations share a route when some route serves both of them, which a
+        # batched matrix product counts for every pair at once
+        is_direct = np.matmul(trip_on_route.transpose(0, 2, 1), trip_on_route) > 0
+
+        # hubs[p] lists the stations served by at least two routes of route set p,
+        # padded with unused slots so every route set can be handled at once
+        is_hub = on_route.sum(axis=1) >= 2
+        hub_count = int(is_hub.sum(axis=1).max())
+        hubs = np.argsort(~is_hub, axis=1, kind="stable")[:, :hub_count]
+        used = np.take_along_axis(is_hub, hubs, axis=1)
+
+        transfer = np.full(is_direct.shape, np.inf, dtype=np.float32)
+        candidate = np.empty_like(transfer)
+        population_indices = np.arange(len(population))
+
+        for slot in range(hub_count):
+            hub = hubs[:, slot]
+            hub_on_route = on_route[population_indices, :, hub].astype(np.float32)
+            shares_route = np.matmul(hub_on_route[:, None, :], trip_on_route)[:, 0] > 0
+
+            to_hub = np.where(
+                shares_route & used[:, slot, None],
+                self.__hub_distances[hub],
+                np.float32(np.inf),
+            )
+
+            # min plus product: ride to the hub, then from the hub on another route
+            np.add(to_hub[:, :, None], to_hub[:, None, :], out=candidate)
+            np.minimum(transfer, candidate, out=transfer)
+
+        return is_direct, transfer
+
+    def __get_stations_on_routes(
+        self, starts: np.ndarray, ends: np.ndarray
+    ) -> np.ndarray:
+        # Walk every route back from its end to its start at the same time
+        on_route = np.zeros((*starts.shape, len(self.distances)), dtype=bool)
+        population_indices, route_indices = np.indices(starts.shape)
+
+        current = ends.copy()
+        active = np.isfinite(self.distances[starts, ends])
+
+        while active.any():
+            on_route[
+                population_indices[active], route_indices[active], current[active]
+            ] = True
+            active &= current != starts
+            current = np.where(active, self.predecessors[starts, current], current)
+
+        return on_route
+
+    def step(self):
+        """
+        Advance one generation: keep the elite, then fill the population with
+        mutated children of tournament selected parents
+        """
+        order = np.argsort(self.fitness, kind="stable")
+        elite = self.population[order[: self.elite_count]]
+
+        child_count = self.population_size - self.elite_count
+        first_parents = self.population[self.__select(child_count)]
+        second_parents = self.population[self.__select(child_count)]
+
+        # route level uniform crossover, whole routes are taken from either parent
+        crossover = self.random.random(child_count) < self.crossover_rate
+        take_second = (
+            self.random.random((child_count, self.route_count)) < 0.5
+        ) & crossover[:, None]
+        children = np.where(take_second[..., None], second_parents, first_parents)
+
+        children = self.__mutate(children)
+
+        self.population = np.concatenate([elite, children])
+        self.fitness = self.evaluate(self.population)
+        self.generation += 1
+        self.history.append(float(self.fitness.min()))
+
+    def run(self, generations: int) -> np.ndarray:
+        """
+        Advance several generations
+
+        :param generations: The number of generations to run
+        :return: The best route set found, a (route count, 2) array of terminals
+        """
+        if not isinstance(generations, int) or generations < 0:
+            raise ValueError("Generations must be a non-negative integer")
+
+        for _ in range(generations):
+            self.step()
+
+        return self.get_best()
+
+    def get_best(self) -> np.ndarray:
+        return self.population[int(np.argmin(self.fitness))].copy()
+
+    def get_best_fitness(self) -> float:
+        return float(self.fitness.min())
+
+    def get_routes(self, route_set: np.ndarray) -> List[List[Station]]:
+        """
+        Expand a route set into the stations each route stops at
+
+        :param route_set: A (route count, 2) array of terminals
+        :return: The stations of every route, from its first terminal to its second,
+            or an empty list for a route whose terminals are not connected
+        """
+        if self.graph_service is None:
+            raise ValueError("Routes need the graph service")
+
+        routes = []
+
+        for start, end in np.asarray(route_set).tolist():
+            if not np.isfinite(self.distances[start, end]):
+                routes.append([])
+                continue
+
+            # the same paths the fitness was evaluated on
+            route = [end]
+
+            while route[-1] != start:
+                route.append(int(self.predecessors[start, route[-1]]))
+
+            routes.append([self.stations[index] for index in reversed(route)])
+
+        return routes
+
+    def __select(self, count: int) -> np.ndarray:
+        # tournament selection, the fittest of tournament_size random contestants
+        contestants = self.random.integers(
+            self.population_size, size=(count, self.tournament_size)
+        )
+        winners = np.argmin(self.fitness[contestants], axis=1)
+        return contestants[np.arange(count), winners]
+
+    def __mutate(self, children: np.ndarray) -> np.ndarray:
+        size = len(self.distances)
+        mutate = self.random.random(children.shape) < self.mutation_rate
+        children = np.where(
+            mutate, self.random.integers(size, size=children.shape), children
+        )
+
+        # a route needs two different terminals
+        loops = children[..., 0] == children[..., 1]
+        children[..., 1] = np.where(
+            loops,
+            (children[..., 1] + self.random.integers(1, size, size=loops.shape)) % size,
+            children[..., 1],
+        )
+
+        return children
@@ -0,0 +1,361 @@
+"""
+shortest_path_table.py
+
+The ShortestPathTable class holds precomputed all-pairs shortest path
+distances and predecessors for a station graph. The matrices are stored as
+.npy files and opened memory-mapped, so several processes reading the same
+table share one copy in the page cache.
+"""
+
+import heapq
+import json
+import os
+import shutil
+import tempfile
+from typing import List, Tuple
+
+import numpy as np
+
+NO_PREDECESSOR = -1
+
+DISTANCES_FILE = "distances.npy"
+PREDECESSORS_FILE = "predecessors.npy"
+STATIONS_FILE = "stations.json"
+
+
+class ShortestPathTable:
+    def __init__(
+        self, station_ids: List[str], distances: np.ndarray, predecessors: np.ndarray
+    ):
+        if distances.shape != (len(station_ids), len(station_ids)):
+            raise ValueError("Distance matrix does not match the station list")
+
+        if predecessors.shape != distances.shape:
+            raise ValueError("Predecessor matrix does not match the distance matrix")
+
+        self.station_ids = station_ids
+        self.distances = distances
+        self.predecessors = predecessors
+
+    @staticmethod
+    def build(
+        station_ids: List[str],
+        adjacency: List[List[Tuple[int, float]]],
+        directory: str,
+    ) -> "ShortestPathTable":
+        """
+        Run a single source Dijkstra from every station and write the resulting
+        distance and predecessor matrices to a directory
+
+        :param station_ids: The station ids, in index order
+        :param adjacency: For every station index, a list of (target index, weight) pairs
+        :param directory: The directory to write the table to
+        :return: The table, opened memory-mapped from the directory
+        """
+        if len(adjacency) != len(station_ids):
+            raise ValueError("Adjacency does not match the station list")
+
+        size = len(station_ids)
+        parent = os.path.dirname(os.path.abspath(directory))
+        os.makedirs(parent, exist_ok=True)
+
+        # Write into a temporary directory first so that concurrent readers never
+        # see a half written table
+        temporary_directory = tempfile.mkdtemp(dir=parent)
+
+        try:
+            distances = np.lib.format.open_memmap(
+                os.path.join(temporary_directory, DISTANCES_FILE),
+                mode="w+",
+                dtype=np.float32,
+                shape=(size, size),
+            )
+            predecessors = np.lib.format.open_memmap(
+                os.path.join(temporary_directory, PREDECESSORS_FILE),
+                mode="w+",
+                dtype=np.int32,
+                shape=(size, size),
+            )
+
+            for source in range(size):
+                distances[source], predecessors[source] = _single_source_dijkstra(
+                    adjacency, source
+                )
+
+            distances.flush()
+            predecessors.flush()
+            del distances, predecessors
+
+            with open(
+                os.path.join(temporary_directory, STATIONS_FILE), "w", encoding="utf-8"
+            ) as f:
+                json.dump(station_ids, f)
+
+            try:
+                os.rename(temporary_directory, directory)
+            except OSError:
+                # Another process finished the same table first
+                shutil.rmtree(temporary_directory, ignore_errors=True)
+
+        except BaseException:
+            shutil.rmtree(temporary_directory, ignore_errors=True)
+            raise
+
+        return ShortestPathTable.load(directory)
+
+    @staticmethod
+    def load(directory: str) -> "ShortestPathTable":
+        """
+        Open a table previously written by build
+
+        :param directory: The directory the table was written to
+        :return: The table, with both matrices memory-mapped read only
+        """
+        with open(os.path.join(directory, STATIONS_FILE), "r", encoding="utf-8") as f:
+            station_ids = json.load(f)
+
+        return ShortestPathTable(
+            station_ids,
+            np.load(os.path.join(directory, DISTANCES_FILE), mmap_mode="r"),
+            np.load(os.path.join(directory, PREDECESSORS_FILE), mmap_mode="r"),
+        )
+
+    @staticmethod
+    def exists(directory: str) -> bool:
+        return all(
+            os.path.exists(os.path.join(directory, file))
+            for file in (DISTANCES_FILE, PREDECESSORS_FILE, STATIONS_FILE)
+        )
+
+    def remove_edges(
+        self,
+        edges: List[Tuple[int, int]],
+        adjacency: List[List[Tuple[int, float]]],
+    ):
+        """
+        Update the table after edges were taken out of the graph it was built from.
+        Only start stations whose shortest path tree used one of the edges change,
+        and of those only the stations below the edges in the tree are searched
+        again. The change is kept in memory, see __make_writable.
+
+        :param edges: The (source index, target index) pairs taken out
+        :param adjacency: The adjacency of the graph without the edges, as in build
+        """
+        sources = np.array([source for source, _ in edges], dtype=np.int64)
+        targets = np.array([target for _, target in edges], dtype=np.int64)
+        # [start, edge]: whether the shortest path tree of start uses the edge
+        in_tree = self.predecessors[:, targets] == sources
+        rows = np.flatnonzero(in_tree.any(axis=1))
+
+        if len(rows) == 0:
+            return
+
+        reverse_adjacency: List[List[Tuple[int, float]]] = [[] for _ in adjacency]
+
+        for source, source_edges in enumerate(adjacency):
+            for target, weight in source_edges:
+                reverse_adjacency[target].append((source, weight))
+
+        self.__make_writable()
+
+        for row in rows.tolist():
+            distances = self.distances[row].tolist()
+            predecessors = self.predecessors[row].tolist()
+            _repair_after_removal(
+                adjacency,
+                reverse_adjacency,
+                distances,
+                predecessors,
+                targets[in_tree[row]].tolist(),
+            )
+            self.distances[row] = distances
+            self.predecessors[row] = predecessors
+
+    def add_edges(
+        self,
+        edges: List[Tuple[int, int, float]],
+        adjacency: List[List[Tuple[int, float]]],
+    ):
+        """
+        Update the table after edges were added to the graph it was built from.
+        Only start stations for which one of the edges is a shortcut change, and
+        of those only the stations the shortcut brings closer are visited.
+
+        :param edges: The (source index, target index, weight) of the added edges
+        :param adjacency: The adjacency of the graph with the edges, as in build
+        """
+        sources = np.array([source for source, _, _ in edges], dtype=np.int64)
+        targets = np.array([target for _, target, _ in edges], dtype=np.int64)
+        weights = np.array([weight for _, _, weight in edges], dtype=np.float64)
+        rows = np.flatnonzero(
+            (self.distances[:, sources] + weights < self.distances[:, targets]).any(
+                axis=1
+            )
+        )
+
+        if len(rows) == 0:
+            return
+
+        self.__make_writable()
+
+        for row in rows.tolist():
+            distances = self.distances[row].tolist()
+            predecessors = self.predecessors[row].tolist()
+            _repair_after_insertion(adjacency, distances, predecessors, edges)
+            self.distances[row] = distances
+            self.predecessors[row] = predecessors
+
+    def __make_writable(self):
+        # Matrices opened from a directory become copy-on-write: only the pages of
+        # changed rows are copied, and the files other processes share are left
+        # as built
+        if not self.distances.flags.writeable:
+            self.distances = _make_writable(self.distances)
+
+        if not self.predecessors.flags.writeable:
+            self.predecessors = _make_writable(self.predecessors)
+
+    def get_distance(self, start: int, end: int) -> float:
+        return float(self.distances[start, end])
+
+    def get_path(self, start: int, end: int) -> List[int]:
+        """
+        Rebuild the shortest path between two station indices by walking the
+        predecessor row of the start station
+
+        :param start: The index of the start station
+        :param end: The index of the end station
+        :return: The station indices on the path, or an empty list if there is no path
+        """
+        if start == end:
+            return [start]
+
+        row = self.predecessors[start]
+
+        if row[end] == NO_PREDECESSOR:
+            return []
+
+        path = [end]
+        current = end
+
+        while current != start:
+            current = int(row[current])
+            path.append(current)
+
+        path.reverse()
+        return path
+
+
+def _make_writable(matrix: np.ndarray) -> np.ndarray:
+    if isinstance(matrix, np.memmap) and matrix.filename is not None:
+        return np.load(matrix.filename, mmap_mode="c")
+
+    return np.array(matrix)
+
+
+def _repair_after_removal(
+    adjacency: List[List[Tuple[int, float]]],
+    reverse_adjacency: List[List[Tuple[int, float]]],
+    distances: List[float],
+    predecessors: List[int],
+    heads: List[int],
+):
+    # Every station below a removed edge in the shortest path tree lost its path.
+    # The stations of the tree that are left keep theirs, so the lost ones are
+    # seeded from their edges into the rest of the tree and searched again.
+    lost = set(heads)
+    stack = list(heads)
+
+    while stack:
+        node = stack.pop()
+
+        for target, _ in adjacency[node]:
+            if predecessors[target] == node and target not in lost:
+                lost.add(target)
+                stack.append(target)
+
+    for node in lost:
+        distances[node] = float("inf")
+        predecessors[node] = NO_PREDECESSOR
+
+    heap = []
+
+    for node in lost:
+        for source, weight in reverse_adjacency[node]:
+            if source not in lost and distances[source] + weight < distances[node]:
+                distances[node] = distances[source] + weight
+                predecessors[node] = source
+
+        if distances[node] != float("inf"):
+            heap.append((distances[node], node))
+
+    heapq.heapify(heap)
+    _relax(adjacency, distances, predecessors, heap)
+
+
+def _repair_after_insertion(
+    adjacency: List[List[Tuple[int, float]]],
+    distances: List[float],
+    predecessors: List[int],
+    edges: List[Tuple[int, int, float]],
+):
+    # Only stations an added edge brings closer change, so the search starts at
+    # the targets of the shortcuts and stops where distances stop improving
+    heap = []
+
+    for source, target, weight in edges:
+        if distances[source] + weight < distances[target]:
+            distances[target] = distances[source] + weight
+            predecessors[target] = source
+            heap.append((distances[target], target))
+
+    heapq.heapify(heap)
+    _relax(adjacency, distances, predecessors, heap)
+
+
+def _relax(
+    adjacency: List[List[Tuple[int, float]]],
+    distances: List[float],
+    predecessors: List[int],
+    heap: List[Tuple[float, int]],
+):
+    while heap:
+        distance, node = heapq.heappop(heap)
+
+        if distance > distances[node]:
+            continue
+
+        for target, weight in adjacency[node]:
+            candidate = distance + weight
+
+            if candidate < distances[target]:
+                distances[target] = candidate
+                predecessors[target] = node
+                heapq.heappush(heap, (candidate, target))
+
+
+def _single_source_dijkstra(
+    adjacency: List[List[Tuple[int, float]]], source: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    size = len(adjacency)
+    distances = [float("inf")] * size
+    predecessors = [NO_PREDECESSOR] * size
+
+    distances[source] = 0.0
+    heap = [(0.0, source)]
+
+    while heap:
+        distance, node = heapq.heappop(heap)
+
+        if distance > distances[node]:
+            continue
+
+        for target, weight in adjacency[node]:
+            candidate = distance + weight
+
+            if candidate < distances[target]:
+                distances[target] = candidate
+                predecessors[target] = node
+                heapq.heappush(heap, (candidate, target))
+
+    return np.array(distances, dtype=np.float64), np.array(predecessors, dtype=np.int32)
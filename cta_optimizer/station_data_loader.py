@@ -6,43 +6,133 @@ data from a file and returning a list of Station objects.
 """
 
 import json
-from typing import List, Optional
-from pydantic import BaseModel, ValidationError
+import os
+from typing import Dict, List, TYPE_CHECKING
 
+from cta_optimizer.lib.instrumentation import instrumentation
 from cta_optimizer.models.location import Location
 from cta_optimizer.models.station import Station
 
+if TYPE_CHECKING:
+    from cta_optimizer.station_spatial_index import StationSpatialIndex
 
-class TransferData(BaseModel):
-    free_transfer: Optional[bool]
 
+# Speed in kilometers per hour of line files that do not give one
+DEFAULT_LINE_SPEED = 30.0
 
-class AdjacentData(BaseModel):
-    pass
+# The pydantic schema lives in station_schema and is imported on first use.
+# Its models are still importable from this module.
+SCHEMA_NAMES = (
+    "TransferData",
+    "AdjacentData",
+    "Position",
+    "StationStop",
+    "StationData",
+)
 
+if TYPE_CHECKING:
+    from cta_optimizer.station_schema import (
+        TransferData,
+        AdjacentData,
+        Position,
+        StationStop,
+        StationData,
+    )
 
-class Position(BaseModel):
-    lat: float
-    lng: float
 
+def __getattr__(name: str):
+    if name in SCHEMA_NAMES:
+        from cta_optimizer import station_schema
 
-class StationStop(BaseModel):
-    name: str
-    closed: bool = False
-    route: str
-    position: Position
-    adjacent_stations: List[str] | dict[str, AdjacentData]
-    transfer_stations: dict[str, TransferData]
+        return getattr(station_schema, name)
 
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-class StationData(BaseModel):
-    route_name: str
-    speed: float
-    stations: List[StationStop]
+
+class StationDataLoadError(Exception):
+    """
+    Raised, or recorded in StationDataLoader.load_errors, when a station file
+    cannot be read or validated
+    """
+
+    def __init__(self, file: str, message: str, cause: Exception = None):
+        super().__init__(f"{message} ({file}): {cause}")
+        self.file = file
+        self.message = message
+        self.cause = cause
+
+    def __reduce__(self):
+        # Keep the error picklable across worker processes
+        return StationDataLoadError, (self.file, self.message, self.cause)
+
+
+def _parse_station_file(file: str) -> "StationData | StationDataLoadError":
+    """
+    Read and validate one station file. Errors are returned rather than raised so
+    that one bad file does not cancel the other files loading next to it.
+
+    :param file: The path of the file to load
+    :return: The validated StationData, or the error that stopped it from loading
+    """
+    from pydantic import ValidationError
+
+    from cta_optimizer.station_schema import StationData
+
+    try:
+        with open(file, "r") as f:
+            data = json.load(f)
+
+        if isinstance(data, list):
+            data = _wrap_station_list(file, data)
+
+        return StationData(**data)
+
+    except (OSError, json.JSONDecodeError) as e:
+        return StationDataLoadError(file, "Error loading station data", e)
+    except ValidationError as e:
+        return StationDataLoadError(file, "Error validating station data", e)
+    except Exception as e:
+        return StationDataLoadError(file, "An unknown error occurred", e)
+
+
+def _wrap_station_list(file: str, stations: list) -> dict:
+    """
+    Line files written as a bare list of stops, like the bundled CTA files, have
+    no route name or speed. The route name is taken from the first stop, or from
+    the file name, and the speed defaults to DEFAULT_LINE_SPEED.
+
+    :param file: The path of the file the stops were read from
+    :param stations: The stops
+    :return: The stops in the StationData layout
+    """
+    if len(stations) > 0 and isinstance(stations[0], dict) and "route" in stations[0]:
+        route_name = stations[0]["route"]
+    else:
+        route_name = os.path.splitext(os.path.basename(file))[0].removesuffix("_line")
+
+    return {
+        "route_name": route_name,
+        "speed": DEFAULT_LINE_SPEED,
+        "stations": stations,
+    }
 
 
 class StationDataLoader:
-    def __init__(self, files: List[str] = None):
+    def __init__(
+        self,
+        files: List[str] = None,
+        max_workers: int = None,
+        use_processes: bool = False,
+        strict: bool = False,
+    ):
+        """
+        :param files: The station files to load
+        :param max_workers: The number of files to read and validate at once.
+            Defaults to the executor's own default
+        :param use_processes: Whether to parse in worker processes instead of threads
+        :param strict: Whether to raise the first StationDataLoadError instead of
+            skipping files that fail to load
+        """
         if files is None:
             raise ValueError("Filename cannot be None")
 
@@ -53,117 +143,227 @@ class StationDataLoader:
             raise ValueError("Filename cannot be empty")
 
         self.files = files
-        self.stations: List[Station[AdjacentData, TransferData]] = (
-            self.__load_stations()
-        )
+        self.max_workers = max_workers
+        self.use_processes = use_processes
+        self.strict = strict
+        self.load_errors: List[StationDataLoadError] = []
+
+        with instrumentation.timer("station_data_loader.load"):
+            self.stations: List[Station[AdjacentData, TransferData]] = (
+                self.__load_stations()
+            )
+
+        instrumentation.count("station_data_loader.files", len(files))
+        instrumentation.count("station_data_loader.stations", len(self.stations))
+        instrumentation.sample_memory("station_data_loader.load")
+
+        # Lookup indexes, kept in sync with self.stations by add_station and remove_station
+        self.__stations_by_id: Dict[str, Station[AdjacentData, TransferData]] = {}
+        self.__stations_by_route: Dict[
+            str, List[Station[AdjacentData, TransferData]]
+        ] = {}
+
+        for station in self.stations:
+            self.__index_station(station)
+
+        # Built on the first get_spatial_index call
+        self.__spatial_index: "StationSpatialIndex | None" = None
 
     def __load_stations(self) -> List[Station]:
         """
-        Load station data from the specified file and return a list of Station objects
+        Load station data from the specified files and return a list of Station objects.
+        Files are read and validated concurrently, then linked together in file order,
+        so the result does not depend on which file finishes first. A file that fails
+        to load is recorded in self.load_errors and skipped.
 
-        :param filename: The name of the file to load
         :return: A list of Station objects
         """
+        station_data = []
 
-        # Load the station data from the JSON file
-        try:
-            stations = {}
-            station_data = []
+        for result in self.__parse_files():
+            if isinstance(result, StationDataLoadError):
+                print(result)
+                self.load_errors.append(result)
+                continue
 
-            for file in self.files:
-                with open(file, "r") as file:
-                    data = json.load(file)
+            station_data.append(result)
+
+        if self.strict and len(self.load_errors) > 0:
+            raise self.load_errors[0]
+
+        try:
+            return self.__link_stations(station_data)
+        except Exception as e:
+            print(f"An unknown error occurred: {e}")
+            return []
 
-                    this_station_data = StationData(**data)
-                    station_data.append(this_station_data)
+    def __parse_files(self) -> List["StationData | StationDataLoadError"]:
+        if len(self.files) == 1 or self.max_workers == 1:
+            return [_parse_station_file(file) for file in self.files]
 
-                    # create all the stations before adding adjacent stations
-                    for station in this_station_data.stations:
-                        station_id = f"{station.route}:{station.name}"
+        from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
-                        new_station = Station(
-                            station.name,
-                            Location(station.position.lat, station.position.lng),
-                            station.route,
-                        )
+        executor_class = (
+            ProcessPoolExecutor if self.use_processes else ThreadPoolExecutor
+        )
 
-                        new_station.set_closed(station.closed)
+        with executor_class(max_workers=self.max_workers) as executor:
+            return list(executor.map(_parse_station_file, self.files))
 
-                        stations[station_id] = new_station
+    @staticmethod
+    def __link_stations(station_data: List["StationData"]) -> List[Station]:
+        stations = {}
 
-            for station_data_file in station_data:
-                # add adjacent stations
-                for station in station_data_file.stations:
-                    station_id = f"{station.route}:{station.name}"
+        # create all the stations before adding adjacent stations
+        for this_station_data in station_data:
+            for station in this_station_data.stations:
+                station_id = f"{station.route}:{station.name}"
 
-                    # check if the adjacent_stations is a list or a dictionary
-                    if isinstance(station.adjacent_stations, list):
+                new_station = Station(
+                    station.name,
+                    Location.intern(station.position.lat, station.position.lng),
+                    station.route,
+                )
 
-                        for adjacent_station_id in station.adjacent_stations:
-                            if adjacent_station_id not in stations:
-                                continue
+                new_station.set_closed(station.closed)
 
-                            adjacent_station = stations[adjacent_station_id]
+                stations[station_id] = new_station
 
-                            # Prevent adding the same station as an adjacent station
-                            if adjacent_station == stations[station_id]:
-                                continue
+        for station_data_file in station_data:
+            # add adjacent stations
+            for station in station_data_file.stations:
+                station_id = f"{station.route}:{station.name}"
 
-                            stations[station_id].add_adjacent_station(adjacent_station)
-                    else:
-                        for (
-                            adjacent_station_id,
-                            adjacent_station_data,
-                        ) in station.adjacent_stations.items():
-                            if adjacent_station_id not in stations:
-                                continue
+                # check if the adjacent_stations is a list or a dictionary
+                if isinstance(station.adjacent_stations, list):
 
-                            adjacent_station = stations[adjacent_station_id]
+                    for adjacent_station_id in station.adjacent_stations:
+                        if adjacent_station_id not in stations:
+                            continue
 
-                            # Prevent adding the same station as an adjacent station
-                            if adjacent_station == stations[station_id]:
-                                continue
+                        adjacent_station = stations[adjacent_station_id]
 
-                            stations[station_id].add_adjacent_station(
-                                adjacent_station, adjacent_station_data
-                            )
+                        # Prevent adding the same station as an adjacent station
+                        if adjacent_station == stations[station_id]:
+                            continue
 
-                # add transfer stations
-                for station in station_data_file.stations:
-                    station_id = f"{station.route}:{station.name}"
+                        stations[station_id].add_adjacent_station(adjacent_station)
+                else:
                     for (
-                        transfer_station_id,
-                        transfer_data,
-                    ) in station.transfer_stations.items():
-                        if transfer_station_id not in stations:
+                        adjacent_station_id,
+                        adjacent_station_data,
+                    ) in station.adjacent_stations.items():
+                        if adjacent_station_id not in stations:
                             continue
 
-                        transfer_station = stations[transfer_station_id]
+                        adjacent_station = stations[adjacent_station_id]
+
+                        # Prevent adding the same station as an adjacent station
+                        if adjacent_station == stations[station_id]:
+                            continue
 
-                        stations[station_id].add_transfer_station(
-                            transfer_station, transfer_data
+                        stations[station_id].add_adjacent_station(
+                            adjacent_station, adjacent_station_data
                         )
 
-            return list(stations.values())
+            # add transfer stations
+            for station in station_data_file.stations:
+                station_id = f"{station.route}:{station.name}"
+                for (
+                    transfer_station_id,
+                    transfer_data,
+                ) in station.transfer_stations.items():
+                    if transfer_station_id not in stations:
+                        continue
 
-        except (OSError, json.JSONDecodeError) as e:
-            print(f"Error loading station data: {e}")
-            return []
-        except ValidationError as e:
-            print(f"Error validating station data: {e}")
-            return []
-        except Exception as e:
-            print(f"An unknown error occurred: {e}")
-            return []
+                    transfer_station = stations[transfer_station_id]
+
+                    stations[station_id].add_transfer_station(
+                        transfer_station, transfer_data
+                    )
+
+        return list(stations.values())
+
+    def get_load_errors(self) -> List["StationDataLoadError"]:
+        """
+        Get the errors for files that failed to load
+
+        :return: A list of StationDataLoadError, in file order
+        """
+        return self.load_errors
+
+    def __index_station(self, station: Station):
+        self.__stations_by_id[station.get_id()] = station
+        self.__stations_by_route.setdefault(station.route, []).append(station)
+
+    def add_station(self, station: Station):
+        """
+        Add a station, replacing any station with the same ID
+
+        :param station: The Station object to add
+        """
+        if station is None:
+            raise ValueError("Station cannot be None")
+
+        if not isinstance(station, Station):
+            raise ValueError("Station must be a Station object")
+
+        self.remove_station(station.get_id())
+
+        self.stations.append(station)
+        self.__index_station(station)
+
+        if self.__spatial_index is not None:
+            self.__spatial_index.add_station(station)
+
+    def remove_station(self, station_id: str):
+        """
+        Remove a station by ID
+
+        :param station_id: The ID of the station to remove
+        :return: The removed Station object, or None if there is no station with that ID
+        """
+        station = self.__stations_by_id.pop(station_id, None)
+
+        if station is None:
+            return None
+
+        self.stations.remove(station)
+
+        route_stations = self.__stations_by_route[station.route]
+        route_stations.remove(station)
+
+        if len(route_stations) == 0:
+            del self.__stations_by_route[station.route]
+
+        if self.__spatial_index is not None:
+            self.__spatial_index.remove_station(station)
+
+        return station
+
+    def get_spatial_index(self) -> "StationSpatialIndex":
+        """
+        Get a spatial index over the loaded stations for nearest-station and radius
+        queries. The index is built on first use and kept up to date by add_station
+        and remove_station. Closed stations stay indexed and are filtered per query.
+
+        :return: The StationSpatialIndex
+        """
+        if self.__spatial_index is None:
+            from cta_optimizer.station_spatial_index import StationSpatialIndex
+
+            self.__spatial_index = StationSpatialIndex(self.stations)
+
+        return self.__spatial_index
 
     def get_stations_by_route(self, route: str) -> List[Station]:
         """
         Get a list of stations for a specific train line
 
         :param route: The train line to get stations for
-        :return: A list of Station objects
+        :return: A list of Station objects, in the order they were loaded
         """
-        return [station for station in self.stations if station.route == route]
+        return list(self.__stations_by_route.get(route, []))
 
     def get_station_by_id(self, station_id: str):
         """
@@ -172,10 +372,7 @@ class StationDataLoader:
         :param station_id: The ID of the station to get
         :return: The Station object
         """
-        return next(
-            (station for station in self.stations if station.get_id() == station_id),
-            None,
-        )
+        return self.__stations_by_id.get(station_id)
 
     def get_all_stations(self) -> List[Station]:
         return self.stations
@@ -0,0 +1,37 @@
+"""
+station_schema.py
+
+The pydantic models describing a line file. StationDataLoader imports this
+module on first use so that importing the loader does not import pydantic.
+"""
+
+from typing import List, Optional
+from pydantic import BaseModel
+
+
+class TransferData(BaseModel):
+    free_transfer: Optional[bool]
+
+
+class AdjacentData(BaseModel):
+    pass
+
+
+class Position(BaseModel):
+    lat: float
+    lng: float
+
+
+class StationStop(BaseModel):
+    name: str
+    closed: bool = False
+    route: str
+    position: Position
+    adjacent_stations: List[str] | dict[str, AdjacentData]
+    transfer_stations: dict[str, TransferData]
+
+
+class StationData(BaseModel):
+    route_name: str
+    speed: float
+    stations: List[StationStop]
@@ -0,0 +1,259 @@
+"""
+station_spatial_index.py
+
+The StationSpatialIndex class answers "which stations are near this location"
+without measuring the distance to every station. Stations are bucketed into a
+grid of latitude/longitude cells; a query only measures the stations in the
+cells that overlap the search circle.
+"""
+
+from math import asin, cos, degrees, floor, radians, sin
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+from cta_optimizer.models.kilometer import Kilometer
+from cta_optimizer.models.location import (
+    EARTH_RADIUS_KILOMETERS,
+    Location,
+    haversine_distances,
+)
+from cta_optimizer.models.station import Station
+
+DEFAULT_CELL_SIZE_KILOMETERS = 1.0
+
+# Half the circumference of the earth, no two locations are further apart
+MAX_DISTANCE_KILOMETERS = EARTH_RADIUS_KILOMETERS * np.pi
+
+
+class StationSpatialIndex:
+    def __init__(
+        self,
+        stations: Iterable[Station] = (),
+        cell_size: float = DEFAULT_CELL_SIZE_KILOMETERS,
+    ):
+        """
+        :param stations: The stations to index
+        :param cell_size: The height of a grid cell in kilometers
+        """
+        if cell_size is None or not isinstance(cell_size, (int, float)):
+            raise ValueError("Cell size must be a number")
+
+        if cell_size <= 0:
+            raise ValueError("Cell size must be positive")
+
+        self.cell_size = cell_size
+        self.rebuild(stations)
+
+    def rebuild(self, stations: Iterable[Station]):
+        """
+        Replace every indexed station
+
+        :param stations: The stations to index
+        """
+        self.__stations: List[Station | None] = []
+        self.__positions: Dict[Station, int] = {}
+        self.__cells: Dict[Tuple[int, int], List[int]] = {}
+
+        self.__latitudes: List[float] = []
+        self.__longitudes: List[float] = []
+        self.__coordinates: Tuple[np.ndarray, np.ndarray] | None = None
+
+        stations = list(stations)
+        reference_latitude = (
+            stations[0].get_location().get_latitude() if len(stations) > 0 else 0
+        )
+
+        self.__cell_latitude = degrees(self.cell_size / EARTH_RADIUS_KILOMETERS)
+        self.__cell_longitude = self.__cell_latitude / max(
+            cos(radians(reference_latitude)), 0.01
+        )
+
+        for station in stations:
+            self.add_station(station)
+
+    def add_station(self, station: Station):
+        """
+        Add a station, or move it if its location changed
+
+        :param station: The station to add
+        """
+        if station is None:
+            raise ValueError("Station cannot be None")
+
+        if not isinstance(station, Station):
+            raise ValueError("Station must be a Station object")
+
+        self.remove_station(station)
+
+        position = len(self.__stations)
+        latitude, longitude = station.get_location().get_coordinates()
+
+        self.__stations.append(station)
+        self.__positions[station] = position
+        self.__latitudes.append(radians(latitude))
+        self.__longitudes.append(radians(longitude))
+        self.__cells.setdefault(self.__get_cell(latitude, longitude), []).append(
+            position
+        )
+        self.__coordinates = None
+
+    def remove_station(self, station: Station):
+        """
+        Remove a station, if it is indexed
+
+        :param station: The station to remove
+        """
+        position = self.__positions.pop(station, None)
+
+        if position is None:
+            return
+
+        cell = self.__get_cell(
+            degrees(self.__latitudes[position]), degrees(self.__longitudes[position])
+        )
+        self.__cells[cell].remove(position)
+
+        if len(self.__cells[cell]) == 0:
+            del self.__cells[cell]
+
+        # Keep positions stable, the slot is skipped by every query
+        self.__stations[position] = None
+
+    def __len__(self):
+        return len(self.__positions)
+
+    def get_stations_within(
+        self, location: Location, radius: float, include_closed: bool = False
+    ) -> List[Tuple[Station, Kilometer]]:
+        """
+        Get every station within a radius of a location
+
+        :param location: The location to search around
+        :param radius: The search radius in kilometers
+        :param include_closed: Whether to return closed stations
+        :return: (station, distance) pairs, nearest first
+        """
+        self.__validate_location(location)
+
+        if radius is None or not isinstance(radius, (int, float)) or radius < 0:
+            raise ValueError("Radius must be a non-negative number")
+
+        positions, distances = self.__search(location, radius)
+        return self.__to_results(positions, distances, include_closed)
+
+    def get_nearest_stations(
+        self, location: Location, k: int = 1, include_closed: bool = False
+    ) -> List[Tuple[Station, Kilometer]]:
+        """
+        Get the k stations nearest to a location
+
+        :param location: The location to search around
+        :param k: The number of stations to return
+        :param include_closed: Whether to return closed stations
+        :return: Up to k (station, distance) pairs, nearest first
+        """
+        self.__validate_location(location)
+
+        if k is None or not isinstance(k, int) or k < 1:
+            raise ValueError("K must be a positive integer")
+
+        radius = self.cell_size
+
+        # Grow the search circle until it holds k stations or covers the whole earth
+        while True:
+            positions, distances = self.__search(location, radius)
+            results = self.__to_results(positions, distances, include_closed)
+
+            if len(results) >= k or radius >= MAX_DISTANCE_KILOMETERS:
+                return results[:k]
+
+            radius *= 2
+
+    def __search(self, location: Location, radius: float):
+        latitude, longitude = location.get_coordinates()
+        angle = radius / EARTH_RADIUS_KILOMETERS
+        latitude_extent = degrees(angle)
+
+        cells = self.__cells.keys()
+
+        if abs(latitude) + latitude_extent < 90 and sin(angle) < cos(radians(latitude)):
+            # Widest longitude reached by a circle of this radius on the sphere
+            longitude_extent = degrees(asin(sin(angle) / cos(radians(latitude))))
+
+            if abs(longitude) + longitude_extent < 180:
+                low_y, low_x = self.__get_cell(
+                    latitude - latitude_extent, longitude - longitude_extent
+                )
+                high_y, high_x = self.__get_cell(
+                    latitude + latitude_extent, longitude + longitude_extent
+                )
+
+                if (high_y - low_y + 1) * (high_x - low_x + 1) <= len(self.__cells):
+                    cells = (
+                        (y, x)
+                        for y in range(low_y, high_y + 1)
+                        for x in range(low_x, high_x + 1)
+                    )
+                else:
+                    cells = (
+                        (y, x)
+                        for y, x in self.__cells.keys()
+                        if low_y <= y <= high_y and low_x <= x <= high_x
+                    )
+
+        positions = np.array(
+            [position for cell in cells for position in self.__cells.get(cell, ())],
+            dtype=np.int64,
+        )
+
+        latitudes, longitudes = self.__get_coordinates()
+        distances = haversine_distances(
+            radians(latitude),
+            radians(longitude),
+            latitudes[positions],
+            longitudes[positions],
+        )
+
+        within = distances <= radius
+        return positions[within], distances[within]
+
+    def __to_results(
+        self, positions: np.ndarray, distances: np.ndarray, include_closed: bool
+    ) -> List[Tuple[Station, Kilometer]]:
+        order = np.lexsort((positions, distances))
+
+        results = []
+
+        for position, distance in zip(
+            positions[order].tolist(), distances[order].tolist()
+        ):
+            station = self.__stations[position]
+
+            if include_closed or not station.is_closed():
+                results.append((station, Kilometer(distance)))
+
+        return results
+
+    def __get_coordinates(self) -> Tuple[np.ndarray, np.ndarray]:
+        if self.__coordinates is None:
+            self.__coordinates = (
+                np.array(self.__latitudes, dtype=np.float64),
+                np.array(self.__longitudes, dtype=np.float64),
+            )
+
+        return self.__coordinates
+
+    def __get_cell(self, latitude: float, longitude: float) -> Tuple[int, int]:
+        return (
+            floor(latitude / self.__cell_latitude),
+            floor(longitude / self.__cell_longitude),
+        )
+
+    @staticmethod
+    def __validate_location(location: Location):
+        if location is None:
+            raise ValueError("Location cannot be None")
+
+        if not isinstance(location, Location):
+            raise ValueError("Location must be a Location object")
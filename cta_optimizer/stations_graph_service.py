@@ -1,15 +1,125 @@
-from typing import List, Generic, TypeVar
-from networkx import DiGraph, shortest_path
+import os
+from collections import OrderedDict
+from enum import StrEnum
+from math import radians, sin, cos, sqrt, asin
+from typing import List, Generic, TypeVar, Iterable, Tuple, TYPE_CHECKING
 
+from cta_optimizer.lib.content_hash import hash_files, hash_values
+from cta_optimizer.lib.instrumentation import instrumentation
+from cta_optimizer.models.location import Location, EARTH_RADIUS_KILOMETERS
 from cta_optimizer.models.station import Station
+from cta_optimizer.models.trip import Trip
+
+# networkx and numpy are imported on first use, so that importing this module
+# stays cheap for short-lived processes
+if TYPE_CHECKING:
+    import numpy as np
+    from networkx import DiGraph
+
+    from cta_optimizer.contraction_hierarchy import ContractionHierarchy
+    from cta_optimizer.csr_graph import CSRGraph
+    from cta_optimizer.shortest_path_table import ShortestPathTable
+
+DEFAULT_SHORTEST_PATH_CACHE_DIR = ".cache/shortest_paths"
+DEFAULT_CONTRACTION_HIERARCHY_CACHE_DIR = ".cache/contraction_hierarchies"
+
+# Number of searched paths get_shortest_path keeps
+DEFAULT_PATH_CACHE_SIZE = 1024
+
+# Fare of a transfer that is not free, stored on the edge as "fare"
+TRANSFER_FARE = 2.50
+
+
+class GraphBackend(StrEnum):
+    """
+    Enum class for the graph storage used by StationsGraphService
+    """
+
+    NETWORKX = "networkx"
+    CSR = "csr"
+
+
+class RoutingAlgorithm(StrEnum):
+    """
+    Enum class for the search used by get_shortest_path
+    """
+
+    DIJKSTRA = "dijkstra"
+    ASTAR = "astar"
+    CONTRACTION_HIERARCHY = "ch"
+
 
 A = TypeVar("A")
 T = TypeVar("T")
 
 
 class StationsGraphService(Generic[A, T]):
-    def __init__(self):
-        self.graph = DiGraph()
+    def __init__(
+        self,
+        backend: GraphBackend | str = GraphBackend.NETWORKX,
+        path_cache_size: int = DEFAULT_PATH_CACHE_SIZE,
+    ):
+        """
+        :param backend: "networkx" keeps stations in a networkx.DiGraph. "csr" keeps
+            them in a CSRGraph: integer station indices and edges frozen into
+            compressed sparse row arrays, which is much smaller and faster to search
+            on large networks.
+        :param path_cache_size: The number of paths get_shortest_path keeps, least
+            recently used first out. 0 turns the cache off.
+        """
+        if not isinstance(path_cache_size, int) or path_cache_size < 0:
+            raise ValueError("Path cache size must be a non-negative integer")
+
+        self.backend = GraphBackend(backend)
+
+        if self.backend == GraphBackend.CSR:
+            from cta_optimizer.csr_graph import CSRGraph
+
+            graph = CSRGraph()
+        else:
+            from networkx import DiGraph
+
+            graph = DiGraph()
+
+        self.graph: "DiGraph | CSRGraph" = graph
+
+        # (latitude, longitude, cos(latitude)) in radians, used by the A* heuristic
+        self.__radian_coordinates: dict[Station[A, T], Tuple[float, float, float]] = {}
+
+        # Opt-in all-pairs table, see precompute_shortest_paths
+        self.shortest_path_table: "ShortestPathTable | None" = None
+        self.__table_stations: List[Station[A, T]] = []
+        self.__table_indices: dict[Station[A, T], int] = {}
+
+        # Contraction hierarchy for "ch" queries, built on the first one or loaded
+        # by precompute_contraction_hierarchy
+        self.contraction_hierarchy: "ContractionHierarchy | None" = None
+        self.__hierarchy_stations: List[Station[A, T]] = []
+        self.__hierarchy_indices: dict[Station[A, T], int] = {}
+
+        # CSR copy of a networkx graph for searches that only run on CSR arrays
+        self.__csr_copy: "CSRGraph | None" = None
+
+        # (start, end, algorithm) -> (path, generation it was searched in)
+        self.__path_cache: OrderedDict[
+            Tuple[Station[A, T], Station[A, T], RoutingAlgorithm],
+            Tuple[Tuple[Station[A, T], ...], int],
+        ] = OrderedDict()
+        self.__path_cache_size = path_cache_size
+
+        # closed station, or frozenset of the two stations of a closed segment ->
+        # (generation it was closed in, edges it masks)
+        self.__closures: dict[
+            Station[A, T] | frozenset,
+            Tuple[int, List[Tuple[Station[A, T], Station[A, T]]]],
+        ] = {}
+        # (station1, station2) -> (number of closures masking the edge, the edge
+        # data to restore it with)
+        self.__masked_edges: dict[
+            Tuple[Station[A, T], Station[A, T]], Tuple[int, dict | float]
+        ] = {}
+        # incremented by every closure
+        self.__generation = 0
 
     def add_station(self, station: Station[A, T]):
         if station is None:
@@ -17,22 +127,156 @@ class StationsGraphService(Generic[A, T]):
 
         self.graph.add_node(station)
 
-    def add_edge(self, station1: Station[A, T], station2: Station[A, T], weight: float = None):
+        latitude = radians(station.get_location().get_latitude())
+        longitude = radians(station.get_location().get_longitude())
+        self.__radian_coordinates[station] = (latitude, longitude, cos(latitude))
+        self.__invalidate_caches()
+
+    def add_edge(
+        self, station1: Station[A, T], station2: Station[A, T], weight: float = None
+    ):
         if station1 not in self.graph.nodes() or station2 not in self.graph.nodes():
             raise ValueError("Invalid station")
 
         # Make sure that both stations are not the same and are not closed
-        if station1 == station2 or station1.is_closed() or station2.is_closed():
+        if (
+            station1 == station2
+            or self.is_station_closed(station1)
+            or self.is_station_closed(station2)
+        ):
             return
 
         distance = station1.get_location().distance_to(station2.get_location())
+        fare, transfer = self.__get_transfer_costs(station1, station2)
         self.graph.add_weighted_edges_from(
-            [(station1, station2, weight or distance.value)], "distance"
+            [(station1, station2, weight or distance.value)],
+            "distance",
+            fare=fare,
+            transfer=transfer,
         )
+        self.__invalidate_caches()
+
+    @instrumentation.timed("stations_graph_service.add_edges")
+    def add_edges(self, edges: Iterable[Tuple[Station[A, T], Station[A, T]]]):
+        """
+        Add many edges at once. Distances for all edges are computed in one
+        vectorized pass instead of one Location.distance_to call per edge.
+
+        :param edges: (station1, station2) pairs
+        """
+        # a pair given twice is added once
+        valid_edges = {}
+
+        for station1, station2 in edges:
+            if station1 not in self.graph.nodes() or station2 not in self.graph.nodes():
+                raise ValueError("Invalid station")
+
+            # Make sure that both stations are not the same and are not closed
+            if (
+                station1 == station2
+                or self.is_station_closed(station1)
+                or self.is_station_closed(station2)
+            ):
+                continue
+
+            valid_edges[(station1, station2)] = None
+
+        if len(valid_edges) == 0:
+            return
+
+        distances = Location.pairwise_distances(
+            [station1.get_location() for station1, _ in valid_edges],
+            [station2.get_location() for _, station2 in valid_edges],
+        )
+
+        # edges with the same fare and transfer data are added in one call
+        edges_by_costs: dict[Tuple[float, int], list] = {}
+
+        for (station1, station2), distance in zip(valid_edges, distances.tolist()):
+            edges_by_costs.setdefault(
+                self.__get_transfer_costs(station1, station2), []
+            ).append((station1, station2, distance))
+
+        for (fare, transfer), weighted_edges in edges_by_costs.items():
+            self.graph.add_weighted_edges_from(
+                weighted_edges, "distance", fare=fare, transfer=transfer
+            )
+
+        instrumentation.count("stations_graph_service.edges", len(valid_edges))
+
+        self.__invalidate_caches()
+
+    @instrumentation.timed("stations_graph_service.add_weighted_edge_arrays")
+    def add_weighted_edge_arrays(
+        self,
+        sources: "np.ndarray",
+        targets: "np.ndarray",
+        weights: "np.ndarray",
+        fares: "np.ndarray" = None,
+        transfers: "np.ndarray" = None,
+    ):
+        """
+        Add many edges with known weights, given as indices into get_all_stations().
+        Unlike add_edge, closed stations are not skipped; the caller is expected to
+        have filtered them already. With the CSR backend the arrays are merged into
+        the graph without creating a Python object per edge.
+
+        :param sources: The source station index of every edge
+        :param targets: The target station index of every edge
+        :param weights: The distance of every edge
+        :param fares: The fare of every edge, 0 if not given
+        :param transfers: 1 for every edge that is a transfer, 0 if not given
+        """
+        import numpy as np
+
+        fares = np.zeros(len(sources)) if fares is None else fares
+        transfers = np.zeros(len(sources)) if transfers is None else transfers
+
+        if self.backend == GraphBackend.CSR:
+            self.graph.add_edge_arrays(
+                sources, targets, weights, fare=fares, transfer=transfers
+            )
+        else:
+            stations = list(self.graph.nodes())
+            self.graph.add_edges_from(
+                (
+                    stations[source],
+                    stations[target],
+                    {"distance": weight, "fare": fare, "transfer": int(transfer)},
+                )
+                for source, target, weight, fare, transfer in zip(
+                    np.asarray(sources).tolist(),
+                    np.asarray(targets).tolist(),
+                    np.asarray(weights).tolist(),
+                    np.broadcast_to(fares, np.shape(sources)).tolist(),
+                    np.broadcast_to(transfers, np.shape(sources)).tolist(),
+                )
+            )
+
+        self.__invalidate_caches()
+
+    @staticmethod
+    def __get_transfer_costs(
+        station1: Station[A, T], station2: Station[A, T]
+    ) -> Tuple[float, int]:
+        # (fare, transfer) of the edge between two stations. Transfers without
+        # data are counted but free, as the line files only record data for
+        # transfers that are paid for or known to be free.
+        transfer_stations = station1.transfer_stations
+
+        if station2 not in transfer_stations:
+            return 0.0, 0
+
+        data = transfer_stations[station2]
+
+        if data is not None and not getattr(data, "free_transfer", None):
+            return TRANSFER_FARE, 1
+
+        return 0.0, 1
 
     def __calculate_weight(self, station1: Station[A, T], station2: Station[A, T]):
         distance = station1.get_location().distance_to(station2.get_location()).value
-        is_transfer = station2.get_id() in station1.get_transfer_stations()
+        is_transfer = station2.get_id() in station1.transfer_stations
 
         return distance if not is_transfer else distance * 2
 
@@ -45,7 +289,294 @@ class StationsGraphService(Generic[A, T]):
     def get_all_stations(self):
         return self.graph.nodes()
 
-    def get_shortest_path(self, start: Station[A, T], end: Station[A, T]) -> List[Station[A, T]]:
+    def is_station_closed(self, station: Station[A, T]) -> bool:
+        """
+        :param station: The station
+        :return: Whether the station is closed in its data or by close_station
+        """
+        return station.is_closed() or station in self.__closures
+
+    def close_station(self, station: Station[A, T]):
+        """
+        Close a station until reopen_station. Every edge into or out of it is masked
+        in place, without rebuilding the graph. Cached paths and precomputed table
+        rows that go through the station are updated, everything else stays cached.
+        The closure only applies to this graph: the Station itself is not changed,
+        so other graphs built from the same stations are not affected.
+
+        :param station: The station to close
+        """
+        if station not in self.graph.nodes():
+            raise ValueError("Invalid station")
+
+        if station in self.__closures:
+            return
+
+        if self.backend == GraphBackend.CSR:
+            self.graph.freeze()
+            index = self.graph.index[station]
+            stations = self.graph.stations
+            start, end = self.graph.reverse_offsets[index : index + 2]
+            edges = [
+                *(
+                    (station, stations[target])
+                    for target in self.graph.get_neighbors(index)[0].tolist()
+                ),
+                *(
+                    (stations[source], station)
+                    for source in self.graph.reverse_sources[start:end].tolist()
+                ),
+            ]
+        else:
+            edges = [
+                *self.graph.out_edges(station),
+                *self.graph.in_edges(station),
+            ]
+
+        # edges another closure already took out of the graph
+        edges.extend(
+            edge
+            for edge in self.__masked_edges
+            if station in edge and edge not in edges
+        )
+
+        self.__close(station, edges)
+
+    def reopen_station(self, station: Station[A, T]):
+        """
+        Reopen a station closed by close_station. Its edges come back unless another
+        closure still masks them.
+
+        :param station: The station to reopen
+        """
+        if station not in self.graph.nodes():
+            raise ValueError("Invalid station")
+
+        if station not in self.__closures:
+            return
+
+        self.__reopen(station)
+
+    def close_segment(self, station1: Station[A, T], station2: Station[A, T]):
+        """
+        Close the track between two adjacent stations, in both directions, until
+        reopen_segment. Both stations stay open for every other edge. Edges added
+        between the two stations while the segment is closed are not masked.
+
+        :param station1: The station at one end of the segment
+        :param station2: The station at the other end of the segment
+        """
+        if station1 not in self.graph.nodes() or station2 not in self.graph.nodes():
+            raise ValueError("Invalid station")
+
+        key = frozenset((station1, station2))
+
+        if key in self.__closures:
+            return
+
+        edges = [
+            edge
+            for edge in ((station1, station2), (station2, station1))
+            if edge in self.__masked_edges or self.__has_edge(*edge)
+        ]
+
+        if len(edges) == 0:
+            raise ValueError("Invalid segment")
+
+        self.__close(key, edges)
+
+    def reopen_segment(self, station1: Station[A, T], station2: Station[A, T]):
+        """
+        Reopen a segment closed by close_segment
+
+        :param station1: The station at one end of the segment
+        :param station2: The station at the other end of the segment
+        """
+        if station1 not in self.graph.nodes() or station2 not in self.graph.nodes():
+            raise ValueError("Invalid station")
+
+        key = frozenset((station1, station2))
+
+        if key in self.__closures:
+            self.__reopen(key)
+
+    def __has_edge(self, station1: Station[A, T], station2: Station[A, T]) -> bool:
+        if self.backend == GraphBackend.CSR:
+            from cta_optimizer.csr_graph import NO_EDGE
+
+            index = self.graph.index
+            return self.graph.get_edge(index[station1], index[station2]) != NO_EDGE
+
+        return self.graph.has_edge(station1, station2)
+
+    def __close(
+        self,
+        key: Station[A, T] | frozenset,
+        edges: List[Tuple[Station[A, T], Station[A, T]]],
+    ):
+        # Mask every edge not masked yet. An edge closed by several closures only
+        # comes back when the last of them reopens.
+        masked = []
+
+        for edge in edges:
+            if edge in self.__masked_edges:
+                count, data = self.__masked_edges[edge]
+                self.__masked_edges[edge] = (count + 1, data)
+                continue
+
+            self.__masked_edges[edge] = (1, self.__mask_edge(*edge))
+            masked.append(edge)
+
+        self.__generation += 1
+        self.__closures[key] = (self.__generation, edges)
+
+        if len(masked) == 0:
+            return
+
+        # shortcuts may run over a masked edge
+        self.__drop_contraction_hierarchy()
+
+        # only paths over a masked edge get longer
+        masked_set = set(masked)
+
+        for cache_key, (path, _) in list(self.__path_cache.items()):
+            if any(edge in masked_set for edge in zip(path, path[1:])):
+                del self.__path_cache[cache_key]
+
+        if self.shortest_path_table is not None:
+            self.__update_table_after_close(masked)
+
+    def __reopen(self, key: Station[A, T] | frozenset):
+        generation, edges = self.__closures.pop(key)
+        restored = []
+
+        for edge in edges:
+            count, data = self.__masked_edges[edge]
+
+            if count > 1:
+                self.__masked_edges[edge] = (count - 1, data)
+                continue
+
+            del self.__masked_edges[edge]
+            self.__unmask_edge(*edge, data)
+            restored.append((edge, data))
+
+        # paths searched while the closure was in place may have a shorter way now
+        for cache_key, (_, path_generation) in list(self.__path_cache.items()):
+            if path_generation >= generation:
+                del self.__path_cache[cache_key]
+
+        if len(restored) == 0:
+            return
+
+        self.__drop_contraction_hierarchy()
+
+        if self.shortest_path_table is not None:
+            self.__update_table_after_reopen(restored)
+
+    def __mask_edge(
+        self, station1: Station[A, T], station2: Station[A, T]
+    ) -> dict | float:
+        # Take an edge out of every search, returning what restores it
+        if self.backend == GraphBackend.CSR:
+            index = self.graph.index
+            source, target = index[station1], index[station2]
+            data = float(self.graph.weights[_get_csr_edge(self.graph, source, target)])
+            self.graph.set_weight(source, target, float("inf"))
+        else:
+            data = self.graph.adj[station1][station2]
+            self.graph.remove_edge(station1, station2)
+
+            if self.__csr_copy is not None:
+                index = self.__csr_copy.index
+                self.__csr_copy.set_weight(
+                    index[station1], index[station2], float("inf")
+                )
+
+        return data
+
+    def __unmask_edge(
+        self, station1: Station[A, T], station2: Station[A, T], data: dict | float
+    ):
+        if self.backend == GraphBackend.CSR:
+            index = self.graph.index
+            source, target = index[station1], index[station2]
+
+            # unless the edge was added again while masked
+            edge = _get_csr_edge(self.graph, source, target)
+
+            if self.graph.weights[edge] == float("inf"):
+                self.graph.set_weight(source, target, data)
+
+            return
+
+        if self.graph.has_edge(station1, station2):
+            return
+
+        self.graph.add_edge(station1, station2, **data)
+
+        if self.__csr_copy is not None:
+            index = self.__csr_copy.index
+            source, target = index[station1], index[station2]
+
+            from cta_optimizer.csr_graph import NO_EDGE
+
+            if self.__csr_copy.get_edge(source, target) == NO_EDGE:
+                # the copy was made while the edge was masked
+                self.__csr_copy = None
+            else:
+                self.__csr_copy.set_weight(source, target, data["distance"])
+
+    def __update_table_after_close(
+        self, masked: List[Tuple[Station[A, T], Station[A, T]]]
+    ):
+        indices = self.__table_indices
+        self.shortest_path_table.remove_edges(
+            [(indices[station1], indices[station2]) for station1, station2 in masked],
+            self.__get_index_adjacency(self.__table_stations, indices),
+        )
+
+    def __update_table_after_reopen(
+        self, restored: List[Tuple[Tuple[Station[A, T], Station[A, T]], dict | float]]
+    ):
+        indices = self.__table_indices
+        self.shortest_path_table.add_edges(
+            [
+                (
+                    indices[station1],
+                    indices[station2],
+                    data if isinstance(data, float) else data["distance"],
+                )
+                for (station1, station2), data in restored
+            ],
+            self.__get_index_adjacency(self.__table_stations, indices),
+        )
+
+    def get_shortest_path(
+        self,
+        start: Station[A, T],
+        end: Station[A, T],
+        algorithm: RoutingAlgorithm | str = RoutingAlgorithm.DIJKSTRA,
+    ) -> List[Station[A, T]]:
+        """
+        Get the shortest path between two stations
+
+        A* uses the great-circle distance to the end station as its heuristic. That is
+        only admissible while edge weights are at least the distance between their
+        stations, which holds unless add_edge was given a smaller explicit weight.
+
+        "ch" searches a contraction hierarchy, built on the first "ch" query unless
+        precompute_contraction_hierarchy loaded one, and rebuilt after the graph
+        changes or a closure. It finds a path as short as Dijkstra's, though where
+        several paths tie it may pick another one.
+
+        :param start: The station to start from
+        :param end: The station to end at
+        :param algorithm: The search to run, "dijkstra", "astar" or "ch"
+        :return: The stations on the path, including start and end
+        """
+        algorithm = RoutingAlgorithm(algorithm)
+
         if start is None:
             raise ValueError("Start station cannot be None")
 
@@ -55,4 +586,613 @@ class StationsGraphService(Generic[A, T]):
         if start not in self.graph.nodes() or end not in self.graph.nodes():
             raise ValueError("Invalid station")
 
+        if self.shortest_path_table is not None:
+            path = self.shortest_path_table.get_path(
+                self.__table_indices[start], self.__table_indices[end]
+            )
+
+            if len(path) == 0:
+                raise _no_path(start, end)
+
+            return [self.__table_stations[index] for index in path]
+
+        if self.__path_cache_size == 0:
+            return self.__search_shortest_path(start, end, algorithm)
+
+        key = (start, end, algorithm)
+        cached = self.__path_cache.get(key)
+
+        if cached is not None:
+            self.__path_cache.move_to_end(key)
+            return list(cached[0])
+
+        path = self.__search_shortest_path(start, end, algorithm)
+        self.__path_cache[key] = (tuple(path), self.__generation)
+
+        if len(self.__path_cache) > self.__path_cache_size:
+            self.__path_cache.popitem(last=False)
+
+        return path
+
+    @instrumentation.timed("stations_graph_service.search_shortest_path")
+    def __search_shortest_path(
+        self, start: Station[A, T], end: Station[A, T], algorithm: RoutingAlgorithm
+    ) -> List[Station[A, T]]:
+        if algorithm == RoutingAlgorithm.CONTRACTION_HIERARCHY:
+            return self.__get_hierarchy_shortest_path(start, end)
+
+        if self.backend == GraphBackend.CSR:
+            return self.__get_csr_shortest_path(start, end, algorithm)
+
+        from networkx import astar_path, shortest_path
+
+        if algorithm == RoutingAlgorithm.ASTAR:
+            return astar_path(
+                self.graph,
+                start,
+                end,
+                heuristic=self.__create_distance_heuristic(end),
+                weight="distance",
+            )
+
         return list(shortest_path(self.graph, start, end, weight="distance"))
+
+    @instrumentation.timed("stations_graph_service.get_shortest_paths")
+    def get_shortest_paths(
+        self,
+        pairs: Iterable[Tuple[Station[A, T], Station[A, T]]],
+        return_paths: bool = False,
+    ) -> "np.ndarray | Tuple[np.ndarray, List[List[Station[A, T]]]]":
+        """
+        Get the shortest paths between many pairs of stations. Pairs are grouped by
+        start station and one single source search is run per start station, so a
+        batch costs about as much as one search per distinct start station.
+
+        :param pairs: (start, end) station pairs
+        :param return_paths: Whether to also rebuild the stations on every path
+        :return: The distance of every pair, inf where there is no path, and with
+            return_paths the stations on every path, an empty list where there is none
+        """
+        import numpy as np
+
+        pairs = list(pairs)
+        nodes = self.graph.nodes()
+
+        for start, end in pairs:
+            if start is None or end is None:
+                raise ValueError("Stations cannot be None")
+
+            if start not in nodes or end not in nodes:
+                raise ValueError("Invalid station")
+
+        # positions of the pairs that share each start station
+        pairs_by_start: dict[Station[A, T], List[int]] = {}
+
+        for position, (start, _) in enumerate(pairs):
+            pairs_by_start.setdefault(start, []).append(position)
+
+        distances = np.full(len(pairs), np.inf)
+        paths: List[List[Station[A, T]]] = [[] for _ in pairs]
+
+        for start, positions in pairs_by_start.items():
+            ends = [pairs[position][1] for position in positions]
+            start_distances, get_path = self.__search_from(start, ends)
+
+            for position, end in zip(positions, ends):
+                distance = start_distances(end)
+
+                if distance == float("inf"):
+                    continue
+
+                distances[position] = distance
+
+                if return_paths:
+                    paths[position] = get_path(end)
+
+        if return_paths:
+            return distances, paths
+
+        return distances
+
+    @instrumentation.timed("stations_graph_service.get_k_shortest_paths")
+    def get_k_shortest_paths(
+        self, start: Station[A, T], end: Station[A, T], k: int
+    ) -> List[List[Station[A, T]]]:
+        """
+        Get the k shortest loopless paths between two stations, shortest first, for
+        offering riders alternatives. Paths of equal length come in a fixed order.
+
+        :param start: The station to start from
+        :param end: The station to end at
+        :param k: The number of paths to get
+        :return: Up to k distinct paths, fewer if there are not that many
+        """
+        from cta_optimizer.k_shortest_paths import k_shortest_paths
+
+        if not isinstance(k, int) or k < 1:
+            raise ValueError("K must be a positive integer")
+
+        graph = self.__get_csr_graph()
+
+        if start not in graph.index or end not in graph.index:
+            raise _no_path(start, end)
+
+        paths = k_shortest_paths(graph, graph.index[start], graph.index[end], k)
+
+        if len(paths) == 0:
+            raise _no_path(start, end)
+
+        return [[graph.stations[index] for index in path] for _, path in paths]
+
+    def get_trip(
+        self,
+        start: Station[A, T],
+        end: Station[A, T],
+        algorithm: RoutingAlgorithm | str = RoutingAlgorithm.DIJKSTRA,
+    ) -> Trip[Station[A, T]]:
+        """
+        Get the shortest path between two stations with its cumulative distance,
+        transfer count and fare, read from the edges of the path
+
+        :param start: The station to start from
+        :param end: The station to end at
+        :param algorithm: The search to run, "dijkstra", "astar" or "ch"
+        :return: The trip
+        """
+        return self.__create_trip(self.get_shortest_path(start, end, algorithm))
+
+    def get_trips(
+        self, pairs: Iterable[Tuple[Station[A, T], Station[A, T]]]
+    ) -> List[Trip[Station[A, T]] | None]:
+        """
+        Get the trip between many pairs of stations, see get_shortest_paths
+
+        :param pairs: (start, end) station pairs
+        :return: The trip of every pair, None where there is no path
+        """
+        _, paths = self.get_shortest_paths(pairs, return_paths=True)
+
+        return [self.__create_trip(path) if len(path) > 0 else None for path in paths]
+
+    @instrumentation.timed("stations_graph_service.get_pareto_trips")
+    def get_pareto_trips(
+        self,
+        start: Station[A, T],
+        end: Station[A, T],
+        max_transfers: int = None,
+        algorithm: RoutingAlgorithm | str = RoutingAlgorithm.DIJKSTRA,
+    ) -> List[Trip[Station[A, T]]]:
+        """
+        Get every Pareto optimal trip between two stations over distance, fare and
+        transfer count: each trip is better than every other one in at least one of
+        the three.
+
+        :param start: The station to start from
+        :param end: The station to end at
+        :param max_transfers: Leave out trips with more transfers than this
+        :param algorithm: "astar" discards partial trips that cannot beat a trip
+            already found using the straight line distance to the end station. A
+            contraction hierarchy only keeps shortest paths, so "ch" searches like
+            "dijkstra"
+        :return: The trips, shortest first
+        """
+        from cta_optimizer.pareto_search import pareto_search
+
+        algorithm = RoutingAlgorithm(algorithm)
+
+        if max_transfers is not None and (
+            not isinstance(max_transfers, int) or max_transfers < 0
+        ):
+            raise ValueError("Max transfers must be a non-negative integer")
+
+        graph = self.__get_csr_graph()
+
+        if start not in graph.index or end not in graph.index:
+            raise _no_path(start, end)
+
+        heuristic = None
+
+        if algorithm == RoutingAlgorithm.ASTAR:
+            station_heuristic = self.__create_distance_heuristic(end)
+            stations = graph.stations
+
+            def heuristic(index: int) -> float:
+                return station_heuristic(stations[index], end)
+
+        paths = pareto_search(
+            graph, graph.index[start], graph.index[end], max_transfers, heuristic
+        )
+
+        if len(paths) == 0:
+            raise _no_path(start, end)
+
+        return [
+            Trip(
+                [graph.stations[index] for index in indices],
+                cumulative_distances,
+                transfers,
+                fare,
+            )
+            for _, fare, transfers, indices, cumulative_distances in paths
+        ]
+
+    def __get_csr_graph(self) -> "CSRGraph[Station[A, T]]":
+        if self.backend == GraphBackend.CSR:
+            return self.graph
+
+        if self.__csr_copy is None:
+            self.__csr_copy = self.__copy_to_csr_graph()
+
+        return self.__csr_copy
+
+    @instrumentation.timed("stations_graph_service.copy_to_csr_graph")
+    def __copy_to_csr_graph(self) -> "CSRGraph[Station[A, T]]":
+        import numpy as np
+        from cta_optimizer.csr_graph import CSRGraph
+
+        graph = CSRGraph()
+
+        for station in self.graph.nodes():
+            graph.add_node(station)
+
+        index = graph.index
+        edges = list(self.graph.edges(data=True))
+        graph.add_edge_arrays(
+            np.array([index[source] for source, _, _ in edges], dtype=np.int64),
+            np.array([index[target] for _, target, _ in edges], dtype=np.int64),
+            np.array([data["distance"] for _, _, data in edges], dtype=np.float64),
+            fare=np.array(
+                [data.get("fare", 0.0) for _, _, data in edges], dtype=np.float64
+            ),
+            transfer=np.array(
+                [data.get("transfer", 0) for _, _, data in edges], dtype=np.float64
+            ),
+        )
+
+        return graph
+
+    def __create_trip(self, path: List[Station[A, T]]) -> Trip[Station[A, T]]:
+        cumulative_distances = [0.0]
+        transfers = 0
+        fare = 0.0
+
+        if self.backend == GraphBackend.CSR:
+            import numpy as np
+
+            self.graph.freeze()
+            index = self.graph.index
+            weights = self.graph.weights
+            no_data = np.zeros(len(weights))
+            fares = self.graph.edge_data.get("fare", no_data)
+            transfer_edges = self.graph.edge_data.get("transfer", no_data)
+
+            for station1, station2 in zip(path, path[1:]):
+                edge = _get_csr_edge(self.graph, index[station1], index[station2])
+                cumulative_distances.append(
+                    cumulative_distances[-1] + float(weights[edge])
+                )
+                fare += float(fares[edge])
+                transfers += int(transfer_edges[edge])
+        else:
+            adjacency = self.graph.adj
+
+            for station1, station2 in zip(path, path[1:]):
+                data = adjacency[station1][station2]
+                cumulative_distances.append(cumulative_distances[-1] + data["distance"])
+                fare += data.get("fare", 0.0)
+                transfers += data.get("transfer", 0)
+
+        return Trip(path, cumulative_distances, transfers, fare)
+
+    def __search_from(self, start: Station[A, T], ends: List[Station[A, T]]):
+        # One single source search, returned as (distance to, path to) functions
+        if self.shortest_path_table is not None:
+            table = self.shortest_path_table
+            indices = self.__table_indices
+            stations = self.__table_stations
+            source = indices[start]
+
+            def get_table_path(end: Station[A, T]) -> List[Station[A, T]]:
+                return [stations[index] for index in table.get_path(source, indices[end])]
+
+            return (
+                lambda end: table.get_distance(source, indices[end]),
+                get_table_path,
+            )
+
+        if self.backend == GraphBackend.CSR:
+            from cta_optimizer.csr_graph import build_path
+
+            index = self.graph.index
+            stations = self.graph.stations
+            source = index[start]
+            distances, predecessors = self.graph.search(
+                source, targets=[index[end] for end in ends]
+            )
+
+            def get_csr_path(end: Station[A, T]) -> List[Station[A, T]]:
+                return [
+                    stations[node]
+                    for node in build_path(predecessors, source, index[end])
+                ]
+
+            return lambda end: distances[index[end]], get_csr_path
+
+        from networkx import dijkstra_predecessor_and_distance
+
+        predecessors, distances = dijkstra_predecessor_and_distance(
+            self.graph, start, weight="distance"
+        )
+
+        def get_path(end: Station[A, T]) -> List[Station[A, T]]:
+            path = [end]
+
+            while path[-1] != start:
+                path.append(predecessors[path[-1]][0])
+
+            path.reverse()
+            return path
+
+        return lambda end: distances.get(end, float("inf")), get_path
+
+    def __get_csr_shortest_path(
+        self, start: Station[A, T], end: Station[A, T], algorithm: RoutingAlgorithm
+    ) -> List[Station[A, T]]:
+        heuristic = None
+
+        if algorithm == RoutingAlgorithm.ASTAR:
+            station_heuristic = self.__create_distance_heuristic(end)
+            stations = self.graph.stations
+
+            def heuristic(index: int) -> float:
+                return station_heuristic(stations[index], end)
+
+        path = self.graph.shortest_path(start, end, heuristic)
+
+        if len(path) == 0:
+            raise _no_path(start, end)
+
+        return path
+
+    def __get_hierarchy_shortest_path(
+        self, start: Station[A, T], end: Station[A, T]
+    ) -> List[Station[A, T]]:
+        if self.contraction_hierarchy is None:
+            from cta_optimizer.contraction_hierarchy import ContractionHierarchy
+
+            stations, indices, station_ids, adjacency = self.__get_index_graph()
+
+            with instrumentation.timer(
+                "stations_graph_service.build_contraction_hierarchy"
+            ):
+                hierarchy = ContractionHierarchy.build(station_ids, adjacency)
+
+            self.__set_contraction_hierarchy(hierarchy, stations, indices)
+
+        indices = self.__hierarchy_indices
+        path = self.contraction_hierarchy.get_path(indices[start], indices[end])
+
+        if len(path) == 0:
+            raise _no_path(start, end)
+
+        stations = self.__hierarchy_stations
+        return [stations[index] for index in path]
+
+    def __create_distance_heuristic(self, end: Station[A, T]):
+        radian_coordinates = self.__radian_coordinates
+        end_latitude, end_longitude, end_cos_latitude = radian_coordinates[end]
+        diameter = 2 * EARTH_RADIUS_KILOMETERS
+
+        def heuristic(station: Station[A, T], _: Station[A, T]) -> float:
+            latitude, longitude, cos_latitude = radian_coordinates[station]
+
+            a = (
+                sin((end_latitude - latitude) / 2) ** 2
+                + cos_latitude
+                * end_cos_latitude
+                * sin((end_longitude - longitude) / 2) ** 2
+            )
+            return diameter * asin(sqrt(min(a, 1.0)))
+
+        return heuristic
+
+    @instrumentation.timed("stations_graph_service.precompute_shortest_paths")
+    def precompute_shortest_paths(
+        self, files: List[str], cache_dir: str = DEFAULT_SHORTEST_PATH_CACHE_DIR
+    ) -> "ShortestPathTable":
+        """
+        Precompute the shortest path between every pair of stations. The table is
+        saved under cache_dir, keyed by a hash of the line files the graph was built
+        from, and reused by any later process that builds the same graph. Once
+        loaded, get_shortest_path is answered from the table until the graph changes.
+
+        :param files: The line files the graph was built from
+        :param cache_dir: The directory to keep precomputed tables in
+        :return: The precomputed table
+        """
+        from cta_optimizer.shortest_path_table import ShortestPathTable
+
+        if files is None or len(files) == 0:
+            raise ValueError("Files cannot be empty")
+
+        stations, indices, station_ids, adjacency = self.__get_index_graph()
+        directory = _get_cache_directory(cache_dir, files, station_ids, adjacency)
+
+        if ShortestPathTable.exists(directory):
+            table = ShortestPathTable.load(directory)
+        else:
+            table = ShortestPathTable.build(station_ids, adjacency, directory)
+
+        self.__table_stations = stations
+        self.__table_indices = indices
+        self.shortest_path_table = table
+        return table
+
+    @instrumentation.timed("stations_graph_service.precompute_contraction_hierarchy")
+    def precompute_contraction_hierarchy(
+        self,
+        files: List[str],
+        cache_dir: str = DEFAULT_CONTRACTION_HIERARCHY_CACHE_DIR,
+    ) -> "ContractionHierarchy":
+        """
+        Build the contraction hierarchy "ch" queries search. Like the shortest path
+        table, it is saved under cache_dir, keyed by a hash of the line files and of
+        the graph, and reused by any later process that builds the same graph.
+
+        :param files: The line files the graph was built from
+        :param cache_dir: The directory to keep contraction hierarchies in
+        :return: The contraction hierarchy
+        """
+        from cta_optimizer.contraction_hierarchy import ContractionHierarchy
+
+        if files is None or len(files) == 0:
+            raise ValueError("Files cannot be empty")
+
+        stations, indices, station_ids, adjacency = self.__get_index_graph()
+        directory = _get_cache_directory(cache_dir, files, station_ids, adjacency)
+
+        if ContractionHierarchy.exists(directory):
+            hierarchy = ContractionHierarchy.load(directory)
+        else:
+            hierarchy = ContractionHierarchy.build(station_ids, adjacency)
+            hierarchy.save(directory)
+
+        self.__set_contraction_hierarchy(hierarchy, stations, indices)
+        return hierarchy
+
+    def get_all_pairs_shortest_paths(self) -> Tuple["np.ndarray", "np.ndarray"]:
+        """
+        Get the shortest path between every pair of stations, running one single
+        source Dijkstra per station. Matrices are in get_all_stations() order.
+
+        :return: (distances, predecessors): distances[i, j] is the distance from
+            station i to station j, inf where there is no path, and predecessors[i, j]
+            is the station before j on that path, -1 where there is none
+        """
+        import numpy as np
+
+        size = len(self.graph.nodes())
+        distances = np.empty((size, size), dtype=np.float64)
+        predecessors = np.empty((size, size), dtype=np.int32)
+
+        if self.backend == GraphBackend.CSR:
+            search = self.graph.search
+        else:
+            from cta_optimizer.shortest_path_table import _single_source_dijkstra
+
+            stations = list(self.graph.nodes())
+            indices = {station: index for index, station in enumerate(stations)}
+            adjacency = self.__get_index_adjacency(stations, indices)
+
+            def search(source: int):
+                return _single_source_dijkstra(adjacency, source)
+
+        for source in range(size):
+            distances[source], predecessors[source] = search(source)
+
+        return distances, predecessors
+
+    def __get_index_graph(
+        self,
+    ) -> Tuple[
+        List[Station[A, T]],
+        dict[Station[A, T], int],
+        List[str],
+        List[List[Tuple[int, float]]],
+    ]:
+        # (stations, station -> index, station ids, adjacency) of the graph as it is
+        stations = list(self.graph.nodes())
+        station_ids = [station.get_id() for station in stations]
+
+        if len(set(station_ids)) != len(station_ids):
+            raise ValueError("Station ids must be unique to index the graph")
+
+        indices = {station: index for index, station in enumerate(stations)}
+        adjacency = self.__get_index_adjacency(stations, indices)
+        return stations, indices, station_ids, adjacency
+
+    def __set_contraction_hierarchy(
+        self,
+        hierarchy: "ContractionHierarchy",
+        stations: List[Station[A, T]],
+        indices: dict[Station[A, T], int],
+    ):
+        self.contraction_hierarchy = hierarchy
+        self.__hierarchy_stations = stations
+        self.__hierarchy_indices = indices
+
+    def __drop_contraction_hierarchy(self):
+        self.contraction_hierarchy = None
+        self.__hierarchy_stations = []
+        self.__hierarchy_indices = {}
+
+    def __get_index_adjacency(
+        self, stations: List[Station[A, T]], indices: dict[Station[A, T], int]
+    ) -> List[List[Tuple[int, float]]]:
+        return [
+            [
+                (indices[target], data["distance"])
+                for target, data in self.graph.adj[station].items()
+            ]
+            for station in stations
+        ]
+
+    def __invalidate_caches(self):
+        self.__csr_copy = None
+        self.__path_cache.clear()
+        self.__drop_contraction_hierarchy()
+
+        if self.shortest_path_table is None:
+            return
+
+        self.shortest_path_table = None
+        self.__table_stations = []
+        self.__table_indices = {}
+
+
+def _get_csr_edge(graph: "CSRGraph", source: int, target: int) -> int:
+    """
+    Find the position of an edge that must exist, for indexing the edge arrays
+
+    :param graph: The graph
+    :param source: The index of the source station
+    :param target: The index of the target station
+    :return: The edge position
+    """
+    from cta_optimizer.csr_graph import NO_EDGE
+
+    edge = graph.get_edge(source, target)
+
+    # NO_EDGE would index the last edge
+    if edge == NO_EDGE:
+        raise KeyError((source, target))
+
+    return edge
+
+
+def _get_cache_directory(
+    cache_dir: str,
+    files: List[str],
+    station_ids: List[str],
+    adjacency: List[List[Tuple[int, float]]],
+) -> str:
+    # The same files can still produce different graphs, for example with a
+    # different subset of closed stations, so the graph itself is part of the key
+    graph_key = hash_values(
+        [
+            *station_ids,
+            *(
+                f"{source}:{target}:{weight!r}"
+                for source, edges in enumerate(adjacency)
+                for target, weight in edges
+            ),
+        ]
+    )
+    return os.path.join(cache_dir, hash_files(files), graph_key[:16])
+
+
+def _no_path(start: Station, end: Station) -> Exception:
+    # Every backend reports a missing path the way networkx does
+    from networkx import NetworkXNoPath
+
+    return NetworkXNoPath(f"No path between {start} and {end}")
@@ -0,0 +1,479 @@
+"""
+timetable.py
+
+The Timetable class answers earliest arrival queries over a day of scheduled
+service with the Connection Scan Algorithm. Every trip is cut into connections,
+one per hop between consecutive stops, and the connections are kept in flat
+arrays sorted by departure time. A query scans them once, from the first
+connection leaving after the requested time, and stops as soon as connections
+leave later than the best arrival at the destination.
+
+Walking transfers come from Station.get_transfer_stations() and take
+minimum_transfer_seconds. Staying on the platform to change trips at the same
+station takes no time.
+
+Times are integer seconds after midnight of the service day and may run past
+24 hours, as in GTFS.
+"""
+
+import json
+from bisect import bisect_left
+from typing import Dict, Generic, Iterable, List, Sequence, Tuple, TypeVar
+
+import numpy as np
+
+from cta_optimizer.models.journey import Journey, parse_time
+from cta_optimizer.models.station import Station
+
+S = TypeVar("S", bound=Station)
+
+DEFAULT_MINIMUM_TRANSFER_SECONDS = 120
+DEFAULT_DWELL_SECONDS = 30
+
+UNREACHED = np.iinfo(np.int64).max
+NO_CONNECTION = -1
+
+# (station, arrival time, departure time) of every stop of a trip
+TripStop = Tuple[S, int, int]
+
+
+class Timetable(Generic[S]):
+    def __init__(
+        self,
+        stations: List[S],
+        departure_stations: np.ndarray,
+        arrival_stations: np.ndarray,
+        departure_times: np.ndarray,
+        arrival_times: np.ndarray,
+        trips: np.ndarray,
+        trip_ids: List[str],
+        minimum_transfer_seconds: int = DEFAULT_MINIMUM_TRANSFER_SECONDS,
+    ):
+        """
+        :param stations: The stations connections run between
+        :param departure_stations: The index in stations of the station every
+            connection leaves from
+        :param arrival_stations: The index of the station every connection arrives at
+        :param departure_times: The departure time of every connection
+        :param arrival_times: The arrival time of every connection
+        :param trips: The index in trip_ids of the trip every connection belongs to.
+            The connections of one trip must be given in the order they are ridden.
+        :param trip_ids: The id of every trip
+        :param minimum_transfer_seconds: The time to walk between transfer stations
+        """
+        departure_stations = np.asarray(departure_stations, dtype=np.int32)
+        arrival_stations = np.asarray(arrival_stations, dtype=np.int32)
+        departure_times = np.asarray(departure_times, dtype=np.int64)
+        arrival_times = np.asarray(arrival_times, dtype=np.int64)
+        trips = np.asarray(trips, dtype=np.int32)
+
+        if not (
+            departure_stations.shape
+            == arrival_stations.shape
+            == departure_times.shape
+            == arrival_times.shape
+            == trips.shape
+        ) or (departure_stations.ndim != 1):
+            raise ValueError(
+                "Connection arrays must be one dimensional and the same length"
+            )
+
+        if len(trips) > 0:
+            if min(departure_stations.min(), arrival_stations.min()) < 0 or max(
+                departure_stations.max(), arrival_stations.max()
+            ) >= len(stations):
+                raise ValueError("Invalid station index")
+
+            if trips.min() < 0 or trips.max() >= len(trip_ids):
+                raise ValueError("Invalid trip index")
+
+            if departure_times.min() < 0 or np.any(arrival_times < departure_times):
+                raise ValueError("Connections must arrive after they depart")
+
+        if (
+            not isinstance(minimum_transfer_seconds, int)
+            or minimum_transfer_seconds < 0
+        ):
+            raise ValueError("Minimum transfer seconds must be a non-negative integer")
+
+        # sort by departure, then arrival so that a hop that takes no time comes
+        # before the connections leaving where it arrives. lexsort is stable, which
+        # keeps the ridden order of a trip's connections that tie on both.
+        order = np.lexsort((arrival_times, departure_times))
+
+        self.stations = stations
+        self.index: Dict[S, int] = {
+            station: position for position, station in enumerate(stations)
+        }
+        self.trip_ids = trip_ids
+        self.minimum_transfer_seconds = minimum_transfer_seconds
+
+        self.departure_stations = departure_stations[order]
+        self.arrival_stations = arrival_stations[order]
+        self.departure_times = departure_times[order]
+        self.arrival_times = arrival_times[order]
+        self.trips = trips[order]
+
+        # the next connection of the same trip, NO_CONNECTION after the last one
+        by_trip = np.lexsort((np.arange(len(self.trips)), self.trips))
+        next_in_trip = np.full(len(self.trips), NO_CONNECTION, dtype=np.int64)
+        same_trip = self.trips[by_trip[:-1]] == self.trips[by_trip[1:]]
+        next_in_trip[by_trip[:-1][same_trip]] = by_trip[1:][same_trip]
+        self.__next_in_trip = next_in_trip.tolist()
+
+        self.__build_footpaths()
+
+        # the scan reads one element at a time, which is much faster on lists
+        self.__departure_station_list = self.departure_stations.tolist()
+        self.__arrival_station_list = self.arrival_stations.tolist()
+        self.__departure_time_list = self.departure_times.tolist()
+        self.__arrival_time_list = self.arrival_times.tolist()
+        self.__trip_list = self.trips.tolist()
+
+    @staticmethod
+    def from_trips(
+        trips: Iterable[Tuple[str, Sequence[TripStop]]],
+        minimum_transfer_seconds: int = DEFAULT_MINIMUM_TRANSFER_SECONDS,
+    ) -> "Timetable[S]":
+        """
+        :param trips: (trip id, stops) pairs, every stop a (station, arrival time,
+            departure time) triple in the order the trip runs
+        :param minimum_transfer_seconds: The time to walk between transfer stations
+        :return: The timetable of the trips
+        """
+        stations: List[S] = []
+        index: Dict[S, int] = {}
+        trip_ids: List[str] = []
+        departure_stations, arrival_stations = [], []
+        departure_times, arrival_times, trip_indices = [], [], []
+
+        for trip_id, stops in trips:
+            if len(stops) < 2:
+                raise ValueError(f"Trip {trip_id} must have at least two stops")
+
+            trip_index = len(trip_ids)
+            trip_ids.append(trip_id)
+
+            for station, _, _ in stops:
+                if station not in index:
+                    index[station] = len(stations)
+                    stations.append(station)
+
+            for (station1, _, departure), (station2, arrival, _) in zip(
+                stops, stops[1:]
+            ):
+                departure_stations.append(index[station1])
+                arrival_stations.append(index[station2])
+                departure_times.append(departure)
+                arrival_times.append(arrival)
+                trip_indices.append(trip_index)
+
+        return Timetable(
+            stations,
+            departure_stations,
+            arrival_stations,
+            departure_times,
+            arrival_times,
+            trip_indices,
+            trip_ids,
+            minimum_transfer_seconds,
+        )
+
+    @staticmethod
+    def load(
+        file: str,
+        stations: Iterable[S],
+        minimum_transfer_seconds: int = DEFAULT_MINIMUM_TRANSFER_SECONDS,
+    ) -> "Timetable[S]":
+        """
+        Load a schedule file:
+        {"trips": [{"id": "red-1", "stops": [
+            {"station": "red:Howard", "arrival": "05:00:00", "departure": "05:00:30"},
+            ...]}]}
+        Stations are referred to by id. Times are HH:MM:SS or seconds after
+        midnight, and departure defaults to arrival.
+
+        :param file: The schedule file to load
+        :param stations: The stations the schedule refers to
+        :param minimum_transfer_seconds: The time to walk between transfer stations
+        :return: The timetable of the schedule
+        """
+        stations_by_id = {station.get_id(): station for station in stations}
+
+        with open(file, "r") as f:
+            data = json.load(f)
+
+        trips = []
+
+        for trip in data["trips"]:
+            stops = []
+
+            for stop in trip["stops"]:
+                station = stations_by_id.get(stop["station"])
+
+                if station is None:
+                    raise ValueError(f"Unknown station: {stop['station']}")
+
+                arrival = parse_time(stop["arrival"])
+                departure = parse_time(stop.get("departure", stop["arrival"]))
+                stops.append((station, arrival, departure))
+
+            trips.append((trip["id"], stops))
+
+        return Timetable.from_trips(trips, minimum_transfer_seconds)
+
+    @staticmethod
+    def from_headways(
+        routes: Dict[str, List[S]],
+        speed: float,
+        first_departure: int,
+        last_departure: int,
+        headway_seconds: int,
+        dwell_seconds: int = DEFAULT_DWELL_SECONDS,
+        minimum_transfer_seconds: int = DEFAULT_MINIMUM_TRANSFER_SECONDS,
+    ) -> "Timetable[S]":
+        """
+        Build a schedule for lines that only have a speed, such as StationData
+        lines: trips leave both ends of every route at a fixed headway and run at
+        the line speed, stopping dwell_seconds at every station.
+
+        :param routes: The stations of every route, in running order
+        :param speed: The running speed in kilometers per hour
+        :param first_departure: The time the first trips leave
+        :param last_departure: The latest time a trip can leave
+        :param headway_seconds: The time between trips in the same direction
+        :param dwell_seconds: The time trips wait at every station
+        :param minimum_transfer_seconds: The time to walk between transfer stations
+        :return: The timetable of the generated trips
+        """
+        if speed is None or speed <= 0:
+            raise ValueError("Speed must be positive")
+
+        if headway_seconds is None or headway_seconds <= 0:
+            raise ValueError("Headway must be positive")
+
+        if last_departure < first_departure:
+            raise ValueError("Last departure cannot be before first departure")
+
+        trips = []
+
+        for route, route_stations in routes.items():
+            for direction, stops in (
+                ("outbound", route_stations),
+                ("inbound", route_stations[::-1]),
+            ):
+                run_seconds = [
+                    round(
+                        station1.get_location()
+                        .distance_to(station2.get_location())
+                        .value
+                        / speed
+                        * 3600
+                    )
+                    for station1, station2 in zip(stops, stops[1:])
+                ]
+
+                for number, start in enumerate(
+                    range(first_departure, last_departure + 1, headway_seconds)
+                ):
+                    time = start
+                    trip_stops = [(stops[0], time, time)]
+
+                    for station, seconds in zip(stops[1:], run_seconds):
+                        arrival = time + seconds
+                        time = arrival + dwell_seconds
+                        trip_stops.append((station, arrival, time))
+
+                    trips.append((f"{route}:{direction}:{number}", trip_stops))
+
+        return Timetable.from_trips(trips, minimum_transfer_seconds)
+
+    def get_connection_count(self) -> int:
+        return len(self.trips)
+
+    def get_earliest_arrival_times(self, start: S, departure_time: int) -> np.ndarray:
+        """
+        :param start: The station to leave from
+        :param departure_time: The earliest time to leave
+        :return: The earliest arrival time at every station, in stations order,
+            UNREACHED where no trip gets there
+        """
+        arrivals, _, _ = self.__scan(self.__get_index(start), departure_time)
+        return np.array(arrivals, dtype=np.int64)
+
+    def get_earliest_arrival(
+        self, start: S, end: S, departure_time: int
+    ) -> Journey[S] | None:
+        """
+        :param start: The station to leave from
+        :param end: The station to arrive at
+        :param departure_time: The earliest time to leave
+        :return: The journey that arrives at end first, None if no trip gets there
+        """
+        source = self.__get_index(start)
+        target = self.__get_index(end)
+
+        arrivals, entries, exits = self.__scan(source, departure_time, target)
+
+        if arrivals[target] == UNREACHED:
+            return None
+
+        return self.__build_journey(source, target, departure_time, entries, exits)
+
+    def __get_index(self, station: S) -> int:
+        index = self.index.get(station)
+
+        if index is None:
+            raise ValueError(f"Station is not in the timetable: {station}")
+
+        return index
+
+    def __scan(
+        self, source: int, departure_time: int, target: int = NO_CONNECTION
+    ) -> Tuple[List[int], List[int], List[int]]:
+        departure_stations = self.__departure_station_list
+        arrival_stations = self.__arrival_station_list
+        departure_times = self.__departure_time_list
+        arrival_times = self.__arrival_time_list
+        trips = self.__trip_list
+        footpath_offsets = self.__footpath_offsets
+        footpath_targets = self.__footpath_targets
+        transfer_seconds = self.minimum_transfer_seconds
+
+        size = len(self.stations)
+        arrivals = [UNREACHED] * size
+        # per station: the connections that boarded and left the trip that got
+        # there first, or (NO_CONNECTION, station walked from) for a walk
+        entries = [NO_CONNECTION] * size
+        exits = [NO_CONNECTION] * size
+        # per trip: the first connection that could be boarded
+        boarded = [NO_CONNECTION] * len(self.trip_ids)
+
+        arrivals[source] = departure_time
+
+        for edge in range(footpath_offsets[source], footpath_offsets[source + 1]):
+            neighbor = footpath_targets[edge]
+            arrivals[neighbor] = departure_time + transfer_seconds
+            exits[neighbor] = source
+
+        for connection in range(
+            bisect_left(departure_times, departure_time), len(departure_times)
+        ):
+            departure = departure_times[connection]
+
+            if target != NO_CONNECTION and departure >= arrivals[target]:
+                break
+
+            trip = trips[connection]
+
+            if boarded[trip] == NO_CONNECTION:
+                if arrivals[departure_stations[connection]] > departure:
+                    continue
+
+                boarded[trip] = connection
+
+            arrival = arrival_times[connection]
+            station = arrival_stations[connection]
+
+            if arrival >= arrivals[station]:
+                continue
+
+            arrivals[station] = arrival
+            entries[station] = boarded[trip]
+            exits[station] = connection
+
+            walk_arrival = arrival + transfer_seconds
+
+            for edge in range(footpath_offsets[station], footpath_offsets[station + 1]):
+                neighbor = footpath_targets[edge]
+
+                if walk_arrival < arrivals[neighbor]:
+                    arrivals[neighbor] = walk_arrival
+                    entries[neighbor] = NO_CONNECTION
+                    exits[neighbor] = station
+
+        return arrivals, entries, exits
+
+    def __build_journey(
+        self,
+        source: int,
+        target: int,
+        departure_time: int,
+        entries: List[int],
+        exits: List[int],
+    ) -> Journey[S]:
+        # (station index, time, trip id) from the end back to the start
+        stops = []
+        station = target
+        # the journey starts when its first ride leaves, or at departure_time if
+        # it starts with a walk
+        start_time = departure_time
+
+        while station != source:
+            entry, exit = entries[station], exits[station]
+
+            if entry == NO_CONNECTION:
+                # walked from the station in exit
+                stops.append((station, None, None))
+                station = exit
+                start_time = departure_time
+                continue
+
+            trip_id = self.trip_ids[self.__trip_list[exit]]
+
+            for connection in self.__get_trip_connections(entry, exit)[::-1]:
+                stops.append(
+                    (
+                        self.__arrival_station_list[connection],
+                        self.__arrival_time_list[connection],
+                        trip_id,
+                    )
+                )
+
+            station = self.__departure_station_list[entry]
+            start_time = self.__departure_time_list[entry]
+
+        stops.append((source, start_time, None))
+        stops.reverse()
+
+        # a walk arrives the minimum transfer time after the previous stop
+        times = []
+
+        for _, time, _ in stops:
+            if time is None:
+                time = times[-1] + self.minimum_transfer_seconds
+
+            times.append(time)
+
+        return Journey(
+            [self.stations[index] for index, _, _ in stops],
+            times,
+            [trip_id for _, _, trip_id in stops],
+        )
+
+    def __get_trip_connections(self, entry: int, exit: int) -> List[int]:
+        connections = [entry]
+
+        while connections[-1] != exit:
+            connections.append(self.__next_in_trip[connections[-1]])
+
+        return connections
+
+    def __build_footpaths(self):
+        sources, targets = [], []
+
+        for source, station in enumerate(self.stations):
+            for transfer_station in station.transfer_stations:
+                target = self.index.get(transfer_station)
+
+                if target is not None:
+                    sources.append(source)
+                    targets.append(target)
+
+        sources = np.asarray(sources, dtype=np.int64)
+        order = np.argsort(sources, kind="stable")
+        offsets = np.zeros(len(self.stations) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(sources, minlength=len(self.stations)), out=offsets[1:])
+
+        self.__footpath_offsets = offsets.tolist()
+        self.__footpath_targets = np.asarray(targets, dtype=np.int64)[order].tolist()
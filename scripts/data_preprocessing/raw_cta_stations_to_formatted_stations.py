@@ -1,8 +1,40 @@
 import json
 
+from cta_optimizer.models.location import Location as StationLocation
+from cta_optimizer.models.station import Station
+from cta_optimizer.network_inference import (
+    DEFAULT_WALKING_RADIUS_KILOMETERS,
+    infer_adjacent_stations,
+    infer_transfer_stations,
+)
 from cta_optimizer.station_data_loader import TransferData
 from pydantic import BaseModel
 
+# Stations of the Loop in track order, from Tower 18 at Lake and Wells
+LOOP_STATIONS = [
+    "Clark/Lake",
+    "State/Lake",
+    "Washington/Wabash",
+    "Adams/Wabash",
+    "Harold Washington Library-State/Van Buren",
+    "LaSalle/Van Buren",
+    "Quincy/Wells",
+    "Washington/Wells",
+]
+
+# Track segments the inference cannot find from the geometry alone, as runs of
+# adjacent stations. The Green Line splits at Garfield, but Halsted is closer
+# to King Drive than to Garfield. Lines that circle the Loop run from the
+# station before it all the way round and back to that station, a cycle no
+# tree holds.
+PINNED_ADJACENT_STATIONS = {
+    "green": [["Garfield", "Halsted"]],
+    "brown": [["Merchandise Mart", *LOOP_STATIONS[::-1], "Merchandise Mart"]],
+    "purple_express": [["Merchandise Mart", *LOOP_STATIONS[::-1], "Merchandise Mart"]],
+    "orange": [["Roosevelt", *LOOP_STATIONS[4:], *LOOP_STATIONS[:4], "Roosevelt"]],
+    "pink": [["Clinton", *LOOP_STATIONS, "Clinton"]],
+}
+
 
 class Location(BaseModel):
     latitude: float
@@ -74,25 +106,27 @@ def main():
         "orange": orange_line_stations,
     }
 
-    # Format the CTA stations data
+    # Format the CTA stations data, one station per name on each line
     formatted_station_data = []
 
     for line, stations in lines.items():
+        line_stations = {}
+
         for station in stations:
-            formatted_station_data.append(
-                FormattedStationData(
-                    name=station.station_name,
-                    route=line,
-                    position=Position(
-                        lat=station.location.latitude,
-                        lng=station.location.longitude
-                    ),
-                    adjacent_stations=[],
-                    transfer_stations={}
-                )
+            line_stations[station.station_name] = FormattedStationData(
+                name=station.station_name,
+                route=line,
+                position=Position(
+                    lat=station.location.latitude,
+                    lng=station.location.longitude
+                ),
+                adjacent_stations=[],
+                transfer_stations={}
             )
 
+        formatted_station_data.extend(line_stations.values())
 
+    infer_edges(formatted_station_data)
 
     # Write the formatted CTA stations data
     with open("../../data/trains/cta/formatted_stations.json", "w") as file:
@@ -104,10 +138,8 @@ def main():
         )
 
     # split the formatted stations data into separate files
-    for line, stations in lines.items():
+    for line in lines:
         line_stations = list(filter(lambda x: x.route == line, formatted_station_data))
-        # remove duplicates from each line
-        line_stations = list({station.name: station for station in line_stations}.values())
 
         with open(f"../../data/trains/cta/{line}_line.json", "w") as file:
             json.dump(
@@ -118,6 +150,46 @@ def main():
             )
 
 
+def infer_edges(formatted_station_data: list[FormattedStationData]):
+    """
+    Fill in the adjacent stations of every station from the geometry of its line,
+    and its transfer stations from the stations of other lines within walking
+    distance. A transfer between two lines of the same station is free.
+
+    :param formatted_station_data: The stations of every line, changed in place
+    """
+    stations = {
+        Station(
+            station.name,
+            StationLocation.intern(station.position.lat, station.position.lng),
+            station.route
+        ): station
+        for station in formatted_station_data
+    }
+    stations_by_id = {station.get_id(): station for station in stations}
+    pinned_edges = [
+        (stations_by_id[f"{route}:{name1}"], stations_by_id[f"{route}:{name2}"])
+        for route, runs in PINNED_ADJACENT_STATIONS.items()
+        for run in runs
+        for name1, name2 in zip(run, run[1:])
+    ]
+
+    adjacent_stations = infer_adjacent_stations(stations, pinned_edges=pinned_edges)
+    transfer_stations = infer_transfer_stations(
+        stations, DEFAULT_WALKING_RADIUS_KILOMETERS
+    )
+
+    for station, station_data in stations.items():
+        station_data.adjacent_stations = sorted(
+            adjacent_station.get_id() for adjacent_station in adjacent_stations[station]
+        )
+        station_data.transfer_stations = {
+            transfer_station.get_id(): TransferData(
+                free_transfer=True if transfer_station.name == station.name else None
+            )
+            for transfer_station, _ in transfer_stations[station]
+        }
+
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
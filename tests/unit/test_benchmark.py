@@ -0,0 +1,159 @@
+import json
+import os
+import tempfile
+import unittest
+
+from cta_optimizer import benchmark
+
+line_data = {
+    "route_name": "red",
+    "speed": 25,
+    "stations": [
+        {
+            "name": "Howard",
+            "route": "red",
+            "position": {"lat": 42.019063, "lng": -87.672892},
+            "adjacent_stations": ["red:Jarvis"],
+            "transfer_stations": {},
+        },
+        {
+            "name": "Jarvis",
+            "route": "red",
+            "position": {"lat": 42.015876, "lng": -87.669092},
+            "adjacent_stations": ["red:Howard", "red:Morse"],
+            "transfer_stations": {},
+        },
+        {
+            "name": "Morse",
+            "route": "red",
+            "position": {"lat": 42.008362, "lng": -87.665909},
+            "adjacent_stations": ["red:Jarvis"],
+            "transfer_stations": {},
+        },
+    ],
+}
+
+BENCHMARK_NAMES = [
+    "load_stations",
+    "build_graph",
+    "shortest_path_dijkstra",
+    "shortest_path_astar",
+    "distance_to",
+    "logger_info",
+    "logger_info_buffered",
+]
+
+
+def create_results(medians: dict) -> dict:
+    return {
+        "version": benchmark.RESULTS_VERSION,
+        "benchmarks": {name: {"median": median} for name, median in medians.items()},
+    }
+
+
+class TestBenchmark(unittest.TestCase):
+
+    def setUp(self):
+        self.temporary_directory = tempfile.TemporaryDirectory()
+        self.line_file = os.path.join(self.temporary_directory.name, "red_line.json")
+
+        with open(self.line_file, "w", encoding="utf-8") as f:
+            json.dump(line_data, f)
+
+    def tearDown(self):
+        self.temporary_directory.cleanup()
+
+    def test_run_benchmarks(self):
+        results = benchmark.run_benchmarks([self.line_file], repeat=2, od_pair_count=4)
+
+        self.assertEqual(list(results["benchmarks"]), BENCHMARK_NAMES)
+        self.assertEqual(results["stations"], 3)
+
+        for result in results["benchmarks"].values():
+            self.assertEqual(len(result["runs"]), 2)
+            self.assertLessEqual(result["min"], result["median"])
+
+        # every station of the line is reachable from every other one
+        self.assertEqual(
+            results["benchmarks"]["shortest_path_dijkstra"]["operations"], 4
+        )
+        self.assertEqual(
+            results["benchmarks"]["shortest_path_dijkstra"]["paths_found"], 4
+        )
+
+    def test_default_files_are_bundled(self):
+        self.assertGreater(len(benchmark.DEFAULT_LINE_FILES), 0)
+
+        for file in benchmark.DEFAULT_LINE_FILES:
+            self.assertTrue(os.path.exists(file))
+
+    def test_od_pairs_are_fixed(self):
+        station_ids = [f"red:{index}" for index in range(20)]
+        pairs = benchmark.get_od_pairs(station_ids, 10)
+
+        self.assertEqual(pairs, benchmark.get_od_pairs(station_ids[::-1], 10))
+        self.assertTrue(all(origin != end for origin, end in pairs))
+        self.assertEqual(benchmark.get_od_pairs(station_ids[:1], 10), [])
+
+    def test_compare_results(self):
+        baseline = create_results({"load_stations": 1.0, "distance_to": 1.0})
+        current = create_results(
+            {"load_stations": 1.1, "distance_to": 1.5, "logger_info": 9.0}
+        )
+
+        self.assertEqual(
+            benchmark.compare_results(baseline, current, 0.2),
+            [("distance_to", 1.0, 1.5)],
+        )
+        self.assertEqual(benchmark.compare_results(baseline, current, 1.0), [])
+
+        with self.assertRaises(ValueError):
+            benchmark.compare_results(baseline, current, -1)
+
+    def test_main_writes_and_compares_results(self):
+        output = os.path.join(self.temporary_directory.name, "results", "run.json")
+        arguments = ["--files", self.line_file, "--repeat", "1", "--od-pairs", "2"]
+
+        self.assertEqual(benchmark.main([*arguments, "--output", output]), 0)
+
+        results = benchmark.read_results(output)
+        self.assertEqual(results["files"], ["red_line.json"])
+
+        baseline = os.path.join(self.temporary_directory.name, "baseline.json")
+        benchmark.write_results(
+            create_results({name: 0.0 for name in BENCHMARK_NAMES}), baseline
+        )
+
+        self.assertEqual(
+            benchmark.main([*arguments, "--output", output, "--compare", baseline]), 1
+        )
+
+    def test_main_synthetic_network(self):
+        output = os.path.join(self.temporary_directory.name, "synthetic.json")
+
+        self.assertEqual(
+            benchmark.main(
+                ["--synthetic", "100", "--repeat", "1", "--od-pairs", "5"]
+                + ["--output", output]
+            ),
+            0,
+        )
+
+        results = benchmark.read_results(output)
+        self.assertGreaterEqual(results["stations"], 100)
+        self.assertEqual(
+            results["benchmarks"]["shortest_path_dijkstra"]["paths_found"], 5
+        )
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            benchmark.run_benchmarks([])
+
+        with self.assertRaises(ValueError):
+            benchmark.time_runs(lambda: None, 0, 1)
+
+        invalid = os.path.join(self.temporary_directory.name, "invalid.json")
+        benchmark.write_results({"version": 0}, invalid)
+
+        with self.assertRaises(ValueError):
+            benchmark.read_results(invalid)
@@ -0,0 +1,54 @@
+import os
+import tempfile
+import unittest
+
+from cta_optimizer.lib.content_hash import hash_files, hash_values
+
+
+class TestContentHash(unittest.TestCase):
+
+    def setUp(self):
+        self.temporary_directory = tempfile.TemporaryDirectory()
+        self.file1 = os.path.join(self.temporary_directory.name, "a.json")
+        self.file2 = os.path.join(self.temporary_directory.name, "b.json")
+
+        with open(self.file1, "w", encoding="utf-8") as f:
+            f.write("first")
+
+        with open(self.file2, "w", encoding="utf-8") as f:
+            f.write("second")
+
+    def tearDown(self):
+        self.temporary_directory.cleanup()
+
+    def test_hash_files_is_stable(self):
+        self.assertEqual(
+            hash_files([self.file1, self.file2]), hash_files([self.file1, self.file2])
+        )
+
+    def test_hash_files_depends_on_order(self):
+        self.assertNotEqual(
+            hash_files([self.file1, self.file2]), hash_files([self.file2, self.file1])
+        )
+
+    def test_hash_files_depends_on_content(self):
+        before = hash_files([self.file1])
+
+        with open(self.file1, "w", encoding="utf-8") as f:
+            f.write("changed")
+
+        self.assertNotEqual(before, hash_files([self.file1]))
+
+    def test_hash_files_invalid(self):
+        with self.assertRaises(ValueError):
+            hash_files(None)
+
+        with self.assertRaises(OSError):
+            hash_files([os.path.join(self.temporary_directory.name, "missing.json")])
+
+    def test_hash_values(self):
+        self.assertEqual(hash_values(["a", "b"]), hash_values(["a", "b"]))
+        self.assertNotEqual(hash_values(["ab"]), hash_values(["a", "b"]))
+
+        with self.assertRaises(ValueError):
+            hash_values(None)
@@ -0,0 +1,122 @@
+import os
+import random
+import tempfile
+import unittest
+
+from cta_optimizer.contraction_hierarchy import ContractionHierarchy
+from cta_optimizer.shortest_path_table import _single_source_dijkstra
+
+STATION_IDS = ["red:A", "red:B", "red:C", "red:D"]
+
+# A -> B -> C, A -> C is longer than going through B, D is unreachable
+ADJACENCY = [
+    [(1, 1.0), (2, 5.0)],
+    [(2, 1.0)],
+    [],
+    [],
+]
+
+
+def create_random_adjacency(size: int, edges: int, seed: int):
+    generator = random.Random(seed)
+    adjacency = [[] for _ in range(size)]
+
+    for _ in range(edges):
+        source, target = generator.randrange(size), generator.randrange(size)
+        adjacency[source].append((target, float(generator.randint(1, 20))))
+
+    return adjacency
+
+
+def path_length(adjacency, path):
+    return sum(
+        min(weight for target, weight in adjacency[source] if target == next_station)
+        for source, next_station in zip(path, path[1:])
+    )
+
+
+class TestContractionHierarchy(unittest.TestCase):
+
+    def test_get_path(self):
+        hierarchy = ContractionHierarchy.build(STATION_IDS, ADJACENCY)
+
+        self.assertEqual(hierarchy.get_path(0, 2), [0, 1, 2])
+        self.assertEqual(hierarchy.get_path(1, 1), [1])
+        self.assertEqual(hierarchy.get_distance(0, 2), 2.0)
+
+    def test_get_path_unreachable(self):
+        hierarchy = ContractionHierarchy.build(STATION_IDS, ADJACENCY)
+
+        self.assertEqual(hierarchy.get_path(0, 3), [])
+        self.assertEqual(hierarchy.get_path(2, 0), [])
+        self.assertEqual(hierarchy.get_distance(0, 3), float("inf"))
+
+    def test_matches_dijkstra(self):
+        for seed in range(5):
+            adjacency = create_random_adjacency(60, 150, seed)
+            station_ids = [f"random:{index}" for index in range(len(adjacency))]
+            hierarchy = ContractionHierarchy.build(station_ids, adjacency)
+
+            for start in range(0, len(adjacency), 3):
+                distances, _ = _single_source_dijkstra(adjacency, start)
+
+                for end in range(len(adjacency)):
+                    path = hierarchy.get_path(start, end)
+
+                    if distances[end] == float("inf"):
+                        self.assertEqual(path, [])
+                        continue
+
+                    # shortcuts are unpacked into edges of the original graph
+                    self.assertEqual((path[0], path[-1]), (start, end))
+                    self.assertAlmostEqual(path_length(adjacency, path), distances[end])
+                    self.assertAlmostEqual(
+                        hierarchy.get_distance(start, end), distances[end]
+                    )
+
+    def test_adds_shortcuts(self):
+        # a line of stations contracts from the ends inwards, so paths across it
+        # need shortcuts
+        adjacency = [[] for _ in range(8)]
+
+        for index in range(7):
+            adjacency[index].append((index + 1, 1.0))
+            adjacency[index + 1].append((index, 1.0))
+
+        hierarchy = ContractionHierarchy.build(
+            [f"red:{index}" for index in range(8)], adjacency
+        )
+
+        self.assertGreater(hierarchy.get_shortcut_count(), 0)
+        self.assertEqual(hierarchy.get_path(0, 7), list(range(8)))
+        self.assertEqual(hierarchy.get_path(7, 0), list(range(7, -1, -1)))
+
+    def test_save_and_load(self):
+        adjacency = create_random_adjacency(40, 100, 0)
+        station_ids = [f"random:{index}" for index in range(len(adjacency))]
+        built = ContractionHierarchy.build(station_ids, adjacency)
+
+        with tempfile.TemporaryDirectory() as temporary_directory:
+            directory = os.path.join(temporary_directory, "hierarchy")
+
+            self.assertFalse(ContractionHierarchy.exists(directory))
+            built.save(directory)
+            self.assertTrue(ContractionHierarchy.exists(directory))
+
+            loaded = ContractionHierarchy.load(directory)
+
+        self.assertEqual(loaded.station_ids, station_ids)
+        self.assertEqual(loaded.get_shortcut_count(), built.get_shortcut_count())
+
+        for start in range(0, len(adjacency), 4):
+            for end in range(len(adjacency)):
+                self.assertEqual(
+                    loaded.get_path(start, end), built.get_path(start, end)
+                )
+
+    def test_build_invalid(self):
+        with self.assertRaises(ValueError):
+            ContractionHierarchy.build(STATION_IDS, ADJACENCY[:2])
+
+        with self.assertRaises(ValueError):
+            ContractionHierarchy.build(STATION_IDS, [[(1, -1.0)], [], [], []])
@@ -0,0 +1,181 @@
+import unittest
+
+import numpy as np
+
+from cta_optimizer.csr_graph import NO_EDGE, CSRGraph, build_path
+
+
+def create_graph():
+    graph = CSRGraph()
+
+    for station in ["A", "B", "C", "D"]:
+        graph.add_node(station)
+
+    graph.add_weighted_edges_from(
+        [("A", "B", 1), ("B", "C", 1), ("A", "C", 5), ("C", "A", 1)], "distance"
+    )
+
+    return graph
+
+
+class TestCSRGraph(unittest.TestCase):
+
+    def test_add_node_assigns_dense_indices(self):
+        graph = create_graph()
+        graph.add_node("A")
+
+        self.assertEqual(graph.index, {"A": 0, "B": 1, "C": 2, "D": 3})
+        self.assertEqual(list(graph.nodes()), ["A", "B", "C", "D"])
+        self.assertIn("C", graph.nodes())
+
+    def test_freeze_builds_csr_arrays(self):
+        graph = create_graph()
+        self.assertFalse(graph.is_frozen())
+
+        graph.freeze()
+
+        self.assertTrue(graph.is_frozen())
+        np.testing.assert_array_equal(graph.offsets, [0, 2, 3, 4, 4])
+        np.testing.assert_array_equal(graph.targets, [1, 2, 2, 0])
+        np.testing.assert_array_equal(graph.weights, [1, 5, 1, 1])
+        self.assertEqual(graph.targets.dtype, np.int32)
+
+    def test_get_edge(self):
+        graph = create_graph()
+        graph.freeze()
+        index = graph.index
+
+        self.assertEqual(graph.weights[graph.get_edge(index["A"], index["C"])], 5)
+        self.assertEqual(graph.get_edge(index["B"], index["A"]), NO_EDGE)
+        self.assertEqual(graph.get_edge(index["D"], index["A"]), NO_EDGE)
+
+        with self.assertRaises(ValueError):
+            graph.set_weight(index["B"], index["A"], 1)
+
+    def test_edges_added_after_freeze_replace_existing(self):
+        graph = create_graph()
+        graph.freeze()
+
+        graph.add_weighted_edges_from([("A", "C", 0.5), ("D", "A", 2)])
+
+        self.assertEqual(graph.adj["A"], {"B": {"distance": 1}, "C": {"distance": 0.5}})
+        self.assertEqual(graph.adj["D"], {"A": {"distance": 2}})
+
+    def test_nodes_added_after_freeze(self):
+        graph = create_graph()
+        graph.freeze()
+
+        graph.add_node("E")
+        graph.add_weighted_edges_from([("E", "A", 1)])
+
+        self.assertEqual(graph.shortest_path("E", "C"), ["E", "A", "B", "C"])
+        self.assertEqual(len(graph.offsets), 6)
+
+    def test_shortest_path(self):
+        graph = create_graph()
+
+        self.assertEqual(graph.shortest_path("A", "C"), ["A", "B", "C"])
+        self.assertEqual(graph.shortest_path("C", "B"), ["C", "A", "B"])
+        self.assertEqual(graph.shortest_path("A", "A"), ["A"])
+        self.assertEqual(graph.shortest_path("A", "D"), [])
+
+    def test_search_settles_every_reachable_station(self):
+        graph = create_graph()
+
+        distances, predecessors = graph.search(0)
+
+        self.assertEqual(distances, [0, 1, 2, float("inf")])
+        self.assertEqual(build_path(predecessors, 0, 2), [0, 1, 2])
+
+    def test_search_stops_after_targets(self):
+        graph = create_graph()
+        distances, predecessors = graph.search(0, targets=[1])
+
+        self.assertEqual(distances[1], 1)
+        self.assertEqual(build_path(predecessors, 0, 1), [0, 1])
+
+        # C is reached but never settled, D is never reached
+        self.assertEqual(distances[3], float("inf"))
+
+        distances, _ = graph.search(0, targets=[1, 2])
+        self.assertEqual(distances[:3], [0, 1, 2])
+
+    def test_search_reverse(self):
+        graph = create_graph()
+        distances, next_stations = graph.search(2, reverse=True)
+
+        # distance to C, and the next station on the way there
+        self.assertEqual(distances, [2, 1, 0, float("inf")])
+        self.assertEqual(next_stations[:2], [1, 2])
+
+    def test_search_with_heuristic(self):
+        graph = create_graph()
+
+        distances, _ = graph.search(0, 2, heuristic=lambda index: 0.0)
+
+        self.assertEqual(distances[2], 2)
+
+    def test_adjacency_view_contains(self):
+        graph = create_graph()
+
+        self.assertIn("A", graph.adj)
+        self.assertNotIn("E", graph.adj)
+
+    def test_bidirectional_search_matches_search(self):
+        random = np.random.default_rng(7)
+
+        for _ in range(50):
+            size = int(random.integers(2, 15))
+            graph = CSRGraph()
+
+            for station in range(size):
+                graph.add_node(station)
+
+            graph.add_weighted_edges_from(
+                (int(source), int(target), float(weight))
+                for source, target, weight in zip(
+                    random.integers(0, size, 3 * size),
+                    random.integers(0, size, 3 * size),
+                    random.integers(1, 10, 3 * size),
+                )
+            )
+
+            source, target = random.integers(0, size, 2).tolist()
+            distances, _ = graph.search(source)
+            path = graph.bidirectional_search(source, target)
+
+            if distances[target] == float("inf"):
+                self.assertEqual(path, [])
+                continue
+
+            self.assertEqual(path[0], source)
+            self.assertEqual(path[-1], target)
+            self.assertAlmostEqual(
+                sum(graph.adj[a][b]["distance"] for a, b in zip(path, path[1:])),
+                distances[target],
+            )
+
+    def test_reverse_arrays(self):
+        graph = create_graph()
+        graph.freeze()
+
+        np.testing.assert_array_equal(graph.reverse_offsets, [0, 1, 2, 4, 4])
+        np.testing.assert_array_equal(graph.reverse_sources, [2, 0, 1, 0])
+
+    def test_add_edge_arrays(self):
+        graph = create_graph()
+
+        graph.add_edge_arrays(np.array([3, 0]), np.array([0, 1]), np.array([2.0, 3.0]))
+        graph.add_weighted_edges_from([("D", "A", 4)])
+
+        self.assertEqual(graph.adj["D"], {"A": {"distance": 4}})
+        self.assertEqual(graph.adj["A"], {"B": {"distance": 3}, "C": {"distance": 5}})
+
+    def test_add_edge_arrays_invalid(self):
+        graph = create_graph()
+
+        with self.assertRaises(ValueError):
+            graph.add_edge_arrays(np.array([0]), np.array([4]), np.array([1.0]))
+
+        with self.assertRaises(ValueError):
+            graph.add_edge_arrays(np.array([0, 1]), np.array([1]), np.array([1.0]))
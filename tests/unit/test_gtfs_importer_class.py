@@ -0,0 +1,223 @@
+import os
+import tempfile
+import unittest
+import zipfile
+
+from cta_optimizer.gtfs_importer import DEFAULT_SPEED, GTFSImporter, GTFSImportError
+from cta_optimizer.station_data_loader import StationDataLoader
+from cta_optimizer.stations_graph_service import StationsGraphService
+
+ROUTES = """route_id,route_short_name,route_long_name,route_type
+Red,,Red Line,1
+Y,,Yellow Line,1
+22,22,Clark,3
+"""
+
+TRIPS = """route_id,service_id,trip_id
+Red,weekday,red-south
+Red,weekday,red-north
+Y,weekday,yellow-west
+22,weekday,bus-1
+"""
+
+# Howard has a platform per line. The Red Line has two stations named Western,
+# like the two branches of the Blue Line.
+STOPS = """stop_id,stop_name,stop_lat,stop_lon,location_type,parent_station
+40900,Howard,42.019063,-87.672892,1,
+30173,Howard (Red Line platform),42.019063,-87.672892,0,40900
+30176,Howard (Yellow Line platform),42.019063,-87.672892,0,40900
+41190,Jarvis,42.015876,-87.669092,0,
+40100,Morse,42.008362,-87.665909,0,
+40140,Dempster-Skokie,42.038951,-87.751919,0,
+1,Western,42.000000,-87.660000,0,
+2,Western,41.990000,-87.660000,0,
+1500,Clark & Howard,42.019,-87.673,0,
+"""
+
+STOP_TIMES = """trip_id,arrival_time,departure_time,stop_id,stop_sequence
+red-south,05:00:00,05:00:00,30173,1
+red-south,05:02:00,05:02:30,41190,2
+red-south,,,40100,3
+red-south,05:06:00,05:06:00,1,4
+red-south,05:08:00,05:08:00,2,5
+bus-1,05:00:00,05:00:00,1500,1
+bus-1,05:10:00,05:10:00,41190,2
+red-north,05:30:00,05:30:00,40100,2
+red-north,05:34:00,05:34:00,30173,3
+red-north,05:28:00,05:28:00,2,1
+yellow-west,06:00:00,06:00:00,30176,1
+yellow-west,06:09:00,06:09:00,40140,2
+"""
+
+TRANSFERS = """from_stop_id,to_stop_id,transfer_type,min_transfer_time
+40140,41190,2,300
+41190,40100,3,
+"""
+
+
+def write_feed(directory: str, **files: str) -> str:
+    contents = {
+        "routes.txt": ROUTES,
+        "trips.txt": TRIPS,
+        "stops.txt": STOPS,
+        "stop_times.txt": STOP_TIMES,
+        "transfers.txt": TRANSFERS,
+    }
+    contents.update(files)
+    path = os.path.join(directory, "gtfs.zip")
+
+    with zipfile.ZipFile(path, "w") as feed:
+        for name, content in contents.items():
+            if content is not None:
+                feed.writestr(name, content)
+
+    return path
+
+
+class TestGTFSImporter(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.feed = write_feed(self.directory.name)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def load(self, feed: str = None):
+        importer = GTFSImporter(
+            feed or self.feed,
+            route_types=[1],
+            route_names={"Red": "red", "Y": "yellow"},
+        )
+        return {
+            station_data.route_name: station_data for station_data in importer.load()
+        }
+
+    def test_load_routes(self):
+        lines = self.load()
+
+        self.assertEqual(set(lines), {"red", "yellow"})
+        self.assertEqual(
+            [station.name for station in lines["red"].stations],
+            ["Howard", "Jarvis", "Morse", "Western (1)", "Western (2)"],
+        )
+
+        howard = lines["red"].stations[0]
+        self.assertEqual(howard.route, "red")
+        self.assertEqual(howard.position.lat, 42.019063)
+
+    def test_load_adjacency(self):
+        red = {station.name: station for station in self.load()["red"].stations}
+
+        self.assertEqual(red["Howard"].adjacent_stations, ["red:Jarvis"])
+        self.assertEqual(red["Jarvis"].adjacent_stations, ["red:Morse"])
+        # north and south bound trips both run between Howard and Morse
+        self.assertEqual(
+            sorted(red["Morse"].adjacent_stations), ["red:Howard", "red:Western (1)"]
+        )
+        self.assertEqual(red["Western (2)"].adjacent_stations, ["red:Morse"])
+
+    def test_load_transfers(self):
+        lines = self.load()
+        red = {station.name: station for station in lines["red"].stations}
+        yellow = {station.name: station for station in lines["yellow"].stations}
+
+        # both platforms belong to the Howard station
+        self.assertEqual(
+            red["Howard"].transfer_stations["yellow:Howard"].free_transfer, True
+        )
+        self.assertEqual(
+            yellow["Howard"].transfer_stations["red:Howard"].free_transfer, True
+        )
+
+        # from transfers.txt, except the transfer that is not possible
+        self.assertIsNone(
+            yellow["Dempster-Skokie"].transfer_stations["red:Jarvis"].free_transfer
+        )
+        self.assertEqual(red["Jarvis"].transfer_stations, {})
+
+    def test_load_speed(self):
+        lines = self.load()
+
+        # the south bound trip has an untimed stop, so only the timed hops count
+        self.assertAlmostEqual(lines["red"].speed, 30.0, delta=0.5)
+        self.assertAlmostEqual(lines["yellow"].speed, 46.0, delta=0.5)
+
+        untimed = STOP_TIMES.replace(
+            "yellow-west,06:09:00,06:09:00", "yellow-west,,"
+        ).replace("yellow-west,06:00:00,06:00:00", "yellow-west,,")
+        lines = self.load(
+            write_feed(self.directory.name, **{"stop_times.txt": untimed})
+        )
+
+        self.assertEqual(lines["yellow"].speed, DEFAULT_SPEED)
+
+    def test_write_line_files(self):
+        output = os.path.join(self.directory.name, "lines")
+        files = GTFSImporter(
+            self.feed, route_types=[1], route_names={"Red": "red", "Y": "yellow"}
+        ).write_line_files(output)
+
+        self.assertEqual(
+            sorted(os.path.basename(file) for file in files),
+            ["red_line.json", "yellow_line.json"],
+        )
+
+        loader = StationDataLoader(files, strict=True)
+        graph = StationsGraphService()
+
+        for station in loader.get_all_stations():
+            graph.add_station(station)
+
+        for station in loader.get_all_stations():
+            for adjacent_station in station.get_adjacent_stations():
+                graph.add_edge(station, adjacent_station)
+
+            for transfer_station in station.get_transfer_stations():
+                graph.add_edge(station, transfer_station)
+
+        path = graph.get_shortest_path(
+            loader.get_station_by_id("yellow:Dempster-Skokie"),
+            loader.get_station_by_id("red:Western (1)"),
+        )
+        self.assertEqual(
+            [station.get_id() for station in path],
+            ["yellow:Dempster-Skokie", "red:Jarvis", "red:Morse", "red:Western (1)"],
+        )
+
+    def test_every_route_type_by_default(self):
+        routes = {
+            station_data.route_name for station_data in GTFSImporter(self.feed).load()
+        }
+
+        self.assertEqual(routes, {"Red", "Y", "22"})
+
+    def test_stop_times_must_be_grouped_by_trip(self):
+        feed = write_feed(
+            self.directory.name,
+            **{"stop_times.txt": STOP_TIMES + "red-south,05:10:00,05:10:00,40900,6\n"},
+        )
+
+        with self.assertRaises(GTFSImportError):
+            self.load(feed)
+
+    def test_invalid_feed(self):
+        with self.assertRaises(ValueError):
+            GTFSImporter(os.path.join(self.directory.name, "missing.zip"))
+
+        with self.assertRaises(GTFSImportError):
+            self.load(write_feed(self.directory.name, **{"stops.txt": None}))
+
+        with self.assertRaises(GTFSImportError):
+            self.load(
+                write_feed(
+                    self.directory.name,
+                    **{
+                        "stop_times.txt": STOP_TIMES
+                        + "red-north,06:00:00,06:00:00,99,4\n"
+                    },
+                )
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
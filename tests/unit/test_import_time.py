@@ -0,0 +1,109 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+PACKAGE_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+# Modules that short-lived processes import without routing anything
+LIGHT_MODULES = [
+    "cta_optimizer.main",
+    "cta_optimizer.lib.logger",
+    "cta_optimizer.models.station",
+    "cta_optimizer.station_data_loader",
+    "cta_optimizer.stations_graph_service",
+]
+
+HEAVY_DEPENDENCIES = ["memory_profiler", "networkx", "numpy", "pydantic"]
+
+# Generous enough for a slow CI machine, far below the cost of the heavy dependencies
+IMPORT_TIME_BUDGET_SECONDS = 0.25
+
+MEASURE_IMPORTS = """
+import json, sys, time
+start = time.perf_counter()
+for module in {modules!r}:
+    __import__(module)
+elapsed = time.perf_counter() - start
+print(json.dumps({{
+    "elapsed": elapsed,
+    "loaded": [name for name in {heavy!r} if name in sys.modules],
+}}))
+"""
+
+ACCESS_DEFAULT_LOGGER = """
+import json, os
+from cta_optimizer.lib import logger
+exists_before = os.path.exists(os.path.join("logs", "activity.log"))
+same = logger.default_logger is logger.default_logger
+try:
+    getattr(logger, "missing_logger")
+    missing_raises = False
+except AttributeError:
+    missing_raises = True
+print(json.dumps({
+    "exists_before": exists_before,
+    "exists_after": os.path.exists(os.path.join("logs", "activity.log")),
+    "same": same,
+    "missing_raises": missing_raises,
+}))
+"""
+
+
+def measure_imports(working_directory: str) -> dict:
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            MEASURE_IMPORTS.format(modules=LIGHT_MODULES, heavy=HEAVY_DEPENDENCIES),
+        ],
+        cwd=working_directory,
+        env={**os.environ, "PYTHONPATH": PACKAGE_ROOT},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    return json.loads(result.stdout)
+
+
+class TestImportTime(unittest.TestCase):
+
+    def test_heavy_dependencies_are_not_imported(self):
+        with tempfile.TemporaryDirectory() as directory:
+            result = measure_imports(directory)
+
+        self.assertEqual(result["loaded"], [])
+
+    def test_import_has_no_file_side_effects(self):
+        with tempfile.TemporaryDirectory() as directory:
+            measure_imports(directory)
+
+            self.assertEqual(os.listdir(directory), [])
+
+    def test_import_time_budget(self):
+        with tempfile.TemporaryDirectory() as directory:
+            # the first run warms the bytecode cache
+            measure_imports(directory)
+            result = measure_imports(directory)
+
+        self.assertLess(result["elapsed"], IMPORT_TIME_BUDGET_SECONDS)
+
+    def test_default_logger_is_created_on_first_access(self):
+        with tempfile.TemporaryDirectory() as directory:
+            result = subprocess.run(
+                [sys.executable, "-c", ACCESS_DEFAULT_LOGGER],
+                cwd=directory,
+                env={**os.environ, "PYTHONPATH": PACKAGE_ROOT},
+                capture_output=True,
+                text=True,
+                check=True,
+            )
+            result = json.loads(result.stdout)
+
+        self.assertFalse(result["exists_before"])
+        self.assertTrue(result["exists_after"])
+        self.assertTrue(result["same"])
+        self.assertTrue(result["missing_raises"])
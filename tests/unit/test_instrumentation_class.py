@@ -0,0 +1,243 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import unittest
+
+from cta_optimizer.lib.instrumentation import (
+    INSTRUMENTATION_ENVIRONMENT_VARIABLE,
+    INSTRUMENTATION_FORMAT_ENVIRONMENT_VARIABLE,
+    Instrumentation,
+    OutputFormat,
+    instrumentation,
+)
+from cta_optimizer.models.location import Location
+from cta_optimizer.models.station import Station
+from cta_optimizer.stations_graph_service import StationsGraphService
+
+PACKAGE_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+
+class TestInstrumentation(unittest.TestCase):
+
+    def setUp(self):
+        self.temporary_directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.temporary_directory.cleanup()
+
+    def test_disabled_records_nothing(self):
+        recorder = Instrumentation()
+
+        with recorder.timer("stage"):
+            pass
+
+        recorder.timed("function")(lambda: None)()
+        recorder.count("counter")
+        recorder.sample_memory("sample")
+
+        self.assertEqual(
+            recorder.get_report(),
+            {"timers": {}, "counters": {}, "memory": [], "dropped_events": 0},
+        )
+
+    def test_timers(self):
+        recorder = Instrumentation(enabled=True)
+
+        for _ in range(3):
+            with recorder.timer("stage"):
+                pass
+
+        @recorder.timed("function")
+        def add(a, b):
+            return a + b
+
+        self.assertEqual(add(1, b=2), 3)
+        self.assertEqual(add.__name__, "add")
+
+        with self.assertRaises(KeyError):
+            with recorder.timer("failing"):
+                raise KeyError("stage failed")
+
+        timers = recorder.get_report()["timers"]
+
+        self.assertEqual(timers["stage"]["count"], 3)
+        self.assertEqual(timers["function"]["count"], 1)
+        self.assertEqual(timers["failing"]["count"], 1)
+        self.assertLessEqual(
+            timers["stage"]["min_seconds"], timers["stage"]["max_seconds"]
+        )
+
+    def test_counters_and_memory(self):
+        recorder = Instrumentation(enabled=True)
+        recorder.count("stations", 10)
+        recorder.count("stations", 5)
+        recorder.count("files")
+        recorder.sample_memory("after load")
+
+        report = recorder.get_report()
+
+        self.assertEqual(report["counters"], {"stations": 15, "files": 1})
+        self.assertEqual(report["memory"][0]["name"], "after load")
+
+        if sys.platform != "win32":
+            self.assertGreater(report["memory"][0]["peak_rss_bytes"], 0)
+
+    def test_counters_from_threads(self):
+        recorder = Instrumentation(enabled=True)
+
+        def count():
+            for _ in range(1000):
+                recorder.count("calls")
+
+        threads = [threading.Thread(target=count) for _ in range(4)]
+
+        for thread in threads:
+            thread.start()
+
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(recorder.get_report()["counters"]["calls"], 4000)
+
+    def test_max_events(self):
+        recorder = Instrumentation(enabled=True, max_events=2)
+
+        for _ in range(5):
+            with recorder.timer("stage"):
+                pass
+
+        self.assertEqual(recorder.get_report()["timers"]["stage"]["count"], 5)
+        self.assertEqual(recorder.get_report()["dropped_events"], 3)
+        self.assertEqual(len(recorder.get_chrome_trace()["traceEvents"]), 2)
+
+    def test_write(self):
+        recorder = Instrumentation(enabled=True)
+
+        with recorder.timer("stage"):
+            recorder.count("counter")
+
+        recorder.sample_memory("sample")
+
+        report_file = os.path.join(self.temporary_directory.name, "report.json")
+        trace_file = os.path.join(self.temporary_directory.name, "out", "trace.json")
+        recorder.write(report_file)
+        recorder.write(trace_file, OutputFormat.CHROME)
+
+        with open(report_file, "r", encoding="utf-8") as f:
+            self.assertIn("stage", json.load(f)["timers"])
+
+        with open(trace_file, "r", encoding="utf-8") as f:
+            events = json.load(f)["traceEvents"]
+
+        self.assertEqual(
+            [(event["name"], event["ph"]) for event in events],
+            [("stage", "X"), ("memory: sample", "C"), ("counter", "C")],
+        )
+
+        with self.assertRaises(ValueError):
+            recorder.write()
+
+    def test_reset(self):
+        recorder = Instrumentation(enabled=True)
+        recorder.count("counter")
+        recorder.reset()
+
+        self.assertEqual(recorder.get_report()["counters"], {})
+
+    def test_graph_service_is_instrumented(self):
+        stations = [
+            Station("A", Location(41.90, -87.70), "red"),
+            Station("B", Location(41.91, -87.70), "red"),
+        ]
+        graph = StationsGraphService()
+
+        for station in stations:
+            graph.add_station(station)
+
+        instrumentation.reset()
+        instrumentation.enable()
+
+        try:
+            graph.add_edges([(stations[0], stations[1])])
+            graph.get_shortest_path(stations[0], stations[1])
+            graph.get_shortest_path(stations[0], stations[1])
+            report = instrumentation.get_report()
+        finally:
+            instrumentation.disable()
+            instrumentation.reset()
+
+        self.assertEqual(report["counters"]["stations_graph_service.edges"], 1)
+        self.assertEqual(
+            report["timers"]["stations_graph_service.add_edges"]["count"], 1
+        )
+        # the second path comes from the path cache
+        self.assertEqual(
+            report["timers"]["stations_graph_service.search_shortest_path"]["count"], 1
+        )
+
+    def test_enabled_by_environment(self):
+        output = os.path.join(self.temporary_directory.name, "trace.json")
+        subprocess.run(
+            [
+                sys.executable,
+                "-c",
+                "from cta_optimizer.lib.instrumentation import instrumentation\n"
+                "with instrumentation.timer('stage'):\n"
+                "    pass\n",
+            ],
+            env={
+                **os.environ,
+                "PYTHONPATH": PACKAGE_ROOT,
+                INSTRUMENTATION_ENVIRONMENT_VARIABLE: output,
+                INSTRUMENTATION_FORMAT_ENVIRONMENT_VARIABLE: "chrome",
+            },
+            check=True,
+        )
+
+        with open(output, "r", encoding="utf-8") as f:
+            self.assertEqual(json.load(f)["traceEvents"][0]["name"], "stage")
+
+    def test_invalid_format_in_environment(self):
+        # the package still imports, and writes JSON
+        output = os.path.join(self.temporary_directory.name, "report.json")
+
+        for output_format, enabled in (("xml", ""), ("xml", output), ("CHROME", "")):
+            result = subprocess.run(
+                [
+                    sys.executable,
+                    "-c",
+                    "import cta_optimizer.station_data_loader\n"
+                    "import cta_optimizer.stations_graph_service\n"
+                    "from cta_optimizer.lib.instrumentation import instrumentation\n"
+                    "print(instrumentation.output_format)\n",
+                ],
+                env={
+                    **os.environ,
+                    "PYTHONPATH": PACKAGE_ROOT,
+                    INSTRUMENTATION_ENVIRONMENT_VARIABLE: enabled,
+                    INSTRUMENTATION_FORMAT_ENVIRONMENT_VARIABLE: output_format,
+                },
+                capture_output=True,
+                text=True,
+                check=True,
+            )
+
+            if output_format == "xml":
+                self.assertEqual(result.stdout.strip(), OutputFormat.JSON)
+                self.assertIn("RuntimeWarning", result.stderr)
+            else:
+                self.assertEqual(result.stdout.strip(), OutputFormat.CHROME)
+                self.assertEqual(result.stderr, "")
+
+        with open(output, "r", encoding="utf-8") as f:
+            self.assertIn("timers", json.load(f))
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            Instrumentation(output_format="invalid")
+
+        with self.assertRaises(ValueError):
+            Instrumentation(max_events=-1)
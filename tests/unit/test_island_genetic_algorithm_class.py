@@ -0,0 +1,142 @@
+import unittest
+
+import numpy as np
+
+from cta_optimizer.island_genetic_algorithm import IslandGeneticAlgorithm
+from cta_optimizer.models.location import Location
+from cta_optimizer.models.station import Station
+from cta_optimizer.stations_graph_service import StationsGraphService
+
+
+def create_grid_graph(size: int = 5):
+    """
+    A size x size grid of stations linked to their horizontal and vertical
+    neighbours in both directions
+    """
+    stations = [
+        Station(
+            f"{row}-{column}",
+            Location(41.8 + row * 0.01, -87.7 + column * 0.013),
+            "grid",
+        )
+        for row in range(size)
+        for column in range(size)
+    ]
+
+    graph = StationsGraphService()
+
+    for station in stations:
+        graph.add_station(station)
+
+    for row in range(size):
+        for column in range(size):
+            station = stations[row * size + column]
+
+            if column + 1 < size:
+                graph.add_edge(station, stations[row * size + column + 1])
+                graph.add_edge(stations[row * size + column + 1], station)
+
+            if row + 1 < size:
+                graph.add_edge(station, stations[(row + 1) * size + column])
+                graph.add_edge(stations[(row + 1) * size + column], station)
+
+    return graph, stations
+
+
+class TestIslandGeneticAlgorithm(unittest.TestCase):
+    def setUp(self):
+        self.graph, self.stations = create_grid_graph()
+
+    def create_algorithm(self, **kwargs):
+        options = {
+            "route_count": 3,
+            "island_count": 3,
+            "island_size": 8,
+            "migration_interval": 2,
+            "processes": 1,
+            "seed": 1,
+        }
+        options.update(kwargs)
+
+        return IslandGeneticAlgorithm(self.graph, **options)
+
+    def test_run(self):
+        with self.create_algorithm() as algorithm:
+            best = algorithm.run(5)
+
+            self.assertEqual(best.shape, (3, 2))
+            self.assertEqual(algorithm.generation, 5)
+
+            history = algorithm.get_history()
+            self.assertEqual(len(history), 6)
+            self.assertEqual(history[-1], algorithm.get_best_fitness())
+
+            for island in algorithm.islands:
+                self.assertEqual(island.generation, 5)
+                self.assertEqual(island.population.shape, (8, 3, 2))
+
+    def test_islands_share_arrays_and_carry_fitness(self):
+        with self.create_algorithm() as algorithm:
+            first = algorithm.islands[0]
+
+            for island in algorithm.islands[1:]:
+                self.assertIs(island.fitness_arrays, first.fitness_arrays)
+                self.assertIs(island.distances, first.distances)
+
+            algorithm.run(3)
+
+            for island in algorithm.islands:
+                np.testing.assert_allclose(
+                    island.fitness, island.evaluate(island.population), rtol=1e-6
+                )
+
+    def test_migration_shares_best_route_sets(self):
+        with self.create_algorithm(island_count=2, migration_interval=1) as algorithm:
+            algorithm.run(1)
+
+            # each island sent its best route sets to the other one
+            first, second = algorithm.islands
+            self.assertEqual(first.get_best_fitness(), second.get_best_fitness())
+            np.testing.assert_array_equal(first.get_best(), second.get_best())
+
+    def test_no_migration_between_intervals(self):
+        with self.create_algorithm(island_count=2, migration_interval=10) as algorithm:
+            algorithm.run(3)
+
+            first, second = algorithm.islands
+            self.assertNotEqual(first.get_best_fitness(), second.get_best_fitness())
+
+    def test_processes_match_single_process(self):
+        with self.create_algorithm(processes=1) as algorithm:
+            expected = algorithm.run(4)
+            expected_history = algorithm.get_history()
+
+        with self.create_algorithm(processes=2) as algorithm:
+            actual = algorithm.run(4)
+            actual_history = algorithm.get_history()
+
+        np.testing.assert_array_equal(actual, expected)
+        np.testing.assert_allclose(actual_history, expected_history)
+
+    def test_get_routes(self):
+        with self.create_algorithm() as algorithm:
+            routes = algorithm.get_routes(algorithm.run(1))
+
+            self.assertEqual(len(routes), 3)
+            self.assertTrue(all(len(route) >= 2 for route in routes))
+
+    def test_invalid_options(self):
+        with self.assertRaises(ValueError):
+            self.create_algorithm(island_count=0)
+
+        with self.assertRaises(ValueError):
+            self.create_algorithm(migration_interval=0)
+
+        with self.assertRaises(ValueError):
+            self.create_algorithm(migration_size=8)
+
+        with self.assertRaises(ValueError):
+            self.create_algorithm(processes=0)
+
+        with self.assertRaises(ValueError):
+            self.create_algorithm().run(-1)
@@ -0,0 +1,62 @@
+import unittest
+
+from cta_optimizer.models.journey import Journey, format_time, parse_time
+from cta_optimizer.models.location import Location
+from cta_optimizer.models.station import Station
+
+
+class TestJourneyClass(unittest.TestCase):
+
+    def setUp(self):
+        self.stations = [
+            Station("Jarvis", Location(42.015876, -87.669092), "red"),
+            Station("Howard", Location(42.019063, -87.672892), "red"),
+            Station("Howard", Location(42.019063, -87.672892), "yellow"),
+            Station("Dempster-Skokie", Location(42.038951, -87.751919), "yellow"),
+        ]
+
+    def test_journey_creates_object(self):
+        journey = Journey(
+            self.stations,
+            [28800, 28920, 29040, 29400],
+            [None, "red-1", None, "yellow-1"],
+        )
+
+        self.assertEqual(journey.get_start(), self.stations[0])
+        self.assertEqual(journey.get_end(), self.stations[3])
+        self.assertEqual(journey.get_departure_time(), 28800)
+        self.assertEqual(journey.get_arrival_time(), 29400)
+        self.assertEqual(journey.get_duration(), 600)
+        self.assertEqual(journey.get_rides(), ["red-1", "yellow-1"])
+        self.assertEqual(journey.get_transfer_count(), 1)
+        self.assertEqual(len(journey), 4)
+        self.assertEqual(
+            str(journey), "Journey: Jarvis at 08:00:00 to Dempster-Skokie at 08:10:00"
+        )
+
+    def test_journey_with_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            Journey([], [], [])
+
+        with self.assertRaises(ValueError):
+            Journey(self.stations[:2], [0], [None, "red-1"])
+
+        with self.assertRaises(ValueError):
+            Journey(self.stations[:2], [0, 60], [None])
+
+        with self.assertRaises(ValueError):
+            Journey(self.stations[:2], [60, 0], [None, "red-1"])
+
+    def test_parse_time(self):
+        self.assertEqual(parse_time("08:00:00"), 28800)
+        self.assertEqual(parse_time("25:30:15"), 91815)
+        self.assertEqual(parse_time(600), 600)
+        self.assertEqual(format_time(91815), "25:30:15")
+
+        for time in ("8:00", "08:60:00", "aa:00:00", -1, 1.5, None):
+            with self.assertRaises(ValueError):
+                parse_time(time)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,3 +1,4 @@
+import pickle
 import unittest
 
 from cta_optimizer.models.kilometer import Kilometer
@@ -54,3 +55,11 @@ class TestKilometerClass(unittest.TestCase):
     def test_kilometer_to_string(self):
         kilometer = Kilometer(1)
         self.assertEqual(str(kilometer), "1 km")
+
+    def test_kilometer_is_immutable(self):
+        kilometer = Kilometer(1)
+
+        with self.assertRaises(AttributeError):
+            kilometer.value = 2
+
+        self.assertEqual(pickle.loads(pickle.dumps(kilometer)), kilometer)
@@ -1,5 +1,8 @@
+import pickle
 import unittest
 
+import numpy as np
+
 from cta_optimizer.models.location import Location
 
 
@@ -92,3 +95,72 @@ class TestLocation(unittest.TestCase):
 
         with self.assertRaises(ValueError):
             location1.distance_to("Invalid")
+
+    def test_location_distances_to(self):
+        origin = Location(0, 0)
+        others = [Location(0, 0), Location(1, 1), Location(41.8781, -87.6298)]
+
+        distances = origin.distances_to(others)
+
+        self.assertEqual(distances.shape, (3,))
+        self.assertEqual(distances.dtype, np.float64)
+        for distance, other in zip(distances, others):
+            self.assertAlmostEqual(distance, origin.distance_to(other).value, places=9)
+
+    def test_location_distances_to_invalid_location(self):
+        with self.assertRaises(ValueError):
+            Location(0, 0).distances_to(None)
+
+        with self.assertRaises(ValueError):
+            Location(0, 0).distances_to([Location(0, 0), "Invalid"])
+
+    def test_location_distance_matrix(self):
+        locations = [Location(0, 0), Location(1, 1), Location(-10, 20)]
+
+        matrix = Location.distance_matrix(locations)
+
+        self.assertEqual(matrix.shape, (3, 3))
+        for i, origin in enumerate(locations):
+            for j, destination in enumerate(locations):
+                self.assertAlmostEqual(
+                    matrix[i, j], origin.distance_to(destination).value, places=9
+                )
+
+    def test_location_distance_matrix_empty(self):
+        self.assertEqual(Location.distance_matrix([]).shape, (0, 0))
+
+    def test_location_pairwise_distances(self):
+        origins = [Location(0, 0), Location(1, 1)]
+        destinations = [Location(1, 1), Location(1, 1)]
+
+        distances = Location.pairwise_distances(origins, destinations)
+
+        self.assertAlmostEqual(distances[0], 157.2, places=1)
+        self.assertEqual(distances[1], 0)
+
+        with self.assertRaises(ValueError):
+            Location.pairwise_distances(origins, destinations[:1])
+
+    def test_location_is_immutable(self):
+        location = Location(0, 0)
+
+        with self.assertRaises(AttributeError):
+            location.latitude = 1
+
+        self.assertFalse(hasattr(location, "__dict__"))
+
+    def test_location_intern(self):
+        location = Location.intern(41.878723, -87.63374)
+
+        self.assertIs(Location.intern(41.878723, -87.63374), location)
+        self.assertIsNot(Location.intern(41.878723, -87.6), location)
+        self.assertEqual(location, Location(41.878723, -87.63374))
+        self.assertEqual(hash(location), hash(Location(41.878723, -87.63374)))
+
+        with self.assertRaises(ValueError):
+            Location.intern(91, 0)
+
+    def test_location_pickle(self):
+        location = Location(41.878723, -87.63374)
+
+        self.assertEqual(pickle.loads(pickle.dumps(location)), location)
@@ -1,4 +1,5 @@
 import os
+import time
 import unittest
 from unittest.mock import patch, mock_open
 from cta_optimizer.lib.logger import Logger, LogLevel, format_log_message
@@ -126,3 +127,165 @@ class TestLogger(unittest.TestCase):
     def test_logger_creation_error_backup_fails(self, mock_open):
         logger = Logger(file_path=LOG_FILE_PATH_2, create_new_file=False)
         self.assertTrue(logger.print_to_console)
+
+
+class TestLoggerBuffering(unittest.TestCase):
+
+    def tearDown(self):
+        for path in (LOG_FILE_PATH, *(f"{LOG_FILE_PATH}.{i}" for i in range(1, 4))):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def read_log(self, path: str = LOG_FILE_PATH) -> str:
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read()
+
+    def test_min_level_drops_lower_levels(self):
+        logger = Logger(
+            file_path=LOG_FILE_PATH,
+            create_new_file=True,
+            print_to_console=False,
+            min_level=LogLevel.WARNING,
+        )
+        logger.info("Dropped message")
+        logger.warning("Warning message")
+        logger.error("Error message")
+        logger.close()
+
+        content = self.read_log()
+        self.assertNotIn("Dropped message", content)
+        self.assertIn("WARNING: Warning message", content)
+        self.assertIn("ERROR: Error message", content)
+
+        self.assertFalse(logger.is_enabled_for(LogLevel.INFO))
+        self.assertTrue(logger.is_enabled_for(LogLevel.ERROR))
+
+    def test_min_level_skips_formatting(self):
+        logger = Logger(
+            file_path=LOG_FILE_PATH,
+            create_new_file=True,
+            print_to_console=False,
+            min_level=LogLevel.ERROR,
+        )
+
+        with patch("cta_optimizer.lib.logger.format_log_message") as format_message:
+            logger.info("Dropped message")
+            format_message.assert_not_called()
+
+        logger.close()
+
+    def test_invalid_options(self):
+        with self.assertRaises(ValueError):
+            Logger(file_path=LOG_FILE_PATH, min_level="INVALID")
+
+        with self.assertRaises(ValueError):
+            Logger(file_path=LOG_FILE_PATH, flush_interval=0)
+
+        with self.assertRaises(ValueError):
+            Logger(file_path=LOG_FILE_PATH, max_bytes=-1)
+
+        with self.assertRaises(ValueError):
+            Logger(file_path=LOG_FILE_PATH, backup_count=-1)
+
+    def test_buffered_logger_writes_on_flush(self):
+        logger = Logger(
+            file_path=LOG_FILE_PATH,
+            create_new_file=True,
+            print_to_console=False,
+            buffered=True,
+            flush_interval=60,
+        )
+        logger.info("Buffered message")
+        self.assertNotIn("Buffered message", self.read_log())
+
+        logger.flush()
+        self.assertIn("Buffered message", self.read_log())
+        logger.close()
+
+    def test_buffered_logger_flushes_in_background(self):
+        logger = Logger(
+            file_path=LOG_FILE_PATH,
+            create_new_file=True,
+            print_to_console=False,
+            buffered=True,
+            flush_interval=0.01,
+        )
+        logger.info("Background message")
+
+        for _ in range(200):
+            if "Background message" in self.read_log():
+                break
+
+            time.sleep(0.01)
+
+        self.assertIn("Background message", self.read_log())
+        logger.close()
+
+    def test_close_writes_queued_messages(self):
+        logger = Logger(
+            file_path=LOG_FILE_PATH,
+            create_new_file=True,
+            print_to_console=False,
+            buffered=True,
+            flush_interval=60,
+        )
+
+        for i in range(100):
+            logger.info(f"Message {i}")
+
+        logger.close()
+
+        lines = self.read_log().splitlines()
+        self.assertEqual(len(lines), 100)
+        self.assertTrue(lines[-1].endswith("Message 99"))
+
+        # Closing twice does nothing
+        logger.close()
+
+    def test_rotation_keeps_backups(self):
+        logger = Logger(
+            file_path=LOG_FILE_PATH,
+            create_new_file=True,
+            print_to_console=False,
+            max_bytes=200,
+            backup_count=2,
+        )
+
+        for i in range(20):
+            logger.info(f"Rotated message {i}")
+
+        logger.close()
+
+        self.assertTrue(os.path.exists(f"{LOG_FILE_PATH}.1"))
+        self.assertTrue(os.path.exists(f"{LOG_FILE_PATH}.2"))
+        self.assertFalse(os.path.exists(f"{LOG_FILE_PATH}.3"))
+
+        for path in (LOG_FILE_PATH, f"{LOG_FILE_PATH}.1", f"{LOG_FILE_PATH}.2"):
+            self.assertLessEqual(os.path.getsize(path), 200)
+
+        # The newest messages are in the current file, the ones before it in .1
+        current = self.read_log()
+        first_current = int(current.splitlines()[0].rsplit(" ", 1)[1])
+        self.assertIn("Rotated message 19", current)
+        self.assertIn(
+            f"Rotated message {first_current - 1}",
+            self.read_log(f"{LOG_FILE_PATH}.1"),
+        )
+
+    def test_rotation_without_backups_truncates(self):
+        logger = Logger(
+            file_path=LOG_FILE_PATH,
+            create_new_file=True,
+            print_to_console=False,
+            max_bytes=200,
+            backup_count=0,
+        )
+
+        for i in range(20):
+            logger.info(f"Rotated message {i}")
+
+        logger.close()
+
+        self.assertFalse(os.path.exists(f"{LOG_FILE_PATH}.1"))
+        self.assertLessEqual(os.path.getsize(LOG_FILE_PATH), 200)
+        self.assertIn("Rotated message 19", self.read_log())
@@ -1,3 +1,4 @@
+import pickle
 import unittest
 
 from cta_optimizer.models.mile import Mile
@@ -54,3 +55,11 @@ class TestMileClass(unittest.TestCase):
     def test_mile_to_string(self):
         mile = Mile(1)
         self.assertEqual(str(mile), "1 miles")
+
+    def test_mile_is_immutable(self):
+        mile = Mile(1)
+
+        with self.assertRaises(AttributeError):
+            mile.value = 2
+
+        self.assertEqual(pickle.loads(pickle.dumps(mile)), mile)
@@ -0,0 +1,135 @@
+import filecmp
+import json
+import os
+import tempfile
+import unittest
+
+from cta_optimizer.network_generator import NetworkGenerator, main
+from cta_optimizer.station_data_loader import StationDataLoader
+
+
+class TestNetworkGenerator(unittest.TestCase):
+
+    def setUp(self):
+        self.temporary_directory = tempfile.TemporaryDirectory()
+        self.directory = self.temporary_directory.name
+
+    def tearDown(self):
+        self.temporary_directory.cleanup()
+
+    def test_write_line_files(self):
+        generator = NetworkGenerator(12, 20, transfer_density=1.0, seed=1)
+        files = generator.write_line_files(os.path.join(self.directory, "network"))
+
+        self.assertEqual(len(files), 12)
+        self.assertEqual(os.path.basename(files[0]), "line_00_line.json")
+
+        data_loader = StationDataLoader(files, strict=True)
+        stations = data_loader.get_all_stations()
+
+        self.assertEqual(len(stations), generator.get_stop_count())
+
+        # every line is a chain of stops
+        line = data_loader.get_stations_by_route("line_03")
+        self.assertEqual(len(line), 20)
+
+        for station, next_station in zip(line, line[1:]):
+            self.assertIn(next_station, station.get_adjacent_stations())
+            self.assertIn(station, next_station.get_adjacent_stations())
+
+        # transfers go both ways
+        transfers = [
+            (station, other_station)
+            for station in stations
+            for other_station in station.get_transfer_stations()
+        ]
+
+        self.assertGreater(len(transfers), 0)
+
+        for station, other_station in transfers:
+            self.assertNotEqual(station.route, other_station.route)
+            self.assertIn(station, other_station.get_transfer_stations())
+
+    def test_same_seed_same_network(self):
+        first = NetworkGenerator(5, 10, seed=7).write_line_files(
+            os.path.join(self.directory, "first")
+        )
+        second = NetworkGenerator(5, 10, seed=7).write_line_files(
+            os.path.join(self.directory, "second")
+        )
+        other = NetworkGenerator(5, 10, seed=8).write_line_files(
+            os.path.join(self.directory, "other")
+        )
+
+        for first_file, second_file in zip(first, second):
+            self.assertTrue(filecmp.cmp(first_file, second_file, shallow=False))
+
+        self.assertFalse(filecmp.cmp(first[0], other[0], shallow=False))
+
+    def test_transfer_density(self):
+        def count_transfers(transfer_density: float) -> int:
+            generator = NetworkGenerator(
+                20, 10, transfer_density=transfer_density, seed=3
+            )
+
+            return sum(
+                len(station["transfer_stations"])
+                for line in range(generator.line_count)
+                for station in generator.iter_stations(line)
+            )
+
+        self.assertEqual(count_transfers(0.0), 0)
+        self.assertLess(count_transfers(0.3), count_transfers(1.0))
+
+    def test_spread(self):
+        generator = NetworkGenerator(
+            10, 10, spread_kilometers=2.0, center=(41.88, -87.63), seed=2
+        )
+
+        for line in range(generator.line_count):
+            for station in generator.iter_stations(line):
+                # about a kilometer around the center, with a little jitter
+                self.assertAlmostEqual(station["position"]["lat"], 41.88, delta=0.012)
+                self.assertAlmostEqual(station["position"]["lng"], -87.63, delta=0.016)
+
+    def test_for_stop_count(self):
+        for stop_count in (4, 1000, 12345):
+            generator = NetworkGenerator.for_stop_count(stop_count, seed=1)
+
+            self.assertGreaterEqual(generator.get_stop_count(), stop_count)
+            self.assertLess(
+                generator.get_stop_count(), stop_count + generator.line_count
+            )
+
+    def test_main(self):
+        directory = os.path.join(self.directory, "network")
+
+        self.assertEqual(main([directory, "100", "--seed", "4", "--lines", "5"]), 0)
+        self.assertEqual(len(os.listdir(directory)), 5)
+
+        with open(os.path.join(directory, "line_0_line.json"), "r") as f:
+            data = json.load(f)
+
+        self.assertEqual(data["route_name"], "line_0")
+        self.assertEqual(len(data["stations"]), 20)
+
+    def test_invalid(self):
+        for arguments in (
+            (0, 10),
+            (5, 1),
+            (5, 10.5),
+        ):
+            with self.assertRaises(ValueError):
+                NetworkGenerator(*arguments)
+
+        with self.assertRaises(ValueError):
+            NetworkGenerator(5, 10, transfer_density=1.5)
+
+        with self.assertRaises(ValueError):
+            NetworkGenerator(5, 10, spread_kilometers=0)
+
+        with self.assertRaises(ValueError):
+            NetworkGenerator.for_stop_count(3)
+
+        with self.assertRaises(ValueError):
+            list(NetworkGenerator(5, 10).iter_stations(5))
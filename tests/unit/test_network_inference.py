@@ -0,0 +1,199 @@
+import json
+import os
+import random
+import unittest
+
+from cta_optimizer.models.location import Location
+from cta_optimizer.models.station import Station
+from cta_optimizer.network_inference import (
+    infer_adjacent_stations,
+    infer_transfer_stations,
+)
+
+DATA_DIRECTORY = os.path.join(
+    os.path.dirname(__file__), "..", "..", "data", "trains", "cta"
+)
+
+
+def create_line(route: str, count: int, latitude: float = 41.80, step: float = 0.01):
+    """
+    count stations going north, about a kilometer apart
+    """
+    return [
+        Station(f"{route} {index}", Location(latitude + index * step, -87.70), route)
+        for index in range(count)
+    ]
+
+
+class TestNetworkInference(unittest.TestCase):
+
+    def test_infer_chain(self):
+        line = create_line("red", 10)
+        shuffled = line[:]
+        random.Random(1).shuffle(shuffled)
+
+        adjacent_stations = infer_adjacent_stations(shuffled)
+
+        for index, station in enumerate(line):
+            self.assertCountEqual(
+                adjacent_stations[station],
+                [line[other] for other in (index - 1, index + 1) if 0 <= other < 10],
+            )
+
+    def test_infer_branches(self):
+        # a trunk going north that splits in two at its last station
+        trunk = create_line("green", 5)
+        split = trunk[-1].get_location()
+        east = [
+            Station(
+                f"east {index}",
+                Location(split.latitude + index * 0.007, -87.70 + index * 0.009),
+                "green",
+            )
+            for index in range(1, 4)
+        ]
+        west = [
+            Station(
+                f"west {index}",
+                Location(split.latitude + index * 0.007, -87.70 - index * 0.009),
+                "green",
+            )
+            for index in range(1, 4)
+        ]
+
+        adjacent_stations = infer_adjacent_stations(trunk + east + west)
+
+        self.assertCountEqual(
+            adjacent_stations[trunk[-1]], [trunk[-2], east[0], west[0]]
+        )
+        self.assertEqual(adjacent_stations[east[-1]], [east[-2]])
+        self.assertEqual(adjacent_stations[west[-1]], [west[-2]])
+
+    def test_infer_pinned_junction(self):
+        # a branch that leaves the trunk at B, but is closer to C than to B
+        a = Station("A", Location(41.80, -87.70), "green")
+        b = Station("B", Location(41.81, -87.70), "green")
+        c = Station("C", Location(41.82, -87.70), "green")
+        branch = Station("X", Location(41.83, -87.685), "green")
+        stations = [a, b, c, branch]
+
+        self.assertEqual(infer_adjacent_stations(stations)[branch], [c])
+
+        adjacent_stations = infer_adjacent_stations(
+            stations, pinned_edges=[(b, branch)]
+        )
+
+        self.assertEqual(adjacent_stations[branch], [b])
+        self.assertCountEqual(adjacent_stations[b], [a, c, branch])
+        self.assertEqual(adjacent_stations[c], [b])
+
+    def test_infer_pinned_loop(self):
+        # a line that runs up to a square and around it
+        corners = [
+            Station(name, Location(latitude, longitude), "brown")
+            for name, latitude, longitude in (
+                ("NW", 41.89, -87.64),
+                ("NE", 41.89, -87.62),
+                ("SE", 41.87, -87.62),
+                ("SW", 41.87, -87.64),
+            )
+        ]
+        entry = Station("Entry", Location(41.90, -87.63), "brown")
+        ring = [entry, *corners, entry]
+
+        adjacent_stations = infer_adjacent_stations(
+            [entry, *corners], pinned_edges=list(zip(ring, ring[1:]))
+        )
+
+        self.assertCountEqual(adjacent_stations[entry], [corners[0], corners[-1]])
+        self.assertCountEqual(adjacent_stations[corners[0]], [entry, corners[1]])
+        self.assertEqual(sum(len(others) for others in adjacent_stations.values()), 10)
+
+    def test_bundled_green_line_junction(self):
+        # the Green Line splits at Garfield, towards Ashland/63rd and Cottage Grove
+        with open(
+            os.path.join(DATA_DIRECTORY, "green_line.json"), "r", encoding="utf-8"
+        ) as file:
+            adjacent_stations = {
+                station["name"]: station["adjacent_stations"]
+                for station in json.load(file)
+            }
+
+        self.assertEqual(
+            adjacent_stations["Garfield"],
+            ["green:51st", "green:Halsted", "green:King Drive"],
+        )
+        self.assertEqual(
+            adjacent_stations["Halsted"], ["green:Ashland/63rd", "green:Garfield"]
+        )
+        self.assertEqual(
+            adjacent_stations["King Drive"], ["green:Cottage Grove", "green:Garfield"]
+        )
+
+    def test_infer_routes_separately(self):
+        red = create_line("red", 6)
+        blue = create_line("blue", 6, latitude=41.8001)
+
+        adjacent_stations = infer_adjacent_stations(red + blue)
+
+        for station, others in adjacent_stations.items():
+            self.assertTrue(all(other.route == station.route for other in others))
+
+        self.assertEqual(sum(len(others) for others in adjacent_stations.values()), 20)
+
+    def test_infer_links_distant_groups(self):
+        # with one neighbour each, the two groups do not reach each other
+        line = create_line("red", 3) + create_line("red", 3, latitude=42.5)[::-1]
+        line = [
+            Station(f"red {index}", station.get_location(), "red")
+            for index, station in enumerate(line)
+        ]
+
+        adjacent_stations = infer_adjacent_stations(line, neighbor_count=1)
+
+        self.assertEqual(sum(len(others) for others in adjacent_stations.values()), 10)
+
+    def test_infer_single_station(self):
+        station = Station("A", Location(41.80, -87.70), "red")
+
+        self.assertEqual(infer_adjacent_stations([station]), {station: []})
+
+    def test_infer_transfer_stations(self):
+        red_howard = Station("Howard", Location(42.019063, -87.672892), "red")
+        yellow_howard = Station("Howard", Location(42.019063, -87.672892), "yellow")
+        # about 150 meters away
+        purple_stop = Station("Nearby", Location(42.0204, -87.6728), "purple")
+        red_jarvis = Station("Jarvis", Location(42.015876, -87.669092), "red")
+
+        transfer_stations = infer_transfer_stations(
+            [red_howard, yellow_howard, purple_stop, red_jarvis], 0.2
+        )
+
+        self.assertEqual(
+            [station for station, _ in transfer_stations[red_howard]],
+            [yellow_howard, purple_stop],
+        )
+        self.assertAlmostEqual(transfer_stations[red_howard][0][1].value, 0)
+        self.assertIn(red_howard, [s for s, _ in transfer_stations[purple_stop]])
+        # stations of the same route never transfer
+        self.assertEqual(transfer_stations[red_jarvis], [])
+
+        transfer_stations = infer_transfer_stations(
+            [red_howard, yellow_howard, purple_stop], 0.1
+        )
+
+        self.assertEqual(transfer_stations[purple_stop], [])
+
+    def test_invalid(self):
+        line = create_line("red", 3)
+
+        with self.assertRaises(ValueError):
+            infer_adjacent_stations(line, neighbor_count=0)
+
+        with self.assertRaises(ValueError):
+            infer_transfer_stations(line, radius=-1)
+
+        with self.assertRaises(ValueError):
+            infer_adjacent_stations(
+                line, pinned_edges=[(line[0], create_line("blue", 1)[0])]
+            )
@@ -0,0 +1,181 @@
+import json
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from cta_optimizer.network_snapshot import NetworkSnapshot, SnapshotError
+from cta_optimizer.station_data_loader import StationDataLoader
+from cta_optimizer.stations_graph_service import GraphBackend, StationsGraphService
+
+yellow_line_data = {
+    "route_name": "yellow",
+    "speed": 25,
+    "stations": [
+        {
+            "name": "Dempster-Skokie",
+            "route": "yellow",
+            "position": {"lat": 42.038951, "lng": -87.751919},
+            "adjacent_stations": ["yellow:Howard"],
+            "transfer_stations": {},
+        },
+        {
+            "name": "Howard",
+            "route": "yellow",
+            "position": {"lat": 42.019063, "lng": -87.672892},
+            "adjacent_stations": ["yellow:Dempster-Skokie"],
+            "transfer_stations": {"red:Howard": {"free_transfer": True}},
+        },
+    ],
+}
+
+red_line_data = {
+    "route_name": "red",
+    "speed": 25,
+    "stations": [
+        {
+            "name": "Howard",
+            "route": "red",
+            "position": {"lat": 42.019063, "lng": -87.672892},
+            "adjacent_stations": ["red:Jarvis"],
+            "transfer_stations": {"yellow:Howard": {"free_transfer": False}},
+        },
+        {
+            "name": "Jarvis",
+            "route": "red",
+            "position": {"lat": 42.015876, "lng": -87.669092},
+            "adjacent_stations": ["red:Howard", "red:Morse"],
+            "transfer_stations": {},
+        },
+        {
+            "name": "Morse",
+            "closed": True,
+            "route": "red",
+            "position": {"lat": 42.008362, "lng": -87.665909},
+            "adjacent_stations": ["red:Jarvis"],
+            "transfer_stations": {},
+        },
+    ],
+}
+
+
+def build_graph_from_loader(loader: StationDataLoader) -> StationsGraphService:
+    stations = loader.get_all_stations()
+    graph = StationsGraphService()
+
+    for station in stations:
+        graph.add_station(station)
+
+    for station in stations:
+        for other_station in (
+            *station.get_adjacent_stations().keys(),
+            *station.get_transfer_stations().keys(),
+        ):
+            graph.add_edge(station, other_station)
+
+    return graph
+
+
+class TestNetworkSnapshot(unittest.TestCase):
+
+    def setUp(self):
+        self.temporary_directory = tempfile.TemporaryDirectory()
+        self.files = []
+
+        for data in (yellow_line_data, red_line_data):
+            path = os.path.join(
+                self.temporary_directory.name, f"{data['route_name']}_line.json"
+            )
+
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+
+            self.files.append(path)
+
+        self.path = os.path.join(self.temporary_directory.name, "network.snapshot")
+
+    def tearDown(self):
+        self.temporary_directory.cleanup()
+
+    def test_compile_writes_memory_mapped_arrays(self):
+        NetworkSnapshot.compile(self.files, self.path)
+
+        snapshot = NetworkSnapshot.load(self.path)
+
+        self.assertTrue(os.path.exists(self.path))
+        self.assertIsInstance(snapshot.arrays["latitudes"], np.memmap)
+        self.assertEqual(len(snapshot.arrays["routes"]), 5)
+        self.assertTrue(snapshot.is_current(self.files))
+
+    def test_create_stations_matches_loader(self):
+        loader = StationDataLoader(self.files)
+        stations = NetworkSnapshot.compile(self.files, self.path).create_stations()
+
+        self.assertEqual(stations, loader.get_all_stations())
+
+        for station, loaded_station in zip(stations, loader.get_all_stations()):
+            self.assertEqual(station.route, loaded_station.route)
+            self.assertEqual(station.is_closed(), loaded_station.is_closed())
+            self.assertEqual(
+                list(station.get_adjacent_stations().keys()),
+                list(loaded_station.get_adjacent_stations().keys()),
+            )
+            self.assertEqual(
+                station.get_transfer_stations(),
+                loaded_station.get_transfer_stations(),
+            )
+
+    def test_create_graph_service_matches_loader_graph(self):
+        expected = build_graph_from_loader(StationDataLoader(self.files))
+        snapshot = NetworkSnapshot.compile(self.files, self.path)
+
+        for backend in (GraphBackend.CSR, GraphBackend.NETWORKX):
+            stations = snapshot.create_stations()
+            graph = snapshot.create_graph_service(stations, backend)
+
+            for station in stations:
+                adjacent = graph.get_adjacent_stations(station)
+                expected_adjacent = expected.get_adjacent_stations(station)
+
+                self.assertEqual(set(adjacent.keys()), set(expected_adjacent.keys()))
+                for other_station, data in adjacent.items():
+                    expected_data = expected_adjacent[other_station]
+
+                    self.assertAlmostEqual(data["distance"], expected_data["distance"])
+                    self.assertEqual(data["fare"], expected_data["fare"])
+                    self.assertEqual(data["transfer"], expected_data["transfer"])
+
+            self.assertEqual(
+                [
+                    station.get_id()
+                    for station in graph.get_shortest_path(stations[0], stations[3])
+                ],
+                ["yellow:Dempster-Skokie", "yellow:Howard", "red:Howard", "red:Jarvis"],
+            )
+
+    def test_load_or_compile_recompiles_when_sources_change(self):
+        first = NetworkSnapshot.load_or_compile(self.files, self.path)
+        second = NetworkSnapshot.load_or_compile(self.files, self.path)
+
+        self.assertEqual(first.header["source_hash"], second.header["source_hash"])
+
+        with open(self.files[1], "w", encoding="utf-8") as f:
+            json.dump({**red_line_data, "stations": red_line_data["stations"][:2]}, f)
+
+        self.assertFalse(second.is_current(self.files))
+
+        third = NetworkSnapshot.load_or_compile(self.files, self.path)
+
+        self.assertTrue(third.is_current(self.files))
+        self.assertEqual(len(third.arrays["routes"]), 4)
+
+    def test_load_invalid_file(self):
+        with open(self.path, "wb") as f:
+            f.write(b"not a snapshot")
+
+        with self.assertRaises(SnapshotError):
+            NetworkSnapshot.load(self.path)
+
+        snapshot = NetworkSnapshot.load_or_compile(self.files, self.path)
+        self.assertTrue(snapshot.is_current(self.files))
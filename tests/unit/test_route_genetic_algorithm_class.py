@@ -0,0 +1,222 @@
+import unittest
+
+import numpy as np
+
+from cta_optimizer.models.location import Location
+from cta_optimizer.models.station import Station
+from cta_optimizer.route_genetic_algorithm import RouteGeneticAlgorithm
+from cta_optimizer.stations_graph_service import GraphBackend, StationsGraphService
+
+
+def create_cross_graph(backend: GraphBackend = GraphBackend.NETWORKX):
+    """
+    W -- C -- E and N -- C -- S, two lines crossing at C
+    """
+    stations = [
+        Station("W", Location(41.90, -87.72), "green"),
+        Station("C", Location(41.90, -87.70), "green"),
+        Station("E", Location(41.90, -87.68), "green"),
+        Station("N", Location(41.92, -87.70), "red"),
+        Station("S", Location(41.88, -87.70), "red"),
+    ]
+
+    graph = StationsGraphService(backend)
+
+    for station in stations:
+        graph.add_station(station)
+
+    center = stations[1]
+
+    for station in (stations[0], stations[2], stations[3], stations[4]):
+        graph.add_edge(station, center)
+        graph.add_edge(center, station)
+
+    return graph, stations
+
+
+W, C, E, N, S = range(5)
+
+
+class TestRouteGeneticAlgorithm(unittest.TestCase):
+    def setUp(self):
+        self.graph, self.stations = create_cross_graph()
+        self.distances, _ = self.graph.get_all_pairs_shortest_paths()
+
+    def create_algorithm(self, **kwargs):
+        options = {
+            "route_count": 2,
+            "population_size": 10,
+            "seed": 1,
+            "transfer_penalty": 1.0,
+            "unserved_penalty": 50.0,
+        }
+        options.update(kwargs)
+
+        return RouteGeneticAlgorithm(self.graph, **options)
+
+    def test_creates_population(self):
+        algorithm = self.create_algorithm()
+
+        self.assertEqual(algorithm.population.shape, (10, 2, 2))
+        self.assertTrue(
+            np.all(algorithm.population[..., 0] != algorithm.population[..., 1])
+        )
+        self.assertEqual(algorithm.fitness.shape, (10,))
+
+    def test_direct_and_transfer_trips(self):
+        algorithm = self.create_algorithm()
+        costs, transfers, served = algorithm.evaluate_trips(
+            np.array([[[W, E], [N, S]]])
+        )
+
+        self.assertTrue(served.all())
+
+        # along one line
+        self.assertEqual(transfers[0, W, E], 0)
+        self.assertAlmostEqual(costs[0, W, E], self.distances[W, E])
+
+        # from one line to the other at C
+        self.assertEqual(transfers[0, W, N], 1)
+        self.assertAlmostEqual(
+            costs[0, W, N], self.distances[W, C] + self.distances[C, N] + 1.0, places=4
+        )
+
+    def test_unserved_trips(self):
+        algorithm = self.create_algorithm(route_count=1)
+        costs, transfers, served = algorithm.evaluate_trips(np.array([[[W, E]]]))
+
+        self.assertFalse(served[0, N, S])
+        self.assertFalse(served[0, W, N])
+        self.assertEqual(costs[0, N, S], 50.0)
+        self.assertTrue(served[0, E, W])
+
+    def test_evaluate_matches_trip_costs(self):
+        algorithm = self.create_algorithm()
+        costs, _, _ = algorithm.evaluate_trips(algorithm.population)
+
+        np.testing.assert_allclose(
+            algorithm.evaluate(algorithm.population),
+            (costs * algorithm.demand).sum(axis=(1, 2)),
+            rtol=1e-5,
+        )
+
+    def test_demand_weights_fitness(self):
+        demand = np.zeros((5, 5))
+        demand[N, S] = 1
+
+        algorithm = self.create_algorithm(demand=demand)
+        fitness = algorithm.evaluate(np.array([[[W, E], [N, S]], [[W, E], [E, W]]]))
+
+        self.assertAlmostEqual(fitness[0], self.distances[N, S], places=4)
+        self.assertEqual(fitness[1], 50.0)
+
+    def test_run_keeps_best_route_set(self):
+        algorithm = self.create_algorithm(population_size=20)
+        best = algorithm.run(10)
+
+        self.assertEqual(best.shape, (2, 2))
+        self.assertEqual(algorithm.generation, 10)
+        self.assertEqual(len(algorithm.history), 11)
+
+        # elitism never loses the best route set
+        self.assertTrue(
+            all(
+                later <= earlier
+                for earlier, later in zip(algorithm.history, algorithm.history[1:])
+            )
+        )
+        self.assertAlmostEqual(
+            algorithm.get_best_fitness(), algorithm.evaluate(best[None])[0]
+        )
+
+        # both lines end to end serve every trip with at most one transfer
+        self.assertAlmostEqual(
+            algorithm.get_best_fitness(),
+            algorithm.evaluate(np.array([[[W, E], [N, S]]]))[0],
+            places=3,
+        )
+
+    def test_run_is_reproducible(self):
+        first = self.create_algorithm(seed=7).run(5)
+        second = self.create_algorithm(seed=7).run(5)
+
+        np.testing.assert_array_equal(first, second)
+
+    def test_get_routes(self):
+        algorithm = self.create_algorithm()
+        routes = algorithm.get_routes(np.array([[W, E], [N, S]]))
+
+        self.assertEqual(
+            [[station.get_name() for station in route] for route in routes],
+            [["W", "C", "E"], ["N", "C", "S"]],
+        )
+
+    def test_csr_backend(self):
+        graph, _ = create_cross_graph(GraphBackend.CSR)
+        algorithm = RouteGeneticAlgorithm(graph, 2, population_size=10, seed=1)
+
+        np.testing.assert_allclose(
+            algorithm.evaluate(algorithm.population),
+            self.create_algorithm(
+                transfer_penalty=algorithm.transfer_penalty,
+                unserved_penalty=algorithm.unserved_penalty,
+            ).evaluate(algorithm.population),
+            rtol=1e-6,
+        )
+
+    def test_shared_fitness_arrays_and_fitness(self):
+        algorithm = self.create_algorithm()
+        copy = self.create_algorithm(
+            seed=2,
+            demand=algorithm.demand,
+            population=algorithm.population,
+            fitness=algorithm.fitness,
+            fitness_arrays=algorithm.fitness_arrays,
+        )
+
+        self.assertIs(copy.fitness_arrays, algorithm.fitness_arrays)
+        np.testing.assert_array_equal(copy.fitness, algorithm.fitness)
+        np.testing.assert_allclose(
+            copy.evaluate(copy.population), algorithm.fitness, rtol=1e-6
+        )
+
+        # the fitness carried over is not evaluated again
+        copy = self.create_algorithm(
+            demand=algorithm.demand,
+            population=algorithm.population,
+            fitness=np.zeros(10),
+            fitness_arrays=algorithm.fitness_arrays,
+        )
+
+        self.assertEqual(copy.get_best_fitness(), 0)
+
+        with self.assertRaises(ValueError):
+            self.create_algorithm(fitness_arrays=algorithm.fitness_arrays)
+
+        with self.assertRaises(ValueError):
+            self.create_algorithm(population=algorithm.population, fitness=np.zeros(3))
+
+    def test_invalid_options(self):
+        with self.assertRaises(ValueError):
+            RouteGeneticAlgorithm(None, 2)
+
+        with self.assertRaises(ValueError):
+            self.create_algorithm(route_count=0)
+
+        with self.assertRaises(ValueError):
+            self.create_algorithm(population_size=1)
+
+        with self.assertRaises(ValueError):
+            self.create_algorithm(elite_count=10)
+
+        with self.assertRaises(ValueError):
+            self.create_algorithm(mutation_rate=2)
+
+        with self.assertRaises(ValueError):
+            self.create_algorithm(demand=np.ones((2, 2)))
+
+        with self.assertRaises(ValueError):
+            self.create_algorithm(demand=-np.ones((5, 5)))
+
+        with self.assertRaises(ValueError):
+            self.create_algorithm().run(-1)
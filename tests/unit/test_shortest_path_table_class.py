@@ -0,0 +1,90 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from cta_optimizer.shortest_path_table import ShortestPathTable
+
+STATION_IDS = ["red:A", "red:B", "red:C", "red:D"]
+
+# A -> B -> C, A -> C is longer than going through B, D is unreachable
+ADJACENCY = [
+    [(1, 1.0), (2, 5.0)],
+    [(2, 1.0)],
+    [],
+    [],
+]
+
+
+class TestShortestPathTable(unittest.TestCase):
+
+    def setUp(self):
+        self.temporary_directory = tempfile.TemporaryDirectory()
+        self.directory = os.path.join(self.temporary_directory.name, "table")
+
+    def tearDown(self):
+        self.temporary_directory.cleanup()
+
+    def test_build_writes_table(self):
+        self.assertFalse(ShortestPathTable.exists(self.directory))
+
+        ShortestPathTable.build(STATION_IDS, ADJACENCY, self.directory)
+
+        self.assertTrue(ShortestPathTable.exists(self.directory))
+
+    def test_build_uses_compact_dtypes(self):
+        table = ShortestPathTable.build(STATION_IDS, ADJACENCY, self.directory)
+
+        self.assertEqual(table.distances.dtype, np.float32)
+        self.assertEqual(table.predecessors.dtype, np.int32)
+        self.assertIsInstance(table.distances, np.memmap)
+
+    def test_get_path(self):
+        table = ShortestPathTable.build(STATION_IDS, ADJACENCY, self.directory)
+
+        self.assertEqual(table.get_path(0, 2), [0, 1, 2])
+        self.assertEqual(table.get_path(1, 1), [1])
+        self.assertEqual(table.get_distance(0, 2), 2.0)
+
+    def test_get_path_unreachable(self):
+        table = ShortestPathTable.build(STATION_IDS, ADJACENCY, self.directory)
+
+        self.assertEqual(table.get_path(0, 3), [])
+        self.assertEqual(table.get_distance(0, 3), float("inf"))
+
+    def test_load_matches_build(self):
+        built = ShortestPathTable.build(STATION_IDS, ADJACENCY, self.directory)
+        loaded = ShortestPathTable.load(self.directory)
+
+        self.assertEqual(loaded.station_ids, STATION_IDS)
+        np.testing.assert_array_equal(loaded.distances, built.distances)
+        np.testing.assert_array_equal(loaded.predecessors, built.predecessors)
+
+    def test_remove_and_add_edges(self):
+        table = ShortestPathTable.build(STATION_IDS, ADJACENCY, self.directory)
+        without_edge = [[(2, 5.0)], [(2, 1.0)], [], []]
+
+        table.remove_edges([(0, 1)], without_edge)
+
+        self.assertEqual(table.get_path(0, 2), [0, 2])
+        self.assertEqual(table.get_distance(0, 2), 5.0)
+        self.assertEqual(table.get_path(0, 1), [])
+        self.assertEqual(table.get_path(1, 2), [1, 2])
+
+        table.add_edges([(0, 1, 1.0)], ADJACENCY)
+
+        self.assertEqual(table.get_path(0, 2), [0, 1, 2])
+        self.assertEqual(table.get_distance(0, 2), 2.0)
+
+        table.remove_edges([(0, 1)], without_edge)
+
+        # the table on disk is left as built
+        self.assertEqual(table.get_path(0, 2), [0, 2])
+        self.assertEqual(
+            ShortestPathTable.load(self.directory).get_path(0, 2), [0, 1, 2]
+        )
+
+    def test_invalid_adjacency(self):
+        with self.assertRaises(ValueError):
+            ShortestPathTable.build(STATION_IDS, ADJACENCY[:2], self.directory)
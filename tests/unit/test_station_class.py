@@ -1,4 +1,7 @@
+import pickle
 import unittest
+
+from cta_optimizer.cta.train_station import CTATrainLine, CTATrainStation
 from cta_optimizer.models.station import Station
 from cta_optimizer.models.location import Location
 
@@ -94,3 +97,97 @@ class TestStation(unittest.TestCase):
     def test_station_get_id(self):
         station = Station("Test Station", Location(0, 0), "Red")
         self.assertEqual(station.get_id(), "Red:Test Station")
+
+    def test_station_hash_includes_route(self):
+        location = Location(41.853206, -87.631407)
+        red = Station("Cermak-Chinatown", location, "red")
+        green = Station("Cermak-Chinatown", location, "green")
+
+        self.assertNotEqual(red, green)
+        self.assertNotEqual(hash(red), hash(green))
+        self.assertEqual(len({red, green}), 2)
+
+    def test_station_identity_is_immutable(self):
+        station = Station("Test Station", Location(0, 0), "red")
+
+        with self.assertRaises(AttributeError):
+            station.name = "Other Station"
+
+        with self.assertRaises(AttributeError):
+            station.route = "blue"
+
+        self.assertEqual(station.get_id(), "red:Test Station")
+        self.assertFalse(hasattr(station, "__dict__"))
+
+        # closing and linking a station does not change its identity
+        station.set_closed(True)
+        station.add_transfer_station(Station("Other Station", Location(0, 0), "blue"))
+        self.assertEqual(station, Station("Test Station", Location(0, 0), "red"))
+
+    def test_station_without_transfers_shares_empty_transfers(self):
+        station1 = Station("Station 1", Location(0, 0))
+        station2 = Station("Station 2", Location(0, 0))
+
+        self.assertIs(station1.transfer_stations, station2.transfer_stations)
+
+        station1.add_transfer_station(station2)
+        station1.remove_transfer_station(station2)
+        station2.remove_transfer_station(station1)
+
+        self.assertEqual(len(station1.get_transfer_stations()), 0)
+        self.assertEqual(len(station2.get_transfer_stations()), 0)
+
+    def test_get_transfer_stations_is_writable(self):
+        station1 = Station("Station 1", Location(0, 0), "red")
+        station2 = Station("Station 2", Location(0, 0), "blue")
+        station3 = Station("Station 3", Location(0, 0), "green")
+
+        station1.get_transfer_stations()[station2] = "data"
+
+        self.assertEqual(station1.get_transfer_data(station2), "data")
+        # the other stations still share the empty mapping
+        self.assertIs(station2.transfer_stations, station3.transfer_stations)
+        self.assertEqual(station2.get_transfer_stations(), {})
+
+    def test_station_pickle(self):
+        station = Station("Test Station", Location(0, 0), "red")
+        station.add_adjacent_station(Station("Other Station", Location(1, 1), "red"))
+        station.set_closed(True)
+
+        copy = pickle.loads(pickle.dumps(station))
+
+        self.assertEqual(copy, station)
+        self.assertEqual(hash(copy), hash(station))
+        self.assertEqual(copy.get_id(), station.get_id())
+        self.assertTrue(copy.is_closed())
+        self.assertEqual(
+            list(copy.get_adjacent_stations()), list(station.get_adjacent_stations())
+        )
+
+    def test_cta_train_station_pickle(self):
+        station = CTATrainStation(
+            "Quincy", Location(41.878723, -87.63374), CTATrainLine.BROWN
+        )
+        station.add_transfer_station(
+            CTATrainStation("Quincy", Location(41.878723, -87.63374), CTATrainLine.PINK)
+        )
+
+        copy = pickle.loads(pickle.dumps(station))
+
+        self.assertEqual(copy, station)
+        self.assertEqual(copy.get_line(), CTATrainLine.BROWN)
+        self.assertEqual(
+            [other.get_line() for other in copy.get_transfer_stations()],
+            [CTATrainLine.PINK],
+        )
+
+    def test_cta_train_station(self):
+        location = Location(41.878723, -87.63374)
+        station = CTATrainStation("Quincy", location, CTATrainLine.BROWN)
+
+        self.assertEqual(station.get_line(), CTATrainLine.BROWN)
+        self.assertEqual(station.get_id(), "brown:Quincy")
+        self.assertEqual(hash(station), hash(Station("Quincy", location, "brown")))
+        self.assertNotEqual(
+            station, CTATrainStation("Quincy", location, CTATrainLine.PINK)
+        )
@@ -1,8 +1,15 @@
+import json
+import os
+import tempfile
 import unittest
 from unittest.mock import patch
 from pydantic import ValidationError
 
-from cta_optimizer.station_data_loader import StationDataLoader
+from cta_optimizer.cta.cta_station_data_loader import CTAStationDataLoader
+from cta_optimizer.cta.train_station import CTATrainLine
+from cta_optimizer.models.location import Location
+from cta_optimizer.models.station import Station
+from cta_optimizer.station_data_loader import StationDataLoader, StationDataLoadError
 
 mock_json_data = {
     "route_name": "yellow",
@@ -94,3 +101,248 @@ class TestStationDataLoader(unittest.TestCase):
 
         station = stations[0]
         self.assertEqual(len(station.get_adjacent_stations().keys()), 0)
+
+
+mock_line_data = {
+    "route_name": "red",
+    "speed": 25,
+    "stations": [
+        {
+            "name": "Howard",
+            "route": "red",
+            "position": {"lat": 42.019063, "lng": -87.672892},
+            "adjacent_stations": ["red:Jarvis"],
+            "transfer_stations": {"yellow:Howard": {"free_transfer": True}},
+        },
+        {
+            "name": "Jarvis",
+            "route": "red",
+            "position": {"lat": 42.015876, "lng": -87.669092},
+            "adjacent_stations": ["red:Howard", "red:Morse"],
+            "transfer_stations": {},
+        },
+        {
+            "name": "Morse",
+            "route": "red",
+            "position": {"lat": 42.008362, "lng": -87.665909},
+            "adjacent_stations": ["red:Jarvis"],
+            "transfer_stations": {},
+        },
+    ],
+}
+
+
+class TestStationDataLoaderIndexes(unittest.TestCase):
+
+    def setUp(self):
+        self.temporary_directory = tempfile.TemporaryDirectory()
+        self.files = []
+
+        for data in (mock_json_data, mock_line_data):
+            path = os.path.join(
+                self.temporary_directory.name, f"{data['route_name']}_line.json"
+            )
+
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+
+            self.files.append(path)
+
+    def tearDown(self):
+        self.temporary_directory.cleanup()
+
+    def test_get_station_by_id(self):
+        data_loader = StationDataLoader(self.files)
+
+        station = data_loader.get_station_by_id("red:Jarvis")
+
+        self.assertEqual(station.get_name(), "Jarvis")
+        self.assertIn(
+            data_loader.get_station_by_id("red:Howard"),
+            data_loader.get_station_by_id(
+                "yellow:Dempster-Skokie"
+            ).get_adjacent_stations(),
+        )
+        self.assertIsNone(data_loader.get_station_by_id("red:Invalid"))
+
+    def test_get_stations_by_route_keeps_file_order(self):
+        data_loader = StationDataLoader(self.files)
+
+        stations = data_loader.get_stations_by_route("red")
+
+        self.assertEqual(
+            [station.get_name() for station in stations], ["Howard", "Jarvis", "Morse"]
+        )
+        self.assertEqual(data_loader.get_stations_by_route("blue"), [])
+
+    def test_get_stations_by_route_returns_copy(self):
+        data_loader = StationDataLoader(self.files)
+
+        data_loader.get_stations_by_route("red").clear()
+
+        self.assertEqual(len(data_loader.get_stations_by_route("red")), 3)
+
+    def test_add_station_updates_indexes(self):
+        data_loader = StationDataLoader(self.files)
+        station = Station("Belmont", Location(41.939751, -87.65338), "red")
+
+        data_loader.add_station(station)
+
+        self.assertIs(data_loader.get_station_by_id("red:Belmont"), station)
+        self.assertIs(data_loader.get_stations_by_route("red")[-1], station)
+        self.assertIn(station, data_loader.get_all_stations())
+
+    def test_add_station_replaces_station_with_same_id(self):
+        data_loader = StationDataLoader(self.files)
+        station = Station("Jarvis", Location(42.0, -87.6), "red")
+
+        data_loader.add_station(station)
+
+        self.assertIs(data_loader.get_station_by_id("red:Jarvis"), station)
+        self.assertEqual(len(data_loader.get_stations_by_route("red")), 3)
+        self.assertEqual(len(data_loader.get_all_stations()), 4)
+
+    def test_add_station_invalid(self):
+        data_loader = StationDataLoader(self.files)
+
+        with self.assertRaises(ValueError):
+            data_loader.add_station(None)
+
+        with self.assertRaises(ValueError):
+            data_loader.add_station("Invalid")
+
+    def test_remove_station_updates_indexes(self):
+        data_loader = StationDataLoader(self.files)
+
+        station = data_loader.remove_station("yellow:Dempster-Skokie")
+
+        self.assertEqual(station.get_name(), "Dempster-Skokie")
+        self.assertIsNone(data_loader.get_station_by_id("yellow:Dempster-Skokie"))
+        self.assertEqual(data_loader.get_stations_by_route("yellow"), [])
+        self.assertNotIn(station, data_loader.get_all_stations())
+        self.assertIsNone(data_loader.remove_station("yellow:Dempster-Skokie"))
+
+    def test_cta_station_data_loader_get_stations_by_route(self):
+        data_loader = CTAStationDataLoader(self.files)
+
+        stations = data_loader.get_stations_by_route(CTATrainLine.RED)
+
+        self.assertEqual(len(stations), 3)
+
+    def test_get_spatial_index(self):
+        data_loader = StationDataLoader(self.files)
+
+        index = data_loader.get_spatial_index()
+        nearest, distance = index.get_nearest_stations(Location(42.0159, -87.6691))[0]
+
+        self.assertIs(data_loader.get_spatial_index(), index)
+        self.assertEqual(nearest.get_id(), "red:Jarvis")
+        self.assertLess(distance.value, 0.1)
+
+    def test_get_spatial_index_follows_added_and_removed_stations(self):
+        data_loader = StationDataLoader(self.files)
+        index = data_loader.get_spatial_index()
+        station = Station("Belmont", Location(41.939751, -87.65338), "red")
+
+        data_loader.add_station(station)
+        self.assertIs(index.get_nearest_stations(station.get_location())[0][0], station)
+
+        data_loader.remove_station("red:Belmont")
+        self.assertIsNot(
+            index.get_nearest_stations(station.get_location())[0][0], station
+        )
+
+
+class TestStationDataLoaderParallel(unittest.TestCase):
+
+    def setUp(self):
+        self.temporary_directory = tempfile.TemporaryDirectory()
+        self.files = []
+
+        for data in (mock_json_data, mock_line_data):
+            path = os.path.join(
+                self.temporary_directory.name, f"{data['route_name']}_line.json"
+            )
+
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+
+            self.files.append(path)
+
+        self.invalid_file = os.path.join(self.temporary_directory.name, "invalid.json")
+
+        with open(self.invalid_file, "w", encoding="utf-8") as f:
+            json.dump({"route_name": "blue"}, f)
+
+    def tearDown(self):
+        self.temporary_directory.cleanup()
+
+    def test_parallel_load_matches_sequential_load(self):
+        sequential = StationDataLoader(self.files, max_workers=1)
+
+        for use_processes in (False, True):
+            parallel = StationDataLoader(
+                self.files, max_workers=2, use_processes=use_processes
+            )
+
+            self.assertEqual(
+                [station.get_id() for station in parallel.get_all_stations()],
+                [station.get_id() for station in sequential.get_all_stations()],
+            )
+            self.assertIn(
+                parallel.get_station_by_id("red:Howard"),
+                parallel.get_station_by_id(
+                    "yellow:Dempster-Skokie"
+                ).get_adjacent_stations(),
+            )
+
+    def test_file_errors_are_reported(self):
+        missing_file = os.path.join(self.temporary_directory.name, "missing.json")
+
+        data_loader = StationDataLoader(
+            [self.files[0], self.invalid_file, missing_file, self.files[1]]
+        )
+        errors = data_loader.get_load_errors()
+
+        self.assertEqual(len(data_loader.get_all_stations()), 4)
+        self.assertEqual(
+            [error.file for error in errors], [self.invalid_file, missing_file]
+        )
+        self.assertIsInstance(errors[0].cause, ValidationError)
+        self.assertIsInstance(errors[1].cause, OSError)
+
+    def test_file_errors_from_worker_processes(self):
+        data_loader = StationDataLoader(
+            [self.files[0], self.invalid_file], max_workers=2, use_processes=True
+        )
+
+        self.assertEqual(len(data_loader.get_all_stations()), 1)
+        self.assertEqual(data_loader.get_load_errors()[0].file, self.invalid_file)
+
+    def test_strict_raises_file_error(self):
+        with self.assertRaises(StationDataLoadError) as context:
+            StationDataLoader([self.files[0], self.invalid_file], strict=True)
+
+        self.assertEqual(context.exception.file, self.invalid_file)
+
+    def test_bare_station_list(self):
+        # the bundled line files are a list of stops without route name or speed
+        bare_file = os.path.join(self.temporary_directory.name, "red_line.json")
+
+        with open(bare_file, "w", encoding="utf-8") as f:
+            json.dump(mock_line_data["stations"], f)
+
+        data_loader = StationDataLoader([self.files[0], bare_file], strict=True)
+
+        self.assertEqual(len(data_loader.get_stations_by_route("red")), 3)
+        self.assertIn(
+            data_loader.get_station_by_id("red:Jarvis"),
+            data_loader.get_station_by_id("red:Howard").get_adjacent_stations(),
+        )
+
+        empty_file = os.path.join(self.temporary_directory.name, "blue_line.json")
+
+        with open(empty_file, "w", encoding="utf-8") as f:
+            json.dump([], f)
+
+        self.assertEqual(len(StationDataLoader([empty_file], strict=True).stations), 0)
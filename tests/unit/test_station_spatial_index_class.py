@@ -0,0 +1,141 @@
+import random
+import unittest
+
+from cta_optimizer.models.location import Location
+from cta_optimizer.models.station import Station
+from cta_optimizer.station_spatial_index import StationSpatialIndex
+
+
+def create_stations(count: int = 200, seed: int = 3):
+    random.seed(seed)
+
+    return [
+        Station(
+            f"Station {i}",
+            Location(41.6 + random.random() * 0.5, -87.9 + random.random() * 0.4),
+            "test",
+        )
+        for i in range(count)
+    ]
+
+
+def brute_force(stations, location, include_closed=False):
+    return sorted(
+        (
+            (station, location.distance_to(station.get_location()).value)
+            for station in stations
+            if include_closed or not station.is_closed()
+        ),
+        key=lambda result: result[1],
+    )
+
+
+class TestStationSpatialIndex(unittest.TestCase):
+
+    def test_creates_object(self):
+        index = StationSpatialIndex(create_stations(10))
+
+        self.assertEqual(len(index), 10)
+
+    def test_invalid_cell_size(self):
+        with self.assertRaises(ValueError):
+            StationSpatialIndex([], cell_size=0)
+
+        with self.assertRaises(ValueError):
+            StationSpatialIndex([], cell_size="Invalid")
+
+    def test_get_stations_within_matches_brute_force(self):
+        stations = create_stations()
+        index = StationSpatialIndex(stations, cell_size=0.5)
+        location = Location(41.85, -87.7)
+
+        for radius in (0.1, 1.0, 3.0, 10.0, 100.0):
+            expected = [
+                (station, distance)
+                for station, distance in brute_force(stations, location)
+                if distance <= radius
+            ]
+            results = index.get_stations_within(location, radius)
+
+            self.assertEqual(
+                [station for station, _ in results],
+                [station for station, _ in expected],
+            )
+            for (_, distance), (_, expected_distance) in zip(results, expected):
+                self.assertAlmostEqual(distance.value, expected_distance)
+
+    def test_get_nearest_stations_matches_brute_force(self):
+        stations = create_stations()
+        index = StationSpatialIndex(stations, cell_size=0.25)
+
+        for location in (Location(41.85, -87.7), Location(40.0, -80.0)):
+            expected = brute_force(stations, location)[:5]
+            results = index.get_nearest_stations(location, 5)
+
+            self.assertEqual(
+                [station for station, _ in results],
+                [station for station, _ in expected],
+            )
+
+    def test_get_nearest_stations_with_fewer_stations_than_k(self):
+        index = StationSpatialIndex(create_stations(3))
+
+        self.assertEqual(len(index.get_nearest_stations(Location(0, 0), 10)), 3)
+        self.assertEqual(
+            StationSpatialIndex([]).get_nearest_stations(Location(0, 0), 1), []
+        )
+
+    def test_closed_stations_are_skipped(self):
+        stations = create_stations(50)
+        index = StationSpatialIndex(stations)
+        location = stations[0].get_location()
+
+        self.assertIs(index.get_nearest_stations(location)[0][0], stations[0])
+
+        stations[0].set_closed(True)
+
+        self.assertIsNot(index.get_nearest_stations(location)[0][0], stations[0])
+        self.assertIs(
+            index.get_nearest_stations(location, include_closed=True)[0][0],
+            stations[0],
+        )
+
+    def test_add_and_remove_station(self):
+        index = StationSpatialIndex(create_stations(50))
+        station = Station("New", Location(10, 10), "test")
+
+        index.add_station(station)
+        self.assertEqual(index.get_nearest_stations(Location(10, 10))[0][0], station)
+
+        index.remove_station(station)
+        self.assertNotEqual(index.get_nearest_stations(Location(10, 10))[0][0], station)
+        self.assertEqual(len(index), 50)
+
+    def test_invalid_queries(self):
+        index = StationSpatialIndex(create_stations(5))
+
+        with self.assertRaises(ValueError):
+            index.get_stations_within(None, 1)
+
+        with self.assertRaises(ValueError):
+            index.get_stations_within(Location(0, 0), -1)
+
+        with self.assertRaises(ValueError):
+            index.get_nearest_stations(Location(0, 0), 0)
+
+        with self.assertRaises(ValueError):
+            index.add_station(None)
+
+    def test_queries_near_the_poles_and_antimeridian(self):
+        stations = [
+            Station("North", Location(89.9, 0), "test"),
+            Station("East", Location(0, 179.99), "test"),
+            Station("West", Location(0, -179.99), "test"),
+        ]
+        index = StationSpatialIndex(stations)
+
+        self.assertEqual(
+            [station for station, _ in index.get_stations_within(Location(0, 180), 5)],
+            [stations[1], stations[2]],
+        )
+        self.assertIs(index.get_nearest_stations(Location(90, 0))[0][0], stations[0])
@@ -0,0 +1,883 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+from networkx import NetworkXNoPath
+
+from cta_optimizer.csr_graph import CSRGraph
+from cta_optimizer.models.location import Location
+from cta_optimizer.models.station import Station
+from cta_optimizer.station_schema import TransferData
+from cta_optimizer.stations_graph_service import (
+    TRANSFER_FARE,
+    StationsGraphService,
+    RoutingAlgorithm,
+    GraphBackend,
+)
+
+
+def create_line_graph(backend: GraphBackend = GraphBackend.NETWORKX):
+    """
+    A -- B -- C -- D on one route, with a long direct A -> D edge
+    """
+    stations = [
+        Station("A", Location(41.90, -87.70), "red"),
+        Station("B", Location(41.91, -87.70), "red"),
+        Station("C", Location(41.92, -87.70), "red"),
+        Station("D", Location(41.93, -87.70), "red"),
+    ]
+
+    graph = StationsGraphService(backend)
+
+    for station in stations:
+        graph.add_station(station)
+
+    for station1, station2 in zip(stations, stations[1:]):
+        graph.add_edge(station1, station2)
+        graph.add_edge(station2, station1)
+
+    graph.add_edge(stations[0], stations[3], 100)
+
+    return graph, stations
+
+
+def create_grid_graph(size: int = 6, backend: GraphBackend = GraphBackend.NETWORKX):
+    """
+    A size x size grid of stations with edges between horizontal and vertical
+    neighbours in both directions
+    """
+    stations = [
+        Station(
+            f"{row}-{column}",
+            Location(41.8 + row * 0.01, -87.7 + column * 0.013),
+            "grid",
+        )
+        for row in range(size)
+        for column in range(size)
+    ]
+
+    graph = StationsGraphService(backend)
+
+    for station in stations:
+        graph.add_station(station)
+
+    for row in range(size):
+        for column in range(size):
+            station = stations[row * size + column]
+
+            if column + 1 < size:
+                graph.add_edge(station, stations[row * size + column + 1])
+                graph.add_edge(stations[row * size + column + 1], station)
+
+            if row + 1 < size:
+                graph.add_edge(station, stations[(row + 1) * size + column])
+                graph.add_edge(stations[(row + 1) * size + column], station)
+
+    return graph, stations
+
+
+def create_transfer_graph(backend: GraphBackend = GraphBackend.NETWORKX):
+    """
+    Dempster-Skokie -- Howard on the yellow line and Howard -- Jarvis on the red
+    line. The transfer from yellow to red is paid, the one from red to yellow is
+    free.
+    """
+    red_howard = Station("Howard", Location(42.019063, -87.672892), "red")
+    yellow_howard = Station("Howard", Location(42.019063, -87.672892), "yellow")
+    yellow_dempster = Station(
+        "Dempster-Skokie", Location(42.038951, -87.751919), "yellow"
+    )
+    red_jarvis = Station("Jarvis", Location(42.015876, -87.669092), "red")
+
+    yellow_howard.add_transfer_station(red_howard, TransferData(free_transfer=False))
+    red_howard.add_transfer_station(yellow_howard, TransferData(free_transfer=True))
+
+    stations = [red_howard, yellow_howard, yellow_dempster, red_jarvis]
+    graph = StationsGraphService(backend)
+
+    for station in stations:
+        graph.add_station(station)
+
+    graph.add_edges(
+        [
+            (yellow_dempster, yellow_howard),
+            (yellow_howard, yellow_dempster),
+            (red_howard, red_jarvis),
+            (red_jarvis, red_howard),
+            (yellow_howard, red_howard),
+            (red_howard, yellow_howard),
+        ]
+    )
+
+    return graph, stations
+
+
+def create_pareto_graph(backend: GraphBackend = GraphBackend.NETWORKX):
+    """
+    Four ways from S to T, all at the same location so the distances are given
+    explicitly:
+    S -> T: 10 km, free, no transfer
+    S -> X -> T: 2 km, one paid transfer
+    S -> Y -> T: 3 km, one free transfer
+    S -> Z -> T: 4 km, one paid transfer, worse than going through X
+    """
+    stations = [
+        Station(name, Location(41.88, -87.63), "red")
+        for name in ("S", "X", "Y", "Z", "T")
+    ]
+    graph = StationsGraphService(backend)
+
+    for station in stations:
+        graph.add_station(station)
+
+    S, X, Y, Z, T = range(5)
+    graph.add_weighted_edge_arrays(
+        [S, S, X, S, Y, S, Z],
+        [T, X, T, Y, T, Z, T],
+        [10.0, 1.0, 1.0, 2.0, 1.0, 3.0, 1.0],
+        fares=[0, TRANSFER_FARE, 0, 0, 0, TRANSFER_FARE, 0],
+        transfers=[0, 1, 0, 1, 0, 1, 0],
+    )
+
+    return graph, stations
+
+
+def path_length(graph: StationsGraphService, path):
+    return sum(
+        graph.get_adjacent_stations(station1)[station2]["distance"]
+        for station1, station2 in zip(path, path[1:])
+    )
+
+
+class TestStationsGraphService(unittest.TestCase):
+    backend = GraphBackend.NETWORKX
+
+    def test_add_station_invalid(self):
+        graph = StationsGraphService(self.backend)
+
+        with self.assertRaises(ValueError):
+            graph.add_station(None)
+
+    def test_add_edge_invalid_station(self):
+        graph, stations = create_line_graph(self.backend)
+
+        with self.assertRaises(ValueError):
+            graph.add_edge(stations[0], Station("E", Location(0, 0), "red"))
+
+    def test_add_edge_uses_distance(self):
+        graph, stations = create_line_graph(self.backend)
+
+        adjacent = graph.get_adjacent_stations(stations[0])
+
+        self.assertAlmostEqual(
+            adjacent[stations[1]]["distance"],
+            stations[0].get_location().distance_to(stations[1].get_location()).value,
+        )
+
+    def test_add_edges_matches_add_edge(self):
+        _, stations = create_line_graph(self.backend)
+
+        graph = StationsGraphService(self.backend)
+        for station in stations:
+            graph.add_station(station)
+
+        graph.add_edges(
+            [
+                (stations[0], stations[1]),
+                (stations[1], stations[1]),
+                (stations[1], stations[2]),
+            ]
+        )
+
+        self.assertAlmostEqual(
+            graph.get_adjacent_stations(stations[0])[stations[1]]["distance"],
+            stations[0].get_location().distance_to(stations[1].get_location()).value,
+        )
+        self.assertNotIn(stations[1], graph.get_adjacent_stations(stations[1]))
+
+    def test_add_edges_skips_closed_stations(self):
+        _, stations = create_line_graph(self.backend)
+        stations[2].set_closed(True)
+
+        graph = StationsGraphService(self.backend)
+        for station in stations:
+            graph.add_station(station)
+
+        graph.add_edges([(stations[1], stations[2])])
+
+        self.assertEqual(len(graph.get_adjacent_stations(stations[1])), 0)
+
+    def test_get_shortest_path(self):
+        graph, stations = create_line_graph(self.backend)
+
+        self.assertEqual(graph.get_shortest_path(stations[0], stations[3]), stations)
+
+    def test_get_shortest_path_invalid(self):
+        graph, stations = create_line_graph(self.backend)
+
+        with self.assertRaises(ValueError):
+            graph.get_shortest_path(None, stations[0])
+
+        with self.assertRaises(ValueError):
+            graph.get_shortest_path(stations[0], None)
+
+    def test_precompute_shortest_paths(self):
+        graph, stations = create_line_graph(self.backend)
+
+        with tempfile.TemporaryDirectory() as directory:
+            line_file = os.path.join(directory, "red_line.json")
+            with open(line_file, "w", encoding="utf-8") as f:
+                f.write("{}")
+
+            cache_dir = os.path.join(directory, "cache")
+            table = graph.precompute_shortest_paths([line_file], cache_dir)
+
+            self.assertIs(graph.shortest_path_table, table)
+            self.assertEqual(
+                graph.get_shortest_path(stations[0], stations[3]), stations
+            )
+            self.assertEqual(
+                graph.get_shortest_path(stations[3], stations[0]), stations[::-1]
+            )
+
+            # a second graph built from the same files reuses the saved table
+            other_graph, _ = create_line_graph(self.backend)
+            other_table = other_graph.precompute_shortest_paths([line_file], cache_dir)
+            self.assertEqual(len(os.listdir(cache_dir)), 1)
+            self.assertEqual(other_table.station_ids, table.station_ids)
+
+    def test_precompute_shortest_paths_invalidated_on_change(self):
+        graph, stations = create_line_graph(self.backend)
+
+        with tempfile.TemporaryDirectory() as directory:
+            line_file = os.path.join(directory, "red_line.json")
+            with open(line_file, "w", encoding="utf-8") as f:
+                f.write("{}")
+
+            graph.precompute_shortest_paths([line_file], directory)
+            graph.add_edge(stations[0], stations[2], 0.001)
+
+            self.assertIsNone(graph.shortest_path_table)
+            self.assertEqual(
+                graph.get_shortest_path(stations[0], stations[3]),
+                [stations[0], stations[2], stations[3]],
+            )
+
+    def test_precompute_shortest_paths_no_path(self):
+        graph, stations = create_line_graph(self.backend)
+        isolated = Station("E", Location(41.95, -87.70), "red")
+        graph.add_station(isolated)
+
+        with tempfile.TemporaryDirectory() as directory:
+            line_file = os.path.join(directory, "red_line.json")
+            with open(line_file, "w", encoding="utf-8") as f:
+                f.write("{}")
+
+            graph.precompute_shortest_paths([line_file], directory)
+
+            with self.assertRaises(NetworkXNoPath):
+                graph.get_shortest_path(stations[0], isolated)
+
+    def test_precompute_shortest_paths_invalid_files(self):
+        graph, _ = create_line_graph(self.backend)
+
+        with self.assertRaises(ValueError):
+            graph.precompute_shortest_paths([])
+
+    def test_get_shortest_path_astar(self):
+        graph, stations = create_line_graph(self.backend)
+
+        self.assertEqual(
+            graph.get_shortest_path(stations[0], stations[3], algorithm="astar"),
+            stations,
+        )
+        self.assertEqual(
+            graph.get_shortest_path(
+                stations[2], stations[0], algorithm=RoutingAlgorithm.ASTAR
+            ),
+            [stations[2], stations[1], stations[0]],
+        )
+
+    def test_get_shortest_path_astar_matches_dijkstra(self):
+        graph, stations = create_grid_graph(backend=self.backend)
+
+        for start in stations[::7]:
+            for end in stations[::5]:
+                dijkstra_path = graph.get_shortest_path(start, end)
+                astar_path = graph.get_shortest_path(start, end, algorithm="astar")
+
+                self.assertAlmostEqual(
+                    path_length(graph, dijkstra_path), path_length(graph, astar_path)
+                )
+
+    def test_get_shortest_path_contraction_hierarchy(self):
+        graph, stations = create_line_graph(self.backend)
+
+        self.assertEqual(
+            graph.get_shortest_path(stations[0], stations[3], algorithm="ch"),
+            stations,
+        )
+        self.assertIsNotNone(graph.contraction_hierarchy)
+        self.assertEqual(
+            graph.get_trip(
+                stations[3], stations[1], RoutingAlgorithm.CONTRACTION_HIERARCHY
+            ).get_stations(),
+            [stations[3], stations[2], stations[1]],
+        )
+
+    def test_get_shortest_path_contraction_hierarchy_matches_dijkstra(self):
+        graph, stations = create_grid_graph(backend=self.backend)
+
+        for start in stations[::7]:
+            for end in stations[::5]:
+                dijkstra_path = graph.get_shortest_path(start, end)
+                hierarchy_path = graph.get_shortest_path(start, end, algorithm="ch")
+
+                self.assertEqual(hierarchy_path[0], start)
+                self.assertEqual(hierarchy_path[-1], end)
+                self.assertAlmostEqual(
+                    path_length(graph, dijkstra_path),
+                    path_length(graph, hierarchy_path),
+                )
+
+    def test_contraction_hierarchy_rebuilt_after_changes(self):
+        graph, stations = create_line_graph(self.backend)
+        a, b, c, d = stations
+
+        graph.get_shortest_path(a, d, algorithm="ch")
+        graph.close_station(c)
+
+        self.assertIsNone(graph.contraction_hierarchy)
+        self.assertEqual(graph.get_shortest_path(a, d, algorithm="ch"), [a, d])
+
+        with self.assertRaises(NetworkXNoPath):
+            graph.get_shortest_path(a, c, algorithm="ch")
+
+        graph.reopen_station(c)
+
+        self.assertEqual(graph.get_shortest_path(a, d, algorithm="ch"), stations)
+
+        graph.add_edge(a, c, 0.001)
+
+        self.assertIsNone(graph.contraction_hierarchy)
+        self.assertEqual(graph.get_shortest_path(a, d, algorithm="ch"), [a, c, d])
+
+    def test_precompute_contraction_hierarchy(self):
+        graph, stations = create_grid_graph(4, self.backend)
+
+        with tempfile.TemporaryDirectory() as directory:
+            line_file = os.path.join(directory, "grid_line.json")
+            with open(line_file, "w", encoding="utf-8") as f:
+                f.write("{}")
+
+            cache_dir = os.path.join(directory, "cache")
+            hierarchy = graph.precompute_contraction_hierarchy([line_file], cache_dir)
+
+            self.assertIs(graph.contraction_hierarchy, hierarchy)
+            self.assertAlmostEqual(
+                path_length(
+                    graph,
+                    graph.get_shortest_path(stations[0], stations[15], "ch"),
+                ),
+                path_length(graph, graph.get_shortest_path(stations[0], stations[15])),
+            )
+
+            # a second graph built from the same files reuses the saved hierarchy
+            other_graph, _ = create_grid_graph(4, self.backend)
+            other_hierarchy = other_graph.precompute_contraction_hierarchy(
+                [line_file], cache_dir
+            )
+            self.assertEqual(len(os.listdir(cache_dir)), 1)
+            self.assertEqual(
+                other_hierarchy.get_shortcut_count(), hierarchy.get_shortcut_count()
+            )
+
+            with self.assertRaises(ValueError):
+                graph.precompute_contraction_hierarchy([])
+
+    def test_get_shortest_path_invalid_algorithm(self):
+        graph, stations = create_line_graph(self.backend)
+
+        with self.assertRaises(ValueError):
+            graph.get_shortest_path(stations[0], stations[3], algorithm="invalid")
+
+    def test_get_shortest_paths(self):
+        graph, stations = create_grid_graph(5, self.backend)
+        pairs = [
+            (stations[0], stations[24]),
+            (stations[0], stations[7]),
+            (stations[12], stations[3]),
+            (stations[0], stations[0]),
+            (stations[12], stations[20]),
+        ]
+
+        distances, paths = graph.get_shortest_paths(pairs, return_paths=True)
+
+        self.assertEqual(distances.shape, (5,))
+        self.assertEqual(len(paths), 5)
+
+        for (start, end), distance, path in zip(pairs, distances, paths):
+            expected = graph.get_shortest_path(start, end)
+
+            self.assertAlmostEqual(distance, path_length(graph, expected))
+            self.assertAlmostEqual(
+                path_length(graph, path), path_length(graph, expected)
+            )
+            self.assertEqual(path[0], start)
+            self.assertEqual(path[-1], end)
+
+        self.assertEqual(paths[3], [stations[0]])
+        self.assertEqual(distances[3], 0)
+
+        # distances only
+        only_distances = graph.get_shortest_paths(pairs)
+        self.assertTrue((only_distances == distances).all())
+
+    def test_get_shortest_paths_no_path(self):
+        graph, stations = create_line_graph(self.backend)
+
+        distances, paths = graph.get_shortest_paths(
+            [(stations[3], stations[0]), (stations[1], stations[0])],
+            return_paths=True,
+        )
+
+        # the A -> D edge only goes one way
+        self.assertEqual(paths[1], [stations[1], stations[0]])
+        self.assertLess(distances[1], float("inf"))
+
+        island = Station("E", Location(42.0, -87.70), "red")
+        graph.add_station(island)
+
+        distances, paths = graph.get_shortest_paths(
+            [(stations[0], island)], return_paths=True
+        )
+
+        self.assertEqual(distances[0], float("inf"))
+        self.assertEqual(paths[0], [])
+
+    def test_get_shortest_paths_uses_precomputed_table(self):
+        graph, stations = create_grid_graph(4, self.backend)
+        pairs = [(stations[0], stations[15]), (stations[5], stations[10])]
+        expected = graph.get_shortest_paths(pairs)
+
+        with tempfile.TemporaryDirectory() as directory:
+            line_file = os.path.join(directory, "grid_line.json")
+            with open(line_file, "w", encoding="utf-8") as f:
+                f.write("{}")
+
+            graph.precompute_shortest_paths(
+                [line_file], os.path.join(directory, "cache")
+            )
+
+            distances, paths = graph.get_shortest_paths(pairs, return_paths=True)
+
+        self.assertTrue(((distances - expected) < 1e-4).all())
+        self.assertEqual(paths[0][0], stations[0])
+        self.assertEqual(paths[0][-1], stations[15])
+
+    def test_get_shortest_paths_invalid(self):
+        graph, stations = create_line_graph(self.backend)
+        outside = Station("Z", Location(41.0, -87.0), "red")
+
+        with self.assertRaises(ValueError):
+            graph.get_shortest_paths([(stations[0], outside)])
+
+        with self.assertRaises(ValueError):
+            graph.get_shortest_paths([(None, stations[0])])
+
+        self.assertEqual(len(graph.get_shortest_paths([])), 0)
+
+    def test_get_trip(self):
+        graph, stations = create_transfer_graph(self.backend)
+        red_howard, yellow_howard, yellow_dempster, red_jarvis = stations
+
+        trip = graph.get_trip(yellow_dempster, red_jarvis)
+
+        self.assertEqual(
+            trip.get_stations(), graph.get_shortest_path(yellow_dempster, red_jarvis)
+        )
+        self.assertEqual(trip.get_transfer_count(), 1)
+        self.assertEqual(trip.get_fare(), TRANSFER_FARE)
+        self.assertEqual(len(trip.get_cumulative_distances()), 4)
+        self.assertAlmostEqual(
+            trip.get_distance().value,
+            path_length(graph, trip.get_stations()),
+        )
+        self.assertAlmostEqual(
+            trip.get_cumulative_distances()[1],
+            yellow_dempster.get_location()
+            .distance_to(yellow_howard.get_location())
+            .value,
+        )
+
+        # the transfer back is free
+        trip = graph.get_trip(red_jarvis, yellow_dempster)
+        self.assertEqual(trip.get_transfer_count(), 1)
+        self.assertEqual(trip.get_fare(), 0)
+
+        trip = graph.get_trip(red_howard, red_howard)
+        self.assertEqual(trip.get_cumulative_distances(), [0.0])
+
+    def test_get_trip_no_path(self):
+        graph, stations = create_line_graph(self.backend)
+        island = Station("E", Location(42.0, -87.70), "red")
+        graph.add_station(island)
+
+        with self.assertRaises(NetworkXNoPath):
+            graph.get_trip(stations[0], island)
+
+    def test_get_trips(self):
+        graph, stations = create_transfer_graph(self.backend)
+        island = Station("E", Location(42.0, -87.70), "red")
+        graph.add_station(island)
+
+        trips = graph.get_trips(
+            [
+                (stations[2], stations[3]),
+                (stations[3], stations[2]),
+                (stations[0], island),
+            ]
+        )
+
+        self.assertEqual(trips[0].get_fare(), TRANSFER_FARE)
+        self.assertEqual(trips[1].get_fare(), 0)
+        self.assertIsNone(trips[2])
+
+        for trip in trips[:2]:
+            expected = graph.get_trip(trip.get_start(), trip.get_end())
+            self.assertEqual(trip.get_transfer_count(), expected.get_transfer_count())
+            self.assertAlmostEqual(
+                trip.get_distance().value, expected.get_distance().value
+            )
+
+    def test_get_pareto_trips(self):
+        graph, stations = create_pareto_graph(self.backend)
+        start, x, y, _, end = stations
+
+        for algorithm in RoutingAlgorithm:
+            trips = graph.get_pareto_trips(start, end, algorithm=algorithm)
+
+            self.assertEqual(
+                [trip.get_stations() for trip in trips],
+                [[start, x, end], [start, y, end], [start, end]],
+            )
+            self.assertEqual(
+                [
+                    (
+                        trip.get_distance().value,
+                        trip.get_fare(),
+                        trip.get_transfer_count(),
+                    )
+                    for trip in trips
+                ],
+                [(2.0, TRANSFER_FARE, 1), (3.0, 0.0, 1), (10.0, 0.0, 0)],
+            )
+            self.assertEqual(trips[1].get_cumulative_distances(), [0.0, 2.0, 3.0])
+
+    def test_get_pareto_trips_max_transfers(self):
+        graph, stations = create_pareto_graph(self.backend)
+
+        trips = graph.get_pareto_trips(stations[0], stations[4], max_transfers=0)
+
+        self.assertEqual(len(trips), 1)
+        self.assertEqual(trips[0].get_stations(), [stations[0], stations[4]])
+
+        with self.assertRaises(ValueError):
+            graph.get_pareto_trips(stations[0], stations[4], max_transfers=-1)
+
+    def test_get_pareto_trips_matches_shortest_path(self):
+        graph, stations = create_transfer_graph(self.backend)
+        red_howard, yellow_howard, yellow_dempster, red_jarvis = stations
+
+        trips = graph.get_pareto_trips(yellow_dempster, red_jarvis)
+
+        self.assertEqual(len(trips), 1)
+        self.assertEqual(
+            trips[0].get_stations(),
+            graph.get_shortest_path(yellow_dempster, red_jarvis),
+        )
+        self.assertEqual(trips[0].get_fare(), TRANSFER_FARE)
+
+    def test_get_pareto_trips_after_new_edge(self):
+        graph, stations = create_pareto_graph(self.backend)
+        start, end = stations[0], stations[4]
+        graph.get_pareto_trips(start, end)
+
+        # a free direct edge now beats every other trip
+        graph.add_weighted_edge_arrays([0], [4], [1.0])
+
+        trips = graph.get_pareto_trips(start, end)
+        self.assertEqual(len(trips), 1)
+        self.assertEqual(trips[0].get_distance().value, 1.0)
+
+    def test_get_pareto_trips_no_path(self):
+        graph, stations = create_line_graph(self.backend)
+        island = Station("E", Location(42.0, -87.70), "red")
+        graph.add_station(island)
+
+        with self.assertRaises(NetworkXNoPath):
+            graph.get_pareto_trips(stations[0], island)
+
+    def test_get_k_shortest_paths(self):
+        from networkx import DiGraph, shortest_simple_paths
+
+        graph, stations = create_grid_graph(4, self.backend)
+        reference = DiGraph()
+
+        for station in stations:
+            for neighbor, data in graph.get_adjacent_stations(station).items():
+                reference.add_edge(station, neighbor, distance=data["distance"])
+
+        start, end = stations[0], stations[15]
+        paths = graph.get_k_shortest_paths(start, end, 12)
+        expected = []
+
+        for path in shortest_simple_paths(reference, start, end, weight="distance"):
+            expected.append(path_length(graph, path))
+
+            if len(expected) == 12:
+                break
+
+        self.assertEqual(len(paths), 12)
+        self.assertEqual(len(set(tuple(path) for path in paths)), 12)
+
+        for path, expected_length in zip(paths, expected):
+            self.assertEqual(path[0], start)
+            self.assertEqual(path[-1], end)
+            self.assertEqual(len(set(path)), len(path))
+            self.assertAlmostEqual(path_length(graph, path), expected_length)
+
+        self.assertEqual(paths[0], graph.get_shortest_path(start, end))
+        self.assertEqual(paths, graph.get_k_shortest_paths(start, end, 12))
+
+    def test_get_k_shortest_paths_fewer_than_k(self):
+        graph, stations = create_line_graph(self.backend)
+
+        paths = graph.get_k_shortest_paths(stations[0], stations[3], 5)
+
+        self.assertEqual(paths, [stations, [stations[0], stations[3]]])
+        self.assertEqual(
+            graph.get_k_shortest_paths(stations[1], stations[1], 3), [[stations[1]]]
+        )
+
+    def test_get_k_shortest_paths_invalid(self):
+        graph, stations = create_line_graph(self.backend)
+        island = Station("E", Location(42.0, -87.70), "red")
+        graph.add_station(island)
+
+        with self.assertRaises(NetworkXNoPath):
+            graph.get_k_shortest_paths(stations[0], island, 2)
+
+        with self.assertRaises(ValueError):
+            graph.get_k_shortest_paths(stations[0], stations[3], 0)
+
+    def test_get_all_pairs_shortest_paths(self):
+        graph, stations = create_grid_graph(4, self.backend)
+        distances, predecessors = graph.get_all_pairs_shortest_paths()
+        indices = {station: index for index, station in enumerate(stations)}
+
+        self.assertEqual(distances.shape, (16, 16))
+        self.assertEqual(predecessors.shape, (16, 16))
+
+        for start in (stations[0], stations[5], stations[15]):
+            for end in stations:
+                path = graph.get_shortest_path(start, end)
+
+                self.assertAlmostEqual(
+                    distances[indices[start], indices[end]], path_length(graph, path)
+                )
+
+                if start != end:
+                    # the predecessor is the last stop of a path just as short
+                    predecessor = stations[predecessors[indices[start], indices[end]]]
+
+                    self.assertAlmostEqual(
+                        distances[indices[start], indices[predecessor]]
+                        + graph.get_adjacent_stations(predecessor)[end]["distance"],
+                        distances[indices[start], indices[end]],
+                    )
+
+    def test_get_all_pairs_shortest_paths_unreachable(self):
+        graph, stations = create_line_graph(self.backend)
+        island = Station("E", Location(42.0, -87.70), "red")
+        graph.add_station(island)
+
+        distances, predecessors = graph.get_all_pairs_shortest_paths()
+
+        self.assertEqual(distances[0, 4], float("inf"))
+        self.assertEqual(predecessors[0, 4], -1)
+        self.assertEqual(distances[4, 4], 0)
+
+    def test_close_station(self):
+        graph, stations = create_line_graph(self.backend)
+        a, b, c, d = stations
+
+        self.assertEqual(graph.get_shortest_path(a, d), stations)
+
+        graph.close_station(c)
+
+        self.assertTrue(graph.is_station_closed(c))
+        self.assertEqual(graph.get_shortest_path(a, d), [a, d])
+        self.assertNotIn(c, graph.get_adjacent_stations(b))
+
+        with self.assertRaises(NetworkXNoPath):
+            graph.get_shortest_path(a, c)
+
+        graph.reopen_station(c)
+
+        self.assertFalse(graph.is_station_closed(c))
+        self.assertEqual(graph.get_shortest_path(a, d), stations)
+        self.assertEqual(graph.get_shortest_path(d, a), stations[::-1])
+
+    def test_close_station_only_in_its_graph(self):
+        graph, stations = create_line_graph(self.backend)
+        other_graph = StationsGraphService(self.backend)
+        a, b, c, d = stations
+
+        graph.close_station(b)
+
+        # the stations are shared, the closure is not
+        self.assertFalse(b.is_closed())
+        self.assertFalse(other_graph.is_station_closed(b))
+
+        other_graph.add_station(a)
+        other_graph.add_station(b)
+        other_graph.add_edge(a, b)
+
+        self.assertEqual(other_graph.get_shortest_path(a, b), [a, b])
+
+        # edges added to a closed station are skipped, like for a closed Station
+        graph.add_edge(b, d)
+
+        self.assertNotIn(d, graph.get_adjacent_stations(b))
+
+    def test_close_segment(self):
+        graph, stations = create_line_graph(self.backend)
+        a, b, c, d = stations
+
+        graph.close_segment(c, b)
+
+        self.assertEqual(graph.get_shortest_path(a, d), [a, d])
+        self.assertEqual(graph.get_k_shortest_paths(a, d, 3), [[a, d]])
+        self.assertEqual(
+            [trip.get_stations() for trip in graph.get_pareto_trips(a, d)], [[a, d]]
+        )
+
+        with self.assertRaises(NetworkXNoPath):
+            graph.get_shortest_path(d, a)
+
+        graph.reopen_segment(b, c)
+
+        self.assertEqual(graph.get_shortest_path(a, d), stations)
+        self.assertEqual(graph.get_k_shortest_paths(a, d, 3), [stations, [a, d]])
+
+    def test_overlapping_closures(self):
+        graph, stations = create_line_graph(self.backend)
+        a, b, c, d = stations
+
+        graph.close_segment(b, c)
+        graph.close_station(c)
+        graph.reopen_station(c)
+
+        # the segment is still closed
+        self.assertEqual(graph.get_shortest_path(a, d), [a, d])
+
+        graph.reopen_segment(b, c)
+
+        self.assertEqual(graph.get_shortest_path(a, d), stations)
+
+    def test_closures_keep_unaffected_paths_cached(self):
+        graph, stations = create_grid_graph(4, self.backend)
+        search = mock.Mock(wraps=graph._StationsGraphService__search_shortest_path)
+        graph._StationsGraphService__search_shortest_path = search
+
+        graph.get_shortest_path(stations[0], stations[3])
+        graph.get_shortest_path(stations[12], stations[15])
+        graph.get_shortest_path(stations[12], stations[15])
+
+        self.assertEqual(search.call_count, 2)
+
+        graph.close_station(stations[1])
+
+        self.assertNotIn(stations[1], graph.get_shortest_path(stations[0], stations[3]))
+        graph.get_shortest_path(stations[12], stations[15])
+        self.assertEqual(search.call_count, 3)
+
+        graph.reopen_station(stations[1])
+
+        # only the path searched while the station was closed is searched again
+        self.assertIn(stations[1], graph.get_shortest_path(stations[0], stations[3]))
+        graph.get_shortest_path(stations[12], stations[15])
+        self.assertEqual(search.call_count, 4)
+
+    def test_closures_update_precomputed_table(self):
+        graph, stations = create_grid_graph(4, self.backend)
+
+        with tempfile.TemporaryDirectory() as directory:
+            line_file = os.path.join(directory, "grid_line.json")
+            with open(line_file, "w", encoding="utf-8") as f:
+                f.write("{}")
+
+            table = graph.precompute_shortest_paths([line_file], directory)
+            built, _ = graph.get_all_pairs_shortest_paths()
+
+            graph.close_station(stations[5])
+            graph.close_segment(stations[10], stations[11])
+
+            self.assertIs(graph.shortest_path_table, table)
+            closed, _ = graph.get_all_pairs_shortest_paths()
+            np.testing.assert_allclose(table.distances, closed, rtol=1e-6)
+            self.assertNotIn(
+                stations[5], graph.get_shortest_path(stations[0], stations[15])
+            )
+
+            graph.reopen_station(stations[5])
+            graph.reopen_segment(stations[10], stations[11])
+
+            np.testing.assert_allclose(table.distances, built, rtol=1e-6)
+
+            # the table on disk is left as built
+            other_graph, _ = create_grid_graph(4, self.backend)
+            other_table = other_graph.precompute_shortest_paths([line_file], directory)
+            np.testing.assert_allclose(other_table.distances, built, rtol=1e-6)
+
+    def test_close_invalid(self):
+        graph, stations = create_line_graph(self.backend)
+        island = Station("E", Location(42.0, -87.70), "red")
+
+        with self.assertRaises(ValueError):
+            graph.close_station(island)
+
+        with self.assertRaises(ValueError):
+            graph.close_segment(stations[0], stations[2])
+
+        with self.assertRaises(ValueError):
+            StationsGraphService(self.backend, path_cache_size=-1)
+
+
+class TestStationsGraphServiceCSR(TestStationsGraphService):
+    backend = GraphBackend.CSR
+
+    def test_csr_backend_uses_csr_graph(self):
+        graph, _ = create_line_graph(self.backend)
+
+        self.assertIsInstance(graph.graph, CSRGraph)
+
+    def test_csr_backend_matches_networkx(self):
+        csr_graph, stations = create_grid_graph(backend=GraphBackend.CSR)
+        networkx_graph, _ = create_grid_graph(backend=GraphBackend.NETWORKX)
+
+        for start in stations[::5]:
+            for end in stations[::3]:
+                self.assertAlmostEqual(
+                    path_length(csr_graph, csr_graph.get_shortest_path(start, end)),
+                    path_length(
+                        networkx_graph, networkx_graph.get_shortest_path(start, end)
+                    ),
+                )
+
+    def test_invalid_backend(self):
+        with self.assertRaises(ValueError):
+            StationsGraphService("invalid")
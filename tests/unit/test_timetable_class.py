@@ -0,0 +1,227 @@
+import json
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from cta_optimizer.models.journey import parse_time
+from cta_optimizer.models.location import Location
+from cta_optimizer.models.station import Station
+from cta_optimizer.timetable import UNREACHED, Timetable
+
+
+def create_stations():
+    """
+    A -- B -- C on the red line and C -- D on the blue line, with a walking
+    transfer between the red and blue platforms at C
+    """
+    a = Station("A", Location(41.90, -87.70), "red")
+    b = Station("B", Location(41.91, -87.70), "red")
+    c_red = Station("C", Location(41.92, -87.70), "red")
+    c_blue = Station("C", Location(41.92, -87.70), "blue")
+    d = Station("D", Location(41.92, -87.68), "blue")
+
+    c_red.add_transfer_station(c_blue)
+    c_blue.add_transfer_station(c_red)
+
+    return a, b, c_red, c_blue, d
+
+
+def create_trips(a, b, c_red, c_blue, d):
+    return [
+        (
+            "red-1",
+            [
+                (a, parse_time("08:00:00"), parse_time("08:00:00")),
+                (b, parse_time("08:05:00"), parse_time("08:06:00")),
+                (c_red, parse_time("08:10:00"), parse_time("08:10:00")),
+            ],
+        ),
+        # leaves before the walk from the red platform is over
+        (
+            "blue-1",
+            [
+                (c_blue, parse_time("08:11:00"), parse_time("08:11:00")),
+                (d, parse_time("08:20:00"), parse_time("08:20:00")),
+            ],
+        ),
+        (
+            "blue-2",
+            [
+                (c_blue, parse_time("08:20:00"), parse_time("08:20:00")),
+                (d, parse_time("08:30:00"), parse_time("08:30:00")),
+            ],
+        ),
+        # a slow bus straight from A
+        (
+            "bus-1",
+            [
+                (a, parse_time("08:02:00"), parse_time("08:02:00")),
+                (d, parse_time("08:40:00"), parse_time("08:40:00")),
+            ],
+        ),
+    ]
+
+
+class TestTimetableClass(unittest.TestCase):
+
+    def setUp(self):
+        self.stations = create_stations()
+        self.timetable = Timetable.from_trips(create_trips(*self.stations))
+
+    def test_earliest_arrival_with_transfer(self):
+        a, b, c_red, c_blue, d = self.stations
+
+        journey = self.timetable.get_earliest_arrival(a, d, parse_time("07:55:00"))
+
+        self.assertEqual(journey.get_stations(), [a, b, c_red, c_blue, d])
+        self.assertEqual(
+            journey.get_times(),
+            [
+                parse_time("08:00:00"),
+                parse_time("08:05:00"),
+                parse_time("08:10:00"),
+                parse_time("08:12:00"),
+                parse_time("08:30:00"),
+            ],
+        )
+        self.assertEqual(journey.get_rides(), ["red-1", "blue-2"])
+        self.assertEqual(journey.get_trip_ids()[3], None)
+        self.assertEqual(journey.get_transfer_count(), 1)
+
+    def test_earliest_arrival_after_missing_a_trip(self):
+        a, _, _, _, d = self.stations
+
+        journey = self.timetable.get_earliest_arrival(a, d, parse_time("08:01:00"))
+
+        self.assertEqual(journey.get_stations(), [a, d])
+        self.assertEqual(journey.get_departure_time(), parse_time("08:02:00"))
+        self.assertEqual(journey.get_arrival_time(), parse_time("08:40:00"))
+        self.assertEqual(journey.get_rides(), ["bus-1"])
+
+    def test_earliest_arrival_starting_with_a_walk(self):
+        _, _, c_red, c_blue, d = self.stations
+
+        journey = self.timetable.get_earliest_arrival(c_red, d, parse_time("08:09:00"))
+
+        self.assertEqual(journey.get_stations(), [c_red, c_blue, d])
+        self.assertEqual(journey.get_departure_time(), parse_time("08:09:00"))
+        self.assertEqual(journey.get_rides(), ["blue-1"])
+
+    def test_earliest_arrival_unreachable(self):
+        a, _, _, _, d = self.stations
+
+        self.assertIsNone(
+            self.timetable.get_earliest_arrival(a, d, parse_time("09:00:00"))
+        )
+        self.assertIsNone(
+            self.timetable.get_earliest_arrival(d, a, parse_time("07:00:00"))
+        )
+
+    def test_earliest_arrival_times(self):
+        a, b, c_red, c_blue, d = self.stations
+
+        arrivals = self.timetable.get_earliest_arrival_times(b, parse_time("08:00:00"))
+        index = self.timetable.index
+
+        self.assertEqual(arrivals[index[a]], UNREACHED)
+        self.assertEqual(arrivals[index[b]], parse_time("08:00:00"))
+        self.assertEqual(arrivals[index[c_red]], parse_time("08:10:00"))
+        self.assertEqual(arrivals[index[c_blue]], parse_time("08:12:00"))
+        self.assertEqual(arrivals[index[d]], parse_time("08:30:00"))
+
+    def test_connections_are_sorted(self):
+        self.assertEqual(self.timetable.get_connection_count(), 5)
+        self.assertTrue(np.all(np.diff(self.timetable.departure_times) >= 0))
+
+    def test_load(self):
+        a, b, c_red, c_blue, d = self.stations
+        trips = [
+            {
+                "id": trip_id,
+                "stops": [
+                    {
+                        "station": station.get_id(),
+                        "arrival": arrival,
+                        "departure": departure,
+                    }
+                    for station, arrival, departure in stops
+                ],
+            }
+            for trip_id, stops in create_trips(*self.stations)
+        ]
+        trips[0]["stops"][0] = {"station": a.get_id(), "arrival": "08:00:00"}
+
+        with tempfile.TemporaryDirectory() as directory:
+            file = os.path.join(directory, "schedule.json")
+
+            with open(file, "w") as f:
+                json.dump({"trips": trips}, f)
+
+            timetable = Timetable.load(file, self.stations)
+
+            with open(file, "w") as f:
+                json.dump(
+                    {
+                        "trips": [
+                            {"id": "x", "stops": [{"station": "red:E", "arrival": 0}]}
+                        ]
+                    },
+                    f,
+                )
+
+            with self.assertRaises(ValueError):
+                Timetable.load(file, self.stations)
+
+        journey = timetable.get_earliest_arrival(a, d, parse_time("07:55:00"))
+        self.assertEqual(journey.get_arrival_time(), parse_time("08:30:00"))
+
+    def test_from_headways(self):
+        a, b, c_red, _, _ = self.stations
+
+        timetable = Timetable.from_headways(
+            {"red": [a, b, c_red]},
+            speed=30,
+            first_departure=parse_time("06:00:00"),
+            last_departure=parse_time("07:00:00"),
+            headway_seconds=600,
+            dwell_seconds=30,
+        )
+
+        # 7 trips an hour each way, two connections each
+        self.assertEqual(timetable.get_connection_count(), 28)
+
+        run_seconds = round(a.get_location().distance_to(b.get_location()).value * 120)
+        journey = timetable.get_earliest_arrival(c_red, a, parse_time("06:55:00"))
+
+        self.assertEqual(journey.get_departure_time(), parse_time("07:00:00"))
+        self.assertEqual(journey.get_duration(), 2 * run_seconds + 30)
+        self.assertEqual(journey.get_rides(), ["red:inbound:6"])
+
+    def test_invalid_arguments(self):
+        a, _, _, _, _ = self.stations
+
+        with self.assertRaises(ValueError):
+            self.timetable.get_earliest_arrival(
+                a, Station("E", Location(0, 0), "red"), 0
+            )
+
+        with self.assertRaises(ValueError):
+            Timetable([a], [0], [0, 0], [0], [0], [0], ["x"])
+
+        with self.assertRaises(ValueError):
+            Timetable([a], [0], [1], [0], [0], [0], ["x"])
+
+        with self.assertRaises(ValueError):
+            Timetable([a], [0], [0], [10], [5], [0], ["x"])
+
+        with self.assertRaises(ValueError):
+            Timetable.from_trips([("x", [(a, 0, 0)])])
+
+        with self.assertRaises(ValueError):
+            Timetable.from_headways({"red": [a]}, 0, 0, 60, 60)
+
+
+if __name__ == "__main__":
+    unittest.main()
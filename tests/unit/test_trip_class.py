@@ -0,0 +1,55 @@
+import unittest
+
+from cta_optimizer.models.kilometer import Kilometer
+from cta_optimizer.models.location import Location
+from cta_optimizer.models.station import Station
+from cta_optimizer.models.trip import Trip
+
+
+class TestTripClass(unittest.TestCase):
+
+    def setUp(self):
+        self.stations = [
+            Station("Howard", Location(42.019063, -87.672892), "yellow"),
+            Station("Howard", Location(42.019063, -87.672892), "red"),
+            Station("Jarvis", Location(42.015876, -87.669092), "red"),
+        ]
+
+    def test_trip_creates_object(self):
+        trip = Trip(self.stations, [0.0, 0.0, 0.5], 1, 2.5)
+
+        self.assertEqual(trip.get_stations(), self.stations)
+        self.assertEqual(trip.get_start(), self.stations[0])
+        self.assertEqual(trip.get_end(), self.stations[2])
+        self.assertEqual(trip.get_cumulative_distances(), [0.0, 0.0, 0.5])
+        self.assertEqual(trip.get_distance(), Kilometer(0.5))
+        self.assertEqual(trip.get_transfer_count(), 1)
+        self.assertEqual(trip.get_fare(), 2.5)
+        self.assertEqual(len(trip), 3)
+
+    def test_trip_with_one_station(self):
+        trip = Trip(self.stations[:1], [0.0])
+
+        self.assertEqual(trip.get_distance(), Kilometer(0.0))
+        self.assertEqual(trip.get_transfer_count(), 0)
+        self.assertEqual(trip.get_fare(), 0.0)
+
+    def test_trip_with_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            Trip([], [])
+
+        with self.assertRaises(ValueError):
+            Trip(self.stations, [0.0])
+
+        with self.assertRaises(ValueError):
+            Trip(self.stations, [0.0, 0.0, 0.5], -1)
+
+        with self.assertRaises(ValueError):
+            Trip(self.stations, [0.0, 0.0, 0.5], 1, None)
+
+    def test_trip_to_string(self):
+        trip = Trip(self.stations, [0.0, 0.0, 0.5], 1, 2.5)
+
+        self.assertEqual(
+            str(trip), "Trip: Howard to Jarvis (0.5 km, 1 transfers, $2.50)"
+        )